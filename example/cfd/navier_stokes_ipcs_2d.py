@@ -17,6 +17,7 @@ from fealpy.fem import BilinearForm, MixedBilinearForm
 from fealpy.fem import LinearForm
 from fealpy.fem import VectorSourceIntegrator, ScalarSourceIntegrator
 from fealpy.fem import DirichletBC
+from fealpy.solver import DirectSolver
 
 ## 参数解析
 degree =2 
@@ -72,7 +73,7 @@ mesh = TriangleMesh.from_unit_square(nx=ns, ny=ns)
 uspace = LagrangeFESpace(mesh,p=2,doforder=doforder)
 pspace = LagrangeFESpace(mesh,p=1,doforder=doforder)
 ubc = DirichletBC(uspace, usolution)
-pbc = DirichletBC(pspace, psolution)
+pbc = DirichletBC(pspace, psolution, threshold=is_p_boundary)
 
 tmesh = UniformTimeLine(0, T, nt) # 均匀时间剖分
 
@@ -114,6 +115,12 @@ C = Vbform2.assembly()
 
 ctx = DMumpsContext()
 ctx.set_silent()
+
+# B 和 C 在时间迭代中不变，只分解一次。纯 Neumann 的 B 是奇异的，先在进出口
+# 上加压力的 Dirichlet 边界条件
+BB, _ = pbc.apply(B, np.zeros(B.shape[0]))
+Bsolver = DirectSolver(BB)
+Csolver = DirectSolver(C)
 errorMatrix = np.zeros((2,nt),dtype=np.float64)
 
 for i in range(2): 
@@ -158,12 +165,9 @@ for i in range(2):
     b21 = lform.get_vector()   
     b22 = B@p0
     b2 = b21+b22
+    _, b2 = pbc.apply(B, b2)
     
-    ctx.set_centralized_sparse(B)
-    x = b2.copy()
-    ctx.set_rhs(x)
-    ctx.run(job=6)
-    p1[:] = x[:]
+    p1[:] = Bsolver.solve(b2)
 
     #组装第三个方程的右端向量
     @barycentric
@@ -179,12 +183,7 @@ for i in range(2):
     tb1 = C@us.flatten(order='C')
     b3 = tb1 - tb2
     
-    ctx.set_centralized_sparse(C)
-    x = b3.copy()
-    ctx.set_rhs(x)
-    ctx.run(job=6)
-    
-    u1.flat[:] = x[:]
+    u1.flat[:] = Csolver.solve(b3)
 
     co1 = usolution(mesh.node)
     NN = mesh.number_of_nodes()
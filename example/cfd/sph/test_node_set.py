@@ -48,5 +48,5 @@ mesh.set_node_data("mass", 2*rho0/NF)
 
 space = NodeSetKernelSpace(mesh, H=H)
 
-re = space.kernel(0.02)
+re = space.kernel(np.array([0.02, 0.0]))
 print(re)
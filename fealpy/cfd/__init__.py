@@ -1 +1,2 @@
-from .ns_mac_solver import NSMacSolver
+from .ns_mac_solver import NSMacSolver, MACProjectionSolver
+from .ns_fem_solver import NSFEMSolver
@@ -0,0 +1,304 @@
+import numpy as np
+from scipy.sparse import csr_matrix, spdiags
+
+from ..functionspace import LagrangeFESpace
+from ..solver.direct_solver import DirectSolver
+from ..solver.krylov import CGSolver
+from ..solver.preconditioner import AMGPreconditioner
+
+
+class NSFEMSolver():
+    """
+    @brief 不可压 Navier-Stokes 方程的投影有限元解法器
+
+        rho (u_t + u.grad u) - mu Delta u + grad p = f,  div u = 0
+
+    @note 速度用 P2、压力用 P1（Taylor-Hood 元），支持 IPCS 和 Chorin 两种投影格式。
+          质量、刚度、散度和梯度等常矩阵只组装和分解一次；对流项在缓存的积分点
+          基函数表上用 einsum 计算，写到预分配的数组里。速度的各个分量共享同一个
+          系数矩阵，所以一次多右端求解就得到所有分量。每个时间步的代价只有右端
+          计算和三角回代。
+    """
+    def __init__(self, mesh, dt, rho=1.0, mu=1.0, method='IPCS',
+            source=None, udirichlet=None, uthreshold=None,
+            pdirichlet=None, pthreshold=None, solver='direct', q=None):
+        """
+        @param[in] mesh 单纯形网格
+        @param[in] dt 时间步长
+        @param[in] rho 密度
+        @param[in] mu 粘性系数
+        @param[in] method 'IPCS' 或 'Chorin'
+        @param[in] source 源项 f(p, t)，返回形状为 (..., GD) 的数组
+        @param[in] udirichlet 速度的 Dirichlet 边界值 gD(p)，返回形状为 (..., GD) 的数组
+        @param[in] uthreshold 速度 Dirichlet 边界的判断函数，None 表示整个边界
+        @param[in] pdirichlet 压力的 Dirichlet 边界值 gD(p)
+        @param[in] pthreshold 压力 Dirichlet 边界的判断函数，pdirichlet 为 None
+                              时固定第一个压力自由度为 0
+        @param[in] solver 'direct' 分解一次常矩阵，'amg' 用 pyamg 的代数多重网格
+                          预条件共轭梯度法
+        """
+        if method not in {'IPCS', 'Chorin'}:
+            raise ValueError(f"unknown projection method '{method}'")
+
+        self.mesh = mesh
+        self.dt = dt
+        self.rho = rho
+        self.mu = mu
+        self.method = method
+        self.source = source
+        self.t = 0.0
+
+        self.uspace = LagrangeFESpace(mesh, p=2, doforder='sdofs')
+        self.pspace = LagrangeFESpace(mesh, p=1, doforder='sdofs')
+        self.GD = mesh.geo_dimension()
+
+        self.u = self.uspace.function(dim=self.GD)
+        self.p = self.pspace.function()
+
+        self.init_basis_table(q=q)
+        self.assembly_operators()
+        self.init_boundary_condition(udirichlet, uthreshold, pdirichlet, pthreshold)
+        self.init_solvers(solver)
+
+    def init_basis_table(self, q=None):
+        """
+        @brief 缓存积分点上的基函数值、梯度值和积分权重
+        """
+        mesh = self.mesh
+        q = q if q is not None else 4
+        qf = mesh.integrator(q, 'cell')
+        bcs, ws = qf.get_quadrature_points_and_weights()
+        cm = mesh.entity_measure('cell')
+
+        self.bcs = bcs
+        self.ps = mesh.bc_to_point(bcs) # (NQ, NC, GD)
+        self.cm = cm
+        self.wc = ws[:, None]*cm # (NQ, NC)
+
+        self.uphi = self.uspace.basis(bcs)[:, 0, :]      # (NQ, uldof)
+        self.ugphi = self.uspace.grad_basis(bcs)         # (NQ, NC, uldof, GD)
+        self.pphi = self.pspace.basis(bcs)[:, 0, :]      # (NQ, pldof)
+        self.pgphi = self.pspace.grad_basis(bcs)         # (NQ, NC, pldof, GD)
+
+        self.ucell2dof = self.uspace.cell_to_dof()
+        self.pcell2dof = self.pspace.cell_to_dof()
+
+        NQ, NC = self.wc.shape
+        GD = self.GD
+        # 对流项用的预分配数组
+        self.uq = np.zeros((GD, NQ, NC), dtype=np.float64)
+        self.guq = np.zeros((GD, NQ, NC, GD), dtype=np.float64)
+        self.cq = np.zeros((GD, NQ, NC), dtype=np.float64)
+
+    def _matrix(self, K, cell2dof0, cell2dof1, shape):
+        I = np.broadcast_to(cell2dof0[:, :, None], K.shape)
+        J = np.broadcast_to(cell2dof1[:, None, :], K.shape)
+        return csr_matrix((K.flat, (I.flat, J.flat)), shape=shape)
+
+    def assembly_operators(self):
+        """
+        @brief 组装所有常矩阵
+        """
+        ugdof = self.uspace.number_of_global_dofs()
+        pgdof = self.pspace.number_of_global_dofs()
+        uc2d = self.ucell2dof
+        pc2d = self.pcell2dof
+        wc = self.wc
+
+        K = np.einsum('qc, qi, qj->cij', wc, self.uphi, self.uphi, optimize=True)
+        self.M = self._matrix(K, uc2d, uc2d, (ugdof, ugdof))
+
+        K = np.einsum('qc, qcid, qcjd->cij', wc, self.ugphi, self.ugphi, optimize=True)
+        self.A = self._matrix(K, uc2d, uc2d, (ugdof, ugdof))
+
+        K = np.einsum('qc, qcid, qcjd->cij', wc, self.pgphi, self.pgphi, optimize=True)
+        self.S = self._matrix(K, pc2d, pc2d, (pgdof, pgdof))
+
+        # B[d][i, j] = (psi_i, d phi_j/dx_d)，G[d][i, j] = (phi_i, d psi_j/dx_d)
+        self.B = []
+        self.G = []
+        for d in range(self.GD):
+            K = np.einsum('qc, qi, qcj->cij', wc, self.pphi, self.ugphi[..., d], optimize=True)
+            self.B.append(self._matrix(K, pc2d, uc2d, (pgdof, ugdof)))
+            K = np.einsum('qc, qi, qcj->cij', wc, self.uphi, self.pgphi[..., d], optimize=True)
+            self.G.append(self._matrix(K, uc2d, pc2d, (ugdof, pgdof)))
+
+        rho, mu, dt = self.rho, self.mu, self.dt
+        if self.method == 'IPCS':
+            # Crank-Nicolson 处理粘性项
+            self.A0 = (rho/dt)*self.M + (0.5*mu)*self.A
+            self.A1 = (rho/dt)*self.M - (0.5*mu)*self.A
+        else:
+            self.A0 = (rho/dt)*self.M + mu*self.A
+            self.A1 = (rho/dt)*self.M
+
+    def init_boundary_condition(self, udirichlet, uthreshold, pdirichlet, pthreshold):
+        """
+        @brief 处理 Dirichlet 边界条件，边界值不随时间变化，只计算一次
+        """
+        uspace = self.uspace
+        pspace = self.pspace
+        GD = self.GD
+
+        if udirichlet is not None:
+            self.isUDDof = uspace.is_boundary_dof(threshold=uthreshold)
+            ipoints = uspace.interpolation_points()
+            self.uD = np.asarray(udirichlet(ipoints[self.isUDDof]), dtype=np.float64)
+            self.uD = np.broadcast_to(self.uD, (self.isUDDof.sum(), GD)).T.copy() # (GD, NBD)
+            self.u[:, self.isUDDof] = self.uD
+        else:
+            self.isUDDof = np.zeros(uspace.number_of_global_dofs(), dtype=np.bool_)
+            self.uD = np.zeros((GD, 0), dtype=np.float64)
+
+        if pdirichlet is not None:
+            self.isPDDof = pspace.is_boundary_dof(threshold=pthreshold)
+            ipoints = pspace.interpolation_points()
+            self.pD = np.broadcast_to(pdirichlet(ipoints[self.isPDDof]),
+                    (self.isPDDof.sum(), )).astype(np.float64)
+        else:
+            self.isPDDof = np.zeros(pspace.number_of_global_dofs(), dtype=np.bool_)
+            self.isPDDof[0] = True
+            self.pD = np.zeros(1, dtype=np.float64)
+        self.p[self.isPDDof] = self.pD
+
+    @staticmethod
+    def apply_dirichlet(A, isDDof):
+        """
+        @brief 把 Dirichlet 自由度对应的行和列换成单位阵
+
+        @return 修改后的矩阵和用来修正右端的矩阵 A[:, isDDof]
+        """
+        N = A.shape[0]
+        bdIdx = isDDof.astype(np.int_)
+        D0 = spdiags(1-bdIdx, 0, N, N)
+        D1 = spdiags(bdIdx, 0, N, N)
+        return (D0@A@D0 + D1).tocsr(), A.tocsc()[:, isDDof].tocsr()
+
+    def init_solvers(self, solver):
+        """
+        @brief 处理边界条件后的常矩阵只分解（或建立 AMG 层次结构）一次
+        """
+        self.A0D, self.A0B = self.apply_dirichlet(self.A0, self.isUDDof)
+        self.SD, self.SB = self.apply_dirichlet(self.S, self.isPDDof)
+        self.MD, self.MB = self.apply_dirichlet(self.M, self.isUDDof)
+
+        if solver == 'direct':
+            self.usolver = DirectSolver(self.A0D)
+            self.psolver = DirectSolver(self.SD, symmetric=True)
+            self.msolver = DirectSolver(self.MD, symmetric=True)
+        elif solver == 'amg':
+            # AMG 的层次结构只建立一次，速度的各个分量在 CG 中一起迭代
+            self.usolver = CGSolver(self.A0D, M=AMGPreconditioner(self.A0D), rtol=1e-10)
+            self.psolver = CGSolver(self.SD, M=AMGPreconditioner(self.SD), rtol=1e-10)
+            self.msolver = CGSolver(self.MD, M=AMGPreconditioner(self.MD), rtol=1e-10)
+        else:
+            raise ValueError(f"unknown solver '{solver}'")
+
+    def convection(self, u, out=None):
+        """
+        @brief 计算对流项 (rho u.grad u, v) 对应的右端向量
+
+        @param[in] u 形状为 (GD, ugdof) 的速度
+        @return 形状为 (GD, ugdof) 的数组
+        """
+        uc = u[:, self.ucell2dof] # (GD, NC, uldof)
+        np.einsum('ql, kcl->kqc', self.uphi, uc, out=self.uq, optimize=True)
+        np.einsum('qcld, kcl->kqcd', self.ugphi, uc, out=self.guq, optimize=True)
+        np.einsum('dqc, kqcd->kqc', self.uq, self.guq, out=self.cq, optimize=True)
+        self.cq *= self.rho*self.wc
+        return self._integral(self.cq, out=out)
+
+    def _integral(self, val, out=None):
+        """
+        @brief 计算 (val, v)，val 是形状为 (GD, NQ, NC) 的积分点上的值
+        """
+        GD = self.GD
+        ugdof = self.uspace.number_of_global_dofs()
+        bb = np.einsum('kqc, ql->kcl', val, self.uphi, optimize=True)
+        idx = (np.arange(GD)[:, None, None]*ugdof + self.ucell2dof).flat
+        b = np.bincount(idx, weights=bb.flat, minlength=GD*ugdof).reshape(GD, ugdof)
+        if out is None:
+            return b
+        out[:] = b
+        return out
+
+    def source_vector(self, t):
+        """
+        @brief 计算 t 时刻源项 (f, v)
+        """
+        f = np.asarray(self.source(self.ps, t)) # (NQ, NC, GD)
+        f = np.broadcast_to(f, self.ps.shape[:2] + (self.GD, ))
+        return self._integral(np.moveaxis(f, -1, 0)*self.wc)
+
+    def _solve_velocity(self, solver, AB, b):
+        """
+        @brief 一次求解所有速度分量，b 的形状为 (GD, ugdof)
+        """
+        b -= (AB@self.uD.T).T
+        b[:, self.isUDDof] = self.uD
+        return self._linsolve(solver, b.T).T
+
+    @staticmethod
+    def _linsolve(solver, b):
+        """
+        @brief 用 DirectSolver 或者 Krylov 解法器求解，Krylov 解法器只取解
+        """
+        if isinstance(solver, CGSolver):
+            x, _ = solver.solve(b)
+            return x
+        return solver.solve(b)
+
+    def step(self):
+        """
+        @brief 前进一个时间步
+
+        @return 新时刻的速度 (GD, ugdof) 和压力 (pgdof, )
+        """
+        rho, dt = self.rho, self.dt
+        u0 = self.u
+        p0 = self.p
+        GD = self.GD
+        t1 = self.t + dt
+
+        # 1. 预测速度
+        b = (self.A1@u0.T).T - self.convection(u0)
+        if self.source is not None:
+            b += self.source_vector(self.t)
+        if self.method == 'IPCS':
+            for d in range(GD):
+                b[d] -= self.G[d]@p0
+        us = self._solve_velocity(self.usolver, self.A0B, b)
+
+        # 2. 压力 Poisson 方程
+        b = sum(self.B[d]@us[d] for d in range(GD))
+        b *= -rho/dt
+        if self.method == 'IPCS':
+            b += self.S@p0
+        b -= self.SB@self.pD
+        b[self.isPDDof] = self.pD
+        p1 = self._linsolve(self.psolver, b)
+
+        # 3. 速度校正
+        dp = p1 - p0 if self.method == 'IPCS' else p1
+        b = (self.M@us.T).T
+        for d in range(GD):
+            b[d] -= (dt/rho)*(self.G[d]@dp)
+        u1 = self._solve_velocity(self.msolver, self.MB, b)
+
+        self.u[:] = u1
+        self.p[:] = p1
+        self.t = t1
+        return self.u, self.p
+
+    def run(self, nt, callback=None):
+        """
+        @brief 前进 nt 个时间步
+
+        @param[in] callback 每步之后调用 callback(solver)
+        """
+        for i in range(nt):
+            self.step()
+            if callback is not None:
+                callback(self)
+        return self.u, self.p
+
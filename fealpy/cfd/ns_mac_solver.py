@@ -1,195 +1,457 @@
 import numpy as np
-from scipy.sparse import diags
-from scipy.sparse import diags, lil_matrix
-from scipy.sparse import vstack
-from scipy.sparse.linalg import spsolve
+from scipy.sparse import diags, csr_matrix, vstack, hstack, kron, identity
+from scipy.fft import dctn, idctn
+
+
+def _set_matrix(I, J, shape):
+    """
+    @brief 由行列指标构造值为 1 的稀疏矩阵，重复的位置只算一次，负的列指标按
+           NumPy 的规则回绕到末尾
+    """
+    J = J % shape[1]
+    A = csr_matrix((np.ones(len(I)), (I, J)), shape=shape)
+    A.sum_duplicates()
+    A.data[:] = 1
+    return A
 
 
 class NSMacSolver():
+    """
+    @brief MAC 交错网格上的 Navier-Stokes 离散算子
+
+    @note 所有算子都直接由对角线数组或行列指标向量化地构造成 CSR 稀疏矩阵，
+          不再逐个元素赋值或分配稠密矩阵
+    """
     def __init__(self, umesh, vmesh, pmesh):
         self.umesh = umesh
         self.vmesh = vmesh
         self.pmesh = pmesh
-        
+
+    @staticmethod
+    def _size(mesh):
+        Nrow = mesh.node.shape[1]
+        Ncol = mesh.node.shape[0]
+        return Nrow, Ncol, Nrow*Ncol
 
     def grad_ux(self):
         mesh = self.umesh
         dx = mesh.h[0]
-        Nrow = mesh.node.shape[1]
-        Ncol = mesh.node.shape[0]
-        N = Nrow*Ncol
+        Nrow, Ncol, N = self._size(mesh)
 
         result = diags([1, -1],[Nrow, -Nrow],(N,N), format='csr')
 
         return result/(2*dx)
-    
+
     def grad_vx(self):
         mesh = self.vmesh
         dx = mesh.h[0]
-        Nrow = mesh.node.shape[1]
-        Ncol = mesh.node.shape[0]
-        N = Nrow*Ncol
+        Nrow, Ncol, N = self._size(mesh)
 
-        result = diags([1, -1],[Nrow, -Nrow],(N,N), format='csr')
-        index = np.arange(0,N)
-        result[index[:Nrow],index[:Nrow]] = 2
-        result[index[:Nrow],index[:Nrow]+Nrow] = 2/3
-        result[index[-Nrow:],index[-Nrow:]] = -2
-        result[index[-Nrow:],index[-Nrow:]-Nrow] = -2/3
+        d0 = np.zeros(N)
+        d0[:Nrow] = 2
+        d0[-Nrow:] = -2
+        du = np.ones(N-Nrow)
+        du[:Nrow] = 2/3
+        dl = -np.ones(N-Nrow)
+        dl[-Nrow:] = -2/3
+        result = diags([d0, du, dl], [0, Nrow, -Nrow], (N, N), format='csr')
+        result.eliminate_zeros()
         return result/(2*dx)
 
     def grad_uy(self):
         mesh = self.umesh
         dy = mesh.h[1]
-        Nrow = mesh.node.shape[1]
-        Ncol = mesh.node.shape[0]
-        N = Nrow*Ncol
-        result = diags([1, -1],[1, -1],(N,N), format='lil')
-
-        index = np.arange(0, N, Nrow)
-        result[index, index] = 2
-        result[index, index+1] = 2/3
-        result[index[1:], index[1:]-1] = 0
-
-        index = np.arange(Nrow-1, N, Nrow)
-        result[index, index] = -2
-        result[index, index-1] = -2/3
-        result[index[:-1], index[:-1]+1] = 0
+        Nrow, Ncol, N = self._size(mesh)
+        k = np.arange(N) % Nrow
+        isFirst = k == 0
+        isLast = k == Nrow - 1
+
+        d0 = np.zeros(N)
+        d0[isFirst] = 2
+        d0[isLast] = -2
+        du = np.ones(N-1) # (i, i+1)
+        du[isFirst[:-1]] = 2/3
+        du[isLast[:-1]] = 0
+        dl = -np.ones(N-1) # (i+1, i)
+        dl[isFirst[1:]] = 0
+        dl[isLast[1:]] = -2/3
+        result = diags([d0, du, dl], [0, 1, -1], (N, N), format='csr')
+        result.eliminate_zeros()
         return result/(2*dy)
-    
+
     def grad_vy(self):
         mesh = self.vmesh
         dy = mesh.h[1]
-        Nrow = mesh.node.shape[1]
-        Ncol = mesh.node.shape[0]
-        N = Nrow*Ncol
-        result = diags([1, -1],[1, -1],(N,N), format='lil')
+        Nrow, Ncol, N = self._size(mesh)
+        result = diags([1, -1],[1, -1],(N,N), format='csr')
         return result/(2*dy)
-    
+
     def Tuv(self):
+        """
+        @brief 把 v 插值到 u 的节点上，第一列按周期回绕
+        """
         mesh  = self.umesh
-        Nrow = mesh.node.shape[1]
-        Ncol = mesh.node.shape[0]
-        N = Nrow*Ncol
-        result = np.zeros((N,N))
+        Nrow, Ncol, N = self._size(mesh)
         index = np.arange(N-Nrow)
-        result[index,index+index//Nrow] = 1
-        result[index,index+index//Nrow+1] = 1
-        result[index,index+index//Nrow-Nrow-1] = 1
-        result[index,index+index//Nrow-Nrow] = 1
-        return result/4
-    
+        c = index + index//Nrow
+        I = np.repeat(index, 4)
+        J = np.stack((c, c+1, c-Nrow-1, c-Nrow), axis=1).reshape(-1)
+        return _set_matrix(I, J, (N, N))/4
+
     def Tvu(self):
+        """
+        @brief 把 u 插值到 v 的节点上
+        """
         mesh = self.vmesh
-        Nrow = mesh.node.shape[1]
-        Ncol = mesh.node.shape[0]
-        N = Nrow*Ncol
-        result = np.zeros((N,N))
-        arr = np.arange(0,N)
-        split_array = np.array_split(arr,Ncol)
-        lists = [sub_array.tolist() for sub_array in split_array]
-        num = len(lists)
-        for i in range(num):
-            i_array = np.ones_like(lists[i])
-            result[lists[i],lists[i]-i*i_array] = 1
-            result[lists[i],lists[i]-i*i_array-1] = 1
-        for i in range(num-1):
-            i_array = np.ones_like(lists[i])
-            result[lists[i],lists[i]-i*i_array+Ncol*i_array] = 1
-            result[lists[i],lists[i]-i*i_array-1+Ncol*i_array] = 1
-        index = lists[-1][:Nrow-1]
-        N_array = np.ones_like(index)
-        result[index,index] = 1
-        result[index,index+N_array] = 1
-        return result/4
-    
+        Nrow, Ncol, N = self._size(mesh)
+        r = np.arange(N)
+        i = r//Nrow
+        c = r - i
+
+        I = [r, r]
+        J = [c, c-1]
+
+        flag = i < Ncol-1
+        I += [r[flag], r[flag]]
+        J += [c[flag] + Ncol, c[flag] - 1 + Ncol]
+
+        index = r[(N-Nrow):(N-1)]
+        I += [index, index]
+        J += [index, index+1]
+        return _set_matrix(np.concatenate(I), np.concatenate(J), (N, N))/4
+
     def laplace_u(self):
         mesh = self.umesh
         dx,dy = mesh.h
-        Nrow = mesh.node.shape[1]
-        Ncol = mesh.node.shape[0]
-        N = Nrow*Ncol
-        result = diags([-4, 1, 1, 1, 1],[0, 1, -1, Nrow, -Nrow],(N,N), format='lil')
-
-        index = np.arange(0,N, Nrow)
-        result[index, index] = -6
-        result[index[2:]-1, index[2:]-1] = -6
-        result[index[1:], index[1:]-1] = 0
-        result[index[2:]-1, index[2:]] = 0
-        result[index, index+1] = 4/3
-        result[index[2:]-1, index[2:]-2] = 4/3
+        Nrow, Ncol, N = self._size(mesh)
+        k = np.arange(N) % Nrow
+        col = np.arange(N) // Nrow
+        isFirst = k == 0
+        isLast = (k == Nrow-1) & (col > 0) & (col < Ncol-1)
 
+        d0 = -4*np.ones(N)
+        d0[isFirst | isLast] = -6
+        du = np.ones(N-1) # (i, i+1)
+        du[isLast[:-1]] = 0
+        du[isFirst[:-1]] = 4/3
+        dl = np.ones(N-1) # (i+1, i)
+        dl[isFirst[1:]] = 0
+        dl[isLast[1:]] = 4/3
+        result = diags([d0, du, dl, 1, 1], [0, 1, -1, Nrow, -Nrow], (N, N), format='csr')
+        result.eliminate_zeros()
         return result/(dx*dy)
-    
+
     def laplace_v(self):
         mesh = self.vmesh
         dx,dy = mesh.h
-        Nrow = mesh.node.shape[1]
-        Ncol = mesh.node.shape[0]
-        N = Nrow*Ncol
-        result = diags([-1, 1, 1, 1, 1],[0, 1, -1, Nrow, -Nrow],(N,N), format='lil')
+        Nrow, Ncol, N = self._size(mesh)
 
-        index = np.arange(0,N)
-        result[index[:Nrow],index[:Nrow]] = -6
-        result[index[-Nrow:],index[-Nrow:]] = -6
-        result[index[:Nrow],index[:Nrow]+Nrow] = 4/3
-        result[index[-Nrow:],index[-Nrow:]-Nrow] = 4/3
+        d0 = -np.ones(N)
+        d0[:Nrow] = -6
+        d0[-Nrow:] = -6
+        du = np.ones(N-Nrow)
+        du[:Nrow] = 4/3
+        dl = np.ones(N-Nrow)
+        dl[-Nrow:] = 4/3
+        result = diags([d0, 1, 1, du, dl], [0, 1, -1, Nrow, -Nrow], (N, N), format='csr')
+        return result/(dx*dy)
 
-        return result/(dx*dy) 
-    
     def grand_uxp(self):
         mesh = self.pmesh
         dx = mesh.h[0]
-        Nrow = mesh.node.shape[1]
-        Ncol = mesh.node.shape[0]
-        N = Nrow*Ncol
-        result = diags([1, -1],[0, -Nrow],(N,N), format='lil')
-        A = lil_matrix((Nrow, N))
-        result1 = vstack([result, A], format='lil')   
-        return result1/dx
-    
+        Nrow, Ncol, N = self._size(mesh)
+        result = diags([1, -1],[0, -Nrow],(N,N), format='csr')
+        result = vstack([result, csr_matrix((Nrow, N))], format='csr')
+        return result/dx
+
     def grand_vyp(self):
         mesh = self.pmesh
         dx = mesh.h[0]
-        Nrow = mesh.node.shape[1]
-        Ncol = mesh.node.shape[0]
-        N = Nrow*Ncol
-        N1 = Nrow*Ncol + Nrow
-        result = diags([0],[0],(N1,N), format='lil')
-        arr = np.arange(0,N1)
-        split_array = np.array_split(arr,Nrow)
-        lists = [sub_array.tolist() for sub_array in split_array]
-        num = len(lists)
-        for i in range(num-1):
-            i_array= np.ones_like(lists[i])
-            result[lists[i],lists[i]-i*i_array] = 1
-            result[lists[i],lists[i]-i*i_array-1] = -1
-        index = lists[-1][:Nrow]
-        num_array = np.ones_like(index)
-        result[index,index-(num-1)*num_array] = 1
-        result[index,index-(num-1)*num_array-1] = -1
+        Nrow, Ncol, N = self._size(mesh)
+        N1 = N + Nrow
+        r = np.arange(N1)
+        i = r//(N1//Nrow)
+        k = r%(N1//Nrow)
+        r = r[(i < Nrow-1) | (k < Nrow)]
+        i = r//(N1//Nrow)
+
+        I = np.concatenate((r, r))
+        J = np.concatenate((r - i, r - i - 1)) % N
+        val = np.concatenate((np.ones(len(r)), -np.ones(len(r))))
+        result = csr_matrix((val, (I, J)), shape=(N1, N))
         return result/dx
-    
+
     def source_Fx(self, pde ,t):
         mesh = self.umesh
         nodes = mesh.entity('node')
-        source = pde.source_F(nodes,t) 
+        source = pde.source_F(nodes,t)
         return source
-    
+
     def grad_pux(self):
         mesh = self.umesh
         dx = mesh.h[0]
-        Nrow = mesh.node.shape[1]
-        Ncol = mesh.node.shape[0]
-        N = Nrow*Ncol
-        result = diags([1,1],[0,Nrow],(N-Nrow,N), format='lil')
+        Nrow, Ncol, N = self._size(mesh)
+        result = diags([1,1],[0,Nrow],(N-Nrow,N), format='csr')
         return result/dx
-    
+
     def grad_pvy(self):
         mesh = self.vmesh
         dy = mesh.h[1]
-        Nrow = mesh.node.shape[1]
-        Ncol = mesh.node.shape[0]
-        N = Nrow*Ncol
-        result = diags([1,1],[0,1],(N-Ncol,N), format='lil')
+        Nrow, Ncol, N = self._size(mesh)
+        result = diags([1,1],[0,1],(N-Ncol,N), format='csr')
         return result/dy
+
+
+class MACProjectionSolver():
+    """
+    @brief 二维和三维均匀网格上 MAC 交错网格的投影法 Navier-Stokes 解法器
+
+        u_t + div(u u) - nu Delta u + grad p = f,  div u = 0
+
+    @note 压力放在 mesh 的单元中心，第 k 个速度分量放在法向为 x_k 的面中心，
+          u[k] 的形状是把单元个数在第 k 个方向上加一。区域边界是固壁，法向
+          速度为 0，切向速度由 set_wall_velocity 给定（例如顶盖驱动流）。
+
+          时间推进用显式的对流和扩散加上 Chorin 投影。对流、扩散、散度和梯度
+          都直接在数组切片上计算，不组装矩阵；压力 Poisson 方程（齐次 Neumann
+          边界）用离散余弦变换精确对角化，特征值只计算一次，每一步的代价是
+          O(N log N)，可以用到很大的网格。也可以用 pressure_solver='direct'
+          改用分解一次的稀疏直接解法器。需要显式矩阵时可以用 divergence_matrix、
+          gradient_matrix 和 laplace_matrix，它们都由一维差分矩阵的 Kronecker
+          积直接构造成 CSR 矩阵。
+    """
+    def __init__(self, mesh, nu=1.0, dt=None, source=None, pressure_solver='dct'):
+        """
+        @param[in] mesh UniformMesh2d 或 UniformMesh3d，其单元就是压力单元
+        @param[in] nu 运动粘性系数
+        @param[in] dt 时间步长，None 时按扩散稳定性条件取
+        @param[in] source 源项 f(t)，返回长度为 GD 的列表，第 k 个元素是 u[k]
+                          位置上的值或常数
+        @param[in] pressure_solver 'dct' 或 'direct'
+        """
+        self.mesh = mesh
+        self.GD = mesh.geo_dimension()
+        if self.GD == 2:
+            self.shape = (mesh.nx, mesh.ny)
+        else:
+            self.shape = (mesh.nx, mesh.ny, mesh.nz)
+        self.h = np.array(mesh.h[:self.GD], dtype=np.float64)
+        self.nu = nu
+        self.source = source
+        if dt is None:
+            dt = 0.2*np.min(self.h)**2/(nu*self.GD)
+        self.dt = dt
+        self.t = 0.0
+
+        GD = self.GD
+        self.u = [np.zeros(self.face_shape(k), dtype=np.float64) for k in range(GD)]
+        self.p = np.zeros(self.shape, dtype=np.float64)
+
+        # wall[j][s][k] 是法向为 x_j 的第 s 个边界上第 k 个速度分量
+        self.wall = np.zeros((GD, 2, GD), dtype=np.float64)
+
+        self.pressure_solver = pressure_solver
+        if pressure_solver == 'dct':
+            lam = 0
+            for k in range(GD):
+                n = self.shape[k]
+                l = -(2 - 2*np.cos(np.pi*np.arange(n)/n))/self.h[k]**2
+                lam = np.add.outer(lam, l) if k > 0 else l
+            lam = lam.reshape(self.shape)
+            lam.flat[0] = 1.0 # 纯 Neumann 问题，常数模态单独处理
+            self.eigenvalue = lam
+        elif pressure_solver == 'direct':
+            from ..solver.direct_solver import DirectSolver
+            L = self.laplace_matrix().tolil()
+            L[0, :] = 0
+            L[0, 0] = 1
+            self.psolver = DirectSolver(L.tocsr())
+        else:
+            raise ValueError(f"unknown pressure solver '{pressure_solver}'")
+
+    def face_shape(self, k):
+        shape = list(self.shape)
+        shape[k] += 1
+        return tuple(shape)
+
+    def set_wall_velocity(self, axis, side, value):
+        """
+        @brief 设置固壁的切向速度
+
+        @param[in] axis 边界的法向
+        @param[in] side 0 表示下边界，1 表示上边界
+        @param[in] value 长度为 GD 的速度，法向分量会被忽略
+        """
+        value = np.array(value, dtype=np.float64)
+        value[axis] = 0.0
+        self.wall[axis, side] = value
+
+    @staticmethod
+    def _slice(axis, s, ndim):
+        index = [slice(None)]*ndim
+        index[axis] = s
+        return tuple(index)
+
+    def _pad(self, uk, k, j):
+        """
+        @brief 在第 j 个方向上给 u[k] 两侧各补一层虚拟点，使固壁上的切向速度
+               等于给定值
+        """
+        ndim = self.GD
+        s = lambda x: self._slice(j, x, ndim)
+        w0, w1 = self.wall[j, 0, k], self.wall[j, 1, k]
+        return np.concatenate((2*w0 - uk[s(slice(0, 1))], uk,
+            2*w1 - uk[s(slice(-1, None))]), axis=j)
+
+    def divergence(self, u):
+        """
+        @brief 单元中心上的散度
+        """
+        GD = self.GD
+        div = 0
+        for k in range(GD):
+            s = lambda x: self._slice(k, x, GD)
+            div = div + (u[k][s(slice(1, None))] - u[k][s(slice(None, -1))])/self.h[k]
+        return div
+
+    def gradient(self, p, k):
+        """
+        @brief 第 k 个方向内部面上的压力梯度
+        """
+        s = lambda x: self._slice(k, x, self.GD)
+        return (p[s(slice(1, None))] - p[s(slice(None, -1))])/self.h[k]
+
+    def rhs(self, u, k):
+        """
+        @brief 第 k 个速度分量在内部面上的 -div(u u_k) + nu Delta u_k
+        """
+        GD = self.GD
+        h = self.h
+        uk = u[k]
+        s = lambda axis, x: self._slice(axis, x, GD)
+        inner = s(k, slice(1, -1))
+
+        # 沿 k 方向的通量 u_k^2 在单元中心
+        uc = 0.5*(uk[s(k, slice(1, None))] + uk[s(k, slice(None, -1))])
+        f = uc**2
+        val = -(f[s(k, slice(1, None))] - f[s(k, slice(None, -1))])/h[k]
+        val += self.nu*(uk[s(k, slice(2, None))] - 2*uk[inner]
+                + uk[s(k, slice(None, -2))])/h[k]**2
+
+        for j in range(GD):
+            if j == k:
+                continue
+            ukp = self._pad(uk, k, j)
+            # u_k 和 u_j 插值到棱上，通量 u_j u_k
+            ukj = 0.5*(ukp[s(j, slice(1, None))] + ukp[s(j, slice(None, -1))])[inner]
+            uj = u[j]
+            ujk = 0.5*(uj[s(k, slice(1, None))] + uj[s(k, slice(None, -1))])
+            f = ukj*ujk
+            val -= (f[s(j, slice(1, None))] - f[s(j, slice(None, -1))])/h[j]
+
+            val += self.nu*(ukp[s(j, slice(2, None))] - 2*ukp[s(j, slice(1, -1))]
+                    + ukp[s(j, slice(None, -2))])[inner]/h[j]**2
+        return val
+
+    def solve_pressure(self, b):
+        """
+        @brief 求解齐次 Neumann 边界的离散 Poisson 方程 L p = b，p 的均值为 0
+        """
+        if self.pressure_solver == 'dct':
+            bh = dctn(b, type=2, norm='ortho')
+            bh /= self.eigenvalue
+            bh.flat[0] = 0.0
+            return idctn(bh, type=2, norm='ortho')
+        else:
+            b = b.reshape(-1).copy()
+            b[0] = 0.0
+            p = self.psolver.solve(b)
+            return (p - np.mean(p)).reshape(self.shape)
+
+    def step(self):
+        """
+        @brief 前进一个时间步
+
+        @return 速度分量的列表和压力
+        """
+        GD = self.GD
+        dt = self.dt
+        u = self.u
+        f = self.source(self.t) if self.source is not None else None
+
+        us = [uk.copy() for uk in u]
+        for k in range(GD):
+            inner = self._slice(k, slice(1, -1), GD)
+            val = self.rhs(u, k)
+            if f is not None:
+                fk = f[k]
+                val += fk[inner] if isinstance(fk, np.ndarray) else fk
+            us[k][inner] += dt*val
+
+        p = self.solve_pressure(self.divergence(us)/dt)
+        for k in range(GD):
+            inner = self._slice(k, slice(1, -1), GD)
+            us[k][inner] -= dt*self.gradient(p, k)
+
+        self.u = us
+        self.p = p
+        self.t += dt
+        return self.u, self.p
+
+    def run(self, nt, callback=None):
+        """
+        @brief 前进 nt 个时间步，每步之后调用 callback(solver)
+        """
+        for i in range(nt):
+            self.step()
+            if callback is not None:
+                callback(self)
+        return self.u, self.p
+
+    def _kron(self, ops):
+        A = ops[0]
+        for B in ops[1:]:
+            A = kron(A, B, format='csr')
+        return A.tocsr()
+
+    def _difference(self, n, h):
+        """
+        @brief 一维从 n+1 个面到 n 个单元的差分矩阵
+        """
+        return diags([-1, 1], [0, 1], shape=(n, n+1), format='csr', dtype=np.float64)/h
+
+    def divergence_matrix(self):
+        """
+        @brief 散度矩阵，列按 u[0], u[1], ... 的顺序排列
+        """
+        GD = self.GD
+        blocks = []
+        for k in range(GD):
+            ops = [identity(n, format='csr', dtype=np.float64) for n in self.shape]
+            ops[k] = self._difference(self.shape[k], self.h[k])
+            blocks.append(self._kron(ops))
+        return hstack(blocks, format='csr', dtype=np.float64)
+
+    def gradient_matrix(self, k):
+        """
+        @brief 从单元中心到第 k 个方向内部面的梯度矩阵
+        """
+        ops = [identity(n, format='csr', dtype=np.float64) for n in self.shape]
+        n = self.shape[k]
+        ops[k] = diags([-1, 1], [0, 1], shape=(n-1, n), format='csr', dtype=np.float64)/self.h[k]
+        return self._kron(ops)
+
+    def laplace_matrix(self):
+        """
+        @brief 压力的齐次 Neumann 离散 Laplace 矩阵 L = sum_k D_k G_k
+        """
+        GD = self.GD
+        L = 0
+        for k in range(GD):
+            ops = [identity(n, format='csr', dtype=np.float64) for n in self.shape]
+            n = self.shape[k]
+            D = diags([-1, 1], [0, 1], shape=(n, n+1), format='csr', dtype=np.float64)[:, 1:-1]
+            G = diags([-1, 1], [0, 1], shape=(n-1, n), format='csr', dtype=np.float64)
+            ops[k] = (D@G)/self.h[k]**2
+            L = L + self._kron(ops)
+        return L.tocsr()
@@ -57,5 +57,6 @@ from .vector_neumann_bc_integrator import VectorNeumannBCIntegrator
 from .scalar_neumann_bc_integrator import ScalarNeumannBCIntegrator
 
 from .dirichlet_bc import DirichletBC
+from .sum_factorization_operator import SumFactorizationOperator
 from .recovery_alg import recovery_alg, LinearRecoveryAlg
 
@@ -1,15 +1,19 @@
 import numpy as np
 
-from scipy.sparse import csr_matrix
+from scipy.sparse import csr_matrix, bsr_matrix
 
 
 class BilinearForm:
-    def __init__(self, space, atype=None):
+    def __init__(self, space, atype=None, format='csr'):
         """
         @brief 
+
+        @param[in] format 组装得到的稀疏矩阵的格式，'csr' 或者 'bsr'。'bsr' 只对
+                   doforder 为 'vdims' 的向量空间有意义，矩阵按 GD x GD 的块存储
         """
         self.space = space
         self.atype = atype # 矩阵组装的方式，None、fast、ref
+        self.format = format
         self.dintegrators = [] # 区域积分子
         self.bintegrators = [] # 边界积分子
 
@@ -57,10 +61,12 @@ class BilinearForm:
         """
         return self.assembly()
 
-    def assembly(self):
+    def assembly(self, format=None):
         """
         @brief 数值积分组装
 
+        @param[in] format 矩阵格式，None 时用构造时给出的 self.format
+
         @note space 可能是以下的情形
             * 标量空间
             * 由标量空间组成的向量空间
@@ -68,12 +74,16 @@ class BilinearForm:
             * 向量空间（基函数是向量型的）
             * 张量空间（基函数是张量型的
         """
+        format = self.format if format is None else format
         if isinstance(self.space, tuple) and not isinstance(self.space[0], tuple):
             # 由标量函数空间组成的向量函数空间
-            return self.assembly_for_vspace_with_scalar_basis()
+            return self.assembly_for_vspace_with_scalar_basis(format=format)
         else:
             # 标量函数空间或基是向量函数的向量函数空间
-            return self.assembly_for_sspace_and_vspace_with_vector_basis()
+            self.assembly_for_sspace_and_vspace_with_vector_basis()
+            if format != 'csr':
+                self._M = self._M.asformat(format)
+            return self._M
 
 
     def assembly_for_sspace_and_vspace_with_vector_basis(self) -> None:
@@ -110,7 +120,7 @@ class BilinearForm:
 
         return self._M
 
-    def assembly_for_vspace_with_scalar_basis(self) -> None:
+    def assembly_for_vspace_with_scalar_basis(self, format='csr') -> None:
         """
         组装基函数由标量函数组合而成的向量函数空间的矩阵
 
@@ -125,6 +135,8 @@ class BilinearForm:
         8. 根据空间的自由度排序优先级，进行对应的操作来更新 _M
 
         注意：这个函数不返回任何值，结果保存在 _M 属性中
+
+        format 为 'bsr' 时要求 doforder 为 'vdims'，见 assembly_bsr
         """
         space = self.space
         assert isinstance(space, tuple) and not isinstance(space[0], tuple)
@@ -142,6 +154,15 @@ class BilinearForm:
         for di in self.dintegrators:
             di.assembly_cell_matrix(space, cellmeasure=cellmeasure, out=CM)
             # print("CM", CM.shape, ":\n", CM)
+
+        if format == 'bsr':
+            if space[0].doforder != 'vdims':
+                raise ValueError("the 'bsr' format needs the 'vdims' dof order")
+            self._M = self.assembly_bsr(CM, cell2dof, gdof)
+            for bi in self.bintegrators:
+                self._M = (self._M + bi.assembly_face_matrix(space)).tobsr(blocksize=(GD, GD))
+            return self._M
+
         self._M = csr_matrix((GD*gdof, GD*gdof), dtype=space[0].ftype)
         if space[0].doforder == 'sdofs': # 标量自由度排序优先
             for i in range(GD):
@@ -179,8 +200,41 @@ class BilinearForm:
 
         for bi in self.bintegrators:
             self._M += bi.assembly_face_matrix(space)
+        if format != 'csr':
+            self._M = self._M.asformat(format)
         return self._M
 
+    @staticmethod
+    def assembly_bsr(CM, cell2dof, gdof):
+        """
+        @brief 把按 'vdims' 排列的单元矩阵一次组装成块大小为 GD 的 BSR 矩阵
+
+        @param[in] CM 形状为 (NC, GD*ldof, GD*ldof) 的单元矩阵
+        @param[in] cell2dof 标量空间的单元自由度，形状为 (NC, ldof)
+        @param[in] gdof 标量空间的全局自由度个数
+
+        @note 单元矩阵中第 m 个基函数的第 i 个分量在 m*GD + i 的位置，所以它的
+              (m, n) 块就是 CM[:, m*GD:(m+1)*GD, n*GD:(n+1)*GD]。按块的行列号排序
+              合并重复的块，只需要块个数的列指标，比 CSR 少 GD^2 倍。
+        """
+        NC, ldof = cell2dof.shape
+        GD = CM.shape[1]//ldof
+        val = CM.reshape(NC, ldof, GD, ldof, GD).transpose(0, 1, 3, 2, 4).reshape(-1, GD*GD)
+        I = np.broadcast_to(cell2dof[:, :, None], shape=(NC, ldof, ldof))
+        J = np.broadcast_to(cell2dof[:, None, :], shape=(NC, ldof, ldof))
+        key = I.astype(np.int64).reshape(-1)*gdof + J.reshape(-1)
+        key, inverse = np.unique(key, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        nnzb = len(key)
+        data = np.zeros((nnzb, GD*GD), dtype=CM.dtype)
+        for k in range(GD*GD):
+            data[:, k] = np.bincount(inverse, weights=val[:, k], minlength=nnzb)
+        indices = (key % gdof).astype(cell2dof.dtype)
+        indptr = np.zeros(gdof+1, dtype=cell2dof.dtype)
+        np.cumsum(np.bincount(key//gdof, minlength=gdof), out=indptr[1:])
+        return bsr_matrix((data.reshape(nnzb, GD, GD), indices, indptr), shape=(GD*gdof, GD*gdof))
+
     def fast_assembly(self):
         """
         @brief 免数值积分组装
@@ -1,6 +1,6 @@
 import numpy as np
 
-from scipy.sparse import csr_matrix, spdiags, eye, bmat
+from scipy.sparse import csr_matrix, bsr_matrix, spdiags, eye, bmat
 
 from typing import Optional, Union, Tuple, Callable, Any
 
@@ -85,8 +85,34 @@ class DirichletBC():
 
         bdIdx = np.zeros(A.shape[0], dtype=np.int_)
         bdIdx[dflag.flat] = 1
-        D0 = spdiags(1-bdIdx, 0, A.shape[0], A.shape[0])
-        D1 = spdiags(bdIdx, 0, A.shape[0], A.shape[0])
-        A = D0@A@D0 + D1
+        if A.format == 'bsr':
+            A = self.apply_for_bsr_matrix(A, bdIdx)
+        else:
+            D0 = spdiags(1-bdIdx, 0, A.shape[0], A.shape[0])
+            D1 = spdiags(bdIdx, 0, A.shape[0], A.shape[0])
+            A = D0@A@D0 + D1
         f[dflag.flat] = uh.ravel()[dflag.flat]
         return A, f 
+
+    @staticmethod
+    def apply_for_bsr_matrix(A, bdIdx):
+        """
+        @brief 在 BSR 矩阵的块上直接消去边界自由度所在的行和列，结果仍是同样
+               块大小的 BSR 矩阵
+
+        @param[in] bdIdx 边界自由度处为 1 的整数数组
+        """
+        R, C = A.blocksize
+        A.sort_indices()
+        row = np.repeat(np.arange(A.shape[0]//R), np.diff(A.indptr))
+        keep = 1 - bdIdx
+        data = A.data*keep.reshape(-1, R)[row][:, :, None]
+        data *= keep.reshape(-1, C)[A.indices][:, None, :]
+        isDiag = row == A.indices
+        if np.sum(isDiag) != A.shape[0]//R:
+            # 有的对角块不在稀疏模式中，退回到一般的做法
+            D0 = spdiags(keep, 0, A.shape[0], A.shape[0])
+            D1 = spdiags(bdIdx, 0, A.shape[0], A.shape[0])
+            return (D0@A@D0 + D1).tobsr(blocksize=A.blocksize)
+        data[isDiag] += bdIdx.reshape(-1, R)[:, :, None]*np.eye(R, dtype=A.dtype)
+        return bsr_matrix((data, A.indices, A.indptr), shape=A.shape)
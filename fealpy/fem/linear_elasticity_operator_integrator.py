@@ -2,6 +2,8 @@ import numpy as np
 from typing import Optional, Union, Tuple
 
 class LinearElasticityOperatorIntegrator:
+    _reference_tensors = {} # (TD, p, q) -> 参考单元上的积分张量
+
     def __init__(self, lam: float, mu: float, q: Optional[int]=None):
         """
         初始化 LinearElasticityOperatorIntegrator 类
@@ -34,6 +36,10 @@ class LinearElasticityOperatorIntegrator:
         lam = self.lam
         mu = self.mu
         mesh = space[0].mesh
+        if (mesh.meshtype in {'tri', 'tet'}) and np.isscalar(lam) and np.isscalar(mu):
+            # 单纯形网格上的常系数问题用参考张量快速组装
+            return self.assembly_cell_matrix_fast(space, index=index,
+                    cellmeasure=cellmeasure, out=out)
         ldof = space[0].number_of_local_dofs()
         p = space[0].p # 空间的多项式阶数
         GD = mesh.geo_dimension()
@@ -101,9 +107,80 @@ class LinearElasticityOperatorIntegrator:
             return K
 
 
-    def assembly_cell_matrix_fast(self, space, index=np.s_[:], cellmeasure=None):
-        pass
+    @classmethod
+    def reference_tensor(cls, mesh, p: int, q: int) -> np.ndarray:
+        """
+        参考张量 R[m, n, k, l]，为 (dphi_m/dlambda_k)(dphi_n/dlambda_l) 在单元上的
+        平均值，只与单元的维数和基函数的次数有关，每个 (TD, p, q) 只计算一次
+
+        返回:
+        np.ndarray: 形状为 (ldof*ldof, (TD+1)**2) 的数组
+        """
+        TD = mesh.top_dimension()
+        key = (TD, p, q)
+        if key not in cls._reference_tensors:
+            qf = mesh.integrator(q, 'cell')
+            bcs, ws = qf.get_quadrature_points_and_weights()
+            R = mesh.grad_shape_function(bcs, p=p, variables='u') # (NQ, ldof, TD+1)
+            R = np.einsum('q, qmk, qnl->mnkl', ws, R, R, optimize=True)
+            ldof = R.shape[0]
+            cls._reference_tensors[key] = R.reshape(ldof*ldof, (TD+1)**2)
+        return cls._reference_tensors[key]
+
+    def assembly_cell_matrix_fast(self, space: Tuple, index=np.s_[:],
+                                  cellmeasure: Optional[np.ndarray]=None,
+                                  out: Optional[np.ndarray]=None) -> Optional[np.ndarray]:
+        """
+        基于参考张量组装单纯形网格上常系数的线性弹性单元矩阵
+
+        单纯形上 grad lambda 在单元内为常数，所以
+
+            int d_a phi_m d_b phi_n = |T| sum_{k, l} R[m, n, k, l] g[k, a] g[l, b]
 
+        先在每个单元上由 g = grad lambda 和 lam, mu 组合出形状为
+        (GD*GD, (TD+1)**2) 的小矩阵 H，再和参考张量做一次矩阵乘积得到全部的
+        GD*GD 个块，不需要在积分点上计算基函数的梯度
 
-    def assembly_cell_matrix_ref(self, space, index=np.s_[:], cellmeasure=None):
-        pass
+        参数和返回值同 assembly_cell_matrix
+        """
+        lam = self.lam
+        mu = self.mu
+        mesh = space[0].mesh
+        assert mesh.meshtype in {'tri', 'tet'}
+        p = space[0].p
+        q = self.q if self.q is not None else p+1
+        GD = mesh.geo_dimension()
+        TD = mesh.top_dimension()
+        ldof = space[0].number_of_local_dofs()
+
+        if cellmeasure is None:
+            cellmeasure = mesh.entity_measure('cell', index=index)
+        NC = len(cellmeasure)
+
+        R = self.reference_tensor(mesh, p, q)
+        glambda = mesh.grad_lambda(index=index) # (NC, TD+1, GD)
+        G = np.einsum('cka, clb, c->cabkl', glambda, glambda, cellmeasure, optimize=True)
+        H = lam*G + mu*G.swapaxes(1, 2)
+        idx = np.arange(GD)
+        H[:, idx, idx] += mu*np.sum(G[:, idx, idx], axis=1)[:, None]
+        K0 = (H.reshape(NC, GD*GD, -1)@R.T).reshape(NC, GD, GD, ldof, ldof)
+
+        if space[0].doforder == 'sdofs': # 标量自由度优先排序
+            K0 = K0.transpose(0, 1, 3, 2, 4)
+        elif space[0].doforder == 'vdims':
+            K0 = K0.transpose(0, 3, 1, 4, 2)
+        K0 = K0.reshape(NC, GD*ldof, GD*ldof)
+
+        if out is None:
+            return K0
+        assert out.shape == (NC, GD*ldof, GD*ldof)
+        out += K0
+
+    def assembly_cell_matrix_ref(self, space: Tuple, index=np.s_[:],
+                                 cellmeasure: Optional[np.ndarray]=None,
+                                 out: Optional[np.ndarray]=None) -> Optional[np.ndarray]:
+        """
+        基于参考单元矩阵的组装，对这个积分子就是 assembly_cell_matrix_fast
+        """
+        return self.assembly_cell_matrix_fast(space, index=index,
+                cellmeasure=cellmeasure, out=out)
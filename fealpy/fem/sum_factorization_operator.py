@@ -0,0 +1,213 @@
+import numpy as np
+from scipy.sparse.linalg import LinearOperator
+
+
+def _apply_1d(A, U, axis):
+    """
+    @brief 把一维的表 A (m, n) 作用在 U 的第 axis 个张量方向上
+
+    @param[in] U 形状为 (NC, n0, n1) 或 (NC, n0, n1, n2) 的数组
+    """
+    TD = U.ndim - 1
+    if axis == TD - 1:
+        return U@A.T
+    if axis == TD - 2:
+        return A@U
+    s = U.shape
+    return (A@U.reshape(s[0], s[1], -1)).reshape((s[0], A.shape[0]) + s[2:])
+
+
+class SumFactorizationOperator():
+    """
+    @brief 四边形和六面体网格上 Lagrange 空间的无矩阵算子
+
+        A = c_diff * (grad u, grad v) + c_mass * (u, v)
+
+    @note 张量积单元上的基函数和积分点都是一维的张量积，所以单元上的插值、
+          求梯度以及它们的转置都可以沿每个方向依次用一维的表 (NQ1, p+1) 作用，
+          即和分解（sum factorization）。每个单元的代价为 O(p^{TD+1})，而稠密的
+          单元矩阵需要 O(p^{2TD}) 的存储和 O(p^{3TD}) 的组装。
+
+          只预先保存每个单元在积分点上的几何量 w |det J| J^{-1} J^{-T}，不组装
+          整体矩阵。对象有 shape、dtype、@ 运算和 diagonal 方法，可以直接交给
+          fealpy.solver 中的 Krylov 解法器和 JacobiPreconditioner。
+    """
+    def __init__(self, space, diffusion=1.0, mass=0.0, q=None):
+        """
+        @param[in] space QuadrangleMesh 或 HexahedronMesh 上的标量 LagrangeFESpace
+        @param[in] diffusion 扩散项的系数，标量或者形状为 (NC, ) 的单元常数
+        @param[in] mass 质量项的系数，标量或者形状为 (NC, ) 的单元常数
+        @param[in] q 每个方向上 Gauss-Legendre 积分点的个数，默认为 p+1
+        """
+        mesh = space.mesh
+        if mesh.meshtype not in {'quad', 'hex'}:
+            raise ValueError(f"sum factorization needs a quad or hex mesh, got '{mesh.meshtype}'")
+        self.space = space
+        self.mesh = mesh
+        p = space.p
+        q = p + 1 if q is None else q
+        TD = mesh.top_dimension()
+        self.TD = TD
+        self.q = q
+
+        self.cell2dof = space.cell_to_dof()
+        self.gdof = space.number_of_global_dofs()
+        self.shape = (self.gdof, self.gdof)
+        self.dtype = mesh.ftype
+        self.isDDof = None
+
+        # 一维的基函数表和导数表
+        qf = mesh.integrator(q, 'cell')
+        bcs = qf.quadpts
+        bc = bcs[0]
+        self.B = mesh._shape_function(bc, p=p) # (NQ1, p+1)
+        self.D = np.einsum('...ij, j->...i', mesh._grad_shape_function(bc, p=p),
+                np.array([-1, 1], dtype=self.dtype))
+
+        NC = mesh.number_of_cells()
+        NQ1 = len(bc)
+        qshape = (NC, ) + TD*(NQ1, )
+        J = mesh.jacobi_matrix(bcs) # (NQ, NC, TD, TD)
+        detJ = np.abs(np.linalg.det(J))
+        Jinv = np.linalg.inv(J)
+        w = qf.weights[:, None]*detJ # (NQ, NC)
+
+        self.diffusion = diffusion
+        self.mass = mass
+        self.G = None
+        self.W = None
+        if np.any(diffusion != 0):
+            c = np.broadcast_to(diffusion, (NC, ))
+            G = np.einsum('qc, qcim, qcjm, c->ijcq', w, Jinv, Jinv, c, optimize=True)
+            self.G = G.reshape((TD, TD) + qshape)
+        if np.any(mass != 0):
+            c = np.broadcast_to(mass, (NC, ))
+            self.W = (w*c).T.reshape(qshape)
+
+    def number_of_global_dofs(self):
+        return self.gdof
+
+    def local_apply(self, U):
+        """
+        @brief 单元上的算子作用在局部自由度的值上
+
+        @param[in] U 形状为 (NC, p+1, ..., p+1) 的局部自由度的值
+        """
+        if self.TD == 2:
+            return self._local_apply_2d(U)
+        return self._local_apply_3d(U)
+
+    def _local_apply_2d(self, U):
+        B, D, G, W = self.B, self.D, self.G, self.W
+        T0 = _apply_1d(B, U, 0)
+        out = 0
+        if G is not None:
+            T1 = _apply_1d(D, U, 0)
+            g0 = _apply_1d(B, T1, 1)
+            g1 = _apply_1d(D, T0, 1)
+            f0 = G[0, 0]*g0 + G[0, 1]*g1
+            f1 = G[1, 0]*g0 + G[1, 1]*g1
+            out = _apply_1d(D.T, _apply_1d(B.T, f0, 1), 0)
+            Y = _apply_1d(D.T, f1, 1)
+        else:
+            Y = 0
+        if W is not None:
+            Y = Y + _apply_1d(B.T, W*_apply_1d(B, T0, 1), 1)
+        return out + _apply_1d(B.T, Y, 0)
+
+    def _local_apply_3d(self, U):
+        B, D, G, W = self.B, self.D, self.G, self.W
+        T0 = _apply_1d(B, U, 0)
+        T00 = _apply_1d(B, T0, 1)
+        out = 0
+        Z = 0
+        if G is not None:
+            T1 = _apply_1d(D, U, 0)
+            g = [_apply_1d(B, _apply_1d(B, T1, 1), 2),
+                 _apply_1d(B, _apply_1d(D, T0, 1), 2),
+                 _apply_1d(D, T00, 2)]
+            f = [G[i, 0]*g[0] + G[i, 1]*g[1] + G[i, 2]*g[2] for i in range(3)]
+            out = _apply_1d(D.T, _apply_1d(B.T, _apply_1d(B.T, f[0], 2), 1), 0)
+            X = _apply_1d(D.T, _apply_1d(B.T, f[1], 2), 1)
+            Z = _apply_1d(D.T, f[2], 2)
+        else:
+            X = 0
+        if W is not None:
+            Z = Z + _apply_1d(B.T, W*_apply_1d(B, T00, 2), 2)
+        Y = X + _apply_1d(B.T, Z, 1)
+        return out + _apply_1d(B.T, Y, 0)
+
+    def _matvec(self, x):
+        cell2dof = self.cell2dof
+        NC, ldof = cell2dof.shape
+        n = self.B.shape[1]
+        isDDof = self.isDDof
+        if isDDof is not None:
+            x0 = x
+            x = x.copy()
+            x[isDDof] = 0
+        U = x[cell2dof].reshape((NC, ) + self.TD*(n, ))
+        V = self.local_apply(U)
+        y = np.bincount(cell2dof.reshape(-1), weights=V.reshape(-1), minlength=self.gdof)
+        if isDDof is not None:
+            y[isDDof] = x0[isDDof]
+        return y
+
+    def matvec(self, x):
+        if x.ndim == 1:
+            return self._matvec(x)
+        return np.stack([self._matvec(x[:, i]) for i in range(x.shape[1])], axis=1)
+
+    def __matmul__(self, x):
+        return self.matvec(x)
+
+    def diagonal(self):
+        """
+        @brief 整体矩阵的对角线，用于 Jacobi 预条件
+
+        @note 对角元 sum_q G_ab(q) d_a phi_i(q) d_b phi_i(q) 中的积也是一维量的
+              张量积，所以同样沿每个方向依次用一维的表 X_a * X_b 作用（X 为 B 或 D），
+              代价和一次算子作用相同
+        """
+        TD = self.TD
+        B, D = self.B, self.D
+        d = 0
+        if self.G is not None:
+            for a in range(TD):
+                for b in range(TD):
+                    V = self.G[a, b]
+                    for axis in range(TD):
+                        X = (D if axis == a else B)*(D if axis == b else B)
+                        V = _apply_1d(X.T, V, axis)
+                    d = d + V
+        if self.W is not None:
+            V = self.W
+            for axis in range(TD):
+                V = _apply_1d((B*B).T, V, axis)
+            d = d + V
+        d = np.bincount(self.cell2dof.reshape(-1), weights=d.reshape(-1), minlength=self.gdof)
+        if self.isDDof is not None:
+            d[self.isDDof] = 1
+        return d
+
+    def apply_dirichlet(self, f, uh, isDDof=None):
+        """
+        @brief 处理 Dirichlet 边界条件，之后算子在边界自由度上为单位算子
+
+        @param[in] f 右端向量，不修改外界的值
+        @param[in] uh 有限元函数，只用到它在边界自由度上的值
+        @param[in] isDDof 边界自由度的标记，默认为空间的边界自由度
+        """
+        if isDDof is None:
+            isDDof = self.space.is_boundary_dof()
+        self.isDDof = None
+        u0 = np.zeros(self.gdof, dtype=self.dtype)
+        u0[isDDof] = uh[isDDof]
+        f = f - self.matvec(u0)
+        f[isDDof] = u0[isDDof]
+        self.isDDof = isDDof
+        return f
+
+    def aslinearoperator(self):
+        return LinearOperator(self.shape, matvec=self.matvec,
+                matmat=self.matvec, dtype=self.dtype)
@@ -365,3 +365,41 @@ class EdgeMeshDFEDof():
         w = self.multiIndex/p
         ipoint = np.einsum('ij, kj...->ki...', w, node[cell]).reshape(-1, GD)
         return ipoint
+
+class PermutedDof():
+    """
+    按置换重新编号的自由度，新的第 i 个自由度是原来的第 perm[i] 个自由度
+    """
+    def __init__(self, dof, perm):
+        self.base = dof
+        self.mesh = dof.mesh
+        self.p = dof.p
+        self.perm = perm
+        self.iperm = np.zeros_like(perm)
+        self.iperm[perm] = np.arange(len(perm), dtype=perm.dtype)
+        self.cell2dof = self.iperm[dof.cell2dof]
+
+    def __getattr__(self, name):
+        return getattr(self.base, name)
+
+    def is_boundary_dof(self, threshold=None):
+        gdof = self.number_of_global_dofs()
+        if (type(threshold) is np.ndarray) and (threshold.dtype == np.bool_) \
+                and (len(threshold) == gdof):
+            return threshold
+        return self.base.is_boundary_dof(threshold=threshold)[self.perm]
+
+    def entity_to_dof(self, etype, index=np.s_[:]):
+        return self.iperm[self.base.entity_to_dof(etype, index=index)]
+
+    def face_to_dof(self, index=np.s_[:]):
+        return self.iperm[self.base.face_to_dof(index=index)]
+
+    def edge_to_dof(self, index=np.s_[:]):
+        return self.iperm[self.base.edge_to_dof(index=index)]
+
+    def cell_to_dof(self, index=np.s_[:]):
+        return self.cell2dof[index]
+
+    def interpolation_points(self):
+        return self.base.interpolation_points()[self.perm]
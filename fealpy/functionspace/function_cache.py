@@ -0,0 +1,120 @@
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from .Function import Function
+
+def array_key(a):
+    """
+    @brief 按内容计算积分点、单元编号等参数的键，不能作为键时返回 None
+
+    @note 数组按 dtype、shape 和数据的 crc32、adler32 校验和计算，与数组对象的
+          id 无关，所以每次重新生成的同一组积分点也能命中缓存
+    """
+    if a is None:
+        return ('none', )
+    if isinstance(a, slice):
+        return ('slice', a.start, a.stop, a.step)
+    if isinstance(a, (bool, int, np.integer)):
+        return ('int', int(a))
+    if isinstance(a, (tuple, list)):
+        keys = tuple(array_key(v) for v in a)
+        if None in keys:
+            return None
+        return ('tuple', keys)
+    if isinstance(a, np.ndarray):
+        a = np.ascontiguousarray(a)
+        buf = memoryview(a.reshape(-1)).cast('B')
+        return ('array', a.dtype.str, a.shape, zlib.crc32(buf), zlib.adler32(buf))
+    return None
+
+
+def function_key(uh):
+    """
+    @brief 有限元函数当前数据的键，uh 不是 Function 时返回 None
+
+    @note 键按数据的内容计算，与数据是怎样写入的无关（下标赋值、原地运算、
+          uh.flat[:] = x、np.add.at、np.copyto 和 ufunc 的 out 参数等），
+          代价是一次遍历 uh，比在积分点上求值小得多
+    """
+    if not isinstance(uh, Function):
+        return None
+    return array_key(np.asarray(uh))
+
+
+def mesh_key(mesh):
+    """
+    @brief 网格当前状态的键，网格加密、重新编号或者移动节点后都会改变
+
+    @note 由数据结构对象、实体个数和节点坐标的校验和组成，计算代价是一次
+          遍历节点数组，比重新计算边界上的插值点小得多
+    """
+    return ('mesh', id(mesh.ds), mesh.number_of_cells(), array_key(mesh.entity('node')))
+
+
+def threshold_key(threshold):
+    """
+    @brief 边界标记 threshold 的键：None、可以哈希的函数（绑定方法每次取出时
+           是新对象，但相等且哈希值相同）或者数组
+    """
+    if isinstance(threshold, np.ndarray):
+        return array_key(threshold)
+    if threshold is None:
+        return ('none', )
+    try:
+        hash(threshold)
+    except TypeError:
+        return None
+    return ('callable', threshold)
+
+
+class FunctionValueCache():
+    """
+    @brief 基函数的表和有限元函数在积分点处的值的缓存
+
+    @note 按最近最少使用的顺序淘汰，缓存的数组的总字节数不超过 maxmemory，
+          maxmemory 为 0 时不缓存
+    """
+    def __init__(self, maxmemory=2**27):
+        self.maxmemory = maxmemory
+        self.data = OrderedDict()
+        self.memsize = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        @brief 取出键对应的数组，不存在时返回 None
+        """
+        if key is None:
+            return None
+        val = self.data.get(key, None)
+        if val is None:
+            self.misses += 1
+            return None
+        self.data.move_to_end(key)
+        self.hits += 1
+        return val
+
+    def put(self, key, val):
+        if (key is None) or (val.nbytes > self.maxmemory):
+            return
+        if key in self.data:
+            self.memsize -= self.data[key].nbytes
+        self.data[key] = val
+        self.data.move_to_end(key)
+        self.memsize += val.nbytes
+        while self.memsize > self.maxmemory:
+            _, v = self.data.popitem(last=False)
+            self.memsize -= v.nbytes
+
+    def clear(self):
+        self.data.clear()
+        self.memsize = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
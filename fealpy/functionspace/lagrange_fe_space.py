@@ -1,8 +1,12 @@
 import numpy as np
 from typing import Optional, Union, Callable
 from .Function import Function
+from collections import OrderedDict
+from .function_cache import (FunctionValueCache, array_key, function_key,
+        mesh_key, threshold_key)
 from ..decorator import barycentric, cartesian
 from .fem_dofs import *
+from ..mesh.reordering import rcm_order
 
 class LagrangeFESpace():
     DOF = { 'C': {
@@ -56,6 +60,12 @@ class LagrangeFESpace():
         self.itype = mesh.itype
         self.ftype = mesh.ftype
 
+        # 基函数在积分点处的表和有限元函数在积分点处的值的缓存
+        self.cache = FunctionValueCache()
+        # 边界自由度和它们的插值点的缓存，按 threshold 和网格的状态区分
+        self.bdcache = OrderedDict()
+        self.bdcachesize = 16
+
     def __str__(self):
         return "Lagrange finite element space on linear mesh!"
 
@@ -80,12 +90,153 @@ class LagrangeFESpace():
     def edge_to_dof(self, index=np.s_[:]):
         return self.dof.edge_to_dof() #TODO：index
 
+    def reorder(self, method='rcm', functions=()):
+        """
+        @brief 重新排列自由度，减小矩阵的带宽
+
+        @param[in] method 目前只支持 'rcm'（逆 Cuthill-McKee）
+        @param[in] functions 这个空间中的有限元函数，它们的值随自由度一起置换
+
+        @return 置换 perm，新的第 i 个自由度是原来的第 perm[i] 个自由度
+        """
+        if method != 'rcm':
+            raise ValueError(f"unknown dof ordering '{method}'")
+        gdof = self.number_of_global_dofs()
+        perm = rcm_order(self.cell_to_dof(), gdof)
+        if isinstance(self.dof, PermutedDof): # 与已有的置换复合
+            self.dof = PermutedDof(self.dof.base, self.dof.perm[perm])
+        else:
+            self.dof = PermutedDof(self.dof, perm)
+        self.cache.clear()
+        self.bdcache.clear()
+        for uh in functions:
+            self.permute(uh, perm)
+        return perm
+
+    def update_numbering(self, cell2dof, cellperm):
+        """
+        @brief 网格重新编号之后重建自由度
+
+        @param[in] cell2dof 网格重新编号之前的 cell_to_dof
+        @param[in] cellperm 新的第 i 个单元是原来的第 cellperm[i] 个单元
+
+        @return 自由度的置换 perm，新的第 i 个自由度是原来的第 perm[i] 个自由度
+
+        @note 同一个单元在新旧编号下的 cell_to_dof 按相同的局部基函数排列，
+              所以 perm[new_cell2dof] = cell2dof[cellperm]
+        """
+        mname = type(self.mesh).__name__
+        self.dof = self.DOF[self.spacetype][mname](self.mesh, self.p)
+        self.cellmeasure = self.mesh.entity_measure('cell')
+        self.cache.clear()
+        self.bdcache.clear()
+        perm = np.zeros(self.number_of_global_dofs(), dtype=cell2dof.dtype)
+        perm[self.cell_to_dof()] = cell2dof[cellperm]
+        return perm
+
+    def permute(self, uh, perm):
+        """
+        @brief 按自由度的置换更新有限元函数的值，uh[i] = uh[perm[i]]
+        """
+        gdof = self.number_of_global_dofs()
+        axis = 0 if uh.shape[0] == gdof else -1
+        uh[:] = np.take(np.asarray(uh), perm, axis=axis)
+        return uh
+
     def is_boundary_dof(self, threshold=None):
         if self.spacetype == 'C':
-            return self.dof.is_boundary_dof(threshold=threshold)
+            if not isinstance(getattr(self.dof, 'base', self.dof), LinearMeshCFEDof):
+                return self.dof.is_boundary_dof(threshold=threshold)
+            gdof = self.number_of_global_dofs()
+            if (type(threshold) is np.ndarray) and (threshold.dtype == np.bool_) \
+                    and (len(threshold) == gdof):
+                return threshold
+            isBdDof = np.zeros(gdof, dtype=np.bool_)
+            isBdDof[self.boundary_dof(threshold=threshold)[0]] = True
+            return isBdDof
         else:
             raise ValueError('This space is a discontinuous space!')
 
+    def boundary_dof(self, threshold=None):
+        """
+        @brief Get the boundary dofs and their interpolation points.
+
+        @param threshold: None, a callable on the barycenters of the boundary
+        faces, a face index (or flag) array, or a bool array over all dofs.
+
+        @return (index, ipoints), the sorted boundary dofs and their interpolation
+        points with shape (len(index), GD).
+
+        @note Only the cells next to the selected boundary faces are touched, the
+        interpolation points of all dofs are never formed. The result is cached per
+        threshold and per mesh state (see `mesh_key`), so calling this again, e.g.
+        from `DirichletBC.apply` in every time step, costs a checksum of the nodes.
+        The returned arrays are shared with the cache and are read-only, copy them
+        before modifying.
+        """
+        key = threshold_key(threshold)
+        if key is not None:
+            key = (key, mesh_key(self.mesh))
+            val = self.bdcache.get(key, None)
+            if val is not None:
+                self.bdcache.move_to_end(key)
+                return val
+
+        mesh = self.mesh
+        TD = self.TD
+        gdof = self.number_of_global_dofs()
+        if not isinstance(getattr(self.dof, 'base', self.dof), LinearMeshCFEDof):
+            index = np.nonzero(self.is_boundary_dof(threshold=threshold))[0]
+            return index, self.interpolation_points()[index]
+
+        cell2dof = self.dof.cell2dof
+        if (type(threshold) is np.ndarray) and (threshold.dtype == np.bool_) \
+                and (len(threshold) == gdof):
+            # 给定的是自由度的标记，对每个自由度取含有它的某个单元
+            index = np.nonzero(threshold)[0]
+            loc = np.zeros(gdof, dtype=cell2dof.dtype)
+            loc[cell2dof] = np.arange(cell2dof.shape[0])[:, None]
+            cells = np.unique(loc[index])
+        else:
+            if type(threshold) is np.ndarray:
+                findex = threshold
+            else:
+                findex = mesh.ds.boundary_face_index()
+                if callable(threshold):
+                    bc = mesh.entity_barycenter(TD-1, index=findex)
+                    findex = findex[threshold(bc)]
+            index = np.unique(self.dof.face_to_dof(index=findex))
+            cells = np.unique(mesh.ds.face_to_cell()[findex, 0])
+
+        # 在这些单元上计算局部插值点，取出属于边界自由度的那些
+        c2d = cell2dof[cells]
+        pos = np.minimum(np.searchsorted(index, c2d), max(len(index)-1, 0))
+        flag = index[pos] == c2d if len(index) > 0 else np.zeros(c2d.shape, dtype=np.bool_)
+        ps = mesh.bc_to_point(self.cell_interpolation_bcs(), index=cells) # (ldof, NC, GD)
+        ipoints = np.zeros((len(index), ps.shape[-1]), dtype=self.ftype)
+        ipoints[pos[flag]] = ps.swapaxes(0, 1)[flag]
+
+        # 缓存的数组直接返回给调用者，设为只读以免被修改后污染缓存
+        index.setflags(write=False)
+        ipoints.setflags(write=False)
+        val = (index, ipoints)
+        if key is not None:
+            self.bdcache[key] = val
+            if len(self.bdcache) > self.bdcachesize:
+                self.bdcache.popitem(last=False)
+        return val
+
+    def cell_interpolation_bcs(self):
+        """
+        @brief The barycentric coordinates of the local interpolation points in
+        the order of `cell_to_dof`, a tuple of 1D coordinates on tensor product cells.
+        """
+        p = self.p
+        mesh = self.mesh
+        if mesh.meshtype in {'quad', 'hex'}:
+            return self.TD*(mesh.multi_index_matrix(p, 1)/p, )
+        return mesh.multi_index_matrix(p, self.TD)/p
+
     def geo_dimension(self):
         return self.GD
 
@@ -155,6 +306,61 @@ class LagrangeFESpace():
             val = np.sum(phi[..., 0, :]*uh[e2d], axis=-1)
         return loc, val 
 
+    def _topology_key(self):
+        """
+        @brief 网格拓扑的键，网格加密后改变，无法计算时返回 None
+        """
+        return array_key(self.mesh.entity('cell'))
+
+    def _geometry_key(self, topology=None):
+        """
+        @brief 网格几何的键，节点移动或者网格加密后改变，无法计算时返回 None
+        """
+        if topology is None:
+            topology = self._topology_key()
+        key = (array_key(self.mesh.entity('node')), topology)
+        return None if None in key else key
+
+    def _tabulate(self, name, bc, index, geometry=()):
+        """
+        @brief 带缓存地计算基函数 (name='basis') 或其梯度 (name='grad_basis') 的表
+
+        @param[in] geometry 网格几何的键，表依赖于网格几何时给出，为 None 时不缓存
+        """
+        bkey = array_key(bc)
+        ikey = array_key(index)
+        key = None
+        if (bkey is not None) and (ikey is not None) and (geometry is not None):
+            key = (name, bkey, ikey, geometry)
+        val = self.cache.get(key)
+        if val is None:
+            val = getattr(self, name)(bc, index=index)
+            self.cache.put(key, val)
+        return val
+
+    def _cell_to_dof(self, index, topology):
+        """
+        @brief 带缓存的 cell_to_dof，topology 为 None 时不缓存
+        """
+        ikey = array_key(index)
+        key = None
+        if (ikey is not None) and (topology is not None):
+            key = ('cell2dof', ikey, topology)
+        val = self.cache.get(key)
+        if val is None:
+            val = self.dof.cell_to_dof(index=index)
+            self.cache.put(key, val)
+        return val
+
+    def _value_key(self, name, uh, bc, index, geometry=()):
+        fkey = function_key(uh)
+        bkey = array_key(bc)
+        ikey = array_key(index)
+        if (fkey is None) or (bkey is None) or (ikey is None) or (geometry is None):
+            return None
+        NC = self.mesh.number_of_cells()
+        return (name, fkey, bkey, ikey, NC, self.doforder, geometry)
+
     @barycentric
     def value(self, 
             uh: np.ndarray, 
@@ -173,10 +379,18 @@ class LagrangeFESpace():
         This function takes the dof coefficients of the finite element function `uh` and a set of barycentric
         coordinates `bc` for each mesh cell. It computes the function values at these coordinates
         and returns the results as a numpy.ndarray.
+
+        @note If `uh` is a `Function`, the result is cached by the content of
+        `uh`, `bc` and `index`, and a copy of the cached result is returned.
         """
-        gdof = self.number_of_global_dofs()
-        phi = self.basis(bc, index=index) # (NQ, NC, ldof)
-        cell2dof = self.dof.cell_to_dof(index=index)
+        topology = self._topology_key()
+        key = self._value_key('value', uh, bc, index, geometry=topology)
+        val = self.cache.get(key)
+        if val is not None:
+            return val.copy()
+
+        phi = self._tabulate('basis', bc, index) # (NQ, NC, ldof)
+        cell2dof = self._cell_to_dof(index, topology)
 
         dim = len(uh.shape) - 1
         s0 = 'abdefg'
@@ -196,6 +410,11 @@ class LagrangeFESpace():
             val = np.einsum(s1, phi, uh[cell2dof, ...])
         else:
             raise ValueError(f"Unsupported doforder: {self.doforder}. Supported types are: 'sdofs' and 'vdims'.")
+
+        if key is not None:
+            val = np.asarray(val)
+            self.cache.put(key, val)
+            return val.copy()
         return val
 
 
@@ -207,10 +426,19 @@ class LagrangeFESpace():
             ) -> np.ndarray:
         """
         @brief 
+
+        @note 与 value 一样，uh 为 Function 时按 uh 的内容、bc、index 和网格
+              几何缓存结果，返回缓存结果的副本
         """
-        gdof = self.number_of_global_dofs()
-        gphi = self.grad_basis(bc, index=index)
-        cell2dof = self.dof.cell_to_dof(index=index)
+        topology = self._topology_key()
+        geometry = self._geometry_key(topology)
+        key = self._value_key('grad_value', uh, bc, index, geometry=geometry)
+        val = self.cache.get(key)
+        if val is not None:
+            return val.copy()
+
+        gphi = self._tabulate('grad_basis', bc, index, geometry=geometry)
+        cell2dof = self._cell_to_dof(index, topology)
         dim = len(uh.shape) - 1
         s0 = 'abdefg'
 
@@ -236,6 +464,11 @@ class LagrangeFESpace():
             val = np.einsum(s1, gphi, uh[cell2dof[index], ...])
         else:
             raise ValueError(f"Unsupported doforder: {self.doforder}. Supported types are: 'sdofs' and 'vdims'.")
+
+        if key is not None:
+            val = np.asarray(val)
+            self.cache.put(key, val)
+            return val.copy()
         return val
 
 
@@ -255,12 +488,13 @@ class LagrangeFESpace():
         This function sets the Dirichlet boundary conditions for the FE function `uh`. It supports
         different types for the boundary condition `gD`, such as a function, a scalar, or a numpy array.
         """
-        ipoints = self.interpolation_points() # TODO: 直接获取过滤后的插值点
-        isDDof = self.is_boundary_dof(threshold=threshold)
+        index, ipoints = self.boundary_dof(threshold=threshold)
+        isDDof = np.zeros(self.number_of_global_dofs(), dtype=np.bool_)
+        isDDof[index] = True
         GD = self.geo_dimension()
 
         if callable(gD): 
-            gD = gD(ipoints[isDDof])
+            gD = gD(ipoints)
 
 
         if (len(uh.shape) == 1) or (self.doforder == 'vdims'):
@@ -1,69 +1,278 @@
-import numba
 import numpy as np
 
+from ..mesh.node_set import cell_list_pairs
+
 class NodeSetKernelSpace:
-    
-    def __init__(self, mesh, ker='Quintic', H=1):
+
+    def __init__(self, mesh, ker='Quintic', H=1, skin=0.0):
         """
-        @brief 
+        @brief
 
         @param[in] mesh NodeSet 类型的网格
         @param[in] ker str kernel 函数计算的字符串
+        @param[in] H 光滑长度，核函数的支集半径为 2H
+        @param[in] skin 邻居表的缓冲层厚度，见 NodeSet.neighbor_list
+
+        @note 求和算子都作用在 i < j 的点对上，每个点对只计算一次，再利用
+              \\nabla W_ji = -\\nabla W_ij 用 bincount 同时累加到 i 和 j 上。
+              点移动之后要调用 update 重新计算点对上的数据。
         """
+        if ker != 'Quintic':
+            raise ValueError(f"unsupported kernel '{ker}'")
         self.mesh = mesh
         self.ker = ker
         self.H = H
-         
-    @numba.jit(nopython=True)
+        self.skin = skin
+
+        GD = mesh.dimension()
+        if GD == 2:
+            self.coef = 7/(4*np.pi*H**2)
+        elif GD == 3:
+            self.coef = 21/(16*np.pi*H**3)
+        else:
+            raise ValueError(f"the Quintic kernel is not defined in {GD}D")
+
+        self.pairs = None
+
+    def support(self):
+        return 2*self.H
+
+    def _kernel(self, d):
+        q = np.minimum(d/self.H, 2.0)
+        t = 1 - q/2
+        t *= t
+        return self.coef * t*t * (2*q+1)
+
+    def _grad_kernel(self, d):
+        """
+        @brief 核函数的梯度为 r * _grad_kernel(|r|)
+        """
+        q = np.minimum(d/self.H, 2.0)
+        t = 1 - q/2
+        return (-5*self.coef/self.H**2) * t*t*t
+
     def kernel(self, r):
-        choose = self.ker
-        d = np.sqrt(np.sum(r**2, axis=-1))
-        H = self.H
-        q = d/H
-        if choose == 'Quintic':
-            val = 7 * (1-q/2)**4 * (2*q+1) / (4*np.pi*H**2)        
-        return val
-
-    @numba.jit(nopython=True)
-    def Quintic_kernel(self, r):
+        """
+        @brief 核函数 W(r)
+
+        @param[in] r 形状为 (..., GD) 的相对位置
+        """
         d = np.sqrt(np.sum(r**2, axis=-1))
-        q = d/H
-        val = 7 * (1-q/2)**4 * (2*q+1) / (4*np.pi*H**2)
-        return val
+        return self._kernel(d)
 
     def grad_kernel(self, r):
-        d = np.sqrt(np.sum(r**2))
-        H = self.H
-        q = d/H
-        choose = self.ker
-
-        if choose == 'Quintic':
-            val = -35/(4*np.pi*H**3) * q * (1-q/2)**3
-            val *= r
-            if d==0:
-                val = 0
-            else :
-                val /= d
-        return val
-
-    def value(self, u, points):
-        """
-        @brief 
+        """
+        @brief 核函数的梯度 \\nabla W(r)
+
+        @param[in] r 形状为 (..., GD) 的相对位置
+        """
+        d = np.sqrt(np.sum(r**2, axis=-1))
+        return self._grad_kernel(d)[..., None] * r
+
+    def update(self):
+        """
+        @brief 按点当前的位置重新计算点对上的数据
+
+        @note 点对取自 Verlet 表的候选点对，其中距离超过 2H 的点对上核函数及其
+              梯度都是 0，不需要再过滤。点对上的向量按分量存成形状为 (GD, NP)
+              的数组，逐个分量做 gather 和 bincount 比在 (NP, GD) 的数组上快得多。
+        """
+        node = self.mesh.node
+        i, j = self.mesh.neighbor_pairs(self.support(), skin=self.skin, half=True)
+        rij = np.stack([x.take(i) - x.take(j) for x in node.T])
+        d = np.sqrt(np.einsum('ij, ij->j', rij, rij))
+        self.pairs = (i, j, rij, d, self._grad_kernel(d)*rij)
+        return self.pairs
+
+    def pair_data(self):
+        """
+        @brief i < j 的点对的数据 (i, j, r_ij, |r_ij|, \\nabla_i W_ij)，
+               向量的形状为 (GD, NP)
+        """
+        if self.pairs is None:
+            self.update()
+        return self.pairs
+
+    def _sum(self, i, j, a, b, N):
+        """
+        @brief 把点对上的值 a 累加到 i 上，b 累加到 j 上
+
+        @param[in] a, b 形状为 (NP, ) 的标量或者 (GD, NP) 的向量
+        """
+        if a.ndim == 1:
+            return np.bincount(i, weights=a, minlength=N) + np.bincount(j, weights=b, minlength=N)
+        return np.stack([np.bincount(i, weights=u, minlength=N) +
+            np.bincount(j, weights=v, minlength=N) for u, v in zip(a, b)], axis=-1)
+
+    def _diff(self, i, j, u):
+        """
+        @brief 点对上的差 u_i - u_j，向量按分量返回
+        """
+        if u.ndim == 1:
+            return u.take(i) - u.take(j)
+        return np.stack([v.take(i) - v.take(j) for v in u.T])
+
+    def _mass(self, mass):
+        if mass is None:
+            mass = self.mesh.nodedata['mass']
+        return np.broadcast_to(mass, (self.mesh.number_of_nodes(), ))
+
+    def volume(self):
+        """
+        @brief 点的体积 m/rho，没有质量或密度数据时返回 None
+        """
+        data = self.mesh.nodedata
+        if ('mass' in data) and ('rho' in data):
+            return data['mass']/data['rho']
+        return None
+
+    def _point_pairs(self, points):
+        """
+        @brief 查询点与节点构成的点对 (i, j, x_i - x_j)，向量的形状为 (GD, NP)
+        """
+        node = self.mesh.node
+        indptr, j = cell_list_pairs(node, self.support(), points=points)
+        i = np.repeat(np.arange(len(points)), np.diff(indptr))
+        return i, j, (points[i] - node[j]).T
+
+    def value(self, u, points=None):
+        """
+        @brief
         @param[in] u 定义在节点上的物理量的值
-        @param[in] points 需要求值的点 
+        @param[in] points 需要求值的点，None 表示在节点上求值
 
         @return 物理量在 points 处的函数值
+
+        @note 有体积时用 \\sum_j V_j u_j W(x - x_j)，否则用 Shepard 归一化
         """
-        pass
+        NN = self.mesh.number_of_nodes()
+        vol = self.volume()
+        shepard = vol is None
+        if shepard:
+            vol = np.ones(NN)
 
+        shape = u.shape[1:]
+        u = u.reshape(NN, -1)
+        if points is None:
+            N = NN
+            i, j, _, d, _ = self.pair_data()
+            w = self._kernel(d)
+            wi = w*vol.take(i)
+            wj = w*vol.take(j)
+            val = np.stack([self._sum(i, j, wj*v.take(j), wi*v.take(i), N) for v in u.T], axis=-1)
+            s = self._sum(i, j, wj, wi, N)
+            w0 = self._kernel(0.0)*vol
+            val += w0[:, None]*u
+            s += w0
+        else:
+            N = len(points)
+            i, j, rij = self._point_pairs(points)
+            wj = self._kernel(np.sqrt(np.sum(rij**2, axis=0)))*vol.take(j)
+            val = np.stack([np.bincount(i, weights=wj*v.take(j), minlength=N) for v in u.T], axis=-1)
+            s = np.bincount(i, weights=wj, minlength=N)
 
-    def grad_value(self, u, points):
+        if shepard:
+            s[s == 0] = 1
+            val /= s[:, None]
+        return val.reshape((N, ) + shape)
+
+    def grad_value(self, u, points=None):
         """
-        @brief 
+        @brief
         @param[in] u 定义在节点上的物理量的值
-        @param[in] points 需要求值的点 
+        @param[in] points 需要求值的点，None 表示在节点上求值
 
         @return 物理量在 points 处的梯度值
+
+        @note 用差分形式 \\sum_j V_j (u_j - u(x)) \\nabla W(x - x_j)，常数的梯度
+              为 0。在节点上 u(x) 就是节点的值，在其它点上 u(x) 用 Shepard 插值
+        """
+        NN = self.mesh.number_of_nodes()
+        vol = self.volume()
+        if vol is None:
+            raise ValueError("grad_value needs 'mass' and 'rho' node data")
+
+        shape = u.shape[1:]
+        u = u.reshape(NN, -1)
+        if points is None:
+            N = NN
+            i, j, _, _, gw = self.pair_data()
+            vi = vol.take(i)
+            vj = vol.take(j)
+            val = []
+            for v in u.T:
+                uji = v.take(j) - v.take(i)
+                val.append(self._sum(i, j, (vj*uji)*gw, (vi*uji)*gw, N))
+        else:
+            N = len(points)
+            i, j, rij = self._point_pairs(points)
+            d = np.sqrt(np.sum(rij**2, axis=0))
+            vj = vol.take(j)
+            wj = self._kernel(d)*vj
+            gw = (self._grad_kernel(d)*vj)*rij
+            s = np.bincount(i, weights=wj, minlength=N)
+            s[s == 0] = 1
+            val = []
+            for v in u.T:
+                ux = np.bincount(i, weights=wj*v.take(j), minlength=N)/s
+                uji = v.take(j) - ux.take(i)
+                val.append(np.stack([np.bincount(i, weights=uji*g, minlength=N)
+                    for g in gw], axis=-1))
+        return np.stack(val, axis=1).reshape((N, ) + shape + (-1, ))
+
+    def density(self, mass=None):
+        """
+        @brief 求和密度 rho_i = \\sum_j m_j W_ij，包括点自身
+        """
+        mass = self._mass(mass)
+        i, j, _, d, _ = self.pair_data()
+        w = self._kernel(d)
+        return self._sum(i, j, mass.take(j)*w, mass.take(i)*w, len(mass)) + mass*self._kernel(0.0)
+
+    def continuity(self, velocity, mass=None):
+        """
+        @brief 连续性方程的右端 drho_i/dt = \\sum_j m_j (v_i - v_j) \\cdot \\nabla W_ij
         """
-        pass
+        mass = self._mass(mass)
+        i, j, _, _, gw = self.pair_data()
+        val = np.einsum('ij, ij->j', self._diff(i, j, velocity), gw)
+        return self._sum(i, j, mass.take(j)*val, mass.take(i)*val, len(mass))
 
+    def pressure_force(self, pressure, rho, mass=None):
+        """
+        @brief 压力产生的加速度
+            -\\sum_j m_j (p_i/rho_i^2 + p_j/rho_j^2) \\nabla W_ij
+        """
+        mass = self._mass(mass)
+        i, j, _, _, gw = self.pair_data()
+        c = pressure/rho**2
+        val = c.take(i) + c.take(j)
+        return self._sum(i, j, (-mass.take(j)*val)*gw, (mass.take(i)*val)*gw, len(mass))
+
+    def viscosity_force(self, velocity, rho, mu, mass=None):
+        """
+        @brief Morris 形式的粘性力产生的加速度
+            \\sum_j m_j (mu_i + mu_j) r_ij \\cdot \\nabla W_ij
+                / (rho_i rho_j (|r_ij|^2 + 0.01 H^2)) v_ij
+
+        @param[in] mu 动力粘性系数，标量或定义在节点上
+        """
+        mass = self._mass(mass)
+        mu = np.broadcast_to(mu, mass.shape)
+        i, j, rij, d, gw = self.pair_data()
+        val = (mu.take(i) + mu.take(j))*np.einsum('ij, ij->j', rij, gw)
+        val /= rho.take(i)*rho.take(j)*(d*d + 0.01*self.H**2)
+        vij = self._diff(i, j, velocity)
+        return self._sum(i, j, (mass.take(j)*val)*vij, (-mass.take(i)*val)*vij, len(mass))
+
+    def artificial_viscosity(self, velocity, rho, sound, alpha=0.3, mass=None):
+        """
+        @brief Monaghan 人工粘性产生的加速度 -\\sum_j m_j Pi_ij \\nabla W_ij
+        """
+        mass = self._mass(mass)
+        i, j, rij, d, gw = self.pair_data()
+        rv = np.einsum('ij, ij->j', rij, self._diff(i, j, velocity))
+        mu = self.H*rv/(d*d + 0.01*self.H**2)
+        pi = -alpha*(sound.take(i) + sound.take(j))/(rho.take(i) + rho.take(j))*mu
+        pi[rv >= 0] = 0
+        return self._sum(i, j, (-mass.take(j)*pi)*gw, (mass.take(i)*pi)*gw, len(mass))
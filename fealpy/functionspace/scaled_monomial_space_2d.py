@@ -101,6 +101,8 @@ class ScaledMonomialSpace2d():
         self.itype = self.mesh.itype
         self.ftype = self.mesh.ftype
 
+        # 单元上缩放单项式的几何矩缓存，见 `cell_moments`
+        self.moments = None
 
     def diff_index_1(self, p=None):
         """
@@ -588,12 +590,7 @@ class ScaledMonomialSpace2d():
         """
         p = self.p if p is None else p
 
-        @cartesian
-        def f(x, index):
-            gphi = self.grad_basis(x, index=index, p=p)
-            return np.einsum('ijkm, ijpm->ijkp', gphi, gphi)
-
-        A = self.integralalg.cell_integral(f, q=p+3)
+        A = self.cell_stiff_matrix(p=p)
         cell2dof = self.cell_to_dof(p=p)
         ldof = self.number_of_local_dofs(p=p, doftype='cell')
         I = np.einsum('k, ij->ijk', np.ones(ldof), cell2dof)
@@ -975,41 +972,126 @@ class ScaledMonomialSpace2d():
                 q=q) 
         return F 
 
-    def matrix_H(self, p=None):
-        p = self.p if p is None else p
+    def cell_moments(self, n, index=np.s_[:]):
+        """
+        @brief 计算每个单元上所有次数不超过 n 的缩放单项式的积分（几何矩）
+               \int_K m_\alpha dx, |\alpha| <= n
+
+        @note 几何矩缓存在空间对象上，只有需要更高次数时才重新计算。因为缩放
+              单项式按次数分层编号，低次的矩就是高次矩的前缀。所有次数的质量
+              矩阵和刚度矩阵都由这些矩通过索引得到，不再做数值积分。
+        """
+        ldof = self.number_of_local_dofs(p=n, doftype='cell')
+        if (self.moments is None) or (self.moments.shape[1] < ldof):
+            NC = self.mesh.number_of_cells()
+            self.moments = self.compute_cell_moments(n, np.ones(NC, dtype=np.bool_))
+        return self.moments[index, :ldof]
+
+    def compute_cell_moments(self, n, isCell):
+        """
+        @brief 利用散度定理在边上计算标记单元上次数不超过 n 的几何矩
+
+        @param[in] isCell 长度为 NC 的布尔数组，标记需要计算的单元
+
+        @note 对 n 次齐次的 m_\alpha 有 div((x - x_K) m_\alpha) = (n + 2) m_\alpha,
+              而 (x - x_K)\cdot n_e 在每条边上是常数。
+        """
         mesh = self.mesh
         node = mesh.entity('node')
-
         edge = mesh.entity('edge')
         edge2cell = mesh.ds.edge_to_cell()
-
-        isInEdge = (edge2cell[:, 0] != edge2cell[:, 1])
+        nm = mesh.edge_normal()
 
         NC = mesh.number_of_cells()
+        ldof = self.number_of_local_dofs(p=n, doftype='cell')
 
-        qf = GaussLegendreQuadrature(p + 1)
+        qf = GaussLegendreQuadrature(n//2 + 1)
         bcs, ws = qf.quadpts, qf.weights
         ps = np.einsum('ij, kjm->ikm', bcs, node[edge])
-        phi0 = self.basis(ps, index=edge2cell[:, 0], p=p)
-        phi1 = self.basis(ps[:, isInEdge, :], index=edge2cell[isInEdge, 1], p=p)
-        H0 = np.einsum('i, ijk, ijm->jkm', ws, phi0, phi0)
-        H1 = np.einsum('i, ijk, ijm->jkm', ws, phi1, phi1)
 
-        nm = mesh.edge_normal()
-        b = node[edge[:, 0]] - self.cellbarycenter[edge2cell[:, 0]]
-        H0 = np.einsum('ij, ij, ikm->ikm', b, nm, H0)
-        b = node[edge[isInEdge, 0]] - self.cellbarycenter[edge2cell[isInEdge, 1]]
-        H1 = np.einsum('ij, ij, ikm->ikm', b, -nm[isInEdge], H1)
+        moments = np.zeros((NC, ldof), dtype=self.ftype)
+        for i, sign in zip((0, 1), (1, -1)):
+            flag = isCell[edge2cell[:, i]]
+            if i == 1:
+                flag &= (edge2cell[:, 0] != edge2cell[:, 1])
+            cidx = edge2cell[flag, i]
+            phi = self.basis(ps[:, flag], index=cidx, p=n)
+            b = node[edge[flag, 0]] - self.cellbarycenter[cidx]
+            val = np.einsum('i, ijk, j->jk', ws, phi, sign*np.sum(b*nm[flag], axis=-1))
+            np.add.at(moments, cidx, val)
+
+        multiIndex = self.dof.multi_index_matrix(p=n)
+        q = np.sum(multiIndex, axis=1)
+        moments /= q + 2
+        return moments
 
-        ldof = self.number_of_local_dofs(p=p, doftype='cell')
-        H = np.zeros((NC, ldof, ldof), dtype=self.ftype)
-        np.add.at(H, edge2cell[:, 0], H0)
-        np.add.at(H, edge2cell[isInEdge, 1], H1)
+    def inherit_cell_moments(self, space):
+        """
+        @brief 从另一个缩放单项式空间（例如自适应加密前网格上的空间）继承
+               未改变单元的几何矩，只对新单元计算几何矩
 
+        @note 两个单元的重心、面积和尺寸完全相同时认为是同一个单元
+        """
+        if space.moments is None:
+            return
+        n = int(np.floor((-3 + np.sqrt(1 + 8*space.moments.shape[1]))/2))
+
+        key0 = np.c_[self.cellbarycenter, self.cellmeasure, self.cellsize]
+        key1 = np.c_[space.cellbarycenter, space.cellmeasure, space.cellsize]
+        _, i, j = np.unique(np.r_[key1, key0], axis=0,
+                return_index=True, return_inverse=True)
+        j = j.reshape(-1)
+        NC0 = len(key1)
+        idx = i[j[NC0:]] # 每个新单元在合并数组中第一次出现的位置
+        isOld = idx < NC0
+
+        moments = self.compute_cell_moments(n, ~isOld)
+        moments[isOld] = space.moments[idx[isOld]]
+        self.moments = moments
+
+    def moment_index(self, p=None):
+        """
+        @brief 两个 p 次缩放单项式的乘积在 2p 次几何矩中的编号
+
+        @return 形状为 (ldof, ldof) 的整数数组 I，满足 m_i m_j = m_{I[i, j]}
+        """
+        p = self.p if p is None else p
         multiIndex = self.dof.multi_index_matrix(p=p)
         q = np.sum(multiIndex, axis=1)
-        H /= q + q.reshape(-1, 1) + 2
-        return H
+        q = q + q.reshape(-1, 1)
+        b = multiIndex[:, 1] + multiIndex[:, [1]]
+        return q*(q + 1)//2 + b
+
+    def matrix_H(self, p=None):
+        """
+        @brief 单元上缩放单项式的质量矩阵，由缓存的几何矩通过索引得到
+        """
+        p = self.p if p is None else p
+        moments = self.cell_moments(2*p)
+        return moments[:, self.moment_index(p=p)]
+
+    def cell_stiff_matrix(self, p=None):
+        """
+        @brief 单元上缩放单项式的刚度矩阵 (\nabla m_i, \nabla m_j)_K，
+               由缓存的几何矩通过索引得到
+        """
+        p = self.p if p is None else p
+        NC = self.mesh.number_of_cells()
+        ldof = self.number_of_local_dofs(p=p, doftype='cell')
+        A = np.zeros((NC, ldof, ldof), dtype=self.ftype)
+        if p == 0:
+            return A
+
+        # m_i 的偏导数为 \alpha_x m_{i - e_x}/h，所以只需用到 2p - 2 次的矩
+        moments = self.cell_moments(2*p - 2)
+        ldof0 = self.number_of_local_dofs(p=p-1, doftype='cell')
+        I = self.moment_index(p=p-1)
+        idx = np.arange(ldof0)
+        dindex = self.diff_index_1(p=p)
+        for i, c in (dindex['x'], dindex['y']):
+            A[:, i[:, None], i] += moments[:, I[idx[:, None], idx]]*(c[:, None]*c)
+        A /= self.cellmeasure[:, None, None]
+        return A
 
     def local_projection(self, f, q=None):
         """
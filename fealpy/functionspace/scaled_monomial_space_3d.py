@@ -105,6 +105,9 @@ class ScaledMonomialSpace3d():
 
         self.itype = self.mesh.itype
         self.ftype = self.mesh.ftype
+
+        # 单元上缩放单项式的几何矩缓存，见 `cell_moments`
+        self.moments = None
     
     def geo_dimension(self):
         return self.GD
@@ -422,10 +425,68 @@ class ScaledMonomialSpace3d():
 
     def cell_mass_matrix(self, p=None):
         """
+        @brief 单元上缩放单项式的质量矩阵，由缓存的几何矩通过索引得到
+        """
+        p = self.p if p is None else p
+        moments = self.cell_moments(2*p)
+        return moments[:, self.moment_index(p=p)]
+
+    def cell_moments(self, n, index=np.s_[:]):
+        """
+        @brief 计算每个单元上所有次数不超过 n 的缩放单项式的积分（几何矩）
+
+        @note 几何矩缓存在空间对象上，只有需要更高次数时才重新计算，低次的矩
+              就是高次矩的前缀。这里用四面体上的数值积分计算，取代数精度不低于 n
+              的最小的积分公式，积分公式最高为 9 阶，所以 n > 9 时抛出异常。
+        """
+        if n > 9:
+            raise ValueError(f"no exact tetrahedron quadrature for moments of degree {n} > 9")
+        ldof = self.number_of_local_dofs(p=n, doftype='cell')
+        if (self.moments is None) or (self.moments.shape[1] < ldof):
+            mesh = self.mesh
+            # TetrahedronQuadrature 第 q 个公式的代数精度
+            order = [1, 2, 3, 5, 6, 8, 9]
+            q = 1 + np.searchsorted(order, n)
+            qf = mesh.integrator(q, etype='cell')
+            bcs, ws = qf.get_quadrature_points_and_weights()
+            ps = mesh.bc_to_point(bcs)
+            phi = self.basis(ps, p=n)
+            self.moments = np.einsum('q, qcl, c->cl', ws, phi, self.cellmeasure)
+        return self.moments[index, :ldof]
+
+    def multi_index_matrix(self, p=None):
+        """
+        @brief 与 `basis` 中编号一致的缩放单项式的指数
         """
-        b = (self.basis, None, None)
-        M = self.integralalg.serial_construct_matrix(b)
-        return M 
+        p = self.p if p is None else p
+        ldof = self.number_of_local_dofs(p=p, doftype='cell')
+        multiIndex = np.zeros((ldof, 3), dtype=np.int_)
+        if p == 0:
+            return multiIndex
+        multiIndex[1:4] = np.eye(3, dtype=np.int_)
+        start = 4
+        for i in range(2, p+1):
+            n = (i+1)*i//2
+            multiIndex[start:start+n] = multiIndex[start-n:start] + (1, 0, 0)
+            multiIndex[start+n:start+n+i] = multiIndex[start-i:start] + (0, 1, 0)
+            multiIndex[start+n+i] = multiIndex[start-1] + (0, 0, 1)
+            start += n + i + 1
+        return multiIndex
+
+    def moment_index(self, p=None):
+        """
+        @brief 两个 p 次缩放单项式的乘积在 2p 次几何矩中的编号
+
+        @return 形状为 (ldof, ldof) 的整数数组 I，满足 m_i m_j = m_{I[i, j]}
+        """
+        p = self.p if p is None else p
+        multiIndex = self.multi_index_matrix(p=2*p)
+        table = np.zeros((2*p+1, )*3, dtype=np.int_)
+        table[tuple(multiIndex.T)] = np.arange(len(multiIndex))
+
+        multiIndex = self.multi_index_matrix(p=p)
+        index = multiIndex[:, None, :] + multiIndex[None, :, :]
+        return table[index[..., 0], index[..., 1], index[..., 2]]
 
     def face_mass_matrix(self, p=None):
         p = self.p if p is None else p
@@ -73,6 +73,9 @@ class CircleDomain:
     def signed_dist_function(self, p):
         return self.curve(p) 
 
+    def grad_signed_dist_function(self, p):
+        return self.curve.gradient(p)
+
     def sizing_function(self, p):
         return self.fh(p, self)
 
@@ -0,0 +1,326 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.sparse import csr_matrix, coo_matrix
+
+
+def adjacency_graph(G):
+    """
+    @brief 由稀疏矩阵的非零元结构得到对称、无对角元的邻接图
+
+    @param[in] G 形状为 (n, n) 的稀疏矩阵，如 node_to_node()、cell_to_cell 或刚度矩阵
+    """
+    G = coo_matrix(G)
+    flag = (G.row != G.col) & (G.data != 0)
+    i = G.row[flag]
+    j = G.col[flag]
+    n = G.shape[0]
+    G = csr_matrix((np.ones(2*len(i), dtype=np.bool_), (np.r_[i, j], np.r_[j, i])),
+            shape=(n, n))
+    G.sum_duplicates()
+    return G
+
+
+def _max_neighbor(G, val):
+    """
+    @brief 每个顶点的邻居上 val 的最大值，没有邻居时为 -1
+    """
+    n = G.shape[0]
+    out = np.full(n, -1, dtype=val.dtype)
+    isNonEmpty = np.diff(G.indptr) > 0
+    if np.any(isNonEmpty):
+        out[isNonEmpty] = np.maximum.reduceat(val[G.indices], G.indptr[:-1][isNonEmpty])
+    return out
+
+
+def _smallest_free_color(G, colors, idx):
+    """
+    @brief 顶点 idx 的邻居没有用到的最小的颜色
+
+    @note 邻居的颜色按每 64 个一段编码成 uint64 的位掩码，用 bitwise_or.reduceat
+          按行合并，最低的零位即最小的可用颜色
+    """
+    sub = G[idx]
+    nc = colors[sub.indices]
+    indptr = sub.indptr
+    isNonEmpty = np.diff(indptr) > 0
+    out = np.full(len(idx), -1, dtype=np.int_)
+    pending = np.ones(len(idx), dtype=np.bool_)
+    base = 0
+    one = np.uint64(1)
+    while np.any(pending):
+        c = nc - base
+        bits = np.where((c >= 0) & (c < 64), one << np.clip(c, 0, 63).astype(np.uint64),
+                np.uint64(0))
+        mask = np.zeros(len(idx), dtype=np.uint64)
+        flag = isNonEmpty & pending
+        if np.any(flag):
+            mask[flag] = np.bitwise_or.reduceat(bits, indptr[:-1][isNonEmpty])[flag[isNonEmpty]]
+        free = ~mask
+        isFree = pending & (free != 0)
+        low = free[isFree] & (~free[isFree] + one)
+        out[isFree] = base + np.round(np.log2(low.astype(np.float64))).astype(np.int_)
+        pending &= ~isFree
+        base += 64
+    return out
+
+
+def jones_plassmann_coloring(G, priority=None, seed=0):
+    """
+    @brief Jones-Plassmann 着色，相邻的顶点颜色不同
+
+    @param[in] G 邻接图，稀疏矩阵，只用到非零元的结构
+    @param[in] priority 顶点的优先级，默认为随机数
+    @param[in] seed 随机优先级的种子
+
+    @return 形状为 (n, ) 的颜色编号，从 0 开始
+
+    @note 每一轮中优先级高于所有未着色邻居的顶点构成独立集，同时取邻居没有用到
+          的最小颜色。每一轮都是对邻接矩阵的几次向量化操作，随机优先级时轮数为
+          O(log n/log log n)。优先级由一个顺序给出时，结果与按这个顺序做的顺序
+          贪心着色相同。
+    """
+    G = adjacency_graph(G)
+    n = G.shape[0]
+    if priority is None:
+        priority = np.random.default_rng(seed).random(n)
+    rank = _rank(priority)
+
+    colors = np.full(n, -1, dtype=np.int_)
+    isUncolored = np.ones(n, dtype=np.bool_)
+    while np.any(isUncolored):
+        rr = np.where(isUncolored, rank, -1)
+        idx = np.nonzero(isUncolored & (rr > _max_neighbor(G, rr)))[0]
+        colors[idx] = _smallest_free_color(G, colors, idx)
+        isUncolored[idx] = False
+    return colors
+
+
+def _rank(priority):
+    """
+    @brief 把优先级转化为互不相同的整数，相同优先级时编号小的优先
+    """
+    n = len(priority)
+    order = np.lexsort((-np.arange(n), priority))
+    rank = np.zeros(n, dtype=np.int_)
+    rank[order] = np.arange(n)
+    return rank
+
+
+def _priority(order, degree, seed):
+    n = len(degree)
+    if isinstance(order, str):
+        if order == 'natural':
+            return -np.arange(n, dtype=np.float64)
+        if order == 'largest_first':
+            rng = np.random.default_rng(seed)
+            return degree + 0.5*rng.random(n)
+        raise ValueError(f"unknown greedy order '{order}'")
+    priority = np.zeros(n, dtype=np.float64)
+    priority[order] = -np.arange(n, dtype=np.float64)
+    return priority
+
+
+def greedy_coloring(G, order='largest_first', seed=0):
+    """
+    @brief 并行的贪心着色
+
+    @param[in] order 'natural'（按编号）、'largest_first'（按度数从大到小，度数
+           相同时随机）或者顶点的排列，给出冲突时的优先级
+    @param[in] seed 'largest_first' 的随机种子
+
+    @note 推测式的贪心（Gebremedhin-Manne）：每一轮所有未着色的顶点同时取已着色
+          的邻居没有用到的最小颜色，然后相邻的同色顶点中优先级低的一个放弃颜色，
+          下一轮重新选择。优先级最高的顶点不会冲突，所以每一轮都有进展，一般
+          几轮就结束，比 Jones-Plassmann 的轮数少得多；颜色数与顺序贪心相当，
+          但不保证相同。
+    """
+    G = adjacency_graph(G)
+    n = G.shape[0]
+    rank = _rank(_priority(order, np.diff(G.indptr), seed))
+
+    colors = np.full(n, -1, dtype=np.int_)
+    U = np.arange(n)
+    while len(U) > 0:
+        colors[U] = _smallest_free_color(G, colors, U)
+        # 新着色的顶点之间的冲突，邻居的优先级更高时放弃
+        sub = G[U]
+        row = np.repeat(U, np.diff(sub.indptr))
+        col = sub.indices
+        isLoser = (colors[col] == colors[row]) & (rank[col] > rank[row])
+        U = np.unique(row[isLoser])
+        colors[U] = -1
+    return colors
+
+
+def _or_rows(A, bits):
+    """
+    @brief 稀疏矩阵 A 的每一行上 bits[A.indices] 的按位或
+    """
+    out = np.zeros(A.shape[0], dtype=np.uint64)
+    isNonEmpty = np.diff(A.indptr) > 0
+    if np.any(isNonEmpty):
+        out[isNonEmpty] = np.bitwise_or.reduceat(bits[A.indices], A.indptr[:-1][isNonEmpty])
+    return out
+
+
+def incidence_coloring(B, order='largest_first', seed=0):
+    """
+    @brief 关联关系的着色：属于同一组的对象颜色不同
+
+    @param[in] B 形状为 (n, m) 的稀疏矩阵，B[i, g] 非零表示对象 i 属于组 g，
+           如单元-节点关系（有公共节点的单元颜色不同）
+    @param[in] order 冲突时的优先级，见 greedy_coloring
+
+    @note 与对 B B^T 做 greedy_coloring 的结果等价，但不需要形成 B B^T。四面体
+          网格上单元通过节点的邻接图每行约有 75 个非零元，而 B 每行只有 4 个。
+          每一轮先按组合并已着色对象的颜色位掩码，再按对象合并它所属的组的掩码，
+          取最低的零位；同一组中新选了相同颜色的对象只保留优先级最高的一个。
+    """
+    B = csr_matrix(B)
+    B.data[:] = 1
+    Bt = B.T.tocsr()
+    n = B.shape[0]
+    degree = np.asarray((B@(Bt@np.ones(n))) - np.asarray(B.sum(axis=1)).reshape(-1))
+    rank = _rank(_priority(order, degree, seed))
+
+    one = np.uint64(1)
+    colors = np.full(n, -1, dtype=np.int_)
+    U = np.arange(n)
+    while len(U) > 0:
+        BU = B[U]
+        pending = np.ones(len(U), dtype=np.bool_)
+        pick = np.full(len(U), -1, dtype=np.int_)
+        base = 0
+        while np.any(pending):
+            c = colors - base
+            bits = np.where((c >= 0) & (c < 64), one << np.clip(c, 0, 63).astype(np.uint64),
+                    np.uint64(0))
+            mask = _or_rows(BU, _or_rows(Bt, bits))
+            free = ~mask
+            flag = pending & (free != 0)
+            low = free[flag] & (~free[flag] + one)
+            pick[flag] = base + np.round(np.log2(low.astype(np.float64))).astype(np.int_)
+            pending &= ~flag
+            base += 64
+        colors[U] = pick
+
+        # 同一组中颜色相同的新着色对象只保留优先级最高的
+        item = np.repeat(U, np.diff(BU.indptr))
+        key = BU.indices*(pick.max() + 1) + colors[item]
+        idx = np.lexsort((rank[item], key))
+        key = key[idx]
+        isLast = np.r_[key[1:] != key[:-1], True]
+        U = np.unique(item[idx[~isLast]])
+        colors[U] = -1
+    return colors
+
+
+def color_classes(colors):
+    """
+    @brief 每种颜色的顶点编号（已排序）
+
+    @return 长度为颜色个数的列表
+    """
+    order = np.argsort(colors, kind='stable')
+    count = np.bincount(colors)
+    return np.split(order, np.cumsum(count)[:-1])
+
+
+def is_valid_coloring(G, colors):
+    G = coo_matrix(G)
+    flag = G.row != G.col
+    return bool(np.all(colors[G.row[flag]] != colors[G.col[flag]]))
+
+
+def _coloring(G, method, **kwargs):
+    if method == 'jp':
+        return jones_plassmann_coloring(G, **kwargs)
+    if method == 'greedy':
+        return greedy_coloring(G, **kwargs)
+    raise ValueError(f"unknown coloring method '{method}'")
+
+
+def cell_coloring(mesh, relation='node', method='greedy', **kwargs):
+    """
+    @brief 网格单元的着色
+
+    @param[in] relation 'node' 时有公共顶点的单元颜色不同，同一种颜色的单元上的
+           自由度互不相同，可以无冲突地并行累加；'face' 时只要求有公共面的单元
+           颜色不同（ds.cell_to_cell）
+    @param[in] method 'greedy'（默认）或者 'jp'
+
+    @return 颜色类的列表，每一项为单元编号的数组
+    """
+    if relation == 'node':
+        cell = mesh.entity('cell')
+        NC, NVC = cell.shape
+        NN = mesh.number_of_nodes()
+        C = csr_matrix((np.ones(NC*NVC), cell.reshape(-1),
+            np.arange(0, NC*NVC+1, NVC)), shape=(NC, NN))
+        if method == 'greedy':
+            return color_classes(incidence_coloring(C, **kwargs))
+        G = C@C.T
+    elif relation == 'face':
+        G = mesh.ds.cell_to_cell(return_sparse=True)
+    else:
+        raise ValueError(f"unknown relation '{relation}'")
+    return color_classes(_coloring(G, method, **kwargs))
+
+
+def node_coloring(mesh, relation='cell', method='greedy', **kwargs):
+    """
+    @brief 网格节点的着色
+
+    @param[in] relation 'cell' 时在同一个单元中的节点颜色不同，同一种颜色的节点
+           可以同时移动（如 Gauss-Seidel 型的网格光滑）；'edge' 时只要求同一条边
+           上的节点颜色不同（ds.node_to_node），单纯形网格上两者相同
+    """
+    if relation == 'cell':
+        cell = mesh.entity('cell')
+        NC, NVC = cell.shape
+        NN = mesh.number_of_nodes()
+        C = csr_matrix((np.ones(NC*NVC), cell.reshape(-1),
+            np.arange(0, NC*NVC+1, NVC)), shape=(NC, NN))
+        if method == 'greedy':
+            return color_classes(incidence_coloring(C.T, **kwargs))
+        G = C.T@C
+    elif relation == 'edge':
+        G = mesh.ds.node_to_node()
+    else:
+        raise ValueError(f"unknown relation '{relation}'")
+    return color_classes(_coloring(G, method, **kwargs))
+
+
+def matrix_coloring(A, method='greedy', **kwargs):
+    """
+    @brief 矩阵图的着色，同一种颜色的行之间没有耦合，用于多色 Gauss-Seidel
+    """
+    return color_classes(_coloring(A, method, **kwargs))
+
+
+def colored_scatter_add(out, index, val, classes, workers=None):
+    """
+    @brief 按颜色把 val 累加到 out[index] 上
+
+    @param[in] out 形状为 (gdof, ...) 的数组，原地修改
+    @param[in] index 形状为 (NC, ldof) 的编号，如 cell2dof
+    @param[in] val 形状为 (NC, ldof, ...) 的值
+    @param[in] classes 单元的颜色类，见 cell_coloring
+    @param[in] workers 线程个数，None 时不用线程池
+
+    @note 同一种颜色的单元的编号互不相同，所以 out[index[I]] += val[I] 不需要
+          np.add.at 的重复处理，并且可以把一种颜色分块交给多个线程同时写入
+    """
+    def add(I):
+        out[index[I]] += val[I]
+
+    if workers is None:
+        for I in classes:
+            add(I)
+        return out
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for I in classes:
+            chunks = np.array_split(I, min(workers, max(len(I), 1)))
+            list(executor.map(add, chunks))
+    return out
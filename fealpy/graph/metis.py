@@ -109,6 +109,7 @@ __version__ = '0.2a1'
 import ctypes
 from ctypes import POINTER as P, byref
 import os, sys, operator as op
+from functools import reduce
 from warnings import warn
 from collections import namedtuple
 import numpy as np
@@ -130,8 +131,10 @@ REALTYPEWIDTH = os.getenv('METIS_REALTYPEWIDTH', '32')
 
 if IDXTYPEWIDTH == '32':
     idx_t = ctypes.c_int32
+    idx_dtype = np.int32
 elif IDXTYPEWIDTH == '64':
     idx_t = ctypes.c_int64
+    idx_dtype = np.int64
 else:
     raise EnvironmentError('Env var METIS_IDXTYPEWIDTH must be "32" or "64"')
 
@@ -654,57 +657,39 @@ def adjlist_to_metis(adjlist, nodew=None, nodesz=None):
     return METIS_Graph(idx_t(n), ncon, xadj, adjncy, vwgt, vsize, adjwgt)
 
 
-def array_to_metis(adj, adjLocation, nodew=None, nodesz=None):
+def array_to_metis(adj, adjLocation, nodew=None, nodesz=None, adjw=None):
     """
-    Rudimentary adjacency list converter.
-    Primarily of use if you don't have or don't want to use NetworkX.
+    Zero-copy converter from a CSR adjacency given as NumPy arrays.
 
-    :param mesh: 
-    :param nodew: 
-    :param nodesz:
+    :param adj: the neighbours of all vertices, ``indices`` of a CSR matrix.
+    :param adjLocation: the offsets of each vertex in `adj`, ``indptr`` of a CSR matrix.
+    :param nodew: optional vertex weights, an array of shape ``(n, )`` or ``(n, ncon)``.
+    :param nodesz: optional vertex sizes.
+    :param adjw: optional edge weights with the same length as `adj`.
+
+    The arrays are passed to METIS as pointers into their buffers. Arrays that
+    already have the dtype of ``idx_t`` are not copied; others are converted once.
+    The pointers keep references to the arrays, so the buffers stay alive as long
+    as the returned graph.
 
     Note that all weights and sizes must be non-negative integers.
     """
     n = len(adjLocation) - 1
-    m2 = adjLocation[-1] 
-
-    if adj.dtype == 'int32':
-        if idx_t == ctypes.POINTER(ctypes.c_int64):
-            adj = adj.astype(np.int64)
-            adjLocation = adjLocation.astype(np.int64)
-
-            adjncy = adj.ctypes.data_as(ctypes.POINTER(ctypes.c_int64))
-            xadj = adjLocation.ctypes.data_as(ctypes.POINTER(ctypes.c_int64)) 
-        else:
-            adjncy = adj.ctypes.data_as(ctypes.POINTER(ctypes.c_int32))
-            xadj = adjLocation.ctypes.data_as(ctypes.POINTER(ctypes.c_int32)) 
-    elif adj.dtype == 'int64':
-        if idx_t == ctypes.POINTER(ctypes.c_int32):
-            raise TypeError
-        adjncy = adj.ctypes.data_as(ctypes.POINTER(ctypes.c_int32))
-        xadj = adjLocation.ctypes.data_as(ctypes.POINTER(ctypes.c_int32)) 
-    else:
-        raise TypeError
 
+    def pointer(a):
+        if a is None:
+            return None
+        a = np.ascontiguousarray(a, dtype=idx_dtype)
+        return a.ctypes.data_as(P(idx_t))
 
-    adjwgt = None 
     ncon = idx_t(1)
-    if nodew:
-        if isinstance(nodew[0], int):
-            vwgt = (idx_t*n)(*nodew)
-        else: # Assume a list of them
-            nw = len(nodew[0])
-            ncon = idx_t(nw)
-            vwgt = (idx_t*(nw*n))(*reduce(op.add,nodew))
-    else:
-        vwgt = None
-
-    if nodesz:
-        vsize = (idx_t*n)(*nodesz)
-    else:
-        vsize = None
+    if nodew is not None:
+        nodew = np.asarray(nodew)
+        if nodew.ndim == 2:
+            ncon = idx_t(nodew.shape[1])
 
-    return METIS_Graph(idx_t(n), ncon, xadj, adjncy, vwgt, vsize, adjwgt)
+    return METIS_Graph(idx_t(n), ncon, pointer(adjLocation), pointer(adj),
+            pointer(nodew), pointer(nodesz), pointer(adjw))
 
 
 ### Wrapped METIS functions ###
@@ -752,35 +737,38 @@ def part_mesh(mesh, entity='cell', nparts=2,
         adj, adjLocation = mesh.ds.node_to_node(return_array=True)
 
     graph = array_to_metis(adj, adjLocation)
+    return _part_metis_graph(graph, nparts, tpwgts, ubvec, recursive, **opts)
 
+def _part_metis_graph(graph, nparts, tpwgts=None, ubvec=None, recursive=False, **opts):
+    """
+    Partition a METIS_Graph, the result is written directly into a NumPy array.
+    """
     options = METIS_Options(**opts)
-    print(options)
-    print(options.keys());
     if tpwgts and not isinstance(tpwgts, ctypes.Array):
         if isinstance(tpwgts[0], (tuple, list)):
             tpwgts = reduce(op.add, tpwgts)
         tpwgts = (real_t*len(tpwgts))(*tpwgts)
     if ubvec and not isinstance(ubvec, ctypes.Array):
-        ubvec = (real_t*len(ubvect))(*ubvec)
+        ubvec = (real_t*len(ubvec))(*ubvec)
 
-    if tpwgts: assert len(tpwgts) == nparts * graph.ncon
-    if ubvec: assert len(ubvec) == graph.ncon
+    if tpwgts: assert len(tpwgts) == nparts * graph.ncon.value
+    if ubvec: assert len(ubvec) == graph.ncon.value
 
     nparts_var = idx_t(nparts)
 
     objval = idx_t()
-    partition = (idx_t*graph.nvtxs.value)()
+    partition = np.zeros(graph.nvtxs.value, dtype=idx_dtype)
 
     args = (byref(graph.nvtxs), byref(graph.ncon), graph.xadj,
             graph.adjncy, graph.vwgt, graph.vsize, graph.adjwgt,
             byref(nparts_var), tpwgts, ubvec, options.array,
-            byref(objval), partition)
+            byref(objval), partition.ctypes.data_as(P(idx_t)))
     if recursive:
         _METIS_PartGraphRecursive(*args)
     else:
         _METIS_PartGraphKway(*args)
 
-    return objval.value, np.ctypeslib.as_array(partition)
+    return objval.value, partition
 
 def part_graph(graph, nparts=2,
     tpwgts=None, ubvec=None, recursive=False, **opts):
@@ -873,7 +861,7 @@ def part_graph(graph, nparts=2,
             tpwgts = reduce(op.add, tpwgts)
         tpwgts = (real_t*len(tpwgts))(*tpwgts)
     if ubvec and not isinstance(ubvec, ctypes.Array):
-        ubvec = (real_t*len(ubvect))(*ubvec)
+        ubvec = (real_t*len(ubvec))(*ubvec)
 
     if tpwgts: assert len(tpwgts) == nparts * graph.ncon
     if ubvec: assert len(ubvec) == graph.ncon
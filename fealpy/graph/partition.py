@@ -0,0 +1,279 @@
+import warnings
+
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+from scipy.sparse.linalg import lobpcg
+
+from ..mesh.reordering import hilbert_order
+
+try:
+    from . import metis
+except (ImportError, RuntimeError, OSError):
+    metis = None
+
+
+def cell_adjacency(mesh):
+    """
+    @brief 单元通过公共面的邻接图
+
+    @return 形状为 (NC, NC) 的 CSR 矩阵，indptr 和 indices 即 METIS 的 xadj 和 adjncy
+    """
+    NC = mesh.number_of_cells()
+    face2cell = mesh.ds.face_to_cell()
+    isIn = face2cell[:, 0] != face2cell[:, 1]
+    i = face2cell[isIn, 0]
+    j = face2cell[isIn, 1]
+    G = csr_matrix((np.ones(2*len(i), dtype=np.int_), (np.r_[i, j], np.r_[j, i])),
+            shape=(NC, NC))
+    G.sort_indices()
+    return G
+
+
+def edge_cut(graph, parts):
+    """
+    @brief 划分切断的图的边数
+    """
+    graph = graph.tocoo()
+    return int(np.sum(parts[graph.row] != parts[graph.col])//2)
+
+
+def _split(key, weights, k0, k):
+    """
+    @brief 按 key 排序，在累计权重为 k0/k 的位置分成两部分
+    """
+    order = np.argsort(key, kind='stable')
+    if weights is None:
+        m = len(order)*k0//k
+    else:
+        cw = np.cumsum(weights[order])
+        m = int(np.searchsorted(cw, cw[-1]*k0/k))
+    return order[:m], order[m:]
+
+
+def _fiedler(graph, x0, maxiter=40):
+    """
+    @brief 子图 Laplace 矩阵的 Fiedler 向量，以 x0 为初值，与常向量正交
+    """
+    n = graph.shape[0]
+    graph = graph.astype(np.float64)
+    d = np.asarray(graph.sum(axis=1)).reshape(-1)
+    L = diags(d) - graph
+    x0 = x0 - np.mean(x0)
+    nrm = np.linalg.norm(x0)
+    if nrm == 0:
+        return x0
+    Y = np.ones((n, 1))
+    # Jacobi 预条件
+    dinv = np.divide(1.0, d, out=np.zeros_like(d), where=d > 0)
+    M = diags(dinv)
+    # 只需要近似的 Fiedler 向量来决定切分的顺序，不要求收敛
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        _, v = lobpcg(L, (x0/nrm)[:, None], Y=Y, M=M, largest=False,
+                maxiter=maxiter, tol=1e-3)
+    return v[:, 0]
+
+
+def recursive_bisection(points, nparts, method='coordinate', weights=None,
+        graph=None, refine=None):
+    """
+    @brief 递归二分，每次把点按权重比例分成两部分
+
+    @param[in] points 形状为 (N, GD) 的点，如单元的重心
+    @param[in] method 'coordinate' 沿包围盒最长的方向切分；'inertial' 沿惯性主轴
+           （点的协方差矩阵最大特征值的特征向量）切分，对斜放的区域更好
+    @param[in] weights 每个点的权重，如单元上的自由度个数
+    @param[in] graph 点之间的邻接图，refine 为 'spectral' 时需要
+    @param[in] refine 'spectral' 时用子图的 Fiedler 向量代替坐标作为切分的依据，
+           以坐标为 LOBPCG 的初值只迭代几十步，切断的边通常更少
+
+    @return 形状为 (N, ) 的分区编号
+    """
+    if method not in {'coordinate', 'inertial'}:
+        raise ValueError(f"unknown bisection method '{method}'")
+    if (refine == 'spectral') and (graph is None):
+        raise ValueError("the spectral refinement needs the adjacency graph")
+    graph = None if graph is None else csr_matrix(graph)
+    parts = np.zeros(len(points), dtype=np.int_)
+    stack = [(np.arange(len(points)), nparts, 0)]
+    while stack:
+        idx, k, offset = stack.pop()
+        if k == 1:
+            parts[idx] = offset
+            continue
+        k0 = k//2
+        p = points[idx]
+        if method == 'coordinate':
+            key = p[:, np.argmax(p.max(axis=0) - p.min(axis=0))]
+        else:
+            c = p - p.mean(axis=0)
+            _, vec = np.linalg.eigh(c.T@c)
+            key = c@vec[:, -1]
+        if (refine == 'spectral') and (len(idx) > 50):
+            key = _fiedler(graph[idx][:, idx], key)
+        w = None if weights is None else weights[idx]
+        i0, i1 = _split(key, w, k0, k)
+        stack.append((idx[i0], k0, offset))
+        stack.append((idx[i1], k - k0, offset + k0))
+    return parts
+
+
+def coordinate_bisection(points, nparts, weights=None):
+    """
+    @brief 递归坐标二分，见 recursive_bisection
+    """
+    return recursive_bisection(points, nparts, method='coordinate', weights=weights)
+
+
+def hilbert_partition(points, nparts, weights=None):
+    """
+    @brief 把点按 Hilbert 曲线排序后按权重切成 nparts 段
+
+    @note 只需要一次排序，是最快的划分，每一段在空间上是紧凑的，但分区的
+          边界比二分的更曲折
+    """
+    order = hilbert_order(points)
+    N = len(points)
+    if weights is None:
+        cw = np.arange(1, N+1, dtype=np.float64)
+    else:
+        cw = np.cumsum(weights[order])
+    parts = np.zeros(N, dtype=np.int_)
+    parts[order] = np.minimum((cw - 0.5*(cw[0] if N > 0 else 0))*nparts//cw[-1], nparts-1)
+    return parts
+
+
+def part_mesh(mesh, nparts, method='auto', weights=None, refine=None, **opts):
+    """
+    @brief 网格单元的划分
+
+    @param[in] method
+        - 'metis': 调用 METIS 的 k 路划分，邻接图以 NumPy 数组直接传给 METIS
+        - 'rcb': 单元重心的递归坐标二分
+        - 'inertial': 单元重心的递归惯性二分
+        - 'hilbert': 单元重心的 Hilbert 曲线划分
+        - 'auto': 有 METIS 时用 'metis'，否则用 'rcb'
+    @param[in] weights 单元的权重
+    @param[in] refine 'spectral' 时对二分做谱方法的改进，见 recursive_bisection
+    @param[in] opts 传给 METIS 的选项，如 seed、ufactor
+
+    @return 形状为 (NC, ) 的分区编号
+    """
+    NC = mesh.number_of_cells()
+    if nparts == 1:
+        return np.zeros(NC, dtype=np.int_)
+    if method == 'auto':
+        method = 'rcb' if metis is None else 'metis'
+
+    if method == 'metis':
+        if metis is None:
+            raise RuntimeError("METIS is not available, use method='rcb', 'inertial' or 'hilbert'")
+        G = cell_adjacency(mesh)
+        graph = metis.array_to_metis(G.indices, G.indptr, nodew=weights)
+        _, parts = metis._part_metis_graph(graph, nparts, **opts)
+        return parts.astype(np.int_)
+
+    points = mesh.entity_barycenter('cell')
+    if method == 'hilbert':
+        return hilbert_partition(points, nparts, weights=weights)
+    if method in {'rcb', 'inertial'}:
+        graph = cell_adjacency(mesh) if refine == 'spectral' else None
+        return recursive_bisection(points, nparts,
+                method='coordinate' if method == 'rcb' else 'inertial',
+                weights=weights, graph=graph, refine=refine)
+    raise ValueError(f"unknown partition method '{method}'")
+
+
+class MeshPartition():
+    """
+    @brief 网格单元的划分以及并行组装需要的 ghost 层和交界面信息
+
+    @note 第 r 个子区域由它所有的单元和一层 ghost 单元（与所有的单元有公共顶点
+          的其它单元）组成，所有的单元排在前面。每个节点属于含有它的单元中
+          分区编号最小的子区域。所有的信息都由节点-分区的关联矩阵一次计算得到。
+    """
+    def __init__(self, mesh, parts=None, nparts=None, **kwargs):
+        """
+        @param[in] parts 单元的分区编号，None 时用 part_mesh(mesh, nparts, **kwargs)
+        """
+        if parts is None:
+            parts = part_mesh(mesh, nparts, **kwargs)
+        self.mesh = mesh
+        self.parts = np.asarray(parts, dtype=np.int_)
+        self.nparts = int(self.parts.max()) + 1 if nparts is None else nparts
+
+        cell = mesh.entity('cell')
+        NC = mesh.number_of_cells()
+        NN = mesh.number_of_nodes()
+        NVC = cell.shape[1]
+        # 单元-节点和节点-分区的关联矩阵
+        C = csr_matrix((np.ones(NC*NVC, dtype=np.int_), cell.reshape(-1),
+            np.arange(0, NC*NVC+1, NVC)), shape=(NC, NN))
+        P = csr_matrix((np.ones(NC, dtype=np.int_), (np.arange(NC), self.parts)),
+                shape=(NC, self.nparts))
+        self.node2part = (C.T@P).tocsr() # (NN, nparts)，节点属于哪些分区的单元
+        self.node2part.data[:] = 1
+        self.node2part.sort_indices()
+        self.cell2part = (C@self.node2part).tocsc() # (NC, nparts)，单元与哪些分区有公共顶点
+        self.cell2part.sort_indices()
+
+        self.node_owner = self.node2part.indices[self.node2part.indptr[:-1]]
+        self.isInterfaceNode = np.diff(self.node2part.indptr) > 1
+
+    def number_of_parts(self):
+        return self.nparts
+
+    def owned_cells(self, r):
+        return np.nonzero(self.parts == r)[0]
+
+    def ghost_cells(self, r):
+        """
+        @brief 第 r 个子区域的 ghost 单元
+        """
+        P = self.cell2part
+        cells = P.indices[P.indptr[r]:P.indptr[r+1]]
+        return cells[self.parts[cells] != r]
+
+    def subdomain(self, r):
+        """
+        @brief 第 r 个子区域的局部网格数据
+
+        @return 字典，包含局部的 node、cell，局部单元和节点的全局编号 cell_global、
+                node_global，所有的单元个数 NCO，以及 ghost 节点（不属于 r 的节点）
+                的局部编号 ghost_node 和它们的所有者 ghost_owner
+        """
+        mesh = self.mesh
+        owned = self.owned_cells(r)
+        cells = np.r_[owned, self.ghost_cells(r)]
+        cell = mesh.entity('cell')[cells]
+        nodes, lcell = np.unique(cell, return_inverse=True)
+        ghost = np.nonzero(self.node_owner[nodes] != r)[0]
+        return {
+            'mtype': type(mesh),
+            'node': mesh.entity('node')[nodes],
+            'cell': lcell.reshape(cell.shape),
+            'cell_global': cells,
+            'node_global': nodes,
+            'NCO': len(owned),
+            'NC': mesh.number_of_cells(),
+            'ghost_node': ghost,
+            'ghost_owner': self.node_owner[nodes[ghost]]}
+
+    def interface(self, r):
+        """
+        @brief 第 r 个子区域与相邻子区域的交界面节点
+
+        @return 字典 {s: 与分区 s 共有的节点的全局编号（已排序）}
+        """
+        N = self.node2part
+        nodes = np.nonzero(self.isInterfaceNode & (N[:, [r]].toarray()[:, 0] > 0))[0]
+        sub = N[nodes]
+        owner = np.repeat(nodes, np.diff(sub.indptr))
+        out = {}
+        for s in np.unique(sub.indices):
+            if s != r:
+                out[int(s)] = owner[sub.indices == s]
+        return out
+
+    def neighbors(self, r):
+        return np.array(sorted(self.interface(r).keys()), dtype=np.int_)
@@ -1,3 +1,4 @@
 
 from .ls_fem_solver import LSFEMSolver
 from .ls_solver import LSSolver
+from .eikonal_solver import UniformMeshEikonalSolver, SimplexMeshEikonalSolver
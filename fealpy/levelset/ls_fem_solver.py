@@ -11,8 +11,7 @@ from ..fem import ScalarMassIntegrator
 from ..decorator import barycentric
 
 from .ls_solver import LSSolver
-
-from scipy.sparse.linalg import spsolve
+from .eikonal_solver import SimplexMeshEikonalSolver
 
 
 class LSFEMSolver(LSSolver):
@@ -44,6 +43,12 @@ class LSFEMSolver(LSSolver):
 
         self.u = u
 
+        # The Eikonal solver used by `redistance`, it is built on first use.
+        self.eikonal = None
+
+        # The factorization of the mass matrix used by `reinit`, it is built on first use.
+        self.Msolver = None
+
         # Assemble the convection matrix only if a velocity field is provided.
         if u is not None:
             bform = BilinearForm(space)
@@ -181,8 +186,11 @@ class LSFEMSolver(LSSolver):
         phi1[:] = phi0
         phi2 = space.function()
 
-        # Assemble the mass matrix M.
+        # The mass matrix M does not change, so it is factorized only once.
         M = self.M
+        if self.Msolver is None:
+            from ..solver.direct_solver import DirectSolver
+            self.Msolver = DirectSolver(M, symmetric=True)
 
         # Assemble the stiffness matrix S using ScalarDiffusionIntegrator for artificial diffusion.
         bform = BilinearForm(space)
@@ -212,7 +220,7 @@ class LSFEMSolver(LSSolver):
             b = M @ phi1 + dt * b0 - dt * alpha * (S @ phi1)
 
             # Solve the linear system to update the level set function.
-            phi2[:] = spsolve(M, b)
+            phi2[:] = self.Msolver.solve(b)
 
             # Calculate the error between the new and old level set function.
             error = space.mesh.error(phi2, phi1)
@@ -227,3 +235,34 @@ class LSFEMSolver(LSSolver):
 
         return phi1
 
+    def redistance(self, phi0, band=None):
+        """
+        Reinitialize the level set function to a signed distance function by
+        solving the Eikonal equation |grad phi| = 1 with the fast marching
+        method.
+
+        Unlike `reinit`, no linear system is solved: the cost is O(N log N) in
+        the number of nodes, and the zero level set of the piecewise linear
+        `phi0` is kept in place.
+
+        Parameters:
+        - phi0: The level set function to be reinitialized, it must live in a
+          linear Lagrange space on a triangle or tetrahedron mesh.
+        - band: The width of the narrow band. If given, only the nodes whose
+          distance to the interface is less than `band` are computed, and the
+          other nodes get the value `band` with the sign of `phi0`.
+
+        Returns:
+        - phi1: The reinitialized level set function as a signed distance function.
+        """
+        space = self.space
+        if space.p != 1:
+            raise ValueError("The fast marching reinitialization only supports the linear Lagrange space!")
+
+        # The Eikonal solver keeps the node-to-cell topology, so build it only once.
+        if self.eikonal is None:
+            self.eikonal = SimplexMeshEikonalSolver(space.mesh)
+
+        phi1 = space.function()
+        phi1[:] = self.eikonal.solve(phi0, band=band)
+        return phi1
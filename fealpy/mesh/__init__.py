@@ -25,6 +25,8 @@ from .uniform_mesh_3d import UniformMesh3d
 
 from .node_set import NodeSet
 
+from .mesh_cache import MeshCache
+
 from .ccg_mesh_reader import CCGMeshReader
 from .fab_file_reader import FABFileReader
 from .poly_file_reader import PolyFileReader
@@ -1,8 +1,10 @@
 import numpy as np
 from scipy.spatial import Delaunay
+from concurrent.futures import ThreadPoolExecutor
 import matplotlib.pyplot as plt
 
 from .triangle_mesh import TriangleMesh 
+from .incremental_delaunay import IncrementalDelaunay
 
 class DistMesher2d():
 
@@ -13,16 +15,23 @@ class DistMesher2d():
             ttol = 0.01,
             fscale = 1.2,
             dt = 0.2,
-            output=True):
+            output=True,
+            workers=None,
+            chunksize=100000,
+            callback=None):
         """
         @brief 
 
-        @param[in] domain 三维区域
+        @param[in] domain 二维区域
         @param[in] hmin 最小的边长
         @param[in] ptol
         @param[in] ttol
         @param[in] fscale
         @param[in] dt
+        @param[in] workers 计算符号距离函数和尺寸函数的线程个数，None 表示不用线程池
+        @param[in] chunksize 用线程池时每个线程一次处理的点的个数
+        @param[in] callback 每次三角化后调用的函数，参数为记录迭代信息的字典，
+                            用于替代打印输出
         """
 
         self.localEdge = np.array([(0, 1), (1, 2), (2, 0)])
@@ -38,7 +47,61 @@ class DistMesher2d():
         self.deps = np.sqrt(eps)*hmin
         self.dt = dt 
 
-        self.NT = 0 # 记录三角化的次数
+        self.NT = 0 # 记录三角化改变的次数，包括全局和局部的三角化
+
+        self.workers = workers
+        self.chunksize = chunksize
+        self.callback = callback
+
+    def __cache_key__(self):
+        """
+        @brief MeshCache 计算键时只用决定网格的输入参数，不包括 workers、
+               callback 以及三角化次数等运行状态
+        """
+        return (self.domain, self.hmin, self.ptol, self.ttol, self.fscale, self.dt)
+
+    def evaluate(self, f, p):
+        """
+        @brief 计算 f(p)，点很多且设置了 workers 时把 p 分块后在线程池中计算
+
+        @note 符号距离函数和尺寸函数一般由 NumPy 的向量运算组成，计算时会释放
+              GIL，所以多线程可以利用多个核
+        """
+        NP = len(p)
+        if (self.workers is None) or (NP <= self.chunksize):
+            return f(p)
+        chunks = [p[i:i+self.chunksize] for i in range(0, NP, self.chunksize)]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            val = list(executor.map(f, chunks))
+        return np.concatenate(val)
+
+    def signed_dist_function(self, p):
+        return self.evaluate(self.domain.signed_dist_function, p)
+
+    def sizing_function(self, p):
+        return self.evaluate(self.domain.sizing_function, p)
+
+    def grad_signed_dist_function(self, p, d=None):
+        """
+        @brief 符号距离函数的梯度
+
+        @note 如果区域提供了解析的梯度 `grad_signed_dist_function` 就直接使用，
+              否则用向前差分，所有偏移点放在一起只调用一次符号距离函数
+        """
+        domain = self.domain
+        if hasattr(domain, 'grad_signed_dist_function'):
+            return domain.grad_signed_dist_function(p)
+
+        NP, GD = p.shape
+        if d is None:
+            ps = p[None, :, :] + np.r_[np.zeros((1, GD)), self.deps*np.eye(GD)][:, None, :]
+            val = self.signed_dist_function(ps.reshape(-1, GD)).reshape(GD+1, NP)
+            d = val[0]
+            val = val[1:]
+        else:
+            ps = p[None, :, :] + self.deps*np.eye(GD)[:, None, :]
+            val = self.signed_dist_function(ps.reshape(-1, GD)).reshape(GD, NP)
+        return ((val - d)/self.deps).T
 
 
     def init_nodes(self): 
@@ -46,8 +109,8 @@ class DistMesher2d():
         @brief 生成初始网格
         """
 
-        fd = self.domain.signed_dist_function
-        fh = self.domain.sizing_function 
+        fd = self.signed_dist_function
+        fh = self.sizing_function 
         box = self.domain.box
         hmin = self.hmin
 
@@ -75,21 +138,34 @@ class DistMesher2d():
             node = np.concatenate((fnode, node), axis=0)
         return node
 
-    def delaunay(self, node):
-        fd = self.domain.signed_dist_function
-        tri = Delaunay(node, qhull_options='Qt Qbb Qc Qz')
-        cell = np.asarray(tri.simplices, dtype=np.int_)
+    def delaunay(self, node, cell=None):
+        """
+        @brief 区域内部的 Delaunay 三角形
+
+        @param[in] cell 点集的 Delaunay 三角化，None 时调用 scipy 的 Delaunay
+        """
+        fd = self.signed_dist_function
+        if cell is None:
+            tri = Delaunay(node, qhull_options='Qt Qbb Qc Qz')
+            cell = np.asarray(tri.simplices, dtype=np.int_)
         bc = (node[cell[:, 0]] + node[cell[:, 1]] + node[cell[:, 2]])/3
         return  cell[fd(bc) < -self.geps]
 
-    def construct_edge(self, node):
+    def construct_edge(self, node, cell=None):
         """
         @brief 生成网格的边
+
+        @param[in] cell 点集的 Delaunay 三角化，见 delaunay
         """
         localEdge = self.localEdge
-        cell = self.delaunay(node)
+        cell = self.delaunay(node, cell=cell)
         totalEdge = cell[:, localEdge].reshape(-1, 2)
-        edge  = np.unique(np.sort(totalEdge, axis=1), axis=0)
+
+        # 把每条边编码成一个整数再去重，比按行去重快得多
+        NN = len(node)
+        totalEdge = np.sort(totalEdge, axis=1)
+        key = np.unique(totalEdge[:, 0]*NN + totalEdge[:, 1])
+        edge = np.stack((key//NN, key%NN), axis=1)
 
         if self.output:
             fname = "mesh-%05d.vtu"%(self.NT)
@@ -110,17 +186,12 @@ class DistMesher2d():
         """
 
         domain = self.domain
-        fd = domain.signed_dist_function
 
         if hasattr(domain, 'project'):
             node = domain.project(node)
         else:
-            depsx = np.array([self.deps, 0])
-            depsy = np.array([0, self.deps])
-            dgradx = (fd(node + depsx) - d)/self.deps
-            dgrady = (fd(node + depsy) - d)/self.deps
-            node[:, 0] = node[:, 0] - d*dgradx
-            node[:, 1] = node[:, 1] - d*dgrady
+            dgrad = self.grad_signed_dist_function(node, d=d)
+            node -= d[:, None]*dgrad
 
         return node
 
@@ -131,7 +202,7 @@ class DistMesher2d():
         @return md 每个节点移动的距离
         """
 
-        fh = self.domain.sizing_function
+        fh = self.sizing_function
 
         v = node[edge[:, 0]] - node[edge[:, 1]]
         L = np.sqrt(np.sum(v**2, axis=1))
@@ -141,14 +212,11 @@ class DistMesher2d():
         F = np.maximum(L0 - L, 0)
         FV = (F/L)[:, None]*v
 
-        dnode = np.zeros(node.shape, dtype=np.float64)
-
-
-        np.add.at(dnode[:, 0], edge[:, 0], FV[:, 0])
-        np.add.at(dnode[:, 1], edge[:, 0], FV[:, 1])
-        np.subtract.at(dnode[:, 0], edge[:, 1], FV[:, 0])
-        np.subtract.at(dnode[:, 1], edge[:, 1], FV[:, 1])
-
+        # 所有分量的力用一次 bincount 累加到节点上
+        NN, GD = node.shape
+        idx = GD*edge[:, :, None] + np.arange(GD)
+        val = np.stack((FV, -FV), axis=1)
+        dnode = np.bincount(idx.flat, weights=val.flat, minlength=NN*GD).reshape(NN, GD)
 
         fnode = self.domain.facet(0)
         if fnode is not None:
@@ -162,22 +230,38 @@ class DistMesher2d():
 
     def meshing(self, maxit=1000):
         """
+        @brief 生成网格
+
+        @note 只在第一步做全局的 Delaunay 三角化，之后只检查自上次检查以来移动
+              距离超过 ttol*hmin 的节点周围的单元，在不满足 Delaunay 条件的地方
+              局部重新三角化（见 IncrementalDelaunay）。三角化改变时重新生成边，
+              进度通过 callback 报告，NG 和 NL 分别为全局和局部三角化的次数
         """
 
         domain = self.domain
-        fd = domain.signed_dist_function
+        fd = self.signed_dist_function
 
         node = self.init_nodes()
-        p0 = node.copy()
+        p0 = node.copy() # 节点上次检查三角化时的位置
+        tri = None
         self.NT = 0
-        mmove = 1e+10
         count = 0 
         while count < maxit:
             count += 1
-            if mmove > self.ttol*self.hmin:
-                edge = self.construct_edge(node)
+            if tri is None:
+                tri = IncrementalDelaunay(node, box=True)
+                isChanged = True
+            else:
+                isMoved = np.sum((node - p0)**2, axis=1) > (self.ttol*self.hmin)**2
+                isChanged = np.any(isMoved) and tri.update(node, isMoved)
+                p0[isMoved] = node[isMoved]
+
+            if isChanged:
+                edge = self.construct_edge(node, cell=tri.simplex())
                 self.NT += 1
-                print("第 %05d 次三角化"%(self.NT))
+                if self.callback is not None:
+                    self.callback({'NT': self.NT, 'NG': tri.NG, 'NL': tri.NL,
+                        'iteration': count, 'NN': len(node), 'NE': len(edge)})
 
             md = self.move(node, edge)
 
@@ -188,9 +272,6 @@ class DistMesher2d():
              
             if self.dt*np.max(md[~isOut]) < self.ptol*self.hmin:
                 break
-            else:
-                mmove = np.max(np.sqrt(np.sum((node - p0)**2, axis=1)))
-                p0[:] = node
 
         self.post_processing(node)
 
@@ -204,18 +285,12 @@ class DistMesher2d():
             n = len(fnode)
             isBdNode[0:n] = False
 
-        depsx = np.array([self.deps, 0])
-        depsy = np.array([0, self.deps])
         for i in range(2):
             bnode = node[isBdNode]
             d = fd(bnode)
-            dgradx = (fd(bnode + depsx) - d)/self.deps
-            dgrady = (fd(bnode + depsy) - d)/self.deps
-            dgrad2 = dgradx**2 + dgrady**2
-            dgradx /= dgrad2
-            dgrady /= dgrad2
-            node[isBdNode, 0] = bnode[:, 0] - d*dgradx
-            node[isBdNode, 1] = bnode[:, 1] - d*dgrady
+            dgrad = self.grad_signed_dist_function(bnode, d=d)
+            dgrad /= np.sum(dgrad**2, axis=1, keepdims=True)
+            node[isBdNode] = bnode - d[:, None]*dgrad
 
         return mesh 
 
@@ -226,8 +301,7 @@ class DistMesher2d():
         ne = np.array([1, 2, 0])
         pr = np.array([2, 0, 1])
         domain = self.domain
-        fd = domain.signed_dist_function
-        fh = domain.sizing_function 
+        fd = self.signed_dist_function
         deps = self.deps
 
         cell = self.delaunay(node)
@@ -245,7 +319,6 @@ class DistMesher2d():
         cidx = cidx[isOut]
         lidx = lidx[isOut]
         if len(nidx) > 0:
-            print(node[nidx])
             node[nidx] = (node[cell[cidx, ne[lidx]]] + node[cell[cidx, pr[lidx]]])/2.0
 
 
@@ -482,7 +482,7 @@ class HexahedronMesh(Mesh, Plotable):
         indof = np.all(multiIndex>0, axis=-1)&np.all(multiIndex<p, axis=-1)
         face2ipoint[:, indof] = np.arange(NN+NE*(p-1),
                 NN+NE*(p-1)+NF*(p-1)**2).reshape(NF, -1)
-        return face2ipoint
+        return face2ipoint[index]
 
     def cell_to_ipoint(self, p, index=np.s_[:]):
         """!
@@ -0,0 +1,327 @@
+from itertools import product
+
+import numpy as np
+from scipy.spatial import Delaunay, QhullError
+
+
+def _local_face(NV):
+    """
+    @brief 单纯形中与第 j 个顶点相对的面的局部编号
+    """
+    return np.array([[k for k in range(NV) if k != j] for j in range(NV)], dtype=np.int_)
+
+
+def _signed_volume(node, cell):
+    """
+    @brief 单纯形的有向体积（差一个常数因子）和用于判断退化的尺度
+    """
+    x = node[cell]
+    J = x[:, 1:] - x[:, :1]
+    TD = J.shape[1]
+    return np.linalg.det(J), np.max(np.abs(J), axis=(1, 2))**TD
+
+
+def _match_rows(a, b):
+    """
+    @brief a 中每一行在 b 中的位置，b 中没有时为 -1，要求 b 的行互不相同
+
+    @note 非负整数的行编码为一个整数后用二分查找，编码会溢出时按行去重
+    """
+    base = max(a.max(initial=0), b.max(initial=0)) + 1
+    if len(b) == 0:
+        return np.full(len(a), -1, dtype=np.int_)
+    if float(base)**a.shape[1] < 2**62:
+        w = base**np.arange(a.shape[1], dtype=np.int64)
+        ka = a@w
+        kb = b@w
+        order = np.argsort(kb)
+        i = np.minimum(np.searchsorted(kb, ka, sorter=order), len(b) - 1)
+        pos = order[i]
+        return np.where(kb[pos] == ka, pos, -1)
+    n = len(b)
+    _, inv = np.unique(np.r_[b, a], axis=0, return_inverse=True)
+    inv = inv.reshape(-1)
+    pos = np.full(inv.max() + 1, -1, dtype=np.int_)
+    pos[inv[:n]] = np.arange(n)
+    return pos[inv[n:]]
+
+
+class IncrementalDelaunay():
+    """
+    @brief 维护移动点集的 Delaunay 三角化，点移动之后只在局部重新三角化
+
+    @note 保存整个凸包的三角化 cell 和相邻关系 neighbor（neighbor[i, j] 为与
+          cell[i] 第 j 个顶点相对的面相邻的单纯形，-1 表示凸包的边界），所有的
+          单纯形都是正定向的。
+
+          update 只检查含有移动过的点的单纯形及其相邻单纯形：翻转的单纯形，以及
+          相邻单纯形的对顶点落在外接球内部的面（局部 Delaunay 条件不满足）的两侧
+          都是坏的单纯形。把坏的单纯形向外扩一层得到空腔，只对空腔的顶点做
+          Delaunay 三角化，从与空腔边界面重合的单纯形出发，不穿过空腔边界面
+          向内填充，填充的单纯形替换空腔。空腔的某些边界面不在局部三角化中时
+          （移动较远的点进入了空腔外单纯形的外接球），把这些面外侧的单纯形
+          及其相邻单纯形加入空腔重试；空腔的点移动到了空腔外面时，把含有它的
+          单纯形加入空腔重试；其它的失败把整个空腔扩一层。修复之后再检查新的
+          单纯形，尝试 maxrepair 次之后才做全局的三角化。
+    """
+    def __init__(self, node, box=False, tol=1e-8, maxrepair=8, qhull_options='Qt Qbb Qc Qz'):
+        """
+        @param[in] node 形状为 (NN, GD) 的点
+        @param[in] box 是否加入放大的包围盒的顶点作为固定的辅助点，这时所有的点
+                   都在凸包内部，边界上的点移动也不会改变凸包
+        @param[in] tol 外接球测试和退化判断的相对容差
+        @param[in] maxrepair 局部修复的最多尝试次数，之后做全局的三角化
+        @param[in] qhull_options 传给 scipy.spatial.Delaunay 的选项
+        """
+        self.tol = tol
+        self.maxrepair = maxrepair
+        self.qhull_options = qhull_options
+        self.NG = 0 # 全局三角化的次数
+        self.NL = 0 # 局部修复的次数
+        self.NN = len(node)
+        self.ghost = None
+        if box:
+            lo = np.min(node, axis=0)
+            hi = np.max(node, axis=0)
+            w = hi - lo
+            ghost = np.array(list(product(*zip(lo - w, hi + w))), dtype=node.dtype)
+            # 扰动包围盒的顶点，使凸包的面不共面、顶点不共球，凸包的三角化唯一
+            rng = np.random.default_rng(0)
+            self.ghost = ghost + 0.1*w*rng.random(ghost.shape)
+        self.triangulate(node)
+
+    def _points(self, node):
+        return node if self.ghost is None else np.r_[node, self.ghost]
+
+    def simplex(self):
+        """
+        @brief 不含辅助点的单纯形
+        """
+        cell = self.cell
+        return cell[np.all(cell < self.NN, axis=1)]
+
+    def _orientate(self, node, cell, neighbor):
+        """
+        @brief 交换负定向单纯形的前两个顶点
+        """
+        vol, _ = _signed_volume(node, cell)
+        isNeg = vol < 0
+        cell[isNeg, :2] = cell[isNeg, 1::-1]
+        neighbor[isNeg, :2] = neighbor[isNeg, 1::-1]
+        return cell, neighbor
+
+    def triangulate(self, node):
+        """
+        @brief 全局的 Delaunay 三角化
+        """
+        node = self._points(node)
+        tri = Delaunay(node, qhull_options=self.qhull_options)
+        cell = np.asarray(tri.simplices, dtype=np.int_)
+        neighbor = np.asarray(tri.neighbors, dtype=np.int_)
+        self.cell, self.neighbor = self._orientate(node, cell, neighbor)
+        self.NG += 1
+
+    def bad_cells(self, node, cand):
+        """
+        @brief 候选单纯形中翻转的，以及不满足局部 Delaunay 条件的面两侧的单纯形
+        """
+        cell = self.cell
+        neighbor = self.neighbor
+        vol, s = _signed_volume(node, cell[cand])
+        isInv = vol < -self.tol*s
+        isOk = vol > self.tol*s # 退化的单纯形没有外接球，不检查
+
+        c = cand[isOk]
+        x = node[cell[c]]
+        J = x[:, 1:] - x[:, :1]
+        # 外心 x_0 + y，2 J y = |x_i - x_0|^2
+        y = np.linalg.solve(2*J, np.sum(J**2, axis=-1)[..., None])[..., 0]
+        center = x[:, 0] + y
+        r2 = np.sum(y**2, axis=-1)
+
+        ci, lj = np.nonzero(neighbor[c] >= 0)
+        nb = neighbor[c[ci], lj]
+        k = np.argmax(neighbor[nb] == c[ci, None], axis=1)
+        v = node[cell[nb, k]]
+        isFail = np.sum((v - center[ci])**2, axis=-1) < r2[ci]*(1 - self.tol)
+        return np.unique(np.r_[cand[isInv], c[ci[isFail]], nb[isFail]])
+
+    def update(self, node, isMoved):
+        """
+        @brief 点移动之后更新三角化
+
+        @param[in] node 移动之后的点
+        @param[in] isMoved 标记移动过的点
+
+        @return 三角化是否改变
+        """
+        if self.ghost is not None:
+            node = self._points(node)
+            isMoved = np.r_[isMoved, np.zeros(len(self.ghost), dtype=np.bool_)]
+        cell = self.cell
+        neighbor = self.neighbor
+        cand = np.nonzero(np.any(isMoved[cell], axis=1))[0]
+        if len(cand) == 0:
+            return False
+        # 对顶点移动过的面也要从相邻单纯形一侧检查
+        nb = neighbor[cand]
+        cand = np.unique(np.r_[cand, nb[nb >= 0]])
+        bad = self.bad_cells(node, cand)
+        if len(bad) == 0:
+            return False
+
+        for i in range(self.maxrepair):
+            NK = self.repair_cavity(node, bad)
+            if NK is None:
+                break
+            # 新的单纯形与空腔外的单纯形之间的面也要满足局部 Delaunay 条件
+            cand = np.arange(NK, len(self.cell))
+            nb = self.neighbor[cand]
+            cand = np.unique(np.r_[cand, nb[nb >= 0]])
+            bad = self.bad_cells(node, cand)
+            if len(bad) == 0:
+                self.NL += 1
+                return True
+        self.triangulate(node[:self.NN])
+        return True
+
+    def repair_cavity(self, node, bad):
+        """
+        @brief 以坏的单纯形及其相邻单纯形为初始空腔做局部修复
+
+        @return 成功时为保留的单纯形的个数（新的单纯形排在它们后面），失败时为 None
+        """
+        neighbor = self.neighbor
+        isCavity = np.zeros(len(self.cell), dtype=np.bool_)
+        isCavity[bad] = True
+        grow = bad
+        for i in range(self.maxrepair):
+            nb = neighbor[grow]
+            isCavity[nb[nb >= 0]] = True
+            cavity = np.nonzero(isCavity)[0]
+            grow = self.repair(node, cavity)
+            if grow is None:
+                return len(isCavity) - len(cavity)
+            isCavity[grow] = True
+        return None
+
+    def locate(self, node, point):
+        """
+        @brief 找到含有 node[point] 的单纯形，先用包围盒筛选，再用重心坐标判断
+
+        @note 只在局部修复中有点移动到空腔外面时调用，这样的点很少
+        """
+        cell = self.cell
+        x = node[cell]
+        xmin = np.min(x, axis=1)
+        xmax = np.max(x, axis=1)
+        out = []
+        for p in node[point]:
+            c = np.nonzero(np.all((xmin <= p) & (p <= xmax), axis=1))[0]
+            vol, scale = _signed_volume(node, cell[c])
+            c = c[vol > self.tol*scale]
+            J = x[c, 1:] - x[c, :1]
+            lam = np.linalg.solve(np.swapaxes(J, 1, 2), (p - x[c, 0])[..., None])[..., 0]
+            lam = np.c_[1 - np.sum(lam, axis=-1), lam]
+            out.append(c[np.all(lam >= -self.tol, axis=-1)])
+        return np.unique(np.concatenate(out))
+
+    def repair(self, node, cavity):
+        """
+        @brief 用空腔顶点的局部 Delaunay 三角化替换空腔中的单纯形
+
+        @return 成功时为 None，失败时三角化不变，返回需要加入空腔的单纯形
+        """
+        cell = self.cell
+        neighbor = self.neighbor
+        NC, NV = cell.shape
+        localFace = _local_face(NV)
+        tol = self.tol
+
+        isCavity = np.zeros(NC + 1, dtype=np.bool_) # 最后一个对应 -1
+        isCavity[cavity] = True
+
+        # 空腔的边界面，inner 和 outer 为面两侧的单纯形，outer 为 -1 时是凸包的面
+        ci, lj = np.nonzero(~isCavity[neighbor[cavity]])
+        inner = cavity[ci]
+        outer = neighbor[inner, lj]
+        face = np.sort(cell[inner[:, None], localFace[lj]], axis=1)
+        NF = len(face)
+
+        # 面的哪一侧在空腔内，外侧的单纯形没有翻转，用它的对顶点判断
+        isHull = outer < 0
+        k = np.argmax(neighbor[outer] == inner[:, None], axis=1)
+        opp = np.where(isHull, cell[inner, lj], cell[outer, k])
+        side, _ = _signed_volume(node, np.c_[face, opp])
+        side = np.where(isHull, np.sign(side), -np.sign(side))
+
+        V = np.unique(cell[cavity])
+        try:
+            tri = Delaunay(node[V], qhull_options=self.qhull_options)
+        except QhullError:
+            return cavity
+        lcell = V[tri.simplices]
+        lnbr = np.asarray(tri.neighbors, dtype=np.int_)
+        NL = len(lcell)
+
+        # 局部三角化中与空腔边界面重合的面
+        lface = np.sort(lcell[:, localFace].reshape(-1, NV-1), axis=1)
+        m = _match_rows(lface, face).reshape(NL, NV)
+        isBdFace = m >= 0
+        s, j = np.nonzero(isBdFace)
+        fs, _ = _signed_volume(node, np.c_[face[m[s, j]], lcell[s, j]])
+        isSeed = np.sign(fs) == side[m[s, j]]
+        isMiss = np.bincount(m[s, j][isSeed], minlength=NF) != 1
+        if np.any(isMiss):
+            grow = outer[isMiss]
+            grow = grow[grow >= 0]
+            return np.unique(grow) if len(grow) > 0 else cavity
+
+        # 从种子出发，不穿过空腔的边界面向内填充
+        isFill = np.zeros(NL, dtype=np.bool_)
+        front = np.unique(s[isSeed])
+        isFill[front] = True
+        while len(front) > 0:
+            nb = lnbr[front][~isBdFace[front]]
+            if np.any(nb < 0):
+                return cavity
+            nb = np.unique(nb[~isFill[nb]])
+            isFill[nb] = True
+            front = nb
+        if np.any(isFill[s[~isSeed]]):
+            return cavity
+        new = np.nonzero(isFill)[0]
+        vol, scale = _signed_volume(node, lcell[new])
+        if np.any(np.abs(vol) <= tol*scale):
+            return cavity
+        # 移动到空腔外面的点不在填充的单纯形中，把含有它的单纯形加入空腔
+        isMiss = np.ones(len(node), dtype=np.bool_)
+        isMiss[lcell[new]] = False
+        isMiss = isMiss[V]
+        if np.any(isMiss):
+            grow = self.locate(node, V[isMiss])
+            return grow if len(grow) > 0 else cavity
+
+        # 新单纯形的相邻关系
+        keep = ~isCavity[:-1]
+        NK = np.sum(keep)
+        old2new = np.full(NC + 1, -1, dtype=np.int_)
+        old2new[:-1][keep] = np.arange(NK)
+        l2g = np.full(NL, -1, dtype=np.int_)
+        l2g[new] = NK + np.arange(len(new))
+
+        ncell = lcell[new]
+        nnbr = l2g[lnbr[new]]
+        flag = isBdFace[new]
+        nnbr[flag] = old2new[outer[m[new][flag]]]
+
+        # 外侧单纯形指向空腔的相邻关系改为新的单纯形
+        seed = np.zeros(NF, dtype=np.int_)
+        seed[m[s[isSeed], j[isSeed]]] = l2g[s[isSeed]]
+        knbr = old2new[neighbor[keep]]
+        flag = ~isHull
+        knbr[old2new[outer[flag]], k[flag]] = seed[flag]
+
+        ncell, nnbr = self._orientate(node, ncell, nnbr)
+        self.cell = np.r_[cell[keep], ncell]
+        self.neighbor = np.r_[knbr, nnbr]
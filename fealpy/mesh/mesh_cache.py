@@ -0,0 +1,323 @@
+import os
+import pickle
+import hashlib
+import tempfile
+import functools
+import types
+from collections import OrderedDict
+
+import numpy as np
+
+
+def _global_names(code):
+    """
+    @brief 代码对象及其嵌套的代码对象中用到的名字
+    """
+    names = set(code.co_names)
+    for c in code.co_consts:
+        if isinstance(c, types.CodeType):
+            names |= _global_names(c)
+    return names
+
+
+def _cell_contents(cell):
+    try:
+        return cell.cell_contents
+    except ValueError: # 还没有赋值的闭包变量
+        return None
+
+
+def _update_hash(h, obj, seen):
+    """
+    @brief 把 obj 的内容加入到哈希对象 h 中
+
+    @note 数组按 dtype、shape 和数据计算哈希；函数按模块名、限定名、字节码、
+          常量、默认参数、闭包变量的值以及用到的全局变量计算，嵌套的函数和代码
+          对象递归计算；定义了 __cache_key__ 的对象按它的返回值计算；其它对象
+          （如几何区域）按类名和属性递归计算，不依赖 id 或内存地址。无法按内容
+          计算的对象抛出 TypeError，这时需要显式地给出键。
+    """
+    if obj is None or isinstance(obj, (bool, int, float, complex, str, bytes)):
+        h.update(repr((type(obj).__name__, obj)).encode())
+    elif isinstance(obj, np.generic):
+        h.update(repr((obj.dtype.str, obj.item())).encode())
+    elif isinstance(obj, np.ndarray):
+        h.update(repr(('ndarray', obj.dtype.str, obj.shape)).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (list, tuple)):
+        h.update(repr((type(obj).__name__, len(obj))).encode())
+        for v in obj:
+            _update_hash(h, v, seen)
+    elif isinstance(obj, (set, frozenset)):
+        _update_hash(h, ('set', sorted(obj, key=repr)), seen)
+    elif isinstance(obj, dict):
+        h.update(repr(('dict', len(obj))).encode())
+        for k in sorted(obj, key=repr):
+            _update_hash(h, k, seen)
+            _update_hash(h, obj[k], seen)
+    elif isinstance(obj, type):
+        h.update(repr(('type', obj.__module__, obj.__qualname__)).encode())
+    elif isinstance(obj, types.ModuleType):
+        h.update(repr(('module', obj.__name__)).encode())
+    elif isinstance(obj, types.CodeType):
+        h.update(repr(('code', obj.co_name, obj.co_argcount, obj.co_kwonlyargcount,
+            obj.co_names, obj.co_varnames, obj.co_freevars)).encode())
+        h.update(obj.co_code)
+        _update_hash(h, obj.co_consts, seen)
+    elif hasattr(obj, '__self__') and hasattr(obj, '__func__'): # 绑定方法
+        _update_hash(h, obj.__func__, seen)
+        _update_hash(h, obj.__self__, seen)
+    elif isinstance(obj, types.FunctionType):
+        if id(obj) in seen: # 递归调用自己的函数
+            h.update(repr(('function', obj.__qualname__)).encode())
+            return
+        seen.add(id(obj))
+        code = obj.__code__
+        h.update(repr(('function', obj.__module__, obj.__qualname__)).encode())
+        _update_hash(h, code, seen)
+        _update_hash(h, obj.__defaults__, seen)
+        _update_hash(h, obj.__kwdefaults__, seen)
+        _update_hash(h, [_cell_contents(c) for c in (obj.__closure__ or ())], seen)
+        g = obj.__globals__
+        _update_hash(h, {n: g[n] for n in _global_names(code) if n in g}, seen)
+    elif isinstance(obj, functools.partial):
+        _update_hash(h, ('partial', obj.func, obj.args, obj.keywords), seen)
+    elif callable(obj) and not hasattr(obj, '__dict__'): # 内置函数或 ufunc
+        h.update(repr(('builtin', getattr(obj, '__module__', None),
+            getattr(obj, '__qualname__', getattr(obj, '__name__', repr(obj))))).encode())
+    else:
+        if id(obj) in seen:
+            h.update(b'cycle')
+            return
+        seen.add(id(obj))
+        cls = type(obj)
+        h.update(repr(('object', cls.__module__, cls.__qualname__)).encode())
+        if hasattr(obj, '__cache_key__'):
+            _update_hash(h, obj.__cache_key__(), seen)
+        elif hasattr(obj, '__dict__'):
+            _update_hash(h, obj.__dict__, seen)
+        elif ' at 0x' in repr(obj):
+            raise TypeError(f"cannot compute a cache key from the content of {cls.__qualname__}, "
+                    "pass an explicit key")
+        else:
+            _update_hash(h, repr(obj), seen)
+
+
+class MeshCache():
+    """
+    @brief 按内容寻址的网格缓存
+
+    @note 键由生成函数名、参数（包括几何区域等对象的内容）和一致加密次数计算得到。
+          网格用 pickle 协议 5 序列化，其中节点、单元和拓扑等数组作为带外缓冲区
+          连续地写到一个二进制文件中，读取时用写时复制的方式内存映射，所以同一台
+          机器上并发的多个进程可以共享这些内存页。缓存目录的总大小超过 maxsize
+          时，按最近访问时间淘汰最旧的网格。
+    """
+    align = 64
+
+    def __init__(self, path=None, maxsize=2**30, memory=True, maxmemory=2**28):
+        """
+        @param[in] path 缓存目录，默认为环境变量 FEALPY_MESH_CACHE 或
+                        ~/.cache/fealpy/mesh，为 False 时只用内存缓存
+        @param[in] maxsize 磁盘缓存的最大字节数
+        @param[in] memory 是否在本进程的内存中也保存一份
+        @param[in] maxmemory 内存缓存的最大字节数
+        """
+        if path is None:
+            path = os.environ.get('FEALPY_MESH_CACHE',
+                    os.path.join(os.path.expanduser('~'), '.cache', 'fealpy', 'mesh'))
+        if path:
+            os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.maxsize = maxsize
+
+        self.memory = OrderedDict() if memory else None
+        self.maxmemory = maxmemory
+        self.memsize = 0
+
+    @staticmethod
+    def key(name, *args, refine=0, **kwargs):
+        """
+        @brief 计算网格的键
+
+        @param[in] name 生成函数的名字，或者生成函数本身
+        @param[in] refine 一致加密的次数
+        """
+        h = hashlib.sha256()
+        seen = set()
+        _update_hash(h, name, seen)
+        _update_hash(h, args, seen)
+        _update_hash(h, kwargs, seen)
+        _update_hash(h, int(refine), seen)
+        return h.hexdigest()
+
+    def _files(self, key):
+        return (os.path.join(self.path, key + '.pkl'),
+                os.path.join(self.path, key + '.bin'))
+
+    def __contains__(self, key):
+        if (self.memory is not None) and (key in self.memory):
+            return True
+        return bool(self.path) and os.path.exists(self._files(key)[0])
+
+    def get(self, key, mmap=True):
+        """
+        @brief 取出键对应的网格，不存在时返回 None
+
+        @note 先查本进程的内存缓存（返回数组的副本），再查磁盘缓存
+
+        @param[in] mmap 为 True 时磁盘上的数组以写时复制的方式内存映射，
+                        否则读入内存
+        """
+        if (self.memory is not None) and (key in self.memory):
+            self.memory.move_to_end(key)
+            header, buffers = self.memory[key]
+            return pickle.loads(header, buffers=[bytearray(b) for b in buffers])
+
+        if not self.path:
+            return None
+        fmeta, fdata = self._files(key)
+        try:
+            with open(fmeta, 'rb') as f:
+                meta = pickle.load(f)
+            os.utime(fmeta)
+        except FileNotFoundError:
+            return None
+
+        if sum(n for _, n in meta['offsets']) > 0:
+            if mmap:
+                data = np.memmap(fdata, dtype=np.uint8, mode='c')
+            else:
+                data = np.fromfile(fdata, dtype=np.uint8)
+            buffers = [data[s:s+n] for s, n in meta['offsets']]
+        else:
+            buffers = [bytearray(0) for _ in meta['offsets']]
+        return pickle.loads(meta['header'], buffers=buffers)
+
+    def put(self, key, mesh):
+        """
+        @brief 把网格保存到缓存中
+        """
+        buffers = []
+        header = pickle.dumps(mesh, protocol=5, buffer_callback=buffers.append)
+        buffers = [b.raw() for b in buffers]
+
+        if self.memory is not None:
+            self._put_memory(key, header, [bytes(b) for b in buffers])
+
+        if not self.path:
+            return
+
+        offsets = []
+        start = 0
+        for b in buffers:
+            offsets.append((start, b.nbytes))
+            start += -(-b.nbytes//self.align)*self.align
+
+        # 先写到临时文件再改名，保证其它进程不会读到不完整的文件
+        fmeta, fdata = self._files(key)
+        fd, tmp = tempfile.mkstemp(dir=self.path, prefix='.', suffix='.bin')
+        with os.fdopen(fd, 'wb') as f:
+            for (s, n), b in zip(offsets, buffers):
+                f.seek(s)
+                f.write(b)
+            f.truncate(start)
+        os.replace(tmp, fdata)
+
+        fd, tmp = tempfile.mkstemp(dir=self.path, prefix='.', suffix='.pkl')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump({'header': header, 'offsets': offsets}, f)
+        os.replace(tmp, fmeta)
+
+        self.evict()
+
+    def _put_memory(self, key, header, buffers):
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return
+        self.memory[key] = (header, buffers)
+        self.memsize += len(header) + sum(len(b) for b in buffers)
+        while (self.memsize > self.maxmemory) and (len(self.memory) > 1):
+            _, (h, bs) = self.memory.popitem(last=False)
+            self.memsize -= len(h) + sum(len(b) for b in bs)
+
+    def size(self):
+        """
+        @brief 磁盘缓存的总字节数
+        """
+        if not self.path:
+            return 0
+        return sum(os.path.getsize(os.path.join(self.path, f))
+                for f in os.listdir(self.path) if f.endswith(('.pkl', '.bin')))
+
+    def evict(self, maxsize=None):
+        """
+        @brief 按最近访问时间淘汰磁盘上的网格，直到总大小不超过 maxsize
+        """
+        if not self.path:
+            return
+        maxsize = self.maxsize if maxsize is None else maxsize
+
+        entries = []
+        total = 0
+        for f in os.listdir(self.path):
+            if f.startswith('.') or (not f.endswith('.pkl')):
+                continue
+            fmeta, fdata = self._files(f[:-4])
+            try:
+                stat = os.stat(fmeta)
+                nbytes = stat.st_size + os.path.getsize(fdata)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, fmeta, fdata, nbytes))
+            total += nbytes
+
+        entries.sort()
+        for _, fmeta, fdata, nbytes in entries:
+            if total <= maxsize:
+                break
+            for fname in (fmeta, fdata):
+                try:
+                    os.remove(fname)
+                except FileNotFoundError:
+                    pass
+            total -= nbytes
+
+    def clear(self):
+        """
+        @brief 清空缓存
+        """
+        if self.memory is not None:
+            self.memory.clear()
+            self.memsize = 0
+        self.evict(maxsize=0)
+
+    def get_or_create(self, generator, *args, refine=0, key=None, **kwargs):
+        """
+        @brief 从缓存中取出 generator(*args, **kwargs) 一致加密 refine 次后的网格，
+               不存在时生成并保存
+
+        @note 加密过程中的每一层网格都会保存，所以请求更多的加密次数时会从已经
+              缓存的最细的一层开始加密。generator 需要是确定性的，例如使用随机
+              初始点的 DistMesher2d 需要先固定随机种子。
+
+        @param[in] generator 生成网格的函数，如 TriangleMesh.from_box 或
+                             DistMesher2d(...).meshing
+        @param[in] key 代替 generator 计算键的名字，generator 无法按内容计算键
+                       （如引用了可变的全局状态）时使用
+        """
+        name = generator if key is None else key
+        keys = [self.key(name, *args, refine=i, **kwargs) for i in range(refine+1)]
+        for level in range(refine, -1, -1):
+            mesh = self.get(keys[level])
+            if mesh is not None:
+                break
+        else:
+            level = 0
+            mesh = generator(*args, **kwargs)
+            self.put(keys[0], mesh)
+
+        for i in range(level+1, refine+1):
+            mesh.uniform_refine()
+            self.put(keys[i], mesh)
+        return mesh
@@ -0,0 +1,243 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from .quality import mean_ratio_energy, radius_ratio_energy
+from ..graph.coloring import node_coloring
+
+
+class MeshOptimizer():
+    """
+    @brief 三角形和四面体网格的节点光滑
+
+    @note 支持四种节点的更新方式：
+          - 'mean_ratio'、'radius_ratio'：沿单元质量能量的梯度下降，步长由单元
+            大小做对角缩放
+          - 'odt'：移到相邻单元外心的面积（体积）加权平均，边界单元用重心
+          - 'cpt'：移到相邻单元重心的面积（体积）加权平均
+
+          update 为 'jacobi' 时所有的节点同时移动；为 'gauss-seidel' 时按节点的
+          着色（fealpy.graph.coloring.node_coloring）分组，同一组的节点不在同一个
+          单元中，依次移动每一组，同一组内的写入没有
+          冲突，组与组之间用到最新的坐标。一次迭代只需要 (组数) 次向量化的计算。
+
+          每个节点的移动都做回溯线搜索：步长减半直到相邻单元的能量下降（梯度方法）
+          或者相邻单元都没有翻转（ODT/CPT）。给出区域的符号距离函数 fd 时，边界
+          节点也参与移动，移动后投影回边界上；否则边界节点固定。
+    """
+    def __init__(self, mesh, method='mean_ratio', update='gauss-seidel', fd=None,
+            fixed=None, alpha=1.0, maxls=4, swap=False, callback=None):
+        """
+        @param[in] mesh TriangleMesh 或 TetrahedronMesh，节点坐标在原地修改
+        @param[in] method 'mean_ratio'、'radius_ratio'、'odt' 或 'cpt'
+        @param[in] update 'jacobi' 或 'gauss-seidel'
+        @param[in] fd 区域的符号距离函数，可以是有 signed_dist_function 方法的区域
+        @param[in] fixed 不移动的节点，布尔数组或编号，如区域的角点
+        @param[in] alpha 初始的步长
+        @param[in] maxls 线搜索中步长减半的最多次数
+        @param[in] swap 二维时每次迭代之后是否做 edge_swap
+        @param[in] callback 每次迭代之后调用的函数，参数为记录迭代信息的字典
+        """
+        if method not in {'mean_ratio', 'radius_ratio', 'odt', 'cpt'}:
+            raise ValueError(f"unknown smoothing method '{method}'")
+        if update not in {'jacobi', 'gauss-seidel'}:
+            raise ValueError(f"unknown update '{update}'")
+        self.mesh = mesh
+        self.method = method
+        self.update = update
+        if (fd is not None) and hasattr(fd, 'signed_dist_function'):
+            fd = fd.signed_dist_function
+        self.fd = fd
+        self.fixed = fixed
+        self.alpha = alpha
+        self.maxls = maxls
+        self.swap = swap and (mesh.top_dimension() == 2)
+        self.callback = callback
+        self.energy = radius_ratio_energy if method == 'radius_ratio' else mean_ratio_energy
+        self.history = []
+        self.setup()
+
+    def setup(self):
+        """
+        @brief 建立节点分组和单元的局部编号，网格的拓扑改变之后要重新调用
+        """
+        mesh = self.mesh
+        node = mesh.entity('node')
+        NN, GD = node.shape
+        TD = mesh.top_dimension()
+        if GD != TD:
+            raise ValueError("MeshOptimizer needs a triangle mesh in 2d or a tetrahedron mesh in 3d")
+
+        # 单元按正的定向排列，负定向的单元交换前两个顶点
+        cell = mesh.entity('cell').copy()
+        x = node[cell]
+        J = np.swapaxes(x[:, 1:] - x[:, :1], 1, 2)
+        isNeg = np.linalg.det(J) < 0
+        cell[isNeg, :2] = cell[isNeg, 1::-1]
+        self.cell = cell
+        self.h = np.sqrt(np.mean(np.sum((x[:, 1] - x[:, 0])**2, axis=-1))) # 平均边长
+
+        self.isBdNode = mesh.ds.boundary_node_flag()
+        # 与原来的 odt_iterate 相同，有边界面的单元在 ODT 中用重心代替外心
+        self.isBdCell = mesh.ds.boundary_cell_flag()
+        isMoving = np.ones(NN, dtype=np.bool_) if self.fd is not None else ~self.isBdNode
+        if self.fixed is not None:
+            isMoving[self.fixed] = False
+        self.isMoving = isMoving
+
+        if self.update == 'jacobi':
+            groups = [np.nonzero(isMoving)[0]]
+        else:
+            groups = [nodes[isMoving[nodes]] for nodes in node_coloring(mesh, relation='cell')]
+            groups = [nodes for nodes in groups if len(nodes) > 0]
+        NC, NVC = cell.shape
+        C = csr_matrix((np.ones(NC*NVC), cell.reshape(-1), np.arange(0, NC*NVC+1, NVC)),
+                shape=(NC, NN)).tocsc()
+        self.groups = []
+        for nodes in groups:
+            cells = np.unique(C[:, nodes].indices)
+            lnode, lcell = np.unique(cell[cells], return_inverse=True)
+            pos = np.searchsorted(lnode, nodes)
+            self.groups.append((nodes, cells, lnode, lcell.reshape(-1, NVC), pos))
+
+    def number_of_groups(self):
+        return len(self.groups)
+
+    def cell_quality(self):
+        """
+        @brief 单元的质量 1/eta，在 (0, 1] 中，1 为正单纯形
+        """
+        return 1/self.energy(self.mesh.entity('node'), self.cell)
+
+    def project(self, p):
+        """
+        @brief 用 p - d grad d 把点投影到 fd 的零等值面上，梯度用向前差分
+        """
+        fd = self.fd
+        NP, GD = p.shape
+        eps = np.sqrt(np.finfo(p.dtype).eps)*self.h
+        ps = p[None, :, :] + np.r_[np.zeros((1, GD)), eps*np.eye(GD)][:, None, :]
+        val = fd(ps.reshape(-1, GD)).reshape(GD+1, NP)
+        grad = ((val[1:] - val[0])/eps).T
+        return p - (val[0]/np.sum(grad**2, axis=1))[:, None]*grad
+
+    def _patch(self, lcell, val, n):
+        """
+        @brief 把单元上的量加到局部的节点上
+        """
+        NVC = lcell.shape[1]
+        return np.bincount(lcell.reshape(-1), weights=np.repeat(val, NVC), minlength=n)
+
+    def _direction(self, node, nodes, cells, lnode, lcell, pos):
+        """
+        @brief 一组节点的移动方向
+        """
+        cell = self.cell[cells]
+        x = node[cell]
+        NC, NVC, GD = x.shape
+        n = len(lnode)
+        if self.method in {'mean_ratio', 'radius_ratio'}:
+            e, g = self.energy(node, cell, return_grad=True)
+            h2 = np.mean(np.sum((x[:, :, None] - x[:, None, :])**2, axis=-1), axis=(1, 2))
+            D = self._patch(lcell, e/h2, n)[pos]
+            G = np.stack([np.bincount(lcell.reshape(-1), weights=g[..., i].reshape(-1),
+                minlength=n)[pos] for i in range(GD)], axis=1)
+            return -G/D[:, None]
+
+        J = x[:, 1:] - x[:, :1]
+        vol = np.abs(np.linalg.det(J))
+        c = np.mean(x, axis=1)
+        if self.method == 'odt':
+            isIn = ~self.isBdCell[cells]
+            # 外心 x_0 + y，2 J y = |x_i - x_0|^2
+            b = np.sum(J[isIn]**2, axis=-1)/2
+            c[isIn] = x[isIn, 0] + np.linalg.solve(J[isIn], b[..., None])[..., 0]
+        w = self._patch(lcell, vol, n)[pos]
+        t = np.stack([np.bincount(lcell.reshape(-1), weights=np.repeat(vol*c[:, i], NVC),
+            minlength=n)[pos] for i in range(GD)], axis=1)
+        return t/w[:, None] - node[nodes]
+
+    def _move(self, node, nodes, cells, lnode, lcell, pos):
+        """
+        @brief 移动一组节点，带回溯线搜索，返回每个节点移动的距离
+        """
+        cell = self.cell[cells]
+        n = len(lnode)
+        isEnergy = self.method in {'mean_ratio', 'radius_ratio'}
+        d = self._direction(node, nodes, cells, lnode, lcell, pos)
+        x0 = node[nodes].copy()
+        e0 = self.energy(node, cell)
+        E0 = self._patch(lcell, e0, n)[pos]
+        isBd = self.isBdNode[nodes]
+        project = (self.fd is not None) and np.any(isBd)
+
+        alpha = np.full(len(nodes), self.alpha)
+        active = np.ones(len(nodes), dtype=np.bool_)
+        for k in range(self.maxls + 1):
+            idx = nodes[active]
+            p = x0[active] + alpha[active, None]*d[active]
+            if project:
+                flag = isBd[active]
+                p[flag] = self.project(p[flag])
+            node[idx] = p
+            E = self._patch(lcell, self.energy(node, cell), n)[pos]
+            ok = np.isfinite(E) & ((E < E0) if isEnergy else True)
+            active &= ~ok
+            if not np.any(active):
+                break
+            alpha[active] /= 2
+        node[nodes[active]] = x0[active]
+
+        # 相邻单元的能量之和下降时个别单元仍可能变差（Jacobi 时相邻节点还同时
+        # 移动），把比移动前最差的单元还差的单元上的节点退回原来的位置，保证
+        # 最小质量不下降、单元不翻转
+        emax = np.max(e0)
+        isMoving = np.zeros(len(lnode), dtype=np.bool_)
+        isMoving[pos] = True
+        l2m = np.zeros(len(lnode), dtype=np.int_)
+        l2m[pos] = np.arange(len(nodes))
+        while True:
+            isBad = ~(self.energy(node, cell) <= emax)
+            if not np.any(isBad):
+                break
+            bad = np.unique(lcell[isBad])
+            bad = bad[isMoving[bad]]
+            node[lnode[bad]] = x0[l2m[bad]]
+            isMoving[bad] = False
+        return np.sqrt(np.sum((node[nodes] - x0)**2, axis=1))
+
+    def step(self):
+        """
+        @brief 一次迭代，返回节点移动的最大距离
+        """
+        node = self.mesh.entity('node')
+        move = 0.0
+        for group in self.groups:
+            if len(group[0]) > 0:
+                move = max(move, np.max(self._move(node, *group)))
+        if self.swap:
+            self.mesh.edge_swap()
+            self.setup()
+        return move
+
+    def run(self, maxit=10, tol=1e-4):
+        """
+        @brief 迭代直到节点移动的最大距离或者能量的相对变化小于 tol
+
+        @return 记录每次迭代信息的列表，每一项是包含 iter、energy、min_quality、
+                mean_quality、max_move 的字典
+        """
+        node = self.mesh.entity('node')
+        e0 = np.sum(self.energy(node, self.cell))
+        for i in range(maxit):
+            move = self.step()/self.h
+            e = self.energy(node, self.cell)
+            energy = np.sum(e)
+            info = {'iter': i, 'energy': energy, 'min_quality': 1/np.max(e),
+                    'mean_quality': np.mean(1/e), 'max_move': move}
+            self.history.append(info)
+            if self.callback is not None:
+                self.callback(info)
+            if (move < tol) or (abs(e0 - energy) < tol*abs(e0)):
+                break
+            e0 = energy
+        return self.history
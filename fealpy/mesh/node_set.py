@@ -3,12 +3,163 @@ from scipy.spatial import cKDTree
 from .uniform_mesh_2d import UniformMesh2d
 from .uniform_mesh_3d import UniformMesh3d
 
+def cell_list_pairs(node, r, points=None, chunksize=2**16):
+    """
+    @brief 用均匀的 cell list 找出所有距离不超过 r 的点对
+
+    @param[in] node 形状为 (NN, GD) 的点
+    @param[in] r 搜索半径
+    @param[in] points 查询点，None 时查询 node 自身（不包括点与自身构成的点对）
+    @param[in] chunksize 每次处理的查询点个数，用来控制候选点对数组的大小
+
+    @return CSR 格式的 (indptr, indices)，第 i 个查询点的邻居是
+            indices[indptr[i]:indptr[i+1]]
+
+    @note 把点按所在的格子（边长为 r）排序，每个查询点只需要检查相邻的 3^GD
+          个格子，格子中点的范围用 searchsorted 在排序后的格子编号中找到，
+          候选点对用 repeat 和 cumsum 一次生成，全部是向量运算。查询点也按
+          格子排序处理，这样候选点在内存中基本是连续的，得到的行天然有序，
+          最后只需把行按原来的编号重排，不需要再对点对排序。
+    """
+    self_query = points is None
+    if self_query:
+        points = node
+    NN, GD = node.shape
+    NP = len(points)
+
+    lo = np.minimum(node.min(axis=0), points.min(axis=0)) - r
+    key = np.floor((node - lo)/r).astype(np.int64)
+    pkey = np.floor((points - lo)/r).astype(np.int64)
+    dims = np.maximum(key.max(axis=0), pkey.max(axis=0)) + 2
+    stride = np.r_[np.cumprod(dims[1:][::-1])[::-1], 1]
+
+    cid = key@stride
+    order = np.argsort(cid, kind='stable')
+    scid = cid[order]
+    snode = [np.ascontiguousarray(node[order, k]) for k in range(GD)]
+    if self_query:
+        porder = order
+        pcid = scid
+        spoint = snode
+    else:
+        pcid = pkey@stride
+        porder = np.argsort(pcid, kind='stable')
+        pcid = pcid[porder]
+        spoint = [np.ascontiguousarray(points[porder, k]) for k in range(GD)]
+
+    offset = np.stack(np.meshgrid(*([[-1, 0, 1]]*GD), indexing='ij'), axis=-1)
+    offset = offset.reshape(-1, GD)@stride
+
+    r2 = r*r
+    count = np.zeros(NP, dtype=np.int64)
+    J = []
+    for start in range(0, NP, chunksize):
+        index = np.arange(start, min(start + chunksize, NP))
+        ncid = pcid[index, None] + offset
+        left = np.searchsorted(scid, ncid, side='left').reshape(-1)
+        right = np.searchsorted(scid, ncid, side='right').reshape(-1)
+        c = right - left
+        i = np.repeat(np.repeat(index, len(offset)), c)
+        j = np.repeat(left - np.cumsum(c) + c, c)
+        j += np.arange(len(j))
+
+        d2 = (spoint[0][i] - snode[0][j])**2
+        for k in range(1, GD):
+            d2 += (spoint[k][i] - snode[k][j])**2
+        flag = d2 <= r2
+        if self_query:
+            flag &= (i != j)
+        count[index] = np.bincount(i[flag] - start, minlength=len(index))
+        J.append(order[j[flag]])
+    J = np.concatenate(J)
+
+    # 按查询点原来的编号重排各行
+    sptr = np.zeros(NP + 1, dtype=np.int64)
+    np.cumsum(count, out=sptr[1:])
+    rank = np.empty(NP, dtype=np.int64)
+    rank[porder] = np.arange(NP)
+    count = count[rank]
+    indptr = np.zeros(NP + 1, dtype=np.int64)
+    np.cumsum(count, out=indptr[1:])
+    idx = np.repeat(sptr[rank] - indptr[:-1], count)
+    idx += np.arange(len(idx))
+    return indptr, J[idx]
+
+
+class VerletList:
+    """
+    @brief 带缓冲层的 Verlet 邻居表
+
+    @note 用 cell list 找出距离不超过 r + skin 的候选点对并记录当时的点的位置。
+          只要点的最大位移不超过 skin/2，真实距离不超过 r 的点对一定在候选表中，
+          这时 update 只需要按当前距离过滤候选点对，不用重新建表
+    """
+    def __init__(self, r, skin=0.0):
+        self.r = r
+        self.skin = skin
+        self.node0 = None
+        self.indptr = None
+        self.indices = None
+        self.half = None
+        self.nbuild = 0
+
+    def build(self, node):
+        self.node0 = node.copy()
+        self.indptr, self.indices = cell_list_pairs(node, self.r + self.skin)
+        self.half = None
+        self.nbuild += 1
+
+    def check(self, node):
+        """
+        @brief 点的最大位移超过 skin/2 时重新建表
+        """
+        if (self.node0 is None) or (len(node) != len(self.node0)):
+            self.build(node)
+        else:
+            d2 = np.max(np.sum((node - self.node0)**2, axis=-1))
+            if 4*d2 > self.skin**2:
+                self.build(node)
+
+    def update(self, node, exact=True):
+        """
+        @brief 按当前位置返回距离不超过 r 的点对，必要时重新建表
+
+        @param[in] exact 为 False 时直接返回候选点对，由调用者自己按距离过滤
+
+        @return CSR 格式的 (indptr, indices)
+        """
+        self.check(node)
+        if (self.skin == 0.0) or (not exact):
+            return self.indptr, self.indices
+
+        NN = len(node)
+        I = np.repeat(np.arange(NN), np.diff(self.indptr))
+        J = self.indices
+        d2 = sum((x.take(I) - x.take(J))**2 for x in node.T)
+        flag = d2 <= self.r**2
+        indptr = np.zeros(NN + 1, dtype=np.int64)
+        np.cumsum(np.bincount(I[flag], minlength=NN), out=indptr[1:])
+        return indptr, J[flag]
+
+    def half_pairs(self, node):
+        """
+        @brief i < j 的候选点对 (i, j)，每次建表后只计算一次
+        """
+        self.check(node)
+        if self.half is None:
+            I = np.repeat(np.arange(len(node)), np.diff(self.indptr))
+            flag = I < self.indices
+            self.half = (I[flag], self.indices[flag])
+        return self.half
+
+
 class NodeSet:
     def __init__(self, node, capacity=None):
         self.node = node
         self.tree = cKDTree(node)
         self.is_boundary = np.zeros(self.number_of_nodes(), dtype=bool)
         self.nodedata = {}
+        self.verlet = None
 
     def dimension(self):
         return self.node.shape[1]
@@ -40,6 +191,40 @@ class NodeSet:
         else:
             return self.tree.query_ball_point(points, h)
 
+    def verlet_list(self, h, skin=0.0):
+        """
+        @brief 缓存的 Verlet 邻居表，半径或缓冲层改变时重新创建
+        """
+        if (self.verlet is None) or (self.verlet.r != h) or (self.verlet.skin != skin):
+            self.verlet = VerletList(h, skin=skin)
+        return self.verlet
+
+    def neighbor_list(self, h, skin=0.0, points=None, exact=True):
+        """
+        @brief 距离不超过 h 的邻居，以 CSR 格式的 (indptr, indices) 返回
+
+        @param[in] skin Verlet 表的缓冲层厚度，大于 0 时点移动后只有最大位移超过
+                        skin/2 才重新建表
+        @param[in] points 查询点，None 时查询节点自身（不包含自身）
+        @param[in] exact 为 False 时返回距离不超过 h + skin 的候选邻居
+        """
+        if points is not None:
+            return cell_list_pairs(self.node, h, points=points)
+        return self.verlet_list(h, skin).update(self.node, exact=exact)
+
+    def neighbor_pairs(self, h, skin=0.0, exact=True, half=False):
+        """
+        @brief 距离不超过 h 的有序点对 (i, j)，i != j
+
+        @param[in] half 为 True 时只返回 i < j 的候选点对，其中可能包含距离在
+                        h 和 h + skin 之间的点对，由调用者自己处理
+        """
+        if half:
+            return self.verlet_list(h, skin).half_pairs(self.node)
+        indptr, indices = self.neighbor_list(h, skin=skin, exact=exact)
+        i = np.repeat(np.arange(self.number_of_nodes()), np.diff(indptr))
+        return i, indices
+
 
     @classmethod
     def from_dam_break_domain(cls, dx=0.02, dy=0.02):
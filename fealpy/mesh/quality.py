@@ -1,5 +1,135 @@
 import numpy as np 
 from numpy.linalg import norm, det, inv
+from scipy.sparse import csr_matrix
+
+# 正三角形和正四面体的边矩阵，平均比以它们为理想单元
+_REGULAR_SIMPLEX = {
+    2: np.array([[1.0, 0.5], [0.0, np.sqrt(3)/2]]),
+    3: np.array([[1.0, 0.5, 0.5], [0.0, np.sqrt(3)/2, np.sqrt(3)/6],
+        [0.0, 0.0, np.sqrt(2/3)]])}
+
+
+def mean_ratio_energy(node, cell, return_grad=False):
+    """
+    @brief 单纯形的平均比能量 eta = |T|_F^2/(d det(T)^{2/d})，T = J W^{-1}
+
+    @param[in] node 形状为 (NN, d) 的节点坐标
+    @param[in] cell 形状为 (NC, d+1) 的三角形或四面体单元
+    @param[in] return_grad 是否同时返回能量关于单元顶点坐标的梯度
+
+    @return 形状为 (NC, ) 的能量，以及形状为 (NC, d+1, d) 的梯度
+
+    @note 能量不小于 1，只在正单纯形上等于 1，1/eta 即平均比质量。
+          退化或者反向（det J <= 0）的单元能量为 inf、梯度为 0，
+          所以能量同时也是防止单元翻转的障碍函数。
+    """
+    TD = cell.shape[1] - 1
+    x = node[cell]
+    J = np.swapaxes(x[:, 1:] - x[:, :1], 1, 2) # (NC, d, d)，列为 x_i - x_0
+    Winv = inv(_REGULAR_SIMPLEX[TD])
+    T = J@Winv
+    d = det(T)
+    isValid = d > 0
+    s = np.where(isValid, d, 1.0)**(2/TD)
+    e = np.sum(T**2, axis=(1, 2))/(TD*s)
+    e[~isValid] = np.inf
+    if not return_grad:
+        return e
+
+    T[~isValid] = np.eye(TD)
+    ev = np.where(isValid, e, 0.0)
+    dT = 2*T/(TD*s)[:, None, None] - (2/TD)*ev[:, None, None]*np.swapaxes(inv(T), 1, 2)
+    dJ = dT@Winv.T
+    dJ[~isValid] = 0
+    g = np.zeros(x.shape, dtype=x.dtype)
+    g[:, 1:] = np.swapaxes(dJ, 1, 2)
+    g[:, 0] = -np.sum(g[:, 1:], axis=1)
+    return e, g
+
+
+def radius_ratio_energy(node, cell, return_grad=False):
+    """
+    @brief 单纯形的半径比能量，三角形为 R/(2r)，四面体为 R/(3r)
+
+    @return 形状为 (NC, ) 的能量，以及形状为 (NC, d+1, d) 的梯度
+
+    @note 三角形 mu = p q/(16 A^2)，p、q 为三条边长的和与积；四面体
+          mu = |d| S/(108 V^2)，d 为外接球球心公式中的向量，S 为四个面的面积和。
+          梯度由 grad mu = mu (grad p/p + grad q/q - 2 grad A/A) 这样的对数导数
+          按单元批量计算。退化或者反向的单元能量为 inf、梯度为 0。
+    """
+    TD = cell.shape[1] - 1
+    x = node[cell]
+    if TD == 2:
+        return _tri_radius_ratio(x, return_grad)
+    return _tet_radius_ratio(x, return_grad)
+
+
+def _tri_radius_ratio(x, return_grad):
+    v = [x[:, (i+2)%3] - x[:, (i+1)%3] for i in range(3)] # 第 i 个顶点对边
+    l = np.stack([np.sqrt(np.sum(vi**2, axis=1)) for vi in v], axis=1)
+    p = l.sum(axis=1)
+    q = l.prod(axis=1)
+    A = np.cross(x[:, 1] - x[:, 0], x[:, 2] - x[:, 0])/2
+    isValid = A > 0
+    Av = np.where(isValid, A, 1.0)
+    e = p*q/(16*Av**2)
+    e[~isValid] = np.inf
+    if not return_grad:
+        return e
+
+    g = np.zeros(x.shape, dtype=x.dtype)
+    for i in range(3):
+        a, b = (i+1)%3, (i+2)%3
+        t = ((1/p + 1/l[:, i])/l[:, i])[:, None]*v[i]
+        g[:, b] += t
+        g[:, a] -= t
+        w = x[:, (i+1)%3] - x[:, (i+2)%3]
+        g[:, i, 0] -= w[:, 1]/Av
+        g[:, i, 1] += w[:, 0]/Av
+    g *= np.where(isValid, e, 0.0)[:, None, None]
+    return e, g
+
+
+def _tet_radius_ratio(x, return_grad):
+    v = [x[:, i] - x[:, 0] for i in range(1, 4)]
+    a = [np.sum(vi**2, axis=1, keepdims=True) for vi in v]
+    c = [np.cross(v[(i+1)%3], v[(i+2)%3]) for i in range(3)]
+    dv = a[0]*c[0] + a[1]*c[1] + a[2]*c[2]
+    dn = np.sqrt(np.sum(dv**2, axis=1))
+    V = np.sum(v[0]*c[0], axis=1)/6
+
+    face = [(1, 2, 3), (0, 2, 3), (0, 1, 3), (0, 1, 2)]
+    n = [np.cross(x[:, j] - x[:, i], x[:, k] - x[:, i]) for i, j, k in face]
+    fa = [np.sqrt(np.sum(ni**2, axis=1))/2 for ni in n]
+    S = sum(fa)
+
+    isValid = (V > 0) & (dn > 0)
+    Vv = np.where(isValid, V, 1.0)
+    dnv = np.where(isValid, dn, 1.0)
+    e = dnv*S/(108*Vv**2)
+    e[~isValid] = np.inf
+    if not return_grad:
+        return e
+
+    # 对 v_i = x_i - x_0 的导数
+    gd = dv/dnv[:, None]
+    gv = []
+    for i in range(3):
+        j, k = (i+1)%3, (i+2)%3
+        t = 2*np.sum(gd*c[i], axis=1, keepdims=True)*v[i]
+        t += a[j]*np.cross(gd, v[k]) + a[k]*np.cross(v[j], gd)
+        gv.append(t/dnv[:, None] - 2*c[i]/(6*Vv[:, None]))
+    g = np.zeros(x.shape, dtype=x.dtype)
+    for i in range(3):
+        g[:, i+1] += gv[i]
+        g[:, 0] -= gv[i]
+    for (i, j, k), ni, ai in zip(face, n, fa):
+        nn = ni/np.where(ai > 0, 2*ai, 1.0)[:, None]
+        for m, (s0, s1) in zip((i, j, k), ((k, j), (i, k), (j, i))):
+            g[:, m] += 0.5*np.cross(nn, x[:, s0] - x[:, s1])/S[:, None]
+    g *= np.where(isValid, e, 0.0)[:, None, None]
+    return e, g
 
 
 class QualityMetric:
@@ -98,17 +228,18 @@ class TriRadiusRatio(QualityMetric):
         '''
         quality[detJ<0]=0
         return quality
-    def grad_quality(self):
-        """
-        @brief 计算
+    def grad_quality(self, mesh):
         """
+        @brief 半径比质量关于节点坐标的导数的线性化形式，grad = (A + B) x
 
-        NC = self.number_of_cells()
-        NN = self.number_of_nodes()
-        node = self.mesh.entity('node')
-        cell = self.mesh.entity('cell')
+        @return 形状为 (NN, NN) 的稀疏矩阵 A 和 B，分别作用在 x 和 y 坐标上
+        """
+        NC = mesh.number_of_cells()
+        NN = mesh.number_of_nodes()
+        node = mesh.entity('node')
+        cell = mesh.entity('cell')
 
-        localEdge = self.ds.localEdge
+        localEdge = mesh.ds.local_edge()
         v = [node[cell[:, j], :] - node[cell[:, i], :] for i, j in localEdge]
         l2 = np.zeros((NC, 3))
         for i in range(3):
@@ -117,10 +248,11 @@ class TriRadiusRatio(QualityMetric):
         l = np.sqrt(l2)
         p = l.sum(axis=1, keepdims=True)
         q = l.prod(axis=1, keepdims=True)
+        area = np.cross(v[1], v[2])[:, None]/2
         mu = p*q/(16*area**2)
         c = mu*(1/(p*l) + 1/l2)
 
-        val = np.zeros((NC, 3, 3), dtype=sefl.ftype)
+        val = np.zeros((NC, 3, 3), dtype=mesh.ftype)
         val[:, 0, 0] = c[:, 1] + c[:, 2]
         val[:, 0, 1] = -c[:, 2]
         val[:, 0, 2] = -c[:, 1]
@@ -133,23 +265,21 @@ class TriRadiusRatio(QualityMetric):
         val[:, 2, 1] = -c[:, 0]
         val[:, 2, 2] = c[:, 0] + c[:, 1]
 
-        I = np.broadcast_to(cell[:, None, :], shape=(NC, 3, 3))
-        J = np.broadcast_to(cell[:, :, None], shape=(NC, 3, 3))
-        A = csr_matrix((val, (I, J)), shape=(NN, NN))
+        I = np.broadcast_to(cell[:, :, None], shape=(NC, 3, 3))
+        J = np.broadcast_to(cell[:, None, :], shape=(NC, 3, 3))
+        A = csr_matrix((val.flat, (I.flat, J.flat)), shape=(NN, NN))
 
-        cn = mu/area
-        val[:, 0, 0] = 0
+        cn = (mu/area)[:, 0]
+        val = np.zeros((NC, 3, 3), dtype=mesh.ftype)
         val[:, 0, 1] = -cn
         val[:, 0, 2] = cn
 
         val[:, 1, 0] = cn
-        val[:, 1, 1] = 0
         val[:, 1, 2] = -cn
 
         val[:, 2, 0] = -cn
         val[:, 2, 1] = cn
-        val[:, 2, 2] = 0
-        B = csr_matrix((val, (I, J)), shape=(NN, NN))
+        B = csr_matrix((val.flat, (I.flat, J.flat)), shape=(NN, NN))
         return A, B
 
 class TetRadiusRatio(QualityMetric):
@@ -0,0 +1,120 @@
+import numpy as np
+from numpy.typing import NDArray
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+
+def hilbert_index(points: NDArray, order: int=None) -> NDArray:
+    """
+    @brief The index of points along the Hilbert curve of their bounding box.
+
+    @param points: (N, GD) array of coordinates, GD = 1, 2 or 3.
+    @param order: number of bits per axis, `64//GD` (at most 31) by default.
+
+    @return: (N, ) array of uint64.
+
+    @note Coordinates are scaled to integers in [0, 2^order) and converted
+    with Skilling's transpose algorithm ("Programming the Hilbert curve",
+    2004), vectorized over the points.
+    """
+    N, GD = points.shape
+    if order is None:
+        order = min(64//GD, 31)
+    one = np.uint64(1)
+
+    pmin = points.min(axis=0)
+    span = np.max(points.max(axis=0) - pmin)
+    span = span if span > 0 else 1.0
+    X = ((points - pmin)*((2**order - 1)/span)).astype(np.uint64)
+
+    # inverse undo excess work
+    Q = np.uint64(1 << (order - 1))
+    while Q > one:
+        P = Q - one
+        for i in range(GD):
+            flag = (X[:, i] & Q) != 0
+            X[flag, 0] ^= P
+            flag = ~flag
+            t = (X[flag, 0] ^ X[flag, i]) & P
+            X[flag, 0] ^= t
+            X[flag, i] ^= t
+        Q >>= one
+
+    # Gray encode
+    for i in range(1, GD):
+        X[:, i] ^= X[:, i-1]
+    t = np.zeros(N, dtype=np.uint64)
+    Q = np.uint64(1 << (order - 1))
+    while Q > one:
+        flag = (X[:, GD-1] & Q) != 0
+        t[flag] ^= Q - one
+        Q >>= one
+    X ^= t[:, None]
+
+    # interleave the transposed bits into one index
+    h = np.zeros(N, dtype=np.uint64)
+    for b in range(order-1, -1, -1):
+        b = np.uint64(b)
+        for i in range(GD):
+            h = (h << one) | ((X[:, i] >> b) & one)
+    return h
+
+
+def hilbert_order(points: NDArray, order: int=None) -> NDArray:
+    """
+    @brief The permutation sorting points along the Hilbert curve.
+    """
+    return np.argsort(hilbert_index(points, order=order), kind='stable')
+
+
+def first_touch_order(cell: NDArray, NN: int) -> NDArray:
+    """
+    @brief Number nodes in the order they first appear in `cell`.
+
+    @note Nodes not used by any cell are put at the end in their original order.
+    """
+    used, first = np.unique(cell.reshape(-1), return_index=True)
+    perm = used[np.argsort(first, kind='stable')]
+    isUsed = np.zeros(NN, dtype=np.bool_)
+    isUsed[used] = True
+    return np.r_[perm, np.nonzero(~isUsed)[0]]
+
+
+def rcm_order(cell2dof: NDArray, gdof: int=None) -> NDArray:
+    """
+    @brief Reverse Cuthill-McKee ordering of the dofs coupled through cells.
+
+    @param cell2dof: (NC, ldof) array.
+    """
+    NC, ldof = cell2dof.shape
+    if gdof is None:
+        gdof = cell2dof.max() + 1
+    C = csr_matrix((np.ones(NC*ldof), cell2dof.reshape(-1), np.arange(0, NC*ldof+1, ldof)),
+            shape=(NC, gdof))
+    G = (C.T@C).tocsr()
+    return np.asarray(reverse_cuthill_mckee(G, symmetric_mode=True), dtype=cell2dof.dtype)
+
+
+def inverse_permutation(perm: NDArray) -> NDArray:
+    iperm = np.zeros_like(perm)
+    iperm[perm] = np.arange(len(perm), dtype=perm.dtype)
+    return iperm
+
+
+def entity_permutation(old: NDArray, new: NDArray) -> NDArray:
+    """
+    @brief Match two numberings of the same entities given by their nodes.
+
+    @param old: (N, NV) entities of the old numbering, with nodes already
+    relabelled to the new node numbering.
+    @param new: (N, NV) entities of the new numbering.
+
+    @return: `perm` with `new[i]` the same entity as `old[perm[i]]`.
+    """
+    N = len(old)
+    key = np.sort(np.r_[old, new], axis=1)
+    _, inverse = np.unique(key, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    lookup = np.zeros(N, dtype=old.dtype)
+    lookup[inverse[:N]] = np.arange(N, dtype=old.dtype)
+    return lookup[inverse[N:]]
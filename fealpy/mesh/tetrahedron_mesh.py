@@ -604,6 +604,18 @@ class TetrahedronMesh(Mesh, Plotable):
         r = 3.0*vol/ss
         return R/r/3.0
 
+    ## @ingroup MeshQuality
+    def odt_iterate(self, maxit=1, **kwargs):
+        """
+        @brief ODT 光滑：节点移到相邻单元外心的体积加权平均
+
+        @param[in] kwargs 传给 MeshOptimizer 的参数，如 update、fd、fixed
+
+        @return 记录每次迭代信息的列表，见 MeshOptimizer.run
+        """
+        from .mesh_optimizer import MeshOptimizer
+        return MeshOptimizer(self, method='odt', **kwargs).run(maxit=maxit)
+
     ## @ingroup MeshQuality
     def grad_quality(self):
         """
@@ -760,65 +760,27 @@ class TriangleMesh(Mesh, Plotable):
                 NN = self.number_of_nodes()
                 self.ds.reinit(NN, cell)
 
-    def odt_iterate(self):
-        node = self.node.copy()
-        cell = self.ds.cell
-        alpha = 1
-
-        NN = self.number_of_nodes()
-        NC = self.number_of_cells()
-
-        isBdNode = self.ds.boundary_node_flag()
-        isBdCell = self.ds.boundary_cell_flag()
-        isFreeNode = ~isBdNode
-
-        cm = self.entity_measure("cell") # 单元面积
-        cb = self.entity_barycenter('cell') # 单元重心
-        cc = self.circumcenter() # 单元外心
-        cc[isBdCell] = cb[isBdCell]
-        cc = cm[...,None]*cc
-
-        newNode = np.zeros((NN,2),dtype=np.float64)
-        patch_area = np.zeros(NN,dtype=np.float64)
-
-        np.add.at(newNode,cell,np.broadcast_to(cc[:,None],(NC,3,2)))
-        np.add.at(patch_area,cell,np.broadcast_to(cm[:,None],(NC,3)))
-
-        newNode[isBdNode] = node[isBdNode]
-        newNode[isFreeNode] = newNode[isFreeNode]/patch_area[...,None][isFreeNode]
-        self.node = newNode
-        while np.sum(cm<=0)>0:
-            self.node[isFreeNode] = (1-alpha/2)*node[isFreeNode]+alpha*newNode[isFreeNode]
-        self.edge_swap()
-
-    def cpt_iterate(self):
-        node = self.node.copy()
-        cell = self.ds.cell
-        alpha = 1
-
-        NN = self.number_of_nodes()
-        NC = self.number_of_cells()
-
-        isBdNode = self.ds.boundary_node_flag()
-        isBdCell = self.ds.boundary_cell_flag()
-        isFreeNode = ~isBdNode
+    def odt_iterate(self, maxit=1, **kwargs):
+        """
+        @brief ODT 光滑：节点移到相邻单元外心的面积加权平均，之后做 edge_swap
 
-        cm = self.entity_measure("cell") # 单元面积
-        cb = self.entity_barycenter('cell') # 单元重心
-        cb = cm[...,None]*cb
+        @param[in] kwargs 传给 MeshOptimizer 的参数，如 update、fd、fixed
 
-        newNode = np.zeros((NN,2),dtype=np.float64)
-        patch_area = np.zeros(NN,dtype=np.float64)
+        @return 记录每次迭代信息的列表，见 MeshOptimizer.run
+        """
+        from .mesh_optimizer import MeshOptimizer
+        kwargs.setdefault('swap', True)
+        return MeshOptimizer(self, method='odt', **kwargs).run(maxit=maxit)
 
-        np.add.at(newNode,cell,np.broadcast_to(cb[:,None],(NC,3,2)))
-        np.add.at(patch_area,cell,np.broadcast_to(cm[:,None],(NC,3)))
+    def cpt_iterate(self, maxit=1, **kwargs):
+        """
+        @brief CPT 光滑：节点移到相邻单元重心的面积加权平均，之后做 edge_swap
 
-        newNode[isBdNode] = node[isBdNode]
-        newNode[isFreeNode] = newNode[isFreeNode]/patch_area[...,None][isFreeNode]
-        self.node = newNode
-        while np.sum(cm<=0)>0:
-            self.node[isFreeNode] = (1-alpha/2)*node[isFreeNode]+alpha*newNode[isFreeNode]
-        self.edge_swap()
+        @return 记录每次迭代信息的列表，见 MeshOptimizer.run
+        """
+        from .mesh_optimizer import MeshOptimizer
+        kwargs.setdefault('swap', True)
+        return MeshOptimizer(self, method='cpt', **kwargs).run(maxit=maxit)
 
     def uniform_bisect(self, n=1):
         for i in range(n):
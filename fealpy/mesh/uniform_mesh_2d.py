@@ -966,80 +966,22 @@ class UniformMesh2d(Mesh, Plotable):
         return A0, A1, A2
 
     ## @ingroup FDMInterface
-    def fast_sweeping_method(self, phi0):
+    def fast_sweeping_method(self, phi0, maxit=10, tol=1e-12, band=None):
         """
         @brief 均匀网格上的 fast sweeping method
-        @param[in] phi 是一个离散的水平集函数
+        @param[in] phi0 是一个离散的水平集函数，形状为 (nx+1, ny+1) 或 (NN, )
+        @param[in] maxit 最大迭代次数，每次迭代包含 4 个方向的扫描
+        @param[in] tol 两次迭代之间最大改变量的阈值
+        @param[in] band 窄带宽度，距离大于 band 的值截断为 band
 
-        @note 注意，我们这里假设 x 和 y 方向剖分的段数相等
-        """
-        m = 2
-        nx = self.ds.nx
-        ny = self.ds.ny
-        k = nx / ny
-        ns = ny
-        h = self.h[0]
+        @return 与 phi0 形状相同的符号距离函数
 
-        phi = self.function(ex=1)
-        isNearNode = self.function(dtype=np.bool_, ex=1)
-
-        # 把水平集函数转化为离散的网格函数
-        node = self.entity('node')
-        phi[1:-1, 1:-1] = phi0
-        sign = np.sign(phi[1:-1, 1:-1])
-
-        # 标记界面附近的点
-        isNearNode[1:-1, 1:-1] = np.abs(phi[1:-1, 1:-1]) < 2 * h
-        lsfun = UniformMesh2dFunction(self, phi[1:-1, 1:-1])
-        _, d = lsfun.project(node[isNearNode[1:-1, 1:-1]])
-        phi[isNearNode] = np.abs(d)  # 界面附近的点用精确值
-        phi[~isNearNode] = m  # 其它点用一个比较大的值
-
-        a = np.zeros(ns + 1, dtype=np.float64)
-        b = np.zeros(ns + 1, dtype=np.float64)
-        c = np.zeros(ns + 1, dtype=np.float64)
-        d = np.zeros(int(k * ns + 1), dtype=np.float64)
-        e = np.zeros(int(k * ns + 1), dtype=np.float64)
-        f = np.zeros(int(k * ns + 1), dtype=np.float64)
-
-        n = 0
-        for i in range(1, int(k * ns + 2)):
-            a[:] = np.minimum(phi[i - 1, 1:-1], phi[i + 1, 1:-1])
-            b[:] = np.minimum(phi[i, 0:ns + 1], phi[i, 2:])
-            flag = np.abs(a - b) >= h
-            c[flag] = np.minimum(a[flag], b[flag]) + h
-            c[~flag] = (a[~flag] + b[~flag] + np.sqrt(2 * h * h - (a[~flag] - b[~flag]) ** 2)) / 2
-            phi[i, 1:-1] = np.minimum(c, phi[i, 1:-1])
-            n += 1
-
-        for i in range(int(k * ns + 1), 0, -1):
-            a[:] = np.minimum(phi[i - 1, 1:-1], phi[i + 1, 1:-1])
-            b[:] = np.minimum(phi[i, 0:ns + 1], phi[i, 2:])
-            flag = np.abs(a - b) >= h
-            c[flag] = np.minimum(a[flag], b[flag]) + h
-            c[~flag] = (a[~flag] + b[~flag] + np.sqrt(2 * h * h - (a[~flag] - b[~flag]) ** 2)) / 2
-            phi[i, 1:-1] = np.minimum(c, phi[i, 1:-1])
-            n += 1
-
-        for j in range(1, ns + 2):
-            d[:] = np.minimum(phi[0:int(k * ns + 1), j], phi[2:, j])
-            e[:] = np.minimum(phi[1:-1, j - 1], phi[1:-1, j + 1])
-            flag = np.abs(d - e) >= h
-            f[flag] = np.minimum(d[flag], e[flag]) + h
-            f[~flag] = (d[~flag] + e[~flag] + np.sqrt(2 * h * h - (d[~flag] - e[~flag]) ** 2)) / 2
-            phi[1:-1, j] = np.minimum(f, phi[1:-1, j])
-            n += 1
-
-        for j in range(ns + 1, 0, -1):
-            d[:] = np.minimum(phi[0:int(k * ns + 1), j], phi[2:, j])
-            e[:] = np.minimum(phi[1:-1, j - 1], phi[1:-1, j + 1])
-            flag = np.abs(d - e) >= h
-            f[flag] = np.minimum(d[flag], e[flag]) + h
-            f[~flag] = (d[~flag] + e[~flag] + np.sqrt(2 * h * h - (d[~flag] - e[~flag]) ** 2)) / 2
-            phi[1:-1, j] = np.minimum(f, phi[1:-1, j])
-            n += 1
-
-        return sign * phi[1:-1, 1:-1]
+        @note 计算由 `fealpy.levelset.UniformMeshEikonalSolver` 完成，
+              x 和 y 方向的剖分段数和步长可以不同
+        """
+        from ..levelset.eikonal_solver import UniformMeshEikonalSolver
+        solver = UniformMeshEikonalSolver(self)
+        return solver.solve(phi0, maxit=maxit, tol=tol, band=band)
 
     ## @ingroup FEMInterface
     def geo_dimension(self):
@@ -662,12 +662,21 @@ class UniformMesh3d(Mesh, Plotable):
         pass
 
     ## @ingroup FDMInterface
-    def fast_sweeping_method(self, phi0):
+    def fast_sweeping_method(self, phi0, maxit=10, tol=1e-12, band=None):
         """
         @brief 均匀网格上的 fast sweeping method
-        @param[in] phi 是一个离散的水平集函数
+        @param[in] phi0 是一个离散的水平集函数，形状为 (nx+1, ny+1, nz+1) 或 (NN, )
+        @param[in] maxit 最大迭代次数，每次迭代包含 8 个方向的扫描
+        @param[in] tol 两次迭代之间最大改变量的阈值
+        @param[in] band 窄带宽度，距离大于 band 的值截断为 band
+
+        @return 与 phi0 形状相同的符号距离函数
+
+        @note 计算由 `fealpy.levelset.UniformMeshEikonalSolver` 完成
         """
-        pass
+        from ..levelset.eikonal_solver import UniformMeshEikonalSolver
+        solver = UniformMeshEikonalSolver(self)
+        return solver.solve(phi0, maxit=maxit, tol=tol, band=band)
 
     ## @ingroup FEMInterface
     def geo_dimension(self):
@@ -2,6 +2,8 @@
 Activation Functions
 """
 
+from typing import Sequence, List
+
 from torch import Tensor, exp, sin, cos, tanh, abs
 import scipy.special as sp
 from torch.nn import Module
@@ -40,6 +42,18 @@ class Activation(Module):
         else:
             raise ValueError(f"The order can not be negative.")
 
+    def derivatives(self, x: Tensor, orders: Sequence[int]) -> List[Tensor]:
+        """
+        @brief Derivatives of several orders at the same `x`. Activations whose\
+               derivatives share intermediate values override this to compute\
+               them only once.
+
+        @param orders: sequence of int. Orders of the derivatives.
+
+        @return: list of Tensors, in the same order as `orders`.
+        """
+        return [self.dn(x, k) for k in orders]
+
     def d1(self, p: Tensor) -> Tensor:
         """
         @brief 1-order derivative
@@ -76,6 +90,12 @@ class Sin(Activation):
         else:
             return (-1)**a * cos(x)
 
+    def derivatives(self, x: Tensor, orders: Sequence[int]) -> List[Tensor]:
+        s = sin(x) if any(k % 2 == 0 for k in orders) else None
+        c = cos(x) if any(k % 2 == 1 for k in orders) else None
+        cycle = (s, c, -s if s is not None else None, -c if c is not None else None)
+        return [cycle[k % 4] for k in orders]
+
     def d1(self, p: Tensor):
         return cos(p)
 
@@ -100,6 +120,12 @@ class Cos(Activation):
         else:
             return -(-1)**a * sin(x)
 
+    def derivatives(self, x: Tensor, orders: Sequence[int]) -> List[Tensor]:
+        c = cos(x) if any(k % 2 == 0 for k in orders) else None
+        s = sin(x) if any(k % 2 == 1 for k in orders) else None
+        cycle = (c, -s if s is not None else None, -c if c is not None else None, s)
+        return [cycle[k % 4] for k in orders]
+
     def d1(self, p: Tensor):
         return -sin(p)
 
@@ -117,6 +143,13 @@ class Tanh(Activation):
     def forward(self, p: Tensor):
         return tanh(p)
 
+    def derivatives(self, x: Tensor, orders: Sequence[int]) -> List[Tensor]:
+        if max(orders) > 2:
+            return super().derivatives(x, orders)
+        t = tanh(x)
+        s2 = 1 - t**2 # sech^2
+        return [(t, s2, -2*t*s2)[k] for k in orders]
+
     def d1(self, p: Tensor):
         return sech(p) ** 2
 
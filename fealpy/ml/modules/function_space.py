@@ -1,6 +1,7 @@
 
 from warnings import warn
-from typing import Generic, TypeVar, Optional
+from typing import Generic, TypeVar, Optional, Sequence, Dict, Tuple
+from contextlib import contextmanager
 
 import torch
 from torch import Tensor, dtype, device
@@ -12,9 +13,16 @@ from ..nntyping import TensorFunction
 from .module import TensorMapping
 
 
+# NOTE: Orders supported by `FunctionSpace.fused_basis`, and the number of
+# extra geometric dims they have after the basis dim.
+BASIS_ORDERS: Dict[str, int] = {'value': 0, 'grad': 1, 'hessian': 2, 'laplace': 0}
+
+
 # NOTE: Inherit from Module to make it able to be saved as '.pth' file.
 class FunctionSpace(Module):
     """The base class for all function spaces in ML module."""
+    _basis_cache: Optional[Dict[int, Tuple[Tensor, int, Dict[str, Tensor]]]] = None
+
     def __init__(self, in_dim: int=1, out_dim: int=1,
                  dtype: dtype=None, device: device=None, **kwargs) -> None:
         super().__init__()
@@ -170,6 +178,68 @@ class FunctionSpace(Module):
         raise NotImplementedError(f"derivative_basis is not supported by {self.__class__.__name__}"
                                   "or it has not been implmented.")
 
+    def fused_basis(self, p: Tensor, orders: Sequence[str]=('value', 'grad', 'laplace'),
+                    *, index=_S) -> Dict[str, Tensor]:
+        """
+        @brief Evaluate basis and their derivatives of several orders at the\
+               same time.
+
+        @param p: input Tensor. In the shape of (..., #dims).
+        @param orders: sequence of 'value', 'grad', 'hessian' and 'laplace'.\
+               Shapes of them are the same as `basis`, `grad_basis`,\
+               `hessian_basis` and `laplace_basis` respectively.
+        @param index: indices of basis.
+
+        @return: dict mapping orders to Tensors.
+
+        @note: Inside `with space.basis_cache():`, results are cached for each\
+               sample Tensor `p`, and only missing orders are evaluated. This\
+               helps when several operators are applied to the same samples.
+        """
+        for order in orders:
+            if order not in BASIS_ORDERS:
+                raise ValueError(f"Invalid order '{order}', expected one of "
+                                 f"{tuple(BASIS_ORDERS)}.")
+        cache = self._basis_cache
+        if (cache is None) or (index is not _S):
+            return self._fused_basis(p, orders, index=index)
+
+        entry = cache.get(id(p), None)
+        # NOTE: Check the identity and version of `p`, as ids can be reused and
+        # tensors can be modified inplace.
+        if (entry is None) or (entry[0] is not p) or (entry[1] != p._version):
+            entry = (p, p._version, {})
+            cache[id(p)] = entry
+        data = entry[2]
+        missing = [order for order in orders if order not in data]
+        if missing:
+            data.update(self._fused_basis(p, missing, index=index))
+        return {order: data[order] for order in orders}
+
+    def _fused_basis(self, p: Tensor, orders: Sequence[str], *, index=_S) -> Dict[str, Tensor]:
+        """
+        @brief Evaluate basis of the given orders. Subclasses override this to\
+               share intermediate values between orders.
+        """
+        funcs = {'value': self.basis, 'grad': self.grad_basis,
+                 'hessian': self.hessian_basis, 'laplace': self.laplace_basis}
+        return {order: funcs[order](p, index=index) for order in orders}
+
+    @contextmanager
+    def basis_cache(self):
+        """
+        @brief Context manager caching results of `fused_basis` for each sample\
+               Tensor. The cache is dropped when exiting the outermost context.
+        """
+        if self._basis_cache is not None:
+            yield self
+            return
+        self._basis_cache = {}
+        try:
+            yield self
+        finally:
+            self._basis_cache = None
+
     def integral_basis(self, quadpts: Tensor, weights: Optional[Tensor]=None, *, index=_S):
         """
         @brief Return integral of basis functions, with shape (#basis, ).
@@ -3,6 +3,7 @@ Partitions of Units
 """
 from typing import (
     Union, List, Callable, Any, Generic, TypeVar, Tuple, Literal, Optional,
+    Sequence, Dict
 )
 
 import numpy as np
@@ -233,7 +234,7 @@ class PoUSin(PoU):
 ### PoU in Spaces
 ##################################################
 
-from .function_space import FunctionSpace
+from .function_space import FunctionSpace, BASIS_ORDERS
 
 _FS = TypeVar('_FS', bound=FunctionSpace)
 
@@ -343,6 +344,60 @@ class PoULocalSpace(FunctionSpace, Generic[_FS]):
             raise NotImplementedError("Derivatives higher than order 4 have bot been implemented.")
         return ret * rs
 
+    def _fused_basis(self, p: Tensor, orders: Sequence[str], *, index=S) -> Dict[str, Tensor]:
+        # NOTE: The local mapping, the PoU function and the inner basis are all
+        # evaluated once and shared by orders. For isotropic partitions, the
+        # laplacian only needs the laplacian of the inner basis, not the hessian.
+        x = self.global_to_local(p)
+        rinv = 1/self.radius
+        isotropic = bool(torch.all(self.radius == self.radius[0]))
+        need_lap = 'laplace' in orders
+        need_hes = ('hessian' in orders) or (need_lap and not isotropic)
+        need_grad = need_hes or need_lap or ('grad' in orders)
+
+        inner = ['value', ]
+        if need_grad:
+            inner.append('grad')
+        if need_hes:
+            inner.append('hessian')
+        elif need_lap:
+            inner.append('laplace')
+        phis = self.space.fused_basis(x, inner, index=index)
+        phi = phis['value']
+        psi = self.pou_fn(x)
+        ret: Dict[str, Tensor] = {}
+
+        if 'value' in orders:
+            ret['value'] = phi * psi
+        if need_grad:
+            gphi = phis['grad']
+            gpsi = self.pou_fn.gradient(x)
+            if 'grad' in orders:
+                grad = einsum("...d, ...f -> ...fd", gpsi, phi) + psi[..., None] * gphi
+                ret['grad'] = grad * rinv
+        if need_hes or need_lap:
+            hpsi = self.pou_fn.hessian(x)
+        if need_hes:
+            hphi = phis['hessian']
+            if 'hessian' in orders:
+                hes = einsum("...xy, ...f -> ...fxy", hpsi, phi)
+                cross = einsum("...x, ...fy -> ...fxy", gpsi, gphi)
+                hes = hes + cross + torch.transpose(cross, -1, -2)
+                hes = hes + psi[..., None, None] * hphi
+                ret['hessian'] = hes * (rinv[:, None] * rinv[None, :])
+        if need_lap:
+            if need_hes:
+                rs = rinv**2
+                lap = einsum("...dd, ...f, d -> ...f", hpsi, phi, rs)
+                lap = lap + 2 * einsum("...d, ...fd, d -> ...f", gpsi, gphi, rs)
+                lap = lap + psi * einsum("...fdd, d -> ...f", hphi, rs)
+            else:
+                lap = einsum("...dd, ...f -> ...f", hpsi, phi)
+                lap = lap + 2 * einsum("...d, ...fd -> ...f", gpsi, gphi)
+                lap = (lap + psi * phis['laplace']) * rinv[0]**2
+            ret['laplace'] = lap
+        return ret
+
 
 SpaceFactory = Callable[[int], _FS]
 def assemble(dimension: int=0):
@@ -492,6 +547,24 @@ class PoUSpace(FunctionSpace, Generic[_FS]):
         flag = part.flag(p)
         return flag, self.partitions[idx].grad_basis(p[flag, ...], index=index)
 
+    def _fused_basis(self, p: Tensor, orders: Sequence[str], *, index=S) -> Dict[str, Tensor]:
+        N = p.shape[0:-1]
+        M = self.number_of_basis()
+        GD = p.shape[-1]
+        ret = {order: torch.zeros(N + (M, ) + (GD, )*BASIS_ORDERS[order],
+                                  dtype=self.dtype, device=self.device)
+               for order in orders}
+        basis_cursor = 0
+
+        for part in self.partitions:
+            NF = part.number_of_basis()
+            flag = part.flag(p)
+            data = part.fused_basis(p[flag, ...], orders, index=index)
+            for order in orders:
+                ret[order][flag, basis_cursor:basis_cursor+NF, ...] += data[order]
+            basis_cursor += NF
+        return ret
+
     @classmethod
     def from_uniform_mesh(cls, space_factory: SpaceFactory[_FS], uniform_mesh,
                           part_loc: Literal['node', 'cell'], pou: Optional[PoU]=None,
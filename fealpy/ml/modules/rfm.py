@@ -2,7 +2,7 @@
 Modules for the Random Feature Method
 """
 
-from typing import Tuple
+from typing import Tuple, Sequence, Dict
 
 import torch
 from torch import Tensor, float64
@@ -14,6 +14,7 @@ from .function_space import FunctionSpace
 from .activate import Activation
 
 PI = torch.pi
+_ACT_ORDER = {'value': 0, 'grad': 1, 'hessian': 2, 'laplace': 2}
 
 
 class RandomFeatureSpace(FunctionSpace):
@@ -97,6 +98,26 @@ class RandomFeatureSpace(FunctionSpace):
             b = torch.prod(self.linear.weight[:, idx], dim=-1, keepdim=False)
             return torch.einsum("...f, f -> ...f", a, b)
 
+    def _fused_basis(self, p: Tensor, orders: Sequence[str], *, index=_S) -> Dict[str, Tensor]:
+        # NOTE: The linear transform is done once, and the activation derivatives
+        # are shared by orders. Hessian and laplacian both use the 2nd derivative.
+        z = self._linear(p, index=index)
+        weight = self.linear.weight[index, :]
+        act_orders = sorted({_ACT_ORDER[order] for order in orders})
+        acts = dict(zip(act_orders, self.activate.derivatives(z, act_orders)))
+        ret: Dict[str, Tensor] = {}
+        for order in orders:
+            if order == 'value':
+                ret[order] = acts[0]
+            elif order == 'grad':
+                ret[order] = acts[1][..., None] * weight
+            elif order == 'hessian':
+                ww = weight[:, :, None] * weight[:, None, :]
+                ret[order] = acts[2][..., None, None] * ww
+            else:
+                ret[order] = acts[2] * torch.sum(weight**2, dim=-1)
+        return ret
+
 
 #     def scale(self, p: Tensor, operator: Operator):
 #         """
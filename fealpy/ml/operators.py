@@ -5,10 +5,11 @@ from typing import (
     Generic, TypeVar, overload
 )
 
+import numpy as np
 import torch
 from torch import Tensor
-from scipy.sparse import csr_matrix
-from scipy.sparse.linalg import spsolve
+from scipy.sparse import csr_matrix, vstack, diags, identity
+from scipy.sparse.linalg import spsolve, lsqr, lsmr
 
 from .nntyping import TensorFunction, S
 from .modules import FunctionSpace, Function, PoUSpace
@@ -30,6 +31,117 @@ def _to_tensor(sample: Tensor, func_or_tensor: Optional[FuncOrTensorLike]):
         ret = func_or_tensor
     return ret
 
+def _to_csr(data: Tensor):
+    data = data.coalesce()
+    idx = data.indices().cpu().numpy()
+    val = data.values().detach().cpu().numpy()
+    return csr_matrix((val, (idx[0], idx[1])), shape=tuple(data.shape))
+
+def _to_sparse(rows: List[Tensor], cols: List[Tensor], vals: List[Tensor], shape, p: Tensor):
+    if len(vals) == 0:
+        return torch.sparse_coo_tensor(
+            torch.zeros((2, 0), dtype=torch.int64, device=p.device),
+            torch.zeros((0, ), dtype=p.dtype, device=p.device), shape,
+            check_invariants=False
+        )
+    indices = torch.stack((torch.cat(rows), torch.cat(cols)), dim=0)
+    return torch.sparse_coo_tensor(indices, torch.cat(vals), shape, check_invariants=False)
+
+def _block_triplets(row: Tensor, col: slice, data: Tensor):
+    """
+    @brief COO triplets of a dense block `data` located at rows `row` and\
+           columns `col` (a slice).
+    """
+    nr, nc = data.shape
+    cols = torch.arange(col.start, col.stop, dtype=torch.int64, device=data.device)
+    return (row[:, None].expand(nr, nc).reshape(-1),
+            cols[None, :].expand(nr, nc).reshape(-1),
+            data.reshape(-1))
+
+def _basis_orders(ops: Sequence["Operator"]):
+    orders = []
+    for op in ops:
+        orders.extend(o for o in op.basis_orders if o not in orders)
+    return tuple(orders)
+
+def _fused_by_partitions(ops: Sequence["Operator"], space: FunctionSpace) -> bool:
+    return isinstance(space, PoUSpace) and \
+        all(isinstance(op, ScalerOperator) and op.pointwise for op in ops)
+
+def _partition_blocks(ops: Sequence["ScalerOperator"], p: Tensor, space: PoUSpace)\
+    -> Generator[Tuple[int, Tensor, Tensor], None, None]:
+    """
+    @brief Apply pointwise scaler operators to the local space of each partition,\
+           with the samples inside it only. Yield (partition index, flag, data).
+
+    @note: Basis of all orders required by the operators are evaluated once in\
+           each partition.
+    """
+    orders = _basis_orders(ops)
+    coefs = []
+    for op in ops:
+        coef = op._coef(p)
+        sample_coef = (coef is not None) and (coef.ndim >= op.sample_coef_ndim)
+        coefs.append((coef, sample_coef))
+    for idx, part in enumerate(space.partitions):
+        flag = part.flag(p)
+        if not torch.any(flag):
+            continue
+        sub = p[flag, ...]
+        with part.basis_cache():
+            part.fused_basis(sub, orders)
+            data = reduce(torch.add, (
+                op._apply(sub, part, coef[flag, ...] if sample_coef else coef)
+                for op, (coef, sample_coef) in zip(ops, coefs)
+            ))
+        yield idx, flag, data
+
+def _apply_ops(ops: Sequence["Operator"], p: Tensor, space: FunctionSpace) -> Tensor:
+    """
+    @brief Sum of dense results of operators applied to the same samples.
+
+    @note: Basis required by all operators are evaluated in one pass. Pointwise\
+           operators evaluate PoUSpace by partitions (see `_partition_blocks`),\
+           so the dense basis of the whole space is not prefetched for them.
+    """
+    if _fused_by_partitions(ops, space) and p.ndim == 2:
+        ret = torch.zeros((p.shape[0], space.number_of_basis()),
+                          dtype=p.dtype, device=p.device)
+        for idx, flag, data in _partition_blocks(ops, p, space):
+            ret[flag, space.partition_basis_slice(idx)] += data
+        return ret
+    orders = () if isinstance(space, PoUSpace) else _basis_orders(ops)
+    with space.basis_cache():
+        if orders:
+            space.fused_basis(p, orders)
+        return reduce(torch.add, (op.apply(p, space) for op in ops))
+
+def _apply_ops_sparse(ops: Sequence["Operator"], p: Tensor, space: FunctionSpace) -> Tensor:
+    """
+    @brief Sum of sparse results of operators applied to the same samples.
+
+    @note: If all operators are pointwise scaler operators and the space is a\
+           PoUSpace, the dense (N, nf) matrix is never formed, see\
+           `_partition_blocks`.
+    """
+    if not _fused_by_partitions(ops, space):
+        orders = () if isinstance(space, PoUSpace) else _basis_orders(ops)
+        with space.basis_cache():
+            if orders:
+                space.fused_basis(p, orders)
+            return reduce(torch.add, (op.apply_sparse(p, space) for op in ops))
+
+    rows, cols, vals = [], [], []
+    for idx, flag, data in _partition_blocks(ops, p, space):
+        row = torch.nonzero(flag).reshape(-1)
+        r, c, v = _block_triplets(row, space.partition_basis_slice(idx), data)
+        rows.append(r)
+        cols.append(c)
+        vals.append(v)
+    shape = (p.shape[0], space.number_of_basis())
+    return _to_sparse(rows, cols, vals, shape, p)
+
+
 _FS = TypeVar('_FS', bound=FunctionSpace)
 
 
@@ -89,10 +201,65 @@ class Form(Generic[_FS]):
         for i in sub_list:
             pts = self.samples[i]
             ops = self.operators[i]
-            basis = reduce(torch.add, (op.apply(pts, space) for op in ops))
+            basis = _apply_ops(ops, pts, space)
             src = self.sources[i].broadcast_to(basis.shape[0], self.gd)
             yield basis, src
 
+    def apply_all_sparse(self, op_idx=S, batch_size: Optional[int]=None)\
+        -> Generator[Tuple[Tensor, Tensor], None, None]:
+        """
+        @brief Like `apply_all`, but yield basis as sparse COO tensors.
+
+        @param batch_size: int, optional. Split samples of the pointwise conditions\
+               into batches with at most `batch_size` rows, so that only one batch\
+               is evaluated at a time. Do not split if `None`.
+        """
+        space = self.space
+        if isinstance(op_idx, int):
+            sub_list = [op_idx, ]
+        else:
+            sub_list = range(len(self.samples))[op_idx]
+        for i in sub_list:
+            pts = self.samples[i]
+            ops = self.operators[i]
+            N = pts.shape[0]
+            pointwise = all(op.pointwise for op in ops) and pts.ndim == 2
+            if (batch_size is None) or (not pointwise) or (N <= batch_size):
+                basis = _apply_ops_sparse(ops, pts, space)
+                src = self.sources[i].broadcast_to(basis.shape[0], self.gd)
+                yield basis, src
+            else:
+                src = self.sources[i].broadcast_to(N, self.gd)
+                for start in range(0, N, batch_size):
+                    sub = pts[start:start+batch_size]
+                    basis = _apply_ops_sparse(ops, sub, space)
+                    yield basis, src[start:start+batch_size]
+
+    def sparse_system(self, *, rescale: Optional[float]=1.0,
+                      batch_size: Optional[int]=None) -> Tuple[csr_matrix, np.ndarray]:
+        """
+        @brief Assemble the collocation equations `A x = b` themselves (not the\
+               normal equations), with A in csr_matrix.
+
+        @param rescale: float.
+        @param batch_size: int, optional. See `apply_all_sparse`.
+
+        @return: Tuple[csr_matrix, ndarray]. A with shape (#equations, NF) and b\
+                 with shape (#equations, gd).
+
+        @note: For PoUSpace, each row only has non-zeros in the partitions\
+               containing the sample, so the memory is proportional to\
+               #equations * (features per partition).
+        """
+        As: List[csr_matrix] = []
+        bs: List[np.ndarray] = []
+        for phi, src in self.apply_all_sparse(batch_size=batch_size):
+            if rescale is not None:
+                phi, src = ST.rescale_sparse(phi, src, rescale)
+            As.append(_to_csr(phi))
+            bs.append(src.detach().cpu().numpy())
+        return vstack(As, format='csr'), np.concatenate(bs, axis=0)
+
     @overload
     def assembly(self, *, rescale: Optional[float]=1.0, allow_inplace=True) -> Tuple[csr_matrix, csr_matrix]: ...
     @overload
@@ -101,7 +268,8 @@ class Form(Generic[_FS]):
     @overload
     def assembly(self, *, rescale: Optional[float]=1.0,
                  return_sparse: Literal[False]=False, allow_inplace=True) -> Tuple[Tensor, Tensor]: ...
-    def assembly(self, *, rescale: Optional[float]=1.0, return_sparse=True, allow_inplace=True):
+    def assembly(self, *, rescale: Optional[float]=1.0, return_sparse=True, allow_inplace=True,
+                 block_sparse=False, batch_size: Optional[int]=None):
         """
         @brief Assemble least-square matrix for the linear equations.
 
@@ -110,6 +278,12 @@ class Form(Generic[_FS]):
                Defaults to `True`.
         @param allow_inplace: bool, optional. Set `False` to avoid in-place operation\
                in assembling. Defaults to `True`.
+        @param block_sparse: bool, optional. Accumulate A.T@A from sparse batches\
+               instead of a dense (NF, NF) Tensor. For PoUSpace the result only has\
+               blocks between overlapping partitions. Always returns csr_matrix.\
+               Defaults to `False`.
+        @param batch_size: int, optional. Batch size for `block_sparse`, see\
+               `apply_all_sparse`.
 
         @return: Tuple[Tensor, Tensor] or Tuple[csr_matrix, csr_matrix].\
         """
@@ -118,6 +292,18 @@ class Form(Generic[_FS]):
         assert len(self.sources) >= 1
         bshape = (NF, self.gd)
 
+        if block_sparse:
+            A = csr_matrix((NF, NF), dtype=np.float64)
+            b = np.zeros(bshape, dtype=np.float64)
+            for phi, src in self.apply_all_sparse(batch_size=batch_size):
+                if rescale is not None:
+                    phi, src = ST.rescale_sparse(phi, src, rescale)
+                phi = _to_csr(phi)
+                phiT = phi.T.tocsr()
+                A += phiT@phi
+                b += phiT@src.detach().cpu().numpy()
+            return A, csr_matrix(b)
+
         A = torch.zeros((NF, NF), dtype=space.dtype, device=space.device)
         b = torch.zeros(bshape, dtype=space.dtype, device=space.device)
 
@@ -134,15 +320,52 @@ class Form(Generic[_FS]):
             return csr_matrix(A.detach().cpu()), csr_matrix(b.detach().cpu())
         return A, b
 
-    def spsolve(self, *, rescale: Optional[float]=1.0, ridge: Optional[float]=None):
-        A_, b_ = self.assembly(rescale=rescale, return_sparse=False)
-        if ridge is not None:
-            ST.ridge(A_, ridge)
-        A_ = csr_matrix(A_)
-        b_ = csr_matrix(b_)
+    def spsolve(self, *, rescale: Optional[float]=1.0, ridge: Optional[float]=None,
+                block_sparse=False, batch_size: Optional[int]=None):
+        if block_sparse:
+            A_, b_ = self.assembly(rescale=rescale, block_sparse=True, batch_size=batch_size)
+            if ridge is not None:
+                A_ = A_ + ridge * identity(A_.shape[0], format='csr')
+        else:
+            A_, b_ = self.assembly(rescale=rescale, return_sparse=False)
+            if ridge is not None:
+                ST.ridge(A_, ridge)
+            A_ = csr_matrix(A_)
+            b_ = csr_matrix(b_)
         um = spsolve(A_, b_)
         return self.space.function(torch.from_numpy(um))
 
+    def lsqr(self, *, rescale: Optional[float]=1.0, damp=0.0, atol=1e-12, btol=1e-12,
+             iter_lim: Optional[int]=None, batch_size: Optional[int]=None,
+             method: Literal['lsqr', 'lsmr']='lsqr'):
+        """
+        @brief Solve the collocation equations in the least-square sense by LSQR\
+               (or LSMR) on the sparse system from `sparse_system`, without forming\
+               the normal equations.
+
+        @param rescale: float.
+        @param damp: float. Damping factor, similar to `ridge` in `spsolve`.
+        @param atol, btol: float. Stopping tolerances.
+        @param iter_lim: int, optional.
+        @param batch_size: int, optional. See `apply_all_sparse`.
+        @param method: 'lsqr' or 'lsmr'.
+
+        @note: Columns are scaled to unit norm before iterating, which reduces\
+               the iteration count a lot for random features of different frequency.
+        """
+        A_, b_ = self.sparse_system(rescale=rescale, batch_size=batch_size)
+        norm = np.sqrt(np.asarray(A_.multiply(A_).sum(axis=0))).reshape(-1)
+        norm[norm == 0] = 1.0
+        D = diags(1/norm)
+        AD = A_@D
+        solver = lsqr if method == 'lsqr' else lsmr
+        um = np.stack([solver(AD, b_[:, i], damp=damp, atol=atol, btol=btol,
+                              iter_lim=iter_lim)[0] for i in range(b_.shape[1])], axis=-1)
+        um /= norm[:, None]
+        if um.shape[1] == 1:
+            um = um[:, 0]
+        return self.space.function(torch.from_numpy(um))
+
     def residual(self, um: Tensor, op_index=S):
         ress: List[Tensor] = []
         for basis, src in self.apply_all(op_idx=op_index):
@@ -161,6 +384,13 @@ class Form(Generic[_FS]):
 
 class Operator():
     """Abstract base class of Operator for functions in space."""
+    # NOTE: Pointwise operators only combine basis values at the same sample,
+    # so that they can be applied to samples batch by batch.
+    pointwise = False
+    # NOTE: Orders of `space.fused_basis` used by the operator, evaluated in one
+    # pass for all operators applied to the same samples.
+    basis_orders: Tuple[str, ...] = ()
+
     def __hash__(self) -> int:
         return id(self)
 
@@ -176,6 +406,16 @@ class Operator():
         """
         raise NotImplementedError
 
+    def apply_sparse(self, p: Tensor, space: FunctionSpace) -> Tensor:
+        """
+        @brief Apply to a function space, and return a sparse COO Tensor with\
+               shape (N, nf).
+
+        @note: This default implementation converts the dense result of `apply`.
+        """
+        data = self.apply(p, space)
+        return data.reshape(data.shape[0], -1).to_sparse()
+
     def integrate(self, p: Tensor, space: FunctionSpace, *, index=S) -> Tensor:
         """
         @brief Assemble matrix for weak formulation, and return with shape (nf, nf).
@@ -185,6 +425,35 @@ class Operator():
 
 class ScalerOperator(Operator):
     """Abstract class for scaler operators. Only for typing."""
+    # NOTE: Number of dims of the coefficient when it is given sample-wise.
+    sample_coef_ndim = 1
+
+    def _coef(self, p: Tensor) -> Optional[Tensor]:
+        coef = getattr(self, 'coef', None)
+        if coef is None:
+            return None
+        return _to_tensor(p, coef)
+
+    def _apply(self, p: Tensor, space: FunctionSpace, coef: Optional[Tensor], *, index=S) -> Tensor:
+        raise NotImplementedError
+
+    def apply(self, p: Tensor, space: FunctionSpace, *, index=S) -> Tensor:
+        if (index is S) and (p.ndim == 2) and _fused_by_partitions((self, ), space):
+            return _apply_ops((self, ), p, space)
+        return self._apply(p, space, self._coef(p), index=index)
+
+    def apply_sparse(self, p: Tensor, space: FunctionSpace) -> Tensor:
+        """
+        @brief Apply to a function space, and return a sparse COO Tensor with\
+               shape (N, nf).
+
+        @note: For PoUSpace, pointwise operators are applied to the local space\
+               of each partition with the samples inside it only, so the dense\
+               (N, nf) matrix is never formed.
+        """
+        if (not self.pointwise) or (not isinstance(space, PoUSpace)):
+            return super().apply_sparse(p, space)
+        return _apply_ops_sparse((self, ), p, space)
     def __call__(self, func: Function) -> TensorFunction:
         space = func.space
         um = func.um
@@ -211,11 +480,14 @@ class ScalerDiffusion(ScalerOperator):
         super().__init__()
         self.coef = coef
 
-    def apply(self, p: Tensor, space: FunctionSpace, *, index=S):
-        if self.coef is None:
-            return -space.laplace_basis(p, index=index)
-        coef = _to_tensor(p, self.coef)
-        return -space.laplace_basis(p, index=index) * coef
+    pointwise = True
+    basis_orders = ('laplace', )
+
+    def _apply(self, p: Tensor, space: FunctionSpace, coef: Optional[Tensor], *, index=S):
+        lap = space.fused_basis(p, self.basis_orders, index=index)['laplace']
+        if coef is None:
+            return -lap
+        return -lap * coef
 
     def integrate(self, p: Tensor, space: FunctionSpace, *, index=S) -> Tensor:
         gphi = space.grad_basis(p, index=index)
@@ -239,9 +511,15 @@ class ScalerConvection(ScalerOperator):
         super().__init__()
         self.coef = coef
 
-    def apply(self, p: Tensor, space: FunctionSpace, *, index=S):
-        coef = _to_tensor(p, self.coef)
-        return space.convect_basis(p, coef=coef, index=index)
+    pointwise = True
+    sample_coef_ndim = 2
+    basis_orders = ('grad', )
+
+    def _apply(self, p: Tensor, space: FunctionSpace, coef: Optional[Tensor], *, index=S):
+        grad = space.fused_basis(p, self.basis_orders, index=index)['grad']
+        if coef.ndim == 1:
+            return torch.einsum('d, ...fd -> ...f', coef, grad)
+        return torch.einsum('...d, ...fd -> ...f', coef, grad)
 
     def integrate(self, p: Tensor, space: FunctionSpace, *, index=S) -> Tensor:
         phi = space.basis(p, index=index)
@@ -264,11 +542,14 @@ class ScalerMass(ScalerOperator):
         super().__init__()
         self.coef = coef
 
-    def apply(self, p: Tensor, space: FunctionSpace, *, index=S):
-        if self.coef is None:
-            return space.basis(p, index=index)
-        coef = _to_tensor(p, self.coef)
-        return space.basis(p, index=index) * coef
+    pointwise = True
+    basis_orders = ('value', )
+
+    def _apply(self, p: Tensor, space: FunctionSpace, coef: Optional[Tensor], *, index=S):
+        phi = space.fused_basis(p, self.basis_orders, index=index)['value']
+        if coef is None:
+            return phi
+        return phi * coef
 
     def integrate(self, p: Tensor, space: FunctionSpace, *, index=S) -> Tensor:
         phi = space.basis(p, index=index)
@@ -288,11 +569,59 @@ class Integrator(ScalerOperator):
         basis = space.basis(p, index=index)
         return torch.mean(basis, dim=0, keepdim=True)
 
+    def apply_sparse(self, p: Tensor, space: FunctionSpace) -> Tensor:
+        if not isinstance(space, PoUSpace):
+            return super().apply_sparse(p, space)
+        N = p.shape[0]
+        row = torch.zeros((1, ), dtype=torch.int64, device=p.device)
+        rows, cols, vals = [], [], []
+        for idx, part in enumerate(space.partitions):
+            flag = part.flag(p)
+            if not torch.any(flag):
+                continue
+            data = torch.sum(part.basis(p[flag, ...]), dim=0, keepdim=True) / N
+            r, c, v = _block_triplets(row, space.partition_basis_slice(idx), data)
+            rows.append(r)
+            cols.append(c)
+            vals.append(v)
+        return _to_sparse(rows, cols, vals, (1, space.number_of_basis()), p)
+
 ### Continuous Operators
 
 class ContinuousOperator(ScalerOperator):
     """Abstract class for continuity conditions. Only for typing."""
-    pass
+    def blocks(self, p: Tensor, space: PoUSpace) -> Generator[Tuple[slice, slice, Tensor], None, None]:
+        """
+        @brief Yield dense blocks (row slice, basis slice, data) of the matrix.
+        """
+        raise NotImplementedError
+
+    def apply(self, p: Tensor, space: FunctionSpace, *, index=S) -> Tensor:
+        if not isinstance(space, PoUSpace):
+            raise TypeError(f"{self.__class__.__name__} is designed for PoUSpace, "
+                            f"but applied to {space.__class__.__name__}.")
+        assert p.ndim == 3 #(NVS, #Subs, #Dims)
+        NR = p.shape[0] * p.shape[1]
+        N_basis = space.number_of_basis()
+        data = torch.zeros((NR, N_basis), dtype=p.dtype, device=p.device)
+        for row, col, block in self.blocks(p, space):
+            data[row, col] = block
+        return data
+
+    def apply_sparse(self, p: Tensor, space: FunctionSpace) -> Tensor:
+        if not isinstance(space, PoUSpace):
+            raise TypeError(f"{self.__class__.__name__} is designed for PoUSpace, "
+                            f"but applied to {space.__class__.__name__}.")
+        assert p.ndim == 3 #(NVS, #Subs, #Dims)
+        rows, cols, vals = [], [], []
+        for row, col, block in self.blocks(p, space):
+            row = torch.arange(row.start, row.stop, dtype=torch.int64, device=p.device)
+            r, c, v = _block_triplets(row, col, block)
+            rows.append(r)
+            cols.append(c)
+            vals.append(v)
+        shape = (p.shape[0] * p.shape[1], space.number_of_basis())
+        return _to_sparse(rows, cols, vals, shape, p)
 
 
 class Continuous0(ContinuousOperator):
@@ -330,31 +659,25 @@ class Continuous0(ContinuousOperator):
         super().__init__()
         self.sub2part = sub_to_part
 
-    def apply(self, p: Tensor, space: FunctionSpace, *, index=S) -> Tensor:
-        if not isinstance(space, PoUSpace):
-            raise TypeError("Continuous0 is designed for PoUSpace, but applied "
-                            f"to {space.__class__.__name__}.")
-        assert p.ndim == 3 #(NVS, #Subs, #Dims)
+    def blocks(self, p: Tensor, space: PoUSpace):
         NVS = p.shape[0]
         NS = p.shape[1]
-        N_basis = space.number_of_basis()
         sub2part = self.sub2part
-        data = torch.zeros((NVS*NS, N_basis), dtype=p.dtype, device=p.device)
         for idx in range(NS):
             sp = p[:, idx, :] #(NVS, #Dims)
+            rows = slice(idx*NVS, (idx+1)*NVS)
 
             left_idx = int(sub2part[idx, 0].item())
             left_part = space.partitions[left_idx]
             basis_slice_l = space.partition_basis_slice(left_idx)
             left_data = left_part.space.basis(left_part.global_to_local(sp))
-            data[idx*NVS:(idx+1)*NVS, basis_slice_l] = left_data
+            yield rows, basis_slice_l, left_data
 
             right_idx = int(sub2part[idx, 1].item())
             right_part = space.partitions[right_idx]
             basis_slice_r = space.partition_basis_slice(right_idx)
             right_data = right_part.space.basis(right_part.global_to_local(sp))
-            data[idx*NVS:(idx+1)*NVS, basis_slice_r] = -right_data
-        return data
+            yield rows, basis_slice_r, -right_data
 
 
 class Continuous1(ContinuousOperator):
@@ -404,19 +727,14 @@ class Continuous1(ContinuousOperator):
         self.sub2part = sub_to_part
         self.sub2normal = sub_normal
 
-    def apply(self, p: Tensor, space: FunctionSpace, *, index=S) -> Tensor:
-        if not isinstance(space, PoUSpace):
-            raise TypeError("Continuous1 is designed for PoUSpace, but applied "
-                            f"to {space.__class__.__name__}.")
-        assert p.ndim == 3 #(NVS, #Subs, #Dims)
+    def blocks(self, p: Tensor, space: PoUSpace):
         NVS = p.shape[0]
         NS = p.shape[1]
-        N_basis = space.number_of_basis()
         sub2part = self.sub2part
-        data = torch.zeros((NVS*NS, N_basis), dtype=p.dtype, device=p.device)
         for idx in range(NS):
             sp = p[:, idx, :] #(NVS, #Dims)
             n = self.sub2normal[idx, :] #(GD, )
+            rows = slice(idx*NVS, (idx+1)*NVS)
 
             left_idx = int(sub2part[idx, 0].item())
             left_part = space.partitions[left_idx]
@@ -424,7 +742,7 @@ class Continuous1(ContinuousOperator):
             x = left_part.global_to_local(sp)
             left_data = torch.einsum('...fd, d, d -> ...f', left_part.space.grad_basis(x),
                                      1/left_part.radius, n)
-            data[idx*NVS:(idx+1)*NVS, basis_slice_l] = left_data
+            yield rows, basis_slice_l, left_data
 
             right_idx = int(sub2part[idx, 1].item())
             right_part = space.partitions[right_idx]
@@ -432,8 +750,7 @@ class Continuous1(ContinuousOperator):
             x = right_part.global_to_local(sp)
             right_data = torch.einsum('...fd, d, d -> ...f', right_part.space.grad_basis(x),
                                       1/right_part.radius, n)
-            data[idx*NVS:(idx+1)*NVS, basis_slice_r] = -right_data
-        return data
+            yield rows, basis_slice_r, -right_data
 
 
 ### Sources
@@ -11,3 +11,4 @@ from .collocator import (
     PolygonCollocator, SphereCollocator
 )
 from .interface import InterfaceSampler
+from .prefetch import Prefetcher
@@ -1,5 +1,5 @@
 
-from typing import List, Any, Sequence
+from typing import List, Any, Sequence, Optional
 
 import numpy as np
 import torch
@@ -35,19 +35,22 @@ class Collocator(Sampler):
         self.steps = steps
         from functools import reduce
         self.m = reduce(lambda x, y: x*y, steps, 1)
+        self._grid: Optional[Tensor] = None
         super().__init__(dtype=dtype, device=device, requires_grad=requires_grad,
                          **kwargs)
 
     def run(self, *args):
-        lins: List[Tensor] = []
-        for i in range(self.nd):
-            lins.append(torch.linspace(self.starts[i], self.stops[i], self.steps[i],
-                                       dtype=self.dtype, device=self.device,
-                                       requires_grad=self.requires_grad))
+        # NOTE: The grid is fixed, so it is generated once and reused.
+        if self._grid is None:
+            lins: List[Tensor] = []
+            for i in range(self.nd):
+                lins.append(torch.linspace(self.starts[i], self.stops[i], self.steps[i],
+                                           dtype=self.dtype, device=self.device))
+            self._grid = torch.stack(torch.meshgrid(*lins, indexing='ij'), dim=-1).reshape(-1, self.nd)
         if self.enable_weight:
             self._weight[:] = 1/self.m
             self._weight = self._weight.broadcast_to(self.m, 1)
-        return torch.stack(torch.meshgrid(*lins, indexing='ij'), dim=-1).reshape(-1, self.nd)
+        return self._grid.clone().requires_grad_(self.requires_grad)
 
 
 class CircleCollocator(Sampler):
@@ -6,13 +6,15 @@ import torch
 from torch import Tensor, float64
 
 
-def random_weights(m: int, n: int, dtype=float64, device=None) -> Tensor:
+def random_weights(m: int, n: int, dtype=float64, device=None,
+                   generator: Optional[torch.Generator]=None) -> Tensor:
     """
     @brief Generate m random samples, where each sample has n features (n >= 2),\
     such that the sum of each feature is 1.0.
 
     @param m: The number of samples to generate.
     @param n: The number of features in each sample.
+    @param generator: torch.Generator, optional. Use the global generator if `None`.
 
     @return: An ndarray with shape (m, n), where each row represents a random sample.
 
@@ -23,7 +25,9 @@ def random_weights(m: int, n: int, dtype=float64, device=None) -> Tensor:
         raise ValueError(f'Integer `n` should be larger than 1 but got {n}.')
     u = torch.zeros((m, n+1), dtype=dtype, device=device)
     u[:, n] = 1.0
-    u[:, 1:n] = torch.sort(torch.rand(m, n-1, dtype=dtype), dim=1).values
+    rd = torch.rand(m, n-1, dtype=dtype, generator=generator,
+                    device=None if generator is None else generator.device)
+    u[:, 1:n] = torch.sort(rd, dim=1).values
     return u[:, 1:n+1] - u[:, 0:n]
 
 
@@ -0,0 +1,114 @@
+
+from typing import Optional, Callable, Iterator
+from queue import Queue, Full
+from threading import Thread, Event
+
+from torch import Tensor
+
+
+class Prefetcher():
+    """
+    Generate batches of samples on a background thread.
+
+    Batches are produced by calling `sampler.run(*args)` and kept in a queue\
+    holding at most `depth` batches (`depth=2` is double buffering), so the\
+    next batch is ready when the training loop asks for it. As torch releases\
+    the GIL in tensor operations, sampling overlaps with the training step.
+
+    The background thread runs a fork of the sampler, see `Sampler.fork`. The\
+    state of each batch (e.g. `weight()` and `bcs`) is queued with it and set\
+    on the sampler when the batch is taken, so it always matches the batch\
+    last returned.
+    """
+    _STOP = object()
+
+    def __init__(self, sampler, *args, epoch: int=1, depth: int=2,
+                 func: Optional[Callable[..., Tensor]]=None, **kwargs) -> None:
+        """
+        @brief Start a background thread generating `epoch` batches.
+
+        @param sampler: Sampler.
+        @param *args, **kwargs: Arguments for `sampler.run`.
+        @param epoch: int. Number of batches.
+        @param depth: int. Maximum number of batches buffered ahead.
+        @param func: callable, optional. Called instead of `sampler.run`.
+
+        @note: Batches come in the same order as calling `sampler.run` in the\
+               main thread, so a sampler with a fixed `seed` gives the same\
+               stream with or without prefetching.
+        """
+        if depth < 1:
+            raise ValueError(f"depth should be a positive integer, but got {depth}.")
+        self.sampler = sampler
+        if func is None:
+            self.worker = sampler.fork()
+            self.func = self.worker.run
+        else:
+            self.worker = None
+            self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.epoch = int(epoch)
+        self.queue = Queue(maxsize=depth)
+        self.stop_event = Event()
+        self.thread = Thread(target=self._work, daemon=True)
+        self.thread.start()
+
+    def _put(self, item) -> bool:
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _work(self):
+        try:
+            for _ in range(self.epoch):
+                if self.stop_event.is_set():
+                    return
+                batch = self.func(*self.args, **self.kwargs)
+                state = None if self.worker is None else self.worker.get_state()
+                if not self._put((batch, state)):
+                    return
+        except BaseException as e:
+            self._put(e)
+            return
+        self._put(self._STOP)
+
+    def __iter__(self) -> Iterator[Tensor]:
+        return self
+
+    def __next__(self) -> Tensor:
+        if self.stop_event.is_set():
+            raise StopIteration
+        item = self.queue.get()
+        if item is self._STOP:
+            self.stop_event.set()
+            raise StopIteration
+        if isinstance(item, BaseException):
+            self.stop_event.set()
+            raise item
+        batch, state = item
+        if state is not None:
+            self.sampler.set_state(state)
+        return batch
+
+    def close(self):
+        """
+        @brief Stop the background thread.
+        """
+        self.stop_event.set()
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        self.stop_event.set()
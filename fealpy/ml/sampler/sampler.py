@@ -7,6 +7,7 @@ import torch
 from torch import Tensor, float64, device
 
 from . import functional as F
+from .prefetch import Prefetcher
 
 SampleMode = Literal['random', 'linspace']
 
@@ -17,9 +18,10 @@ class Sampler():
     """
     nd: int = 0
     _weight: Tensor
+    _state_attrs: Tuple[str, ...] = ('_weight', )
     def __init__(self, enable_weight=False,
                  dtype=float64, device: device=None,
-                 requires_grad: bool=False, **kwargs) -> None:
+                 requires_grad: bool=False, seed: Optional[int]=None, **kwargs) -> None:
         """
         @brief Initializes a Sampler instance.
 
@@ -27,12 +29,21 @@ class Sampler():
         @param device: device.
         @param requires_grad: A boolean indicating whether the samples should\
                require gradient computation. Defaults to `False`.
+        @param seed: int, optional. Seed of a generator owned by the sampler,\
+               making the stream of samples reproducible. The global generator\
+               of torch is used if `None`.
         """
         self.enable_weight = enable_weight
         self.dtype = dtype
         self.device = device
         self.requires_grad = bool(requires_grad)
         self._weight = torch.tensor(torch.nan, dtype=dtype, device=device)
+        self.seed = seed
+        if seed is None:
+            self.generator = None
+        else:
+            self.generator = torch.Generator(device=device if device else 'cpu')
+            self.generator.manual_seed(seed)
 
     def run(self, n: int) -> Tensor:
         """
@@ -51,14 +62,51 @@ class Sampler():
         """
         return self._weight
 
-    def load(self, n: int, epoch: int=1) -> Generator[torch.Tensor, None, None]:
+    def get_state(self) -> Dict[str, Any]:
+        """
+        @brief Snapshot of the attributes updated by `run`, such as the weights\
+               (and the bcs of mesh samplers) of the latest samples.
+        """
+        state = {}
+        for name in self._state_attrs:
+            if hasattr(self, name):
+                val = getattr(self, name)
+                state[name] = val.clone() if isinstance(val, Tensor) else val
+        return state
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """
+        @brief Restore a snapshot returned by `get_state`.
+        """
+        for name, val in state.items():
+            setattr(self, name, val)
+
+    def fork(self) -> "Sampler":
+        """
+        @brief Shallow copy sharing the generator, whose `run` does not touch\
+               the state of this sampler. Used by `Prefetcher`.
+        """
+        # NOTE: Mesh samplers dispatch in `__new__`, so `copy.copy` is not used.
+        new = object.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        new._weight = self._weight.clone()
+        return new
+
+    def load(self, n: int, epoch: int=1, *, prefetch: int=0) -> Generator[torch.Tensor, None, None]:
         """
         @brief Return a generator to call `sampler.run()`.
 
         @param epoch: Iteration number, defaults to 1.
+        @param prefetch: int. Number of batches generated ahead on a background\
+               thread, see `Prefetcher`. Batches are generated in the caller's\
+               thread if 0. Defaults to 0.
 
         @return: Generator.
         """
+        if prefetch > 0:
+            with Prefetcher(self, n, epoch=epoch, depth=prefetch) as pf:
+                yield from pf
+            return
         for _ in range(epoch):
             yield self.run(n)
 
@@ -139,7 +187,8 @@ class ISampler(Sampler):
         """
         if self.mode == 'random':
             ruler = torch.stack(
-                [F.random_weights(m[0], 2, dtype=self.dtype, device=self.device)
+                [F.random_weights(m[0], 2, dtype=self.dtype, device=self.device,
+                                  generator=self.generator)
                  for _ in range(self.nd)],
                 dim=0
             ) # (GD, m, 2)
@@ -194,6 +243,9 @@ class BoxBoundarySampler(Sampler):
                               device=device, requires_grad=requires_grad))
             self.subs.append(ISampler(ranges=range2, dtype=dtype,
                               device=device, requires_grad=requires_grad))
+        # NOTE: All boundaries share one generator, giving a single stream.
+        for sub in self.subs:
+            sub.generator = self.generator
 
     def run(self, mb: int, bd_type=False) -> Tensor:
         """
@@ -232,7 +284,7 @@ class MeshSampler(Sampler):
     def __new__(cls, mesh, etype: EType, index=S,
                 mode: Literal['random', 'linspace']='random',
                 dtype=float64, device: device=None,
-                requires_grad: bool=False):
+                requires_grad: bool=False, **kwargs):
         mesh_name = mesh.__class__.__name__
         ms_class = cls._get_sampler_class(mesh_name, etype)
         return object.__new__(ms_class)
@@ -291,6 +343,9 @@ class MeshSampler(Sampler):
             self.cell = torch.tensor(mesh.entity(etype)[index, :], device=device)
         self.NVC: int = self.cell.shape[-1]
         self.mode = mode
+        self._node_matrix: Optional[Tensor] = None
+        self._linspace_bcs: Dict[Tuple[int, int], Tensor] = {}
+        self._state_attrs = ('_weight', 'bcs')
 
         super().__init__(dtype=dtype, device=device, requires_grad=requires_grad,
                          **kwargs)
@@ -314,9 +369,14 @@ class MeshSampler(Sampler):
         multiple indices in 'linspace' mode.
         """
         if self.mode == 'random':
-            return F.random_weights(mp, n, dtype=self.dtype, device=self.device)
+            return F.random_weights(mp, n, dtype=self.dtype, device=self.device,
+                                    generator=self.generator)
         elif self.mode == 'linspace':
-            return F.linspace_weights(mp, n, dtype=self.dtype, device=self.device)
+            key = (mp, n)
+            if key not in self._linspace_bcs:
+                self._linspace_bcs[key] = F.linspace_weights(mp, n, dtype=self.dtype,
+                                                             device=self.device)
+            return self._linspace_bcs[key]
         else:
             raise ValueError(f"Invalid mode {self.mode}.")
 
@@ -324,10 +384,16 @@ class MeshSampler(Sampler):
         """
         The optimized version of method `mesh.cell_bc_to_point()`
         to support faster sampling.
+
+        Vertices of entities are gathered once into a (NVC, NC*GD) matrix,\
+        so that every batch costs one matrix product only.
         """
-        node = self.node
-        cell = self.cell
-        return torch.einsum('...j, ijk->...ik', bcs, node[cell])
+        if self._node_matrix is None:
+            cell_node = self.node[self.cell] # (NC, NVC, GD)
+            self._node_matrix = cell_node.transpose(0, 1).reshape(self.NVC, -1)
+        NC = self.cell.shape[0]
+        ret = bcs.reshape(-1, self.NVC) @ self._node_matrix
+        return ret.reshape(bcs.shape[:-1] + (NC, self.nd))
 
 
 class _PolytopeSampler(MeshSampler):
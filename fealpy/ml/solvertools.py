@@ -41,6 +41,33 @@ def rescale(A_: Tensor, b_: Tensor, amplify=1.0, *, eps=1e-4, inplace=True)\
         return A_ * ratio, b_ * ratio.reshape(b_.shape)
 
 
+def rescale_sparse(A_: Tensor, b_: Tensor, amplify=1.0, *, eps=1e-4)\
+    -> Tuple[Tensor, Tensor]:
+    """
+    @brief Apply rescaling to linear equations with sparse COO matrix. The same\
+           as `rescale`, but rows are rescaled by the maximum of their non-zeros.
+
+    @param A_: Tensor. Sparse COO Tensor.
+    @param b_: Tensor.
+    @param amplify: float.
+    @param eps: float.
+
+    @return: Tensor.
+    """
+    assert A_.ndim == 2
+    A_ = A_.coalesce()
+    row = A_.indices()[0]
+    val = A_.values()
+    scale = torch.zeros((A_.shape[0], ), dtype=val.dtype, device=val.device)
+    scale.scatter_reduce_(0, row, val.abs(), reduce='amax')
+    ratio: Tensor = amplify / (scale + eps)
+    A_ = torch.sparse_coo_tensor(A_.indices(), val * ratio[row], A_.shape,
+                                 check_invariants=False).coalesce()
+    if b_.ndim == 2:
+        return A_, b_ * ratio[:, None]
+    return A_, b_ * ratio.reshape(b_.shape)
+
+
 def ridge(matrix: Tensor, lambda_: float, *, inplace=True) -> Tensor:
     """
     @brief Apply to X^TX the preperation of ridge regression.\n
@@ -107,3 +107,71 @@ class CSRMatrixCommToplogy(CommToplogy):
     def get_local_idx(self):
         rank = self.comm.Get_rank()
         return np.arange(self.location[rank], self.location[rank+1], dtype='i')
+
+class GhostCommToplogy(CommToplogy):
+    """GhostCommToplogy
+
+    Note
+    ----
+    按自由度所有者划分的通信拓扑。每个进程的局部向量按 [owned, ghost] 排列，
+    ghost 部分的值由其所有者发送。sds[r] 是发送给进程 r 的 owned 局部编号，
+    rds[r] 是从进程 r 接收的 ghost 在局部向量中的位置。
+    """
+    def __init__(self, comm, tag=7):
+        super(GhostCommToplogy, self).__init__(comm)
+        self.tag = tag
+
+    def create_comm_toplogy(self, owned, ghost, owner):
+        """create_comm_toplogy
+
+        :param owned: 当前进程所有的自由度的全局编号，已排序
+        :param ghost: ghost 自由度的全局编号
+        :param owner: ghost 自由度的所有者
+        """
+        comm = self.comm
+        size = comm.Get_size()
+        n = len(owned)
+
+        # 告诉每个所有者当前进程需要哪些自由度，请求的顺序就是接收的顺序
+        request = []
+        for r in range(size):
+            flag = owner == r
+            request.append(ghost[flag])
+            if np.any(flag):
+                self.rds[r] = n + np.nonzero(flag)[0]
+        request = comm.alltoall(request)
+        for r in range(size):
+            if len(request[r]) > 0:
+                self.sds[r] = np.searchsorted(owned, request[r])
+        self.neighbor = set(self.sds) | set(self.rds)
+
+    def begin_exchange(self, x):
+        """begin_exchange
+
+        开始非阻塞地更新 x 的 ghost 部分，返回需要传给 end_exchange 的数据，
+        两者之间可以做不依赖 ghost 的计算
+        """
+        comm = self.comm
+        shape = x.shape[1:]
+        reqs = []
+        recv = []
+        for r, idx in self.rds.items():
+            buf = np.empty((len(idx), ) + shape, dtype=x.dtype)
+            reqs.append(comm.Irecv(buf, source=r, tag=self.tag))
+            recv.append((idx, buf))
+        send = []
+        for r, idx in self.sds.items():
+            buf = np.ascontiguousarray(x[idx])
+            reqs.append(comm.Isend(buf, dest=r, tag=self.tag))
+            send.append(buf) # 发送完成之前缓冲区不能释放
+        return reqs, recv, send
+
+    def end_exchange(self, x, pending):
+        reqs, recv, _ = pending
+        for req in reqs:
+            req.Wait()
+        for idx, buf in recv:
+            x[idx] = buf
+
+    def exchange(self, x):
+        self.end_exchange(x, self.begin_exchange(x))
@@ -3,3 +3,8 @@ from .CommToplogy import CommToplogy
 from .CommToplogy import CSRMatrixCommToplogy
 
 from .NumCompComponent import NumCompComponent
+from .CommToplogy import GhostCommToplogy
+
+from .parallel_mesh import ParallelMesh, partition_cells
+from .parallel_space import ParallelFESpace, ParallelCSRMatrix
+from .parallel_solver import ParallelCGSolver
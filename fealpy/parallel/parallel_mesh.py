@@ -0,0 +1,61 @@
+import numpy as np
+
+from ..graph.partition import coordinate_bisection, part_mesh, MeshPartition
+
+
+def partition_cells(mesh, nparts):
+    """
+    @brief 网格单元的划分，有 METIS 时用 METIS，否则用单元重心的递归坐标二分
+    """
+    return part_mesh(mesh, nparts, method='auto')
+
+
+class ParallelMesh():
+    """
+    @brief 分布在各个进程上的网格
+
+    @note 根进程划分整体网格，每个进程得到一个局部网格，由它所有的单元和一层
+          ghost 单元（与所有的单元有公共顶点的单元）组成，所有的单元排在前面。
+          有了这一层 ghost 单元，所有的自由度所在的单元都在局部网格中，每个进程
+          可以独立地组装出它所有的自由度对应的完整的矩阵行，不需要再交换组装的
+          结果。
+    """
+    def __init__(self, comm, mesh=None, parts=None, root=0):
+        """
+        @param[in] comm 通信子，如 mpi4py.MPI.COMM_WORLD
+        @param[in] mesh 整体网格，只在根进程上需要
+        @param[in] parts 单元的分区编号，None 时调用 partition_cells
+        """
+        self.comm = comm
+        self.root = root
+        rank = comm.Get_rank()
+        size = comm.Get_size()
+
+        data = None
+        self.global_mesh = None
+        if rank == root:
+            if parts is None:
+                parts = partition_cells(mesh, size)
+            self.global_mesh = mesh
+            self.parts = parts
+            data = self._split(mesh, parts, size)
+            # 根进程记住每个进程的单元，后面建立自由度的映射时用
+            self.partition = [d['cell_global'] for d in data]
+        data = comm.scatter(data, root=root)
+
+        self.mesh = data['mtype'](data['node'], data['cell'])
+        self.cell_global = data['cell_global']
+        self.node_global = data['node_global']
+        self.NCO = data['NCO'] # 所有的单元个数
+        self.NC = data['NC'] # 整体的单元个数
+
+    @staticmethod
+    def _split(mesh, parts, size):
+        partition = MeshPartition(mesh, parts, nparts=size)
+        return [partition.subdomain(r) for r in range(size)]
+
+    def number_of_owned_cells(self):
+        return self.NCO
+
+    def number_of_global_cells(self):
+        return self.NC
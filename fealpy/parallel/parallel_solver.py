@@ -0,0 +1,32 @@
+import numpy as np
+
+from ..solver.krylov import _dot, CGSolver
+from ..solver.preconditioner import AMGPreconditioner
+
+
+class ParallelCGSolver(CGSolver):
+    """
+    @brief 分布式的（预条件）共轭梯度法
+
+    @note 与 CGSolver 相同，只是内积做全局归约，所有进程得到相同的标量，迭代
+          步数也相同。预条件子作用在各进程所有的自由度上：'jacobi' 为对角预条件，
+          'amg' 在每个进程的对角块 Aoo 上做一次 AMG V 循环（块 Jacobi）。
+    """
+    def __init__(self, A, M=None, maxiter=None, **kwargs):
+        """
+        @param[in] A ParallelCSRMatrix 对象
+        """
+        if kwargs.get('deflation', None) is not None:
+            raise ValueError("ParallelCGSolver does not support deflation")
+        if isinstance(M, str) and (M == 'amg'):
+            M = AMGPreconditioner(A.diagonal_block())
+        if maxiter is None: # 各进程的最大步数必须相同
+            maxiter = 10*A.gshape[0]
+        super().__init__(A, M=M, maxiter=maxiter, **kwargs)
+        self.comm = A.space.comm
+
+    def dot(self, x, y):
+        val = _dot(x, y)
+        out = np.empty_like(val)
+        self.comm.Allreduce(val, out)
+        return out
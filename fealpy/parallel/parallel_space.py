@@ -0,0 +1,187 @@
+import numpy as np
+from scipy.sparse import isspmatrix, spdiags
+
+from .CommToplogy import GhostCommToplogy
+
+
+class ParallelFESpace():
+    """
+    @brief 分布在各个进程上的有限元空间
+
+    @note 每个进程在局部网格上建立同样的空间，组装和插值都在局部空间上进行。
+          局部自由度与全局自由度的对应关系由根进程上的整体空间给出：同一个单元
+          在局部和整体空间中的 cell_to_dof 按相同的局部基函数排列，所以
+          l2g[lcell2dof] = gcell2dof。每个全局自由度属于含有它的单元中分区编号
+          最小的进程。
+
+          分布的向量只保存所有的自由度上的值，按全局编号排序。局部空间的自由度
+          按 [owned, ghost] 重新排列，ghost 只包含与所有的自由度耦合的自由度。
+    """
+    def __init__(self, pmesh, spacetype, *args, **kwargs):
+        """
+        @param[in] pmesh ParallelMesh 对象
+        @param[in] spacetype 空间的类型，如 LagrangeFESpace
+        @param[in] args, kwargs 建立空间的参数，如 p=2
+        """
+        self.pmesh = pmesh
+        self.comm = comm = pmesh.comm
+        rank = comm.Get_rank()
+        size = comm.Get_size()
+
+        data = None
+        if rank == pmesh.root:
+            gspace = spacetype(pmesh.global_mesh, *args, **kwargs)
+            gcell2dof = gspace.cell_to_dof()
+            ldof = gcell2dof.shape[1]
+            gdof = gspace.number_of_global_dofs()
+            owner = np.full(gdof, size, dtype=np.int_)
+            np.minimum.at(owner, gcell2dof.reshape(-1), np.repeat(pmesh.parts, ldof))
+            isBdDof = gspace.is_boundary_dof()
+            data = []
+            for cells in pmesh.partition:
+                cell2dof = gcell2dof[cells]
+                dofs = np.unique(cell2dof)
+                data.append({'cell2dof': cell2dof, 'dofs': dofs,
+                    'owner': owner[dofs], 'isBdDof': isBdDof[dofs], 'gdof': gdof})
+        data = comm.scatter(data, root=pmesh.root)
+
+        self.space = space = spacetype(pmesh.mesh, *args, **kwargs)
+        self.gdof = data['gdof']
+        cell2dof = space.cell_to_dof()
+        l2g = np.zeros(space.number_of_global_dofs(), dtype=np.int_)
+        l2g[cell2dof] = data['cell2dof']
+        idx = np.searchsorted(data['dofs'], l2g)
+        owner = data['owner'][idx]
+        isBdDof = data['isBdDof'][idx]
+
+        # 需要的 ghost 自由度：含有所有的自由度的单元上的其它自由度
+        isOwned = owner == rank
+        isCell = np.any(isOwned[cell2dof], axis=1)
+        isNeeded = np.zeros(len(l2g), dtype=np.bool_)
+        isNeeded[cell2dof[isCell]] = True
+        owned = np.nonzero(isOwned)[0]
+        owned = owned[np.argsort(l2g[owned])]
+        ghost = np.nonzero(isNeeded & ~isOwned)[0]
+        ghost = ghost[np.lexsort((l2g[ghost], owner[ghost]))]
+
+        self.perm = np.r_[owned, ghost] # 新的局部编号到局部空间自由度的映射
+        self.nowned = len(owned)
+        self.nghost = len(ghost)
+        self.global_index = l2g[self.perm]
+        self.isBdDof = isBdDof[self.perm]
+
+        self.topology = GhostCommToplogy(comm)
+        self.topology.create_comm_toplogy(self.global_index[:self.nowned],
+                self.global_index[self.nowned:], owner[ghost])
+
+    def number_of_global_dofs(self):
+        return self.gdof
+
+    def number_of_owned_dofs(self):
+        return self.nowned
+
+    def local_vector(self, x):
+        """
+        @brief 由所有的自由度上的值得到 [owned, ghost] 上的值
+        """
+        n = self.nowned
+        out = np.zeros((n + self.nghost, ) + x.shape[1:], dtype=x.dtype)
+        out[:n] = x
+        self.topology.exchange(out)
+        return out
+
+    def distribute(self, M):
+        """
+        @brief 取出在局部空间上组装的矩阵或向量中所有的自由度对应的行
+
+        @param[in] M 在 self.space 上组装的稀疏矩阵或者向量
+        """
+        rows = self.perm[:self.nowned]
+        if isspmatrix(M):
+            return ParallelCSRMatrix(M.tocsr()[rows][:, self.perm], self)
+        return np.asarray(M)[rows]
+
+    def assemble(self, form):
+        """
+        @brief 组装 BilinearForm 或 LinearForm，form 必须建立在 self.space 上
+        """
+        return self.distribute(form.assembly())
+
+    def interpolate(self, u):
+        return np.asarray(self.space.interpolate(u))[self.perm[:self.nowned]]
+
+    def apply_dirichlet(self, A, F, gD):
+        """
+        @brief 处理 Dirichlet 边界条件，对称地消去边界自由度所在的行和列
+
+        @note 边界自由度由整体空间给出，局部网格上的人工边界不是边界
+        """
+        n = self.nowned
+        uh = np.asarray(self.space.interpolate(gD))[self.perm]
+        uh[~self.isBdDof] = 0
+        F = F - A.Aoo@uh[:n] - A.Aog@uh[n:]
+        isBdDof = self.isBdDof[:n]
+        F[isBdDof] = uh[:n][isBdDof]
+
+        bdIdx = np.zeros(n + self.nghost, dtype=A.dtype)
+        bdIdx[self.isBdDof] = 1
+        Do = spdiags(1 - bdIdx[:n], 0, n, n)
+        Dg = spdiags(1 - bdIdx[n:], 0, self.nghost, self.nghost)
+        A.Aoo = (Do@A.Aoo@Do + spdiags(bdIdx[:n], 0, n, n)).tocsr()
+        A.Aog = (Do@A.Aog@Dg).tocsr()
+        return A, F
+
+    def gather(self, x, root=None):
+        """
+        @brief 把分布的向量收集到根进程上，其它进程返回 None
+        """
+        root = self.pmesh.root if root is None else root
+        index = self.comm.gather(self.global_index[:self.nowned], root=root)
+        val = self.comm.gather(np.asarray(x), root=root)
+        if self.comm.Get_rank() != root:
+            return None
+        out = np.zeros((self.gdof, ) + x.shape[1:], dtype=x.dtype)
+        for i, v in zip(index, val):
+            out[i] = v
+        return out
+
+
+class ParallelCSRMatrix():
+    """
+    @brief 按行分布的 CSR 矩阵
+
+    @note 每个进程保存它所有的行，按列分成 owned 部分 Aoo 和 ghost 部分 Aog。
+          矩阵向量乘积先发起 ghost 值的非阻塞交换，计算 Aoo x 的同时完成通信，
+          最后加上 Aog x_ghost。
+    """
+    def __init__(self, A, space):
+        n = space.nowned
+        self.space = space
+        self.Aoo = A[:, :n].tocsr()
+        self.Aog = A[:, n:].tocsr()
+        self.shape = (n, n)
+        self.gshape = (space.gdof, space.gdof)
+        self.dtype = A.dtype
+
+    def matvec(self, x):
+        space = self.space
+        n = space.nowned
+        xl = np.empty((n + space.nghost, ) + x.shape[1:], dtype=x.dtype)
+        xl[:n] = x
+        pending = space.topology.begin_exchange(xl)
+        y = self.Aoo@x
+        space.topology.end_exchange(xl, pending)
+        y += self.Aog@xl[n:]
+        return y
+
+    def __matmul__(self, x):
+        return self.matvec(x)
+
+    def diagonal(self):
+        return self.Aoo.diagonal()
+
+    def diagonal_block(self):
+        """
+        @brief 所有的行和列构成的对角块，用于块 Jacobi 型的预条件子
+        """
+        return self.Aoo
@@ -19,3 +19,13 @@ from .fast_solver import LinearElasticityLFEMFastSolver
 from .fast_solver import LevelSetFEMFastSolver 
 
 from .LinearElasticityRLFEMFastSolver import LinearElasticityRLFEMFastSolver
+
+from .direct_solver import DirectSolver, FactorizationCache
+from .preconditioner import (Preconditioner, JacobiPreconditioner,
+        ILUPreconditioner, AMGPreconditioner, BlockDiagonalPreconditioner,
+        as_preconditioner)
+from .krylov import (CGSolver, MINRESSolver, GMRESSolver, BiCGStabSolver,
+        FCGSolver, DeflationSpace, KrylovInfo, krylov_solve)
+from .saddle_point import (SaddlePointSystem, BlockTriangularPreconditioner,
+        LSCPreconditioner)
+from .schwarz import SchwarzPreconditioner
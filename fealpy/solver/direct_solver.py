@@ -0,0 +1,224 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+from scipy.sparse import csc_matrix, csr_matrix, isspmatrix
+from scipy.sparse.linalg import splu
+
+try:
+    import scikits.umfpack as umfpack
+except ImportError:
+    umfpack = None
+
+try:
+    from sksparse import cholmod
+except ImportError:
+    cholmod = None
+
+try:
+    import pypardiso
+except ImportError:
+    pypardiso = None
+
+
+def matrix_hash(A, pattern=False):
+    """
+    @brief 稀疏矩阵的内容哈希
+
+    @param[in] pattern 为 True 时只计算稀疏模式（indptr 和 indices）的哈希
+    """
+    A = A.tocsc() if not isinstance(A, (csc_matrix, csr_matrix)) else A
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((A.format, A.shape, A.dtype.str)).encode())
+    h.update(np.ascontiguousarray(A.indptr).tobytes())
+    h.update(np.ascontiguousarray(A.indices).tobytes())
+    if not pattern:
+        h.update(np.ascontiguousarray(A.data).tobytes())
+    return h.hexdigest()
+
+
+class DirectSolver():
+    """
+    @brief 可重复使用的稀疏直接解法器句柄
+
+    @note 矩阵只分解一次，之后的 solve 直接使用已有的分解，右端可以是多列。
+          再次调用 factorize 时，若矩阵的值没有变化则什么也不做；若只有值变化
+          而稀疏模式不变，则重用符号分析（填充约简排序），只做数值分解。
+
+          支持的后端：
+          - 'superlu': scipy 自带的 SuperLU，重用列排序
+          - 'umfpack': scikits.umfpack，重用符号分解
+          - 'cholesky': scikit-sparse 的 CHOLMOD，只适用于对称正定矩阵，重用符号分解
+          - 'pardiso': pypardiso 的 MKL PARDISO
+          - 'auto': 对称时优先用 'cholesky'，否则优先用 'umfpack'，都没有安装时用 'superlu'
+    """
+    def __init__(self, A=None, method='auto', symmetric=False):
+        """
+        @param[in] A 要分解的稀疏矩阵，可以稍后再调用 factorize
+        @param[in] method 后端名字
+        @param[in] symmetric 矩阵是否对称正定
+        """
+        if method == 'auto':
+            if symmetric and (cholmod is not None):
+                method = 'cholesky'
+            elif umfpack is not None:
+                method = 'umfpack'
+            else:
+                method = 'superlu'
+
+        if (method == 'umfpack') and (umfpack is None):
+            raise ImportError("the 'umfpack' method needs scikits.umfpack")
+        if (method == 'cholesky') and (cholmod is None):
+            raise ImportError("the 'cholesky' method needs scikit-sparse")
+        if (method == 'pardiso') and (pypardiso is None):
+            raise ImportError("the 'pardiso' method needs pypardiso")
+        if method not in {'superlu', 'umfpack', 'cholesky', 'pardiso'}:
+            raise ValueError(f"unknown direct solver method '{method}'")
+
+        self.method = method
+        self.symmetric = symmetric
+
+        self.shape = None
+        self.pattern = None # 稀疏模式的哈希
+        self.value = None   # 矩阵内容的哈希
+        self.symbolic = None
+        self.numeric = None
+        self.permuted = False
+        self.A = None
+
+        self.nfactor = 0   # 数值分解的次数
+        self.nsymbolic = 0 # 符号分析的次数
+
+        if A is not None:
+            self.factorize(A)
+
+    def factorize(self, A):
+        """
+        @brief 分解矩阵 A
+        """
+        if not isspmatrix(A):
+            A = csc_matrix(A)
+        A = A.tocsr() if self.method == 'pardiso' else A.tocsc()
+        A.sort_indices()
+
+        pattern = matrix_hash(A, pattern=True)
+        value = matrix_hash(A)
+        if value == self.value:
+            return self
+
+        if pattern != self.pattern:
+            self.symbolic = None
+            self.nsymbolic += 1
+        getattr(self, '_factorize_' + self.method)(A)
+
+        self.shape = A.shape
+        self.pattern = pattern
+        self.value = value
+        self.nfactor += 1
+        return self
+
+    def _factorize_superlu(self, A):
+        if self.symbolic is None:
+            self.numeric = splu(A, permc_spec='COLAMD')
+            self.symbolic = self.numeric.perm_c
+            self.permuted = False
+        else:
+            # 用已有的列排序，跳过 COLAMD
+            self.numeric = splu(A[:, self.symbolic], permc_spec='NATURAL')
+            self.permuted = True
+
+    def _factorize_umfpack(self, A):
+        if self.symbolic is None:
+            family = 'dl' if A.indices.dtype == np.int64 else 'di'
+            self.symbolic = umfpack.UmfpackContext(family)
+            self.symbolic.symbolic(A)
+        self.symbolic.numeric(A)
+        self.numeric = self.symbolic
+        self.A = A
+
+    def _factorize_cholesky(self, A):
+        if self.symbolic is None:
+            self.symbolic = cholmod.analyze(A)
+        self.symbolic.cholesky_inplace(A)
+        self.numeric = self.symbolic
+
+    def _factorize_pardiso(self, A):
+        if self.symbolic is None:
+            self.symbolic = pypardiso.PyPardisoSolver()
+        self.symbolic.factorize(A)
+        self.numeric = self.symbolic
+        self.A = A
+
+    def solve(self, b):
+        """
+        @brief 求解 A x = b
+
+        @param[in] b 形状为 (N, ) 或 (N, k) 的右端，后者一次求解 k 个右端
+        """
+        if self.numeric is None:
+            raise RuntimeError("factorize a matrix before calling solve")
+        b = np.asarray(b)
+        if self.method == 'superlu':
+            x = self.numeric.solve(b)
+            if self.permuted:
+                y = x
+                x = np.empty_like(y)
+                x[self.symbolic] = y
+            return x
+        elif self.method == 'umfpack':
+            if b.ndim == 1:
+                return self.numeric.solve(umfpack.UMFPACK_A, self.A, b)
+            x = [self.numeric.solve(umfpack.UMFPACK_A, self.A, b[:, i])
+                    for i in range(b.shape[1])]
+            return np.stack(x, axis=1)
+        elif self.method == 'cholesky':
+            return self.numeric(b)
+        else:
+            return self.numeric.solve(self.A, b)
+
+    __call__ = solve
+
+
+class FactorizationCache():
+    """
+    @brief 直接解法器句柄的缓存
+
+    @note 默认按矩阵内容的哈希取出句柄，所以每次重新组装但值不变的矩阵也只分解
+          一次；给定 key 时按 key 取出，若矩阵的值变了但稀疏模式不变，就只做
+          数值分解。超过 maxsize 时淘汰最久未用的句柄。
+    """
+    def __init__(self, maxsize=8, method='auto', symmetric=False):
+        self.maxsize = maxsize
+        self.method = method
+        self.symmetric = symmetric
+        self.solvers = OrderedDict()
+
+    def get(self, A, key=None):
+        """
+        @brief 取出 A 对应的直接解法器句柄，必要时分解 A
+
+        @param[in] key 用户给定的键，例如矩阵的名字，None 表示用内容哈希
+        """
+        byvalue = key is None
+        if byvalue:
+            key = matrix_hash(A)
+        if key in self.solvers:
+            self.solvers.move_to_end(key)
+            solver = self.solvers[key]
+            if not byvalue:
+                solver.factorize(A)
+        else:
+            solver = DirectSolver(A, method=self.method, symmetric=self.symmetric)
+            self.solvers[key] = solver
+            if len(self.solvers) > self.maxsize:
+                self.solvers.popitem(last=False)
+        return solver
+
+    def solve(self, A, b, key=None):
+        return self.get(A, key=key).solve(b)
+
+    def clear(self):
+        self.solvers.clear()
+
+    def __len__(self):
+        return len(self.solvers)
@@ -6,6 +6,7 @@ from pypardiso import spsolve
 
 from .amg_coarsen import ruge_stuben_chen_coarsen 
 from .amg_interpolation import two_points_interpolation
+from .smoother import MulticolorGaussSeidelSmoother
 from ..decorator import timer
 
 class IterationCounter(object):
@@ -36,6 +37,7 @@ class GAMGSolver():
             itype: str = 'T', # 插值方法
             ptype: str = 'W', # 预条件类型
             sstep: int = 2, # 默认光滑步数
+            stype: str = 'GS', # 光滑子类型，'GS' 为三角求解，'MCGS' 为多色 Gauss-Seidel
             isolver: str = 'CG', # 默认迭代解法器
             maxit: int = 200,   # 默认迭代最大次数
             csolver: str = 'direct', # 默认粗网格解法器
@@ -48,6 +50,7 @@ class GAMGSolver():
         self.itype = itype
         self.ptype = ptype
         self.sstep = sstep
+        self.stype = stype
         self.isolver = isolver
         self.maxit = maxit
         self.csolver = csolver
@@ -104,6 +107,11 @@ class GAMGSolver():
             if self.A[-1].shape[0] < self.csize:
                 break
 
+        # 多色 Gauss-Seidel 的每种颜色只需要一次向量化的更新，不需要三角求解
+        self.S = [ ]
+        if self.stype == 'MCGS':
+            self.S = [MulticolorGaussSeidelSmoother(A) for A in self.A[:-1]]
+
         # 计算最粗矩阵最大和最小特征值
         emax, _ = eigs(self.A[-1], 1, which='LM')
         emin, _ = eigs(self.A[-1], 1, which='SM')
@@ -159,6 +167,30 @@ class GAMGSolver():
                 print("P.shape = ", self.P[l].shape) 
                 print("R.shape = ", self.R[l].shape) 
 
+    def presmooth(self, r, level):
+        """
+        @brief 前磨光，从零初值出发对 A e = r 做 sstep+1 次前向 Gauss-Seidel
+        """
+        if self.stype == 'MCGS':
+            return self.S[level].smooth(r, np.zeros_like(r), lower=True, maxit=self.sstep+1)
+        e = spsolve(self.L[level], r)
+        for i in range(self.sstep):
+            e += spsolve(self.L[level], r - self.A[level] @ e)
+        return e
+
+    def postsmooth(self, r, e, level):
+        """
+        @brief 后磨光，对 A e = r 做 sstep+1 次后向 Gauss-Seidel
+
+        @return 磨光后的 e。e 可能被原地修改，也可能不是，调用者要使用返回值
+        """
+        if self.stype == 'MCGS':
+            return self.S[level].smooth(r, e, lower=False, maxit=self.sstep+1)
+        e += spsolve(self.U[level], r - self.A[level] @ e)
+        for i in range(self.sstep):
+            e += spsolve(self.U[level], r - self.A[level] @ e)
+        return e
+
     @timer
     def solve(self, b):
         """
@@ -201,9 +233,7 @@ class GAMGSolver():
 
         # 前磨光
         for l in range(level, NL - 1, 1):
-            el = spsolve(self.L[l], r[l])
-            for i in range(self.sstep):
-                el += spsolve(self.L[l], r[l] - self.A[l] @ el)
+            el = self.presmooth(r[l], l)
             e.append(el)
             r.append(self.R[l] @ (r[l] - self.A[l] @ el))
 
@@ -213,9 +243,7 @@ class GAMGSolver():
         # 后磨光
         for l in range(NL - 2, level - 1, -1):
             e[l] += self.P[l] @ e[l + 1]
-            e[l] += spsolve(self.U[l], r[l] - self.A[l] @ e[l])
-            for i in range(self.sstep): # 后磨光
-                e[l] += spsolve(self.U[l], r[l] - self.A[l] @ e[l])
+            e[l] = self.postsmooth(r[l], e[l], l)
 
         return e[level]
 
@@ -232,9 +260,7 @@ class GAMGSolver():
             e = spsolve(self.A[-1], r)
             return e
 
-        e = spsolve(self.L[level], r)
-        for s in range(self.sstep):
-            e += spsolve(self.L[level], r - self.A[level] @ e) 
+        e = self.presmooth(r, level)
 
         rc = self.R[level] @ ( r - self.A[level] @ e) 
 
@@ -242,10 +268,7 @@ class GAMGSolver():
         ec += self.wcycle( rc - self.A[level+1] @ ec, level=level+1)
         
         e += self.P[level] @ ec
-        e += spsolve(self.U[level], r - self.A[level] @ e)
-        for s in range(self.sstep):
-            e += spsolve(self.U[level], r - self.A[level] @ e)
-        return e
+        return self.postsmooth(r, e, level)
 
 
     def fcycle(self, r):
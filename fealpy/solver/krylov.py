@@ -0,0 +1,572 @@
+import numpy as np
+from scipy.linalg import solve_triangular, cho_factor, cho_solve, eigh
+
+from .preconditioner import as_preconditioner
+
+
+def _dot(x, y):
+    """
+    @brief 逐列内积，x 和 y 的形状为 (n, k)
+    """
+    if np.iscomplexobj(x):
+        return np.einsum('ik, ik->k', x.conj(), y)
+    return np.einsum('ik, ik->k', x, y)
+
+def _div(a, b):
+    """
+    @brief 逐列相除，除数为 0 的列结果为 0
+    """
+    a, b = np.broadcast_arrays(a, b)
+    out = np.zeros(a.shape, dtype=np.result_type(a, b, np.float64))
+    return np.divide(a, b, out=out, where=(b != 0))
+
+
+class KrylovInfo():
+    """
+    @brief Krylov 解法器的收敛历史
+
+    @note history 的形状为 (niter+1, k)，第 i 行是第 i 步时各列右端的残差范数，
+          右端是一维数组时形状为 (niter+1, )。CG、FCG、GMRES 和 BiCGStab 记录
+          残差的 2 范数（GMRES 在重启循环内用的是 Givens 旋转给出的残差估计），
+          MINRES 记录预条件范数下的残差估计。
+    """
+    def __init__(self, method, tol, vector):
+        self.method = method
+        self.tol = tol # 每一列的停止阈值
+        self.vector = vector
+        self.niter = 0
+        self.iterations = np.zeros(len(tol), dtype=np.int_) # 每一列收敛时的步数
+        self.converged = np.zeros(len(tol), dtype=np.bool_)
+        self.residual = None # 结束时真实残差的 2 范数
+        self._history = []
+
+    def record(self, it, rnorm):
+        """
+        @brief 记录第 it 步的残差范数，返回各列是否已经收敛
+        """
+        rnorm = np.array(rnorm, dtype=np.float64)
+        self._history.append(rnorm)
+        self.niter = it
+        done = rnorm <= self.tol
+        self.iterations[done & ~self.converged] = it
+        self.converged |= done
+        return self.converged.copy()
+
+    @property
+    def history(self):
+        h = np.array(self._history)
+        return h[:, 0] if self.vector else h
+
+    @property
+    def success(self):
+        return bool(np.all(self.converged))
+
+    def __repr__(self):
+        return (f"KrylovInfo(method='{self.method}', niter={self.niter}, "
+                f"success={self.success}, residual={self.residual})")
+
+
+class KrylovSolver():
+    """
+    @brief Krylov 子空间解法器的基类
+
+    @note 右端可以是 (n, ) 的向量或者 (n, k) 的多列数组。多列时各列是独立的
+          问题，但每步只做一次矩阵与 (n, k) 数组的乘法和一次预条件，标量都按列
+          计算，已经收敛的列不再更新。工作向量保存在 self.work 中，同样大小的
+          问题重复求解（如时间步进）时不再分配。
+    """
+    method = None
+
+    def __init__(self, A, M=None, rtol=1e-8, atol=0.0, maxiter=None,
+            callback=None):
+        """
+        @param[in] A 稀疏矩阵、数组或者 LinearOperator
+        @param[in] M 预条件子，见 as_preconditioner
+        @param[in] rtol, atol 第 j 列的停止条件为 |r_j| <= max(rtol*|b_j|, atol)
+        @param[in] maxiter 最大迭代步数，默认为 10*n
+        @param[in] callback 每步调用 callback(info)
+        """
+        self.A = A
+        self.M = as_preconditioner(M, A)
+        self.shape = A.shape
+        self.rtol = rtol
+        self.atol = atol
+        self.maxiter = maxiter
+        self.callback = callback
+        self.work = {}
+        self.info = None
+
+    def update(self, A=None, M=None):
+        """
+        @brief 更换矩阵或者预条件子，保留工作向量（以及回收的子空间）
+        """
+        if A is not None:
+            self.A = A
+            self.shape = A.shape
+        if M is not None:
+            self.M = as_preconditioner(M, self.A)
+        return self
+
+    def vectors(self, name, shape, dtype):
+        """
+        @brief 取出预先分配的工作数组
+        """
+        v = self.work.get(name, None)
+        if (v is None) or (v.shape != shape) or (v.dtype != dtype):
+            v = np.zeros(shape, dtype=dtype)
+            self.work[name] = v
+        return v
+
+    def matvec(self, x):
+        return self.A @ x
+
+    def dot(self, x, y):
+        """
+        @brief 逐列内积，分布式的解法器重载这个方法做全局归约
+        """
+        return _dot(x, y)
+
+    def norm(self, x):
+        return np.sqrt(np.abs(self.dot(x, x)))
+
+    def _record(self, info, it, rnorm):
+        done = info.record(it, rnorm)
+        if self.callback is not None:
+            self.callback(info)
+        return done
+
+    def solve(self, b, x0=None):
+        """
+        @brief 求解 A x = b
+
+        @return x 和 KrylovInfo
+        """
+        n = self.shape[0]
+        vector = (b.ndim == 1)
+        B = b.reshape(n, -1)
+        dtype = np.result_type(B.dtype, getattr(self.A, 'dtype', np.float64), np.float64)
+        B = B.astype(dtype, copy=False)
+        if x0 is None:
+            x = np.zeros(B.shape, dtype=dtype)
+        else:
+            x = np.array(x0, dtype=dtype).reshape(B.shape)
+
+        tol = np.maximum(self.rtol*self.norm(B), self.atol)
+        info = KrylovInfo(self.method, tol, vector)
+        maxiter = 10*n if self.maxiter is None else self.maxiter
+        self._solve(B, x, info, maxiter)
+
+        residual = self.norm(B - self.matvec(x))
+        info.residual = residual[0] if vector else residual
+        self.info = info
+        return x.reshape(b.shape), info
+
+    def _solve(self, b, x, info, maxiter):
+        raise NotImplementedError
+
+
+class DeflationSpace():
+    """
+    @brief deflated CG 所用的子空间 W，可以在相邻的求解（如时间步）之间回收
+
+    @note W 上的分量由粗问题 (W^T A W) y = W^T r 直接求出，CG 只在 W 的 A-正交
+          补上迭代，所以与 W 对应的小特征值不再拖慢收敛。求解时保存前 nstore 个
+          搜索方向 p 和 A p，结束后在 span{W, P} 上做 Rayleigh-Ritz，取最小的 k 个
+          Ritz 向量作为下一次求解的 W，这一步不需要额外的矩阵乘法。
+    """
+    def __init__(self, k=8, W=None, nstore=None, recycle=True):
+        """
+        @param[in] k 回收的向量个数
+        @param[in] W 初始的子空间，形状为 (n, s)，None 表示从第二次求解开始才 deflate
+        @param[in] nstore 每次求解保存的搜索方向个数，默认为 4*k
+        @param[in] recycle 是否在求解后更新 W
+        """
+        self.k = k
+        self.W = W
+        self.nstore = 4*k if nstore is None else nstore
+        self.recycle = recycle
+        self.AW = None
+        self.E = None
+        self.theta = None # Ritz 值
+        self.P = []
+        self.Q = []
+
+    def setup(self, matvec):
+        """
+        @brief 求解开始时按当前的矩阵计算 AW 和粗问题的分解
+        """
+        self.P = []
+        self.Q = []
+        if self.W is None:
+            return
+        self.AW = matvec(self.W)
+        E = self.W.T @ self.AW
+        self.E = cho_factor((E + E.T)/2)
+
+    def active(self):
+        return self.W is not None
+
+    def correct(self, r):
+        """
+        @brief 粗空间校正 W (W^T A W)^{-1} W^T r
+        """
+        return self.W @ cho_solve(self.E, self.W.T @ r)
+
+    def project(self, z):
+        """
+        @brief 搜索方向中要去掉的部分 W (W^T A W)^{-1} (AW)^T z
+        """
+        return self.W @ cho_solve(self.E, self.AW.T @ z)
+
+    def store(self, p, q):
+        m = sum(v.shape[1] for v in self.P)
+        if m < self.nstore:
+            self.P.append(p[:, :self.nstore-m].copy())
+            self.Q.append(q[:, :self.nstore-m].copy())
+
+    def update(self):
+        """
+        @brief 由 span{W, P} 上的 Rayleigh-Ritz 更新 W
+        """
+        if (not self.recycle) or (len(self.P) == 0):
+            return
+        Z = self.P if self.W is None else [self.W] + self.P
+        AZ = self.Q if self.W is None else [self.AW] + self.Q
+        Z = np.hstack(Z)
+        AZ = np.hstack(AZ)
+        # 先用 SVD 把 Z 正交化，并去掉数值上线性相关的方向
+        U, s, Vt = np.linalg.svd(Z, full_matrices=False)
+        flag = s > s[0]*1e-10
+        T = Vt[flag].T/s[flag]
+        Z = U[:, flag]
+        G = Z.T @ (AZ @ T)
+        theta, Y = eigh((G + G.T)/2)
+        k = min(self.k, len(theta))
+        self.W = Z @ Y[:, :k]
+        self.theta = theta[:k]
+        self.P = []
+        self.Q = []
+
+
+class CGSolver(KrylovSolver):
+    """
+    @brief 共轭梯度法，给出预条件子时为 PCG
+
+    @note 给出 deflation 时为 deflated CG，并在求解之间回收 Krylov 子空间，
+          见 DeflationSpace。
+    """
+    method = 'cg'
+
+    def __init__(self, A, M=None, deflation=None, **kwargs):
+        """
+        @param[in] deflation DeflationSpace 或者形状为 (n, s) 的数组 W
+        """
+        super().__init__(A, M=M, **kwargs)
+        if (deflation is not None) and (not isinstance(deflation, DeflationSpace)):
+            deflation = DeflationSpace(k=deflation.shape[1], W=deflation)
+        self.deflation = deflation
+
+    def _solve(self, b, x, info, maxiter):
+        D = self.deflation
+        r = self.vectors('r', b.shape, b.dtype)
+        p = self.vectors('p', b.shape, b.dtype)
+
+        r[:] = b - self.matvec(x)
+        deflate = (D is not None) and D.active()
+        if D is not None:
+            D.setup(self.matvec)
+        if deflate:
+            x += D.correct(r)
+            r[:] = b - self.matvec(x)
+
+        done = self._record(info, 0, self.norm(r))
+        z = self.M(r)
+        p[:] = z
+        if deflate:
+            p -= D.project(z)
+        rz = self.dot(r, z)
+
+        for it in range(1, maxiter+1):
+            if np.all(done):
+                break
+            q = self.matvec(p)
+            alpha = _div(rz, self.dot(p, q))
+            alpha[done] = 0
+            if D is not None:
+                D.store(p[:, ~done], q[:, ~done])
+            x += alpha*p
+            r -= alpha*q
+            done = self._record(info, it, self.norm(r))
+
+            z = self.M(r)
+            rz0, rz = rz, self.dot(r, z)
+            p *= _div(rz, rz0)
+            p += z
+            if deflate:
+                p -= D.project(z)
+
+        if D is not None:
+            D.update()
+
+
+class MINRESSolver(KrylovSolver):
+    """
+    @brief 对称（可以不定）矩阵的 MINRES 方法，预条件子须对称正定
+
+    @note 停止条件用预条件范数 |r|_{M^{-1}} 下的残差估计，阈值中的 |b| 也取
+          同样的范数。
+    """
+    method = 'minres'
+
+    def _solve(self, b, x, info, maxiter):
+        eps = np.finfo(x.dtype).eps
+        bM = np.sqrt(np.abs(self.dot(b, self.M(b))))
+        info.tol[:] = np.maximum(self.rtol*bM, self.atol)
+
+        r1 = b - self.matvec(x)
+        y = self.M(r1)
+        beta1 = np.sqrt(np.abs(self.dot(r1, y)))
+
+        k = b.shape[1]
+        oldb = np.zeros(k)
+        beta = beta1.copy()
+        dbar = np.zeros(k)
+        epsln = np.zeros(k)
+        phibar = beta1.copy()
+        cs = -np.ones(k)
+        sn = np.zeros(k)
+        w = self.vectors('w', b.shape, b.dtype)
+        w2 = self.vectors('w2', b.shape, b.dtype)
+        w[:] = 0
+        w2[:] = 0
+        r2 = r1.copy()
+
+        done = self._record(info, 0, phibar)
+        for it in range(1, maxiter+1):
+            if np.all(done):
+                break
+            v = _div(1.0, beta)*y
+            y = self.matvec(v)
+            if it >= 2:
+                y -= _div(beta, oldb)*r1
+            alfa = self.dot(v, y)
+            y -= _div(alfa, beta)*r2
+            r1, r2 = r2, y
+            y = self.M(r2)
+            oldb = beta
+            beta = np.sqrt(np.abs(self.dot(r2, y)))
+
+            oldeps = epsln
+            delta = cs*dbar + sn*alfa
+            gbar = sn*dbar - cs*alfa
+            epsln = sn*beta
+            dbar = -cs*beta
+            gamma = np.maximum(np.hypot(gbar, beta), eps)
+            cs = gbar/gamma
+            sn = beta/gamma
+            phi = np.where(done, 0.0, cs*phibar)
+            phibar = np.where(done, phibar, sn*phibar)
+
+            # w 的三项递推，w1 的空间重用为新的 w
+            w1 = w2
+            w2 = w
+            w = w1
+            w *= -oldeps
+            w -= delta*w2
+            w += v
+            w /= gamma
+            x += phi*w
+            done = self._record(info, it, phibar)
+
+
+class GMRESSolver(KrylovSolver):
+    """
+    @brief 重启的 GMRES(m) 方法，使用右预条件，所以记录的是真实残差的估计
+
+    @note flexible 为 True 时为 FGMRES，保存每一步预条件后的向量，允许预条件子
+          每步不同（如内迭代）。
+    """
+    method = 'gmres'
+
+    def __init__(self, A, M=None, restart=30, flexible=False, **kwargs):
+        super().__init__(A, M=M, **kwargs)
+        self.restart = restart
+        self.flexible = flexible
+
+    def _solve(self, b, x, info, maxiter):
+        n, k = b.shape
+        m = self.restart
+        V = self.vectors('V', (m+1, n, k), b.dtype)
+        Z = self.vectors('Z', (m, n, k), b.dtype) if self.flexible else None
+        H = np.zeros((m+1, m, k), dtype=b.dtype)
+        cs = np.zeros((m, k), dtype=b.dtype)
+        sn = np.zeros((m, k), dtype=b.dtype)
+        g = np.zeros((m+1, k), dtype=b.dtype)
+
+        r = b - self.matvec(x)
+        rnorm = self.norm(r)
+        done = self._record(info, 0, rnorm)
+        it = 0
+        while (it < maxiter) and (not np.all(done)):
+            V[0] = r*_div(1.0, rnorm)
+            H[:] = 0
+            g[:] = 0
+            g[0] = rnorm
+            nstep = np.zeros(k, dtype=np.int_) # 本次循环中各列用到的步数
+            for j in range(m):
+                z = self.M(V[j])
+                if self.flexible:
+                    Z[j] = z
+                w = self.matvec(z)
+                for i in range(j+1): # 修正的 Gram-Schmidt 正交化
+                    H[i, j] = self.dot(V[i], w)
+                    w -= H[i, j]*V[i]
+                H[j+1, j] = self.norm(w)
+                V[j+1] = w*_div(1.0, H[j+1, j])
+
+                # Givens 旋转 [[conj(c), conj(s)], [-s, c]]，复数时也是酉矩阵
+                for i in range(j):
+                    t = cs[i].conj()*H[i, j] + sn[i].conj()*H[i+1, j]
+                    H[i+1, j] = -sn[i]*H[i, j] + cs[i]*H[i+1, j]
+                    H[i, j] = t
+                d = np.hypot(np.abs(H[j, j]), np.abs(H[j+1, j]))
+                cs[j] = np.where(d == 0, 1.0, _div(H[j, j], d))
+                sn[j] = _div(H[j+1, j], d)
+                H[j, j] = d
+                H[j+1, j] = 0
+                g[j+1] = -sn[j]*g[j]
+                g[j] = cs[j].conj()*g[j]
+
+                it += 1
+                nstep[~done] = j + 1
+                rnorm = np.where(done, rnorm, np.abs(g[j+1]))
+                done = self._record(info, it, rnorm)
+                if np.all(done) or (it >= maxiter):
+                    break
+
+            u = np.zeros((n, k), dtype=b.dtype)
+            for c in range(k):
+                s = nstep[c]
+                if s == 0:
+                    continue
+                y = solve_triangular(H[:s, :s, c], g[:s, c])
+                W = Z if self.flexible else V
+                u[:, c] = np.einsum('jn, j->n', W[:s, :, c], y)
+            x += u if self.flexible else self.M(u)
+
+            r = b - self.matvec(x)
+            rnorm = self.norm(r)
+            # 用真实残差校正 Givens 旋转给出的估计
+            info.converged = rnorm <= info.tol
+            done = info.converged.copy()
+
+
+class BiCGStabSolver(KrylovSolver):
+    """
+    @brief 非对称矩阵的 BiCGStab 方法，使用右预条件，每步两次矩阵乘法
+    """
+    method = 'bicgstab'
+
+    def _solve(self, b, x, info, maxiter):
+        k = b.shape[1]
+        r = b - self.matvec(x)
+        rhat = r.copy()
+        p = self.vectors('p', b.shape, b.dtype)
+        v = self.vectors('v', b.shape, b.dtype)
+        p[:] = 0
+        v[:] = 0
+        rho = np.ones(k)
+        alpha = np.ones(k)
+        omega = np.ones(k)
+
+        done = self._record(info, 0, self.norm(r))
+        for it in range(1, maxiter+1):
+            if np.all(done):
+                break
+            rho0, rho = rho, self.dot(rhat, r)
+            beta = _div(rho, rho0)*_div(alpha, omega)
+            p -= omega*v
+            p *= beta
+            p += r
+            phat = self.M(p)
+            v[:] = self.matvec(phat)
+            alpha = _div(rho, self.dot(rhat, v))
+            alpha[done] = 0
+            s = r - alpha*v
+            shat = self.M(s)
+            t = self.matvec(shat)
+            omega = _div(self.dot(t, s), self.dot(t, t))
+            omega[done] = 0
+            x += alpha*phat
+            x += omega*shat
+            r = s - omega*t
+            done = self._record(info, it, self.norm(r))
+
+
+class FCGSolver(KrylovSolver):
+    """
+    @brief flexible CG 方法（Notay），允许预条件子每步变化，如内迭代或者 AMG
+           的 K 循环
+
+    @note 新的搜索方向与最近的 mmax 个方向做 A-正交化，mmax=1 时为
+          Polak-Ribiere 形式的 CG。
+    """
+    method = 'fcg'
+
+    def __init__(self, A, M=None, mmax=1, **kwargs):
+        super().__init__(A, M=M, **kwargs)
+        self.mmax = mmax
+
+    def _solve(self, b, x, info, maxiter):
+        r = self.vectors('r', b.shape, b.dtype)
+        r[:] = b - self.matvec(x)
+        P, Q, D = [], [], []
+
+        done = self._record(info, 0, self.norm(r))
+        for it in range(1, maxiter+1):
+            if np.all(done):
+                break
+            z = self.M(r)
+            p = z.copy()
+            for pj, qj, dj in zip(P, Q, D):
+                p -= _div(self.dot(qj, z), dj)*pj
+            q = self.matvec(p)
+            d = self.dot(p, q)
+            alpha = _div(self.dot(p, r), d)
+            alpha[done] = 0
+            x += alpha*p
+            r -= alpha*q
+
+            P.append(p)
+            Q.append(q)
+            D.append(d)
+            if len(P) > self.mmax:
+                P.pop(0)
+                Q.pop(0)
+                D.pop(0)
+            done = self._record(info, it, self.norm(r))
+
+
+KRYLOV_SOLVERS = {
+        'cg': CGSolver,
+        'pcg': CGSolver,
+        'minres': MINRESSolver,
+        'gmres': GMRESSolver,
+        'fgmres': lambda A, **kwargs: GMRESSolver(A, flexible=True, **kwargs),
+        'bicgstab': BiCGStabSolver,
+        'fcg': FCGSolver,
+        }
+
+def krylov_solve(A, b, method='cg', M=None, x0=None, **kwargs):
+    """
+    @brief 用 Krylov 子空间方法求解 A x = b
+
+    @param[in] method 'cg'、'pcg'、'minres'、'gmres'、'fgmres'、'bicgstab' 或 'fcg'
+    @param[in] M 预条件子，见 as_preconditioner
+
+    @return x 和 KrylovInfo
+    """
+    if method not in KRYLOV_SOLVERS:
+        raise ValueError(f"unknown Krylov method '{method}'")
+    solver = KRYLOV_SOLVERS[method](A, M=M, **kwargs)
+    return solver.solve(b, x0=x0)
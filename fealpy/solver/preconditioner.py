@@ -0,0 +1,231 @@
+import numpy as np
+from scipy.sparse import isspmatrix, csc_matrix
+from scipy.sparse.linalg import LinearOperator, spilu
+
+from .direct_solver import DirectSolver
+
+try:
+    import pyamg
+except ImportError:
+    pyamg = None
+
+
+def block_diagonal(A):
+    """
+    @brief BSR 矩阵的对角块，形状为 (n, R, R)
+
+    @note 不在稀疏模式中的对角块取单位矩阵
+    """
+    R = A.blocksize[0]
+    n = A.shape[0]//R
+    row = np.repeat(np.arange(n), np.diff(A.indptr))
+    isDiag = row == A.indices
+    D = np.broadcast_to(np.eye(R, dtype=A.dtype), (n, R, R)).copy()
+    D[row[isDiag]] = A.data[isDiag]
+    return D
+
+
+class Preconditioner():
+    """
+    @brief 预条件子的公共接口
+
+    @note 子类实现 apply(r)，返回 M^{-1} r 的近似，其中 r 的形状为 (n, ) 或者
+          (n, k)，多列时每一列各自作用。所有 Krylov 解法器都通过这个接口使用
+          预条件子，见 as_preconditioner。
+    """
+    shape = None
+
+    def apply(self, r):
+        raise NotImplementedError
+
+    def __call__(self, r):
+        return self.apply(r)
+
+    def aslinearoperator(self):
+        """
+        @brief 转换为 scipy 的 LinearOperator，可以传给 scipy 的迭代解法器
+        """
+        return LinearOperator(self.shape, matvec=self.apply, matmat=self.apply)
+
+
+class IdentityPreconditioner(Preconditioner):
+    def __init__(self, n=None):
+        self.shape = (n, n)
+
+    def apply(self, r):
+        return r
+
+
+class MatrixPreconditioner(Preconditioner):
+    """
+    @brief 直接给出 M^{-1} 的矩阵或者 LinearOperator
+    """
+    def __init__(self, M):
+        self.M = M
+        self.shape = M.shape
+
+    def apply(self, r):
+        return self.M @ r
+
+
+class FunctionPreconditioner(Preconditioner):
+    """
+    @brief 由函数给出的预条件子
+
+    @param[in] func 计算 M^{-1} r 的函数
+    @param[in] vectorized func 是否能直接作用在 (n, k) 的多列数组上，否则逐列调用
+    """
+    def __init__(self, func, shape=None, vectorized=False):
+        self.func = func
+        self.shape = shape
+        self.vectorized = vectorized
+
+    def apply(self, r):
+        if (r.ndim == 1) or self.vectorized:
+            return self.func(r)
+        return np.stack([self.func(r[:, i]) for i in range(r.shape[1])], axis=1)
+
+
+class JacobiPreconditioner(Preconditioner):
+    """
+    @brief 对角（Jacobi）预条件子 D^{-1}
+
+    @note block 为 True 且 A 为 BSR 矩阵时，用 A 的对角块的逆（点块 Jacobi），
+          如弹性问题中每个节点的 GD x GD 块，比只用对角线更有效
+    """
+    def __init__(self, A, block=False):
+        self.shape = A.shape
+        self.block = block
+        self.update(A)
+
+    def update(self, A):
+        if self.block and (A.format == 'bsr') and (A.blocksize[0] > 1):
+            self.dinv = None
+            self.binv = np.linalg.inv(block_diagonal(A))
+            return self
+        d = A.diagonal()
+        self.dinv = np.divide(1.0, d, out=np.zeros_like(d), where=d != 0)
+        return self
+
+    def apply(self, r):
+        if self.dinv is None:
+            n, R = self.binv.shape[:2]
+            out = np.einsum('nij, nj...->ni...', self.binv, r.reshape((n, R) + r.shape[1:]))
+            return out.reshape(r.shape)
+        if r.ndim == 1:
+            return self.dinv*r
+        return self.dinv[:, None]*r
+
+
+class ILUPreconditioner(Preconditioner):
+    """
+    @brief 不完全 LU 分解预条件子，基于 scipy 的 spilu
+    """
+    def __init__(self, A, drop_tol=1e-4, fill_factor=10):
+        self.shape = A.shape
+        self.drop_tol = drop_tol
+        self.fill_factor = fill_factor
+        self.update(A)
+
+    def update(self, A):
+        self.ilu = spilu(csc_matrix(A), drop_tol=self.drop_tol,
+                fill_factor=self.fill_factor)
+        return self
+
+    def apply(self, r):
+        return self.ilu.solve(r)
+
+
+class AMGPreconditioner(Preconditioner):
+    """
+    @brief 代数多重网格预条件子，每次作用做一次 V 循环（或 W、F 循环）
+
+    @param[in] method 'sa' 光滑聚集或者 'rs' Ruge-Stuben 经典 AMG，由 pyamg 提供
+    """
+    def __init__(self, A, method='sa', cycle='V', **kwargs):
+        if pyamg is None:
+            raise ImportError("AMGPreconditioner needs pyamg")
+        if method not in {'sa', 'rs'}:
+            raise ValueError(f"unknown AMG method '{method}'")
+        self.shape = A.shape
+        self.method = method
+        self.cycle = cycle
+        self.kwargs = kwargs
+        self.update(A)
+
+    def update(self, A):
+        # pyamg 的光滑聚集直接支持 BSR 矩阵，按节点的块聚集；经典 AMG 只接受 CSR
+        if (A.format != 'bsr') or (self.method != 'sa'):
+            A = A.tocsr()
+        if self.method == 'sa':
+            self.ml = pyamg.smoothed_aggregation_solver(A, **self.kwargs)
+        else:
+            self.ml = pyamg.ruge_stuben_solver(A, **self.kwargs)
+        self.M = self.ml.aspreconditioner(cycle=self.cycle)
+        return self
+
+    def apply(self, r):
+        if r.ndim == 1:
+            return self.M.matvec(r)
+        return np.stack([self.M.matvec(r[:, i]) for i in range(r.shape[1])], axis=1)
+
+
+class BlockDiagonalPreconditioner(Preconditioner):
+    """
+    @brief 块对角预条件子 diag(M_0^{-1}, M_1^{-1}, ...)
+
+    @param[in] blocks 每个对角块的预条件子，可以是 as_preconditioner 接受的任何对象
+    @param[in] sizes 每个对角块的大小，blocks 中的对象都有 shape 属性时可以省略
+    """
+    def __init__(self, blocks, sizes=None):
+        self.blocks = [as_preconditioner(B) for B in blocks]
+        if sizes is None:
+            sizes = [B.shape[0] for B in self.blocks]
+        self.offsets = np.r_[0, np.cumsum(sizes)]
+        n = int(self.offsets[-1])
+        self.shape = (n, n)
+
+    def apply(self, r):
+        out = np.empty_like(r)
+        for B, s, e in zip(self.blocks, self.offsets[:-1], self.offsets[1:]):
+            out[s:e] = B.apply(r[s:e])
+        return out
+
+
+def as_preconditioner(M, A=None):
+    """
+    @brief 把各种形式的预条件子转换为 Preconditioner
+
+    @param[in] M 可以是
+        - None：不用预条件
+        - Preconditioner 对象
+        - 字符串 'jacobi'、'block-jacobi'、'ilu' 或 'amg'：由 A 构造
+        - 稀疏矩阵、数组或者 LinearOperator：表示 M^{-1}
+        - 有 solve 方法的对象，如 DirectSolver
+        - 函数
+    """
+    if M is None:
+        return IdentityPreconditioner(None if A is None else A.shape[0])
+    if isinstance(M, Preconditioner):
+        return M
+    if isinstance(M, str):
+        if A is None:
+            raise ValueError(f"the matrix is needed to build the '{M}' preconditioner")
+        if M == 'jacobi':
+            return JacobiPreconditioner(A)
+        if M == 'block-jacobi':
+            return JacobiPreconditioner(A, block=True)
+        if M == 'ilu':
+            return ILUPreconditioner(A)
+        if M == 'amg':
+            return AMGPreconditioner(A)
+        raise ValueError(f"unknown preconditioner '{M}'")
+    if isspmatrix(M) or isinstance(M, (np.ndarray, LinearOperator)):
+        return MatrixPreconditioner(M)
+    if hasattr(M, 'solve'):
+        # DirectSolver 的 solve 可以直接处理多列右端
+        return FunctionPreconditioner(M.solve, shape=getattr(M, 'shape', None),
+                vectorized=isinstance(M, DirectSolver))
+    if callable(M):
+        return FunctionPreconditioner(M)
+    raise TypeError(f"can not use {type(M).__name__} as a preconditioner")
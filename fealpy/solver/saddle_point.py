@@ -0,0 +1,215 @@
+import numpy as np
+from scipy.sparse import bmat, spdiags
+from scipy.sparse.linalg import LinearOperator
+
+from .direct_solver import DirectSolver
+from .preconditioner import (Preconditioner, JacobiPreconditioner,
+        BlockDiagonalPreconditioner, as_preconditioner)
+from .krylov import MINRESSolver, GMRESSolver
+
+
+def _matrix(A):
+    """
+    @brief 取出 BilinearForm 或 MixedBilinearForm 的矩阵，没有组装时先组装
+    """
+    if hasattr(A, 'get_matrix'):
+        M = A.get_matrix()
+        return A.assembly() if M is None else M
+    return A
+
+
+class BlockTriangularPreconditioner(Preconditioner):
+    """
+    @brief 块上三角预条件子 [[A, B^T], [0, -S]]^{-1}，配合 GMRES 使用
+
+    @note 先由 p = -S^{-1} g 求出第二块，再求 u = A^{-1}(f - B^T p)。A 和 S 为
+          精确的逆时，GMRES 两步收敛。
+    """
+    def __init__(self, A, S, B):
+        """
+        @param[in] A, S 第一块和 Schur 补的预条件子，见 as_preconditioner
+        @param[in] B 形状为 (n1, n0) 的非对角块
+        """
+        self.A = as_preconditioner(A)
+        self.S = as_preconditioner(S)
+        self.B = B
+        self.m = B.shape[1]
+        n = sum(B.shape)
+        self.shape = (n, n)
+
+    def apply(self, r):
+        m = self.m
+        out = np.empty_like(r)
+        out[m:] = self.S(r[m:])
+        out[m:] *= -1
+        out[:m] = self.A(r[:m] - self.B.T@out[m:])
+        return out
+
+
+class LSCPreconditioner(Preconditioner):
+    """
+    @brief 最小二乘交换子（least-squares commutator）的 Schur 补近似
+
+    @note S^{-1} ~ L^{-1} (B Q^{-1} A Q^{-1} B^T) L^{-1}，其中 L = B Q^{-1} B^T，
+          Q 取速度质量矩阵（或 A）的对角线。这个近似只用到已经组装的矩阵，
+          不需要压力空间上的对流扩散算子，适用于 Navier-Stokes 的 Oseen 线性化。
+          L 是压力空间上类似 Laplace 的矩阵，用 AMG 求逆。
+    """
+    def __init__(self, A, B, Q=None, L='amg'):
+        """
+        @param[in] A 第一块矩阵
+        @param[in] B 形状为 (n1, n0) 的非对角块
+        @param[in] Q 速度质量矩阵，None 时用 A 的对角线
+        @param[in] L L 的求逆方法，'amg' 或者 'direct'
+        """
+        d = (A if Q is None else Q).diagonal()
+        self.dinv = 1.0/d
+        self.A = A
+        self.B = B
+        n = B.shape[0]
+        self.shape = (n, n)
+        L0 = (B@spdiags(self.dinv, 0, len(d), len(d))@B.T).tocsr()
+        if L == 'direct':
+            self.L = as_preconditioner(DirectSolver(L0))
+        else:
+            self.L = as_preconditioner(L, L0)
+
+    def apply(self, r):
+        dinv = self.dinv if r.ndim == 1 else self.dinv[:, None]
+        y = self.L(r)
+        y = dinv*(self.B.T@y)
+        y = self.B@(dinv*(self.A@y))
+        return self.L(y)
+
+
+class SaddlePointSystem():
+    """
+    @brief 鞍点问题的分块系统
+
+        [A  B^T] [u]   [f]
+        [B  -C ] [p] = [g]
+
+    @note 只保存 A、B、C 三块，矩阵向量乘积按块计算，不组装整体矩阵。对象有
+          shape、dtype 和 @ 运算，可以直接交给 fealpy.solver 中的 Krylov 解法器。
+          Stokes、Darcy 以及混合元的线弹性问题都是这种形式。
+    """
+    def __init__(self, A, B, C=None):
+        """
+        @param[in] A 第一块，矩阵或者 BilinearForm，BSR 矩阵保持原来的格式
+        @param[in] B 非对角块，矩阵或者 MixedBilinearForm，形状为 (n1, n0)。
+               形状为 (n0, n1) 时（如 MixedBilinearForm((pspace, ), 2*(uspace, ))
+               组装的 (p, div v)）自动转置，注意 B 的符号由调用者决定
+        @param[in] C 第二块的稳定化项，半正定，可以为 None
+        """
+        A = _matrix(A)
+        A = A if A.format == 'bsr' else A.tocsr()
+        B = _matrix(B)
+        n0 = A.shape[0]
+        if (B.shape[1] != n0) and (B.shape[0] == n0):
+            B = B.T
+        self.A = A
+        self.B = B.tocsr()
+        self.BT = self.B.T.tocsr()
+        self.C = None if C is None else _matrix(C).tocsr()
+
+        self.sizes = (n0, self.B.shape[0])
+        n = sum(self.sizes)
+        self.shape = (n, n)
+        self.dtype = np.result_type(A.dtype, self.B.dtype)
+
+    def split(self, x):
+        m = self.sizes[0]
+        return x[:m], x[m:]
+
+    def matvec(self, x):
+        u, p = self.split(x)
+        out = np.empty(x.shape, dtype=np.result_type(self.dtype, x.dtype))
+        r0, r1 = self.split(out)
+        r0[:] = self.A@u
+        r0 += self.BT@p
+        r1[:] = self.B@u
+        if self.C is not None:
+            r1 -= self.C@p
+        return out
+
+    def __matmul__(self, x):
+        return self.matvec(x)
+
+    def aslinearoperator(self):
+        return LinearOperator(self.shape, matvec=self.matvec,
+                matmat=self.matvec, dtype=self.dtype)
+
+    def tocsr(self):
+        """
+        @brief 组装整体矩阵，只用于直接解法或者调试
+        """
+        C = None if self.C is None else -self.C
+        return bmat([[self.A, self.BT], [self.B, C]], format='csr')
+
+    def schur_preconditioner(self, schur='mass', Mp=None, Q=None):
+        """
+        @brief Schur 补 S = B A^{-1} B^T + C 的近似
+
+        @param[in] schur 'mass' 用 Mp 的对角线，'mass-direct' 精确求解 Mp，
+               'lsc' 用最小二乘交换子
+        @param[in] Mp 压力质量矩阵或 BilinearForm，Stokes 问题中应该除以粘性系数
+        @param[in] Q LSC 中的速度质量矩阵
+        """
+        if schur in {'mass', 'mass-direct'}:
+            if Mp is None:
+                raise ValueError(f"the '{schur}' Schur approximation needs the pressure mass matrix Mp")
+            Mp = _matrix(Mp).tocsr()
+            if self.C is not None:
+                Mp = Mp + self.C
+            if schur == 'mass':
+                return JacobiPreconditioner(Mp)
+            return as_preconditioner(DirectSolver(Mp))
+        if schur == 'lsc':
+            return LSCPreconditioner(self.A, self.B, Q=_matrix(Q))
+        return as_preconditioner(schur)
+
+    def preconditioner(self, kind='diagonal', velocity='amg', schur='mass', Mp=None, Q=None):
+        """
+        @brief 分块预条件子
+
+        @param[in] kind 'diagonal' 块对角，对称正定，配合 MINRES；
+               'triangular' 块上三角，配合 GMRES
+        @param[in] velocity 第一块的预条件子，默认为一次 AMG V 循环
+        @param[in] schur Schur 补的近似，见 schur_preconditioner
+
+        @note 第一块用 AMG、Schur 补用压力质量矩阵时，两者都与精确的块谱等价，
+              所以 Stokes 问题的迭代步数与网格尺寸无关
+        """
+        PA = as_preconditioner(velocity, self.A)
+        PS = self.schur_preconditioner(schur, Mp=Mp, Q=Q)
+        if kind == 'diagonal':
+            return BlockDiagonalPreconditioner([PA, PS], sizes=self.sizes)
+        if kind == 'triangular':
+            return BlockTriangularPreconditioner(PA, PS, self.B)
+        raise ValueError(f"unknown block preconditioner '{kind}'")
+
+    def solve(self, f, g=None, M=None, method=None, x0=None, **kwargs):
+        """
+        @brief 求解分块系统
+
+        @param[in] f, g 两块的右端，g 为 None 时为 0
+        @param[in] M 预条件子，由 preconditioner 得到
+        @param[in] method 'minres' 或 'gmres'，默认按预条件子的类型选择
+        @param[in] kwargs 传给 Krylov 解法器的参数，如 rtol、maxiter
+
+        @return u, p 和 KrylovInfo
+        """
+        if g is None:
+            g = np.zeros((self.sizes[1], ) + f.shape[1:], dtype=f.dtype)
+        b = np.concatenate([f, g], axis=0)
+        if method is None:
+            method = 'gmres' if isinstance(M, BlockTriangularPreconditioner) else 'minres'
+        if method == 'minres':
+            solver = MINRESSolver(self, M=M, **kwargs)
+        elif method == 'gmres':
+            solver = GMRESSolver(self, M=M, **kwargs)
+        else:
+            raise ValueError(f"unknown method '{method}' for the saddle point system")
+        x, info = solver.solve(b, x0=x0)
+        u, p = self.split(x)
+        return u, p, info
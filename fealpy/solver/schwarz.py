@@ -0,0 +1,221 @@
+import os
+from multiprocessing import Process, Pipe
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from scipy.sparse import csr_matrix, csc_matrix
+from scipy.sparse.linalg import splu
+from scipy.linalg import lu_factor, lu_solve
+
+from .preconditioner import Preconditioner
+
+
+def space_partition(space, nparts=None, parts=None):
+    """
+    @brief 由单元的划分得到自由度的不重叠划分，每个自由度属于含有它的单元中
+           编号最小的分区
+
+    @param[in] space 标量的有限元空间
+    @param[in] nparts 分区个数，parts 为 None 时用 partition_cells 划分单元
+    @param[in] parts 单元的分区编号
+    """
+    if parts is None:
+        from ..parallel.parallel_mesh import partition_cells
+        parts = partition_cells(space.mesh, nparts)
+    nparts = parts.max() + 1
+    cell2dof = space.cell_to_dof()
+    gdof = space.number_of_global_dofs()
+    owner = np.full(gdof, nparts, dtype=np.int_)
+    np.minimum.at(owner, cell2dof.reshape(-1), np.repeat(parts, cell2dof.shape[1]))
+    return owner
+
+
+def overlap_subdomains(A, parts, overlap=1):
+    """
+    @brief 把不重叠的自由度划分沿矩阵 A 的图向外扩展 overlap 层
+
+    @return 每个子区域的自由度编号（已排序）
+    """
+    n = A.shape[0]
+    A = A.tocsr()
+    G = csr_matrix((np.ones(len(A.indices), dtype=np.float64), A.indices, A.indptr), shape=A.shape)
+    nparts = parts.max() + 1
+    P = csr_matrix((np.ones(n), (np.arange(n), parts)), shape=(n, nparts))
+    for i in range(overlap):
+        P = G@P
+        P.data[:] = 1
+    P = P.tocsc()
+    P.sort_indices()
+    return [P.indices[P.indptr[i]:P.indptr[i+1]] for i in range(nparts)]
+
+
+def _schwarz_worker(conn, names, n, total, tasks):
+    """
+    @brief 子区域求解的工作进程：先分解分给它的子区域矩阵，然后每收到一次
+           请求就从共享内存读入残量，把子区域的解写到共享内存中
+    """
+    shmr = SharedMemory(name=names[0])
+    shmo = SharedMemory(name=names[1])
+    r = np.ndarray((n, ), dtype=np.float64, buffer=shmr.buf)
+    out = np.ndarray((total, ), dtype=np.float64, buffer=shmo.buf)
+    lus = [(offset, dofs, splu(A)) for offset, dofs, A in tasks]
+    conn.send(True)
+    while conn.recv() is not None:
+        for offset, dofs, lu in lus:
+            out[offset:offset+len(dofs)] = lu.solve(r[dofs])
+        conn.send(True)
+    del r, out
+    shmr.close()
+    shmo.close()
+
+
+class SchwarzPreconditioner(Preconditioner):
+    """
+    @brief 重叠的加性 Schwarz 预条件子，可以带粗空间
+
+    @note restricted 为 True 时为限制加性 Schwarz (RAS)，子区域的解只写回各自
+          不重叠的部分，收敛通常更快，但预条件子不对称，要配合 GMRES 使用；
+          restricted 为 False 时为对称的 ASM，可以配合 CG 使用。
+
+          子区域矩阵在工作进程中只分解一次（SuperLU 的分解不能在进程间传递），
+          之后每次作用只通过共享内存传递残量和子区域的解。
+    """
+    def __init__(self, A, parts, overlap=1, restricted=True, coarse=None,
+            processes=None, doforder='sdofs'):
+        """
+        @param[in] A 稀疏矩阵（实数）
+        @param[in] parts 自由度的不重叠划分，见 space_partition。A 为 GD 个分量的
+               向量型问题时，parts 可以只给出标量空间上的划分，按 doforder 扩展
+        @param[in] overlap 子区域向外扩展的层数
+        @param[in] coarse None、'nicolaides' 或者形状为 (n, m) 的近零空间向量
+               （如弹性问题的刚体运动），粗空间由这些向量限制到每个子区域上得到
+        @param[in] processes 工作进程的个数，默认为 CPU 个数，不超过 1 时在当前
+               进程中求解
+        """
+        A = A.tocsr()
+        n = A.shape[0]
+        self.shape = A.shape
+        if len(parts) != n:
+            GD = n//len(parts)
+            parts = np.tile(parts, GD) if doforder == 'sdofs' else np.repeat(parts, GD)
+        self.parts = parts
+        self.restricted = restricted
+        self.subdomains = overlap_subdomains(A, parts, overlap=overlap)
+
+        offsets = np.r_[0, np.cumsum([len(d) for d in self.subdomains])]
+        self.index = np.concatenate(self.subdomains)
+        total = len(self.index)
+        if restricted:
+            self.weight = (parts[self.index] == np.repeat(np.arange(len(self.subdomains)),
+                np.diff(offsets))).astype(np.float64)
+        else:
+            self.weight = None
+        tasks = [(offsets[i], dofs, csc_matrix(A[dofs][:, dofs]))
+                for i, dofs in enumerate(self.subdomains)]
+
+        if processes is None:
+            processes = os.cpu_count()
+        processes = min(processes, len(tasks))
+        self.workers = []
+        if processes > 1:
+            self._start(tasks, n, total, processes)
+        else:
+            self.lus = [(offset, dofs, splu(Ai)) for offset, dofs, Ai in tasks]
+            self.out = np.zeros(total)
+
+        self._setup_coarse(A, coarse)
+
+    def _start(self, tasks, n, total, processes):
+        self.shm = [SharedMemory(create=True, size=8*n),
+                SharedMemory(create=True, size=8*max(total, 1))]
+        self.r = np.ndarray((n, ), dtype=np.float64, buffer=self.shm[0].buf)
+        self.out = np.ndarray((total, ), dtype=np.float64, buffer=self.shm[1].buf)
+        names = [s.name for s in self.shm]
+
+        # 按子区域矩阵的非零元个数贪心地分配给负载最小的进程
+        load = np.zeros(processes)
+        groups = [[] for i in range(processes)]
+        for t in sorted(tasks, key=lambda t: -t[2].nnz):
+            i = np.argmin(load)
+            groups[i].append(t)
+            load[i] += t[2].nnz
+        for group in groups:
+            conn, child = Pipe()
+            p = Process(target=_schwarz_worker, args=(child, names, n, total, group), daemon=True)
+            p.start()
+            self.workers.append((p, conn))
+        for _, conn in self.workers:
+            conn.recv()
+
+    def _setup_coarse(self, A, coarse):
+        self.R0 = None
+        if coarse is None:
+            return
+        n = A.shape[0]
+        Z = np.ones((n, 1)) if isinstance(coarse, str) and (coarse == 'nicolaides') else coarse
+        Z = Z.reshape(n, -1)
+        m = Z.shape[1]
+        # 第 i 个子区域上的第 j 个粗基函数为 Z[:, j] 限制到它不重叠的部分
+        I = np.repeat(np.arange(n), m)
+        J = (self.parts[:, None]*m + np.arange(m)).reshape(-1)
+        R0 = csr_matrix((Z.reshape(-1), (I, J)), shape=(n, (self.parts.max()+1)*m)).tocsc()
+        R0 = R0[:, np.diff(R0.indptr) > 0]
+        self.R0 = R0
+        self.A0 = lu_factor((R0.T@(A@R0)).toarray())
+        self.A = A
+
+    def _local(self, r):
+        if self.workers:
+            self.r[:] = r
+            for _, conn in self.workers:
+                conn.send(True)
+            for _, conn in self.workers:
+                conn.recv()
+        else:
+            for offset, dofs, lu in self.lus:
+                self.out[offset:offset+len(dofs)] = lu.solve(r[dofs])
+        w = self.out if self.weight is None else self.out*self.weight
+        return np.bincount(self.index, weights=w, minlength=self.shape[0])
+
+    def _coarse(self, r):
+        return self.R0@lu_solve(self.A0, self.R0.T@r)
+
+    def _apply(self, r):
+        if self.R0 is None:
+            return self._local(r)
+        # 粗空间按平衡的方式组合 Q r + (I - Q A) M (I - A Q) r，Q = R0 A0^{-1} R0^T，
+        # 保持 ASM 的对称性，并且比直接相加的粗空间校正有效得多
+        c = self._coarse(r)
+        z = self._local(r - self.A@c)
+        return c + z - self._coarse(self.A@z)
+
+    def apply(self, r):
+        if r.ndim == 1:
+            return self._apply(r)
+        return np.stack([self._apply(r[:, i]) for i in range(r.shape[1])], axis=1)
+
+    def close(self):
+        """
+        @brief 结束工作进程并释放共享内存
+        """
+        for p, conn in self.workers:
+            conn.send(None)
+            p.join()
+        if self.workers:
+            self.workers = []
+            del self.r, self.out
+            for s in self.shm:
+                s.close()
+                s.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -1,3 +1,4 @@
+import numpy as np
 from scipy.sparse import spdiags, eye, bmat, tril, triu
 from scipy.sparse.linalg import spsolve_triangular
 
@@ -26,6 +27,38 @@ class GaussSeidelSmoother():
             for i in range(maxit):
                 x0[:] = spsolve_triangular(self.U1, b-self.L1@x0, lower=lower)
 
+class MulticolorGaussSeidelSmoother():
+    """
+    @brief 多色 Gauss-Seidel 光滑子
+
+    @note 按矩阵图的着色把未知量分组，同一种颜色的未知量之间没有耦合，所以一种
+          颜色内的 Gauss-Seidel 更新就是一次向量化的 Jacobi 更新
+          x_I += (b_I - A_I x)/D_I，不需要三角求解。lower 为 True 时按颜色的顺序
+          扫描，为 False 时按相反的顺序，两者组合是对称的光滑子。
+    """
+    def __init__(self, A, classes=None):
+        """
+        @param[in] A 稀疏矩阵
+        @param[in] classes 颜色类的列表，默认由 matrix_coloring(A) 得到
+        """
+        if classes is None:
+            from ..graph.coloring import matrix_coloring
+            classes = matrix_coloring(A)
+        A = A.tocsr()
+        D = A.diagonal()
+        self.classes = classes
+        self.blocks = [(I, A[I], 1/D[I]) for I in classes]
+
+    def number_of_colors(self):
+        return len(self.classes)
+
+    def smooth(self, b, x0, lower=True, maxit=3):
+        blocks = self.blocks if lower else self.blocks[::-1]
+        for i in range(maxit):
+            for I, AI, DI in blocks:
+                x0[I] += (b[I] - AI@x0)*DI
+        return x0
+
 class JacobiSmoother():
     """
     加权的 Jacobi 光滑子
@@ -40,14 +73,14 @@ class JacobiSmoother():
             T = spdiags(1-bdIdx, 0, gdof, gdof)
             A = T@A@T + Tbd
 
-        self.D = A.diagonal() 
-        self.D *= weight 
-        self.L = tril(A, k=-1).tocsr()
-        self.U = triu(A, k=1).tocsr()
+        # 不拆分出 L 和 U，保持 A 的格式（如 BSR），用 (A - D) r 代替 (L + U) r
+        self.A = A
+        self.D0 = A.diagonal()
+        self.D = self.D0*weight
 
     def smooth(self, b, maxit=100):
         r = b.copy()
         for i in range(maxit):
-            r[:] = b - self.L@r - self.U@r
+            r[:] = b - self.A@r + self.D0*r
             r /= self.D
         return r
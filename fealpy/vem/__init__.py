@@ -17,3 +17,4 @@ from .scalar_source_integrator import NonConformingVEMScalarSourceIntegrator2d
 from .bilinear_form import BilinearForm
 from .linear_form import LinearForm
 from .estimator import PoissonCVEMEstimator
+from .batched_laplace_integrator import BatchedConformingScalarVEMLaplaceIntegrator2d
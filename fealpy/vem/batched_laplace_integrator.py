@@ -0,0 +1,157 @@
+import numpy as np
+
+from ..quadrature import GaussLobattoQuadrature
+from ..functionspace import ConformingScalarVESpace2d
+
+from .scaled_monomial_space_mass_integrator import ScaledMonomialSpaceMassIntegrator2d
+
+
+def group_cells_by_vertex_number(mesh):
+    """
+    @brief 按单元的顶点个数对多边形网格的单元分组
+
+    @return 字典，键为顶点个数 NV，值为顶点个数等于 NV 的单元编号
+    """
+    NV = mesh.ds.number_of_vertices_of_cells()
+    order = np.argsort(NV, kind='stable')
+    nv, count = np.unique(NV[order], return_counts=True)
+    index = np.split(order, np.cumsum(count)[:-1])
+    return dict(zip(nv.tolist(), index))
+
+
+class BatchedConformingScalarVEMLaplaceIntegrator2d():
+    """
+    @brief 协调虚单元 Laplace 算子的批量组装
+
+    @note 把顶点个数相同的单元分为一组，组内所有单元的局部自由度个数相同,
+          因此 D、B、G、PI1 和稳定化后的单元刚度矩阵都可以存成三维数组,
+          用 einsum、matmul 和批量 solve 一次算出，而不是对单元逐个 map。
+          `assembly_cell_matrix` 返回以顶点个数为键的字典，`vem.BilinearForm`
+          会用一次向量化的索引构造完成组装。
+    """
+    def __init__(self, c=None, M=None):
+        """
+        @param[in] c 扩散系数，可以是常数，也可以是长度为 NC 的分片常数数组
+        @param[in] M 缩放单项式空间的单元质量矩阵，只在 p > 1 时需要，
+                     若不提供则在组装时计算
+        """
+        self.coef = c
+        self.M = M
+
+        self.D = None
+        self.B = None
+        self.G = None
+        self.PI1 = None
+
+    def assembly_cell_projector(self, space: ConformingScalarVESpace2d):
+        """
+        @brief 分组计算自由度矩阵 D、H1 投影的左右端矩阵 G 和 B，以及投影矩阵 PI1
+
+        @return 四个字典 D, B, G, PI1，键为顶点个数，值为 (index, A)
+        """
+        p = space.p
+        mesh = space.mesh
+        smspace = space.smspace
+        node = mesh.entity('node')
+        cell = mesh.ds._cell
+        location = mesh.ds.cellLocation
+
+        smldof = smspace.number_of_local_dofs()
+        idof = (p-1)*p//2
+
+        if (p > 1) and (self.M is None):
+            self.M = ScaledMonomialSpaceMassIntegrator2d().assembly_cell_matrix(smspace)
+
+        qf = GaussLobattoQuadrature(p + 1)
+        bcs, ws = qf.quadpts, qf.weights
+        NQ = len(ws)
+
+        w = np.array([(0, -1), (1, 0)])
+        if p > 1:
+            data = smspace.diff_index_2()
+            xx = data['xx']
+            yy = data['yy']
+
+        D = {}
+        B = {}
+        G = {}
+        PI1 = {}
+        for nv, index in group_cells_by_vertex_number(mesh).items():
+            NC = len(index)
+            ldof = nv*p + idof
+            cidx = np.repeat(index, nv)
+
+            v0 = cell[location[index, None] + np.arange(nv)] # (NC, nv)
+            v1 = np.roll(v0, -1, axis=1)
+            ps = np.einsum('qi, ckid->qckd', bcs, node[np.stack((v0, v1), axis=-1)])
+            ps = ps.reshape(NQ, NC*nv, 2)
+
+            # 自由度矩阵 D
+            d = np.zeros((NC, ldof, smldof), dtype=np.float64)
+            phi = smspace.basis(ps[:p], index=cidx) # (p, NC*nv, smldof)
+            d[:, :nv*p] = phi.reshape(p, NC, nv, smldof).transpose(1, 2, 0, 3).reshape(NC, nv*p, smldof)
+            if p > 1:
+                area = smspace.cellmeasure[index]
+                d[:, nv*p:] = self.M[index, :idof, :]/area[:, None, None]
+
+            # H1 投影的右端矩阵 B
+            b = np.zeros((NC, smldof, ldof), dtype=np.float64)
+            if p == 1:
+                b[:, 0, :] = 1/nv
+            else:
+                b[:, 0, nv*p] = 1
+                b[:, xx[0], nv*p + np.arange(xx[0].shape[0])] -= xx[1]
+                b[:, yy[0], nv*p + np.arange(yy[0].shape[0])] -= yy[1]
+
+            gphi = smspace.grad_basis(ps, index=cidx).reshape(NQ, NC, nv, smldof, 2)
+            nm = (node[v1] - node[v0])@w
+            val = np.einsum('q, qcjmk, cjk->cmjq', ws, gphi, nm, optimize=True)
+            idx = np.arange(0, nv*p, p).reshape(-1, 1) + np.arange(p+1)
+            idx[-1, -1] = 0
+            np.add.at(b, (np.s_[:], np.s_[:], idx), val)
+
+            # H1 投影的左端矩阵 G 和投影矩阵 PI1
+            if p == 1:
+                g = np.broadcast_to(np.eye(3), (NC, 3, 3))
+                pi1 = b
+            else:
+                g = b@d
+                pi1 = np.linalg.solve(g, b)
+
+            D[nv] = (index, d)
+            B[nv] = (index, b)
+            G[nv] = (index, g)
+            PI1[nv] = (index, pi1)
+
+        self.D = D
+        self.B = B
+        self.G = G
+        self.PI1 = PI1
+        return D, B, G, PI1
+
+    def assembly_cell_matrix(self, space: ConformingScalarVESpace2d):
+        """
+        @brief 分组组装稳定化后的单元刚度矩阵
+
+        @return 字典，键为顶点个数，值为 (index, K)，K 的形状为 (NCg, ldof, ldof)
+        """
+        coef = self.coef
+        D, _, G, PI1 = self.assembly_cell_projector(space)
+
+        K = {}
+        for nv, (index, d) in D.items():
+            g = G[nv][1].copy()
+            g[:, 0, :] = 0
+            pi1 = PI1[nv][1]
+            ldof = d.shape[1]
+
+            S = np.eye(ldof) - d@pi1
+            k = pi1.swapaxes(-1, -2)@g@pi1 + S.swapaxes(-1, -2)@S
+
+            if coef is not None:
+                if np.isscalar(coef):
+                    k *= coef
+                else:
+                    k *= coef[index, None, None]
+            K[nv] = (index, k)
+        return K
@@ -59,18 +59,39 @@ class BilinearForm:
         """
         @brief 数值积分组装
 
+        @note 积分子可以返回逐单元的矩阵列表，也可以返回按单元顶点个数分组的
+              字典 {NV: (index, K)}，两种情形的 I、J 都由一次向量化的索引构造得到
         """
         space = self.space
-        cell2dof = space.cell_to_dof() 
+        cell2dof = np.concatenate(space.cell_to_dof())
+        location = space.dof.cell2dofLocation
         K = self.dintegrators[0].assembly_cell_matrix(space)
 
-        f2 = lambda x: np.repeat(x, x.shape[0])
-        f3 = lambda x: np.tile(x, x.shape[0])
-        f4 = lambda x: x.flat
+        if isinstance(K, dict):
+            I = []
+            J = []
+            val = []
+            for index, k in K.values():
+                ldof = k.shape[-1]
+                c2d = cell2dof[location[index, None] + np.arange(ldof)]
+                I.append(np.broadcast_to(c2d[:, :, None], k.shape).flat)
+                J.append(np.broadcast_to(c2d[:, None, :], k.shape).flat)
+                val.append(k.flat)
+            I = np.concatenate(I)
+            J = np.concatenate(J)
+            val = np.concatenate(val)
+        else:
+            ldof = location[1:] - location[:-1]
+            n2 = ldof**2
+            start = np.zeros(len(n2) + 1, dtype=location.dtype)
+            start[1:] = np.cumsum(n2)
+            k = np.arange(start[-1]) - np.repeat(start[:-1], n2)
+            m = np.repeat(ldof, n2)
+            offset = np.repeat(location[:-1], n2)
+            I = cell2dof[offset + k//m]
+            J = cell2dof[offset + k%m]
+            val = np.concatenate([x.flat for x in K])
 
-        I = np.concatenate(list(map(f2, cell2dof)))
-        J = np.concatenate(list(map(f3, cell2dof)))
-        val = np.concatenate(list(map(f4, K)))
         gdof = space.number_of_global_dofs()
         self._M = csr_matrix((val, (I, J)), shape=(gdof, gdof), dtype=np.float64)
         return self._M 
@@ -88,13 +88,13 @@ class ConformingScalarVEMH1Projector2d():
         投影左端矩阵,数组大小为(smldof,smldof)
         """
         p = space.p
-        mesh = space.mesh
-        NC = mesh.number_of_cells()
-        self.B = self.assembly_cell_right_hand_side(space) 
+        smspace = space.smspace
 
         if p == 1:
             G = np.array([(1, 0, 0), (0, 1, 0), (0, 0, 1)])
         else:
-            g = lambda x: x[0]@x[1]
-            G = list(map(g, zip(self.B, self.D))) #TODO： 并行加速
+            # G = B@D 的第一行是单项式的平均值，其余行是单项式的刚度矩阵，
+            # 它们都可以由缓存的几何矩直接得到
+            G = smspace.cell_stiff_matrix()
+            G[:, 0, :] = smspace.cell_moments(p)/smspace.cellmeasure[:, None]
         return G
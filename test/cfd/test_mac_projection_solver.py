@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from fealpy.mesh import UniformMesh2d, UniformMesh3d
+from fealpy.cfd import MACProjectionSolver
+
+
+def cavity_mesh(GD, n):
+    if GD == 2:
+        return UniformMesh2d([0, n, 0, n], h=(1/n, 1/n))
+    else:
+        return UniformMesh3d([0, n, 0, n, 0, n], h=(1/n, 1/n, 1/n))
+
+
+@pytest.mark.parametrize("GD", [2, 3])
+def test_operators(GD):
+    solver = MACProjectionSolver(cavity_mesh(GD, 6), nu=0.1)
+    u = [np.random.rand(*solver.face_shape(k)) for k in range(GD)]
+    p = np.random.rand(*solver.shape)
+
+    D = solver.divergence_matrix()
+    val = D@np.concatenate([uk.reshape(-1) for uk in u])
+    np.testing.assert_allclose(val, solver.divergence(u).reshape(-1), atol=1e-12)
+
+    for k in range(GD):
+        val = solver.gradient_matrix(k)@p.reshape(-1)
+        np.testing.assert_allclose(val, solver.gradient(p, k).reshape(-1), atol=1e-12)
+
+    b = np.random.rand(*solver.shape)
+    b -= np.mean(b)
+    q = solver.solve_pressure(b)
+    L = solver.laplace_matrix()
+    np.testing.assert_allclose(L@q.reshape(-1), b.reshape(-1), atol=1e-10)
+
+
+def test_lid_driven_cavity():
+    n = 16
+    mesh = cavity_mesh(2, n)
+    result = []
+    for method in ['dct', 'direct']:
+        solver = MACProjectionSolver(mesh, nu=0.05, dt=0.005, pressure_solver=method)
+        solver.set_wall_velocity(1, 1, (1.0, 0.0))
+        u, p = solver.run(100)
+        assert np.max(np.abs(solver.divergence(u))) < 1e-10
+        result.append(u[0])
+    np.testing.assert_allclose(result[0], result[1], atol=1e-10)
+
+    # 中心线上靠近底部的回流
+    assert np.min(result[0][n//2, :]) < 0
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from fealpy.mesh import TriangleMesh
+from fealpy.cfd import NSFEMSolver
+
+eps = 1e-12
+
+def usolution(p):
+    u = np.zeros(p.shape)
+    u[..., 0] = 4*p[..., 1]*(1 - p[..., 1])
+    return u
+
+def psolution(p):
+    return 8*(1 - p[..., 0])
+
+def is_wall_boundary(p):
+    return (np.abs(p[..., 1]) < eps) | (np.abs(p[..., 1] - 1.0) < eps)
+
+def is_p_boundary(p):
+    return (np.abs(p[..., 0]) < eps) | (np.abs(p[..., 0] - 1.0) < eps)
+
+
+def test_convection():
+    mesh = TriangleMesh.from_unit_square(nx=4, ny=4)
+    solver = NSFEMSolver(mesh, dt=0.1)
+    ip = solver.uspace.interpolation_points()
+
+    # u = (x, -y)，u.grad u = (x, y)
+    u = np.stack((ip[:, 0], -ip[:, 1]))
+    b = solver.convection(u)
+    val = (solver.M@ip).T
+    np.testing.assert_allclose(b, val, atol=1e-12)
+
+
+def test_poiseuille():
+    mesh = TriangleMesh.from_unit_square(nx=8, ny=8)
+    solver = NSFEMSolver(mesh, dt=0.01, method='IPCS',
+            udirichlet=usolution, uthreshold=is_wall_boundary,
+            pdirichlet=psolution, pthreshold=is_p_boundary)
+    count = []
+    u, p = solver.run(200, callback=lambda s: count.append(s.t))
+
+    assert len(count) == 200
+    assert abs(solver.t - 2.0) < 1e-12
+    assert solver.usolver.nfactor == 1
+    uI = usolution(solver.uspace.interpolation_points()).T
+    pI = psolution(solver.pspace.interpolation_points())
+    assert np.max(np.abs(u - uI)) < 1e-3
+    assert np.max(np.abs(p - pI)) < 1e-2
+
+
+def test_poiseuille_amg():
+    pytest.importorskip('pyamg')
+    mesh = TriangleMesh.from_unit_square(nx=8, ny=8)
+    solver = NSFEMSolver(mesh, dt=0.01, method='IPCS',
+            udirichlet=usolution, uthreshold=is_wall_boundary,
+            pdirichlet=psolution, pthreshold=is_p_boundary, solver='amg')
+    u, p = solver.run(200)
+
+    # 速度的各个分量一起迭代，每步的 PCG 都收敛
+    assert solver.usolver.info.success
+    uI = usolution(solver.uspace.interpolation_points()).T
+    pI = psolution(solver.pspace.interpolation_points())
+    assert np.max(np.abs(u - uI)) < 1e-3
+    assert np.max(np.abs(p - pI)) < 1e-2
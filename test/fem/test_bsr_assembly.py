@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from fealpy.mesh import TriangleMesh, TetrahedronMesh
+from fealpy.functionspace import LagrangeFESpace
+from fealpy.fem import BilinearForm, LinearForm
+from fealpy.fem import LinearElasticityOperatorIntegrator, VectorSourceIntegrator
+from fealpy.fem import DirichletBC
+from fealpy.solver import CGSolver, JacobiPreconditioner, AMGPreconditioner
+from fealpy.solver.preconditioner import pyamg
+
+
+def source(p):
+    return np.ones(p.shape, dtype=np.float64)
+
+
+def dirichlet(p):
+    return np.zeros(p.shape, dtype=np.float64)
+
+
+def is_dirichlet(p):
+    return np.abs(p[..., 0]) < 1e-12
+
+
+def elasticity(mesh, p, format):
+    GD = mesh.geo_dimension()
+    space = LagrangeFESpace(mesh, p=p, doforder='vdims')
+    vspace = GD*(space, )
+    bform = BilinearForm(vspace, format=format)
+    bform.add_domain_integrator(LinearElasticityOperatorIntegrator(lam=1.0, mu=1.0))
+    A = bform.assembly()
+    lform = LinearForm(vspace)
+    lform.add_domain_integrator(VectorSourceIntegrator(source, q=p+2))
+    F = lform.assembly()
+    bc = DirichletBC(vspace, dirichlet, threshold=is_dirichlet)
+    return (A, ) + bc.apply(A, F)
+
+
+@pytest.mark.parametrize("mesh, p", [
+    (TriangleMesh.from_box(nx=4, ny=4), 2),
+    (TetrahedronMesh.from_box(nx=2, ny=2, nz=2), 1)])
+def test_bsr_assembly(mesh, p):
+    GD = mesh.geo_dimension()
+    K0, A0, F0 = elasticity(mesh, p, 'csr')
+    K1, A1, F1 = elasticity(mesh, p, 'bsr')
+    np.testing.assert_allclose(K1.toarray(), K0.toarray(), atol=1e-12)
+    assert len(K1.indices) < len(K0.indices)//GD
+
+    # 与 CSR 的结果一致，Dirichlet 边界条件处理后仍是 BSR
+    assert A1.format == 'bsr'
+    assert A1.blocksize == (GD, GD)
+    np.testing.assert_allclose(A1.toarray(), A0.toarray(), atol=1e-12)
+    np.testing.assert_allclose(F1, F0)
+
+
+def test_bsr_sdofs():
+    mesh = TriangleMesh.from_box(nx=2, ny=2)
+    space = LagrangeFESpace(mesh, p=1, doforder='sdofs')
+    bform = BilinearForm(2*(space, ), format='bsr')
+    bform.add_domain_integrator(LinearElasticityOperatorIntegrator(lam=1.0, mu=1.0))
+    with pytest.raises(ValueError):
+        bform.assembly()
+
+
+def test_bsr_solver():
+    mesh = TetrahedronMesh.from_box(nx=4, ny=4, nz=4)
+    _, A0, F = elasticity(mesh, 1, 'csr')
+    _, A1, _ = elasticity(mesh, 1, 'bsr')
+
+    # 块 Jacobi 和按块聚集的 AMG 直接使用 BSR 矩阵
+    Ms = [JacobiPreconditioner(A1, block=True)] + \
+            ([AMGPreconditioner(A1)] if pyamg is not None else [])
+    for M in Ms:
+        x, info = CGSolver(A1, M=M, rtol=1e-10, maxiter=500).solve(F)
+        assert info.success
+        np.testing.assert_allclose(A0@x, F, atol=1e-8*np.linalg.norm(F))
+
+
+@pytest.mark.skipif(pyamg is None, reason="needs pyamg")
+def test_bsr_amg():
+    mesh = TetrahedronMesh.from_box(nx=4, ny=4, nz=4)
+    _, A1, _ = elasticity(mesh, 1, 'bsr')
+    # 光滑聚集在 BSR 矩阵上按节点的块聚集，最细层保持 BSR 格式
+    assert AMGPreconditioner(A1).ml.levels[0].A.format == 'bsr'
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from fealpy.mesh import TriangleMesh, TetrahedronMesh
+from fealpy.functionspace import LagrangeFESpace
+from fealpy.fem import LinearElasticityOperatorIntegrator
+
+
+def elasticity_matrix(space, lam, mu, q):
+    """
+    @brief 直接在积分点上计算 vdims 排列的弹性单元矩阵，作为参照
+    """
+    mesh = space.mesh
+    GD = mesh.geo_dimension()
+    ldof = space.number_of_local_dofs()
+    qf = mesh.integrator(q, 'cell')
+    bcs, ws = qf.get_quadrature_points_and_weights()
+    grad = space.grad_basis(bcs)
+    cm = mesh.entity_measure('cell')
+    S = np.einsum('q, qcma, qcnb, c->cmanb', ws, grad, grad, cm)
+    K = lam*S + mu*S.transpose(0, 1, 4, 3, 2)
+    K += mu*np.einsum('cmdnd, ab->cmanb', S, np.eye(GD))
+    return K.reshape(-1, GD*ldof, GD*ldof)
+
+
+@pytest.mark.parametrize("mesh", [
+    TriangleMesh.from_box(nx=3, ny=2),
+    TetrahedronMesh.from_box(nx=2, ny=1, nz=2)])
+@pytest.mark.parametrize("p", [1, 2, 3])
+@pytest.mark.parametrize("doforder", ['vdims', 'sdofs'])
+def test_fast_assembly(mesh, p, doforder):
+    GD = mesh.geo_dimension()
+    space = LagrangeFESpace(mesh, p=p, doforder=doforder)
+    ldof = space.number_of_local_dofs()
+    integrator = LinearElasticityOperatorIntegrator(lam=2.0, mu=0.5)
+
+    K = integrator.assembly_cell_matrix_fast(GD*(space, ))
+    K0 = elasticity_matrix(space, 2.0, 0.5, p+1)
+    if doforder == 'sdofs':
+        NC = K0.shape[0]
+        K0 = K0.reshape(NC, ldof, GD, ldof, GD).transpose(0, 2, 1, 4, 3).reshape(K.shape)
+    np.testing.assert_allclose(K, K0, atol=1e-12*np.max(np.abs(K0)))
+
+    # 常系数的单纯形网格自动使用快速组装，且累加到 out 中
+    out = np.ones_like(K)
+    integrator.assembly_cell_matrix(GD*(space, ), out=out)
+    np.testing.assert_allclose(out, K + 1, atol=1e-12*np.max(np.abs(K0)))
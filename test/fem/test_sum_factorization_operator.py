@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from scipy.sparse import csr_matrix
+
+from fealpy.mesh import QuadrangleMesh, HexahedronMesh
+from fealpy.functionspace import LagrangeFESpace
+from fealpy.fem import SumFactorizationOperator
+from fealpy.solver import CGSolver, JacobiPreconditioner
+
+
+def perturbed(mesh):
+    """
+    @brief 扰动内部节点，得到非仿射的单元
+    """
+    node = mesh.entity('node')
+    isBdNode = mesh.ds.boundary_node_flag()
+    rng = np.random.default_rng(0)
+    node[~isBdNode] += 0.02*rng.uniform(-1, 1, size=node[~isBdNode].shape)
+    return mesh
+
+
+def assembled_matrix(space, diffusion, mass, q):
+    """
+    @brief 在积分点上直接计算稠密的单元矩阵并组装，作为参照
+    """
+    mesh = space.mesh
+    qf = mesh.integrator(q, 'cell')
+    bcs, ws = qf.get_quadrature_points_and_weights()
+    gphi = mesh.grad_shape_function(bcs, p=space.p, variables='x') # (NQ, NC, ldof, GD)
+    phi = mesh.shape_function(bcs, p=space.p) # (NQ, ldof)
+    J = mesh.jacobi_matrix(bcs)
+    d = np.abs(np.linalg.det(J))
+    K = diffusion*np.einsum('q, qc, qcid, qcjd->cij', ws, d, gphi, gphi)
+    K += mass*np.einsum('q, qc, qi, qj->cij', ws, d, phi, phi)
+    cell2dof = space.cell_to_dof()
+    I = np.broadcast_to(cell2dof[:, :, None], K.shape)
+    J = np.broadcast_to(cell2dof[:, None, :], K.shape)
+    gdof = space.number_of_global_dofs()
+    return csr_matrix((K.flat, (I.flat, J.flat)), shape=(gdof, gdof))
+
+
+@pytest.mark.parametrize("mesh", [
+    perturbed(QuadrangleMesh.from_box(nx=3, ny=4)),
+    perturbed(HexahedronMesh.from_box(nx=2, ny=2, nz=3))])
+@pytest.mark.parametrize("p", [1, 2, 4])
+@pytest.mark.parametrize("coef", [(1.0, 0.0), (0.0, 1.0), (2.0, 3.0)])
+def test_operator(mesh, p, coef):
+    space = LagrangeFESpace(mesh, p=p)
+    A = SumFactorizationOperator(space, diffusion=coef[0], mass=coef[1])
+    A0 = assembled_matrix(space, coef[0], coef[1], p+1)
+    x = np.random.rand(A.shape[0], 2)
+    np.testing.assert_allclose(A@x, A0@x, rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(A.diagonal(), A0.diagonal(), rtol=1e-10, atol=1e-12)
+
+
+def test_poisson():
+    mesh = HexahedronMesh.from_box(nx=3, ny=3, nz=3)
+    space = LagrangeFESpace(mesh, p=4)
+
+    def solution(p):
+        x, y, z = p[..., 0], p[..., 1], p[..., 2]
+        return np.exp(x)*np.sin(y)*np.cos(z)
+
+    A = SumFactorizationOperator(space, diffusion=1.0, mass=1.0)
+    M = SumFactorizationOperator(space, diffusion=0.0, mass=1.0)
+    u = space.interpolate(solution)
+    # -Δu + u = 2u 时 u 为精确解，右端取 M(2u) 的离散近似
+    F = M@(2*u)
+    uh = space.function()
+    uh[:] = u
+    F = A.apply_dirichlet(F, uh)
+    x, info = CGSolver(A, M=JacobiPreconditioner(A), rtol=1e-12, maxiter=1000).solve(F)
+    assert info.success
+    assert np.max(np.abs(x - u)) < 1e-5
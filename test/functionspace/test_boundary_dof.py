@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from fealpy.mesh import (IntervalMesh, TriangleMesh, TetrahedronMesh,
+        QuadrangleMesh, HexahedronMesh)
+from fealpy.functionspace import LagrangeFESpace
+from fealpy.functionspace.fem_dofs import LinearMeshCFEDof
+
+
+def is_left(p):
+    return np.abs(p[..., 0]) < 1e-12
+
+
+def reference(space, threshold):
+    """
+    @brief 用原来的方法（全部插值点再过滤）得到的边界自由度和插值点
+    """
+    isBdDof = LinearMeshCFEDof.is_boundary_dof(space.dof, threshold=threshold)
+    index = np.nonzero(isBdDof)[0]
+    return index, space.interpolation_points()[index]
+
+
+meshes = [
+    IntervalMesh.from_interval_domain([0, 1], nx=5),
+    TriangleMesh.from_box(nx=3, ny=3),
+    TetrahedronMesh.from_box(nx=2, ny=2, nz=2),
+    QuadrangleMesh.from_box(nx=3, ny=2),
+    HexahedronMesh.from_box(nx=2, ny=2, nz=2)]
+
+
+@pytest.mark.parametrize("mesh", meshes)
+@pytest.mark.parametrize("p", [1, 2, 3])
+@pytest.mark.parametrize("threshold", [None, is_left])
+def test_boundary_dof(mesh, p, threshold):
+    space = LagrangeFESpace(mesh, p=p)
+    index, ipoints = space.boundary_dof(threshold=threshold)
+    index0, ipoints0 = reference(space, threshold)
+    np.testing.assert_array_equal(index, index0)
+    np.testing.assert_allclose(ipoints, ipoints0, atol=1e-14)
+
+    # 以自由度标记给出的 threshold
+    isBdDof = np.zeros(space.number_of_global_dofs(), dtype=np.bool_)
+    isBdDof[index0] = True
+    index1, ipoints1 = space.boundary_dof(threshold=isBdDof)
+    np.testing.assert_array_equal(index1, index0)
+    np.testing.assert_allclose(ipoints1, ipoints0, atol=1e-14)
+
+
+def test_boundary_cache():
+    mesh = TriangleMesh.from_box(nx=4, ny=4)
+    space = LagrangeFESpace(mesh, p=3)
+    ncall = [0]
+
+    def threshold(p):
+        ncall[0] += 1
+        return is_left(p)
+
+    def gD(p, t):
+        return np.sin(p[..., 1]) + t
+
+    uh = space.function()
+    for t in [0.0, 0.5, 1.0]:
+        isDDof = space.boundary_interpolate(lambda p: gD(p, t), uh, threshold=threshold)
+        ips = space.interpolation_points()
+        np.testing.assert_allclose(uh[isDDof], gD(ips[isDDof], t))
+    assert ncall[0] == 1
+
+    # 移动节点后缓存失效
+    mesh.node[:, 0] += 1.0
+    index, ipoints = space.boundary_dof(threshold=threshold)
+    assert ncall[0] == 2
+    assert len(index) == 0
+
+    # 加密后重新计算
+    mesh.node[:, 0] -= 1.0
+    mesh.uniform_refine()
+    space = LagrangeFESpace(mesh, p=3)
+    index, ipoints = space.boundary_dof(threshold=threshold)
+    np.testing.assert_allclose(ipoints[:, 0], 0, atol=1e-14)
+    assert len(index) == 3*8 + 1
+
+
+def test_boundary_reorder():
+    mesh = TriangleMesh.from_box(nx=4, ny=4)
+    space = LagrangeFESpace(mesh, p=2)
+    index0, ipoints0 = space.boundary_dof()
+    space.reorder('rcm')
+    index, ipoints = space.boundary_dof()
+    np.testing.assert_allclose(ipoints, space.interpolation_points()[index])
+    assert len(index) == len(index0)
+
+
+def test_boundary_dof_readonly():
+    mesh = TriangleMesh.from_box(nx=4, ny=4)
+    space = LagrangeFESpace(mesh, p=2)
+    index, ipoints = space.boundary_dof()
+    # 返回的是缓存中的数组，不能原地修改
+    with pytest.raises(ValueError):
+        index[0] = -1
+    with pytest.raises(ValueError):
+        ipoints[:] = 0
+    index1, ipoints1 = space.boundary_dof()
+    np.testing.assert_array_equal(index1, index)
+    np.testing.assert_allclose(ipoints1, space.interpolation_points()[index1])
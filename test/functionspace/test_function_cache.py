@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from fealpy.mesh import TriangleMesh
+from fealpy.functionspace import LagrangeFESpace
+from fealpy.functionspace.function_cache import FunctionValueCache
+
+
+def u(p):
+    return np.sin(p[..., 0])*p[..., 1]
+
+
+@pytest.mark.parametrize("doforder", ['sdofs', 'vdims'])
+def test_value_cache(doforder):
+    mesh = TriangleMesh.from_box(nx=4, ny=4)
+    space = LagrangeFESpace(mesh, p=2, doforder=doforder)
+    uh = space.interpolate(u)
+    qf = mesh.integrator(3)
+    bcs, _ = qf.get_quadrature_points_and_weights()
+
+    v0 = uh(bcs)
+    g0 = uh.grad_value(bcs)
+    hits = space.cache.hits
+    # 重新生成的同一组积分点也能命中缓存
+    np.testing.assert_array_equal(uh(bcs.copy()), v0)
+    np.testing.assert_array_equal(uh.grad_value(bcs), g0)
+    assert space.cache.hits == hits + 2
+
+    # 返回的是副本，修改它不影响缓存
+    v1 = uh(bcs)
+    v1[:] = 0
+    np.testing.assert_array_equal(uh(bcs), v0)
+
+    # 下标赋值和原地运算都会使缓存失效
+    uh[:] += 1
+    np.testing.assert_allclose(uh(bcs), v0 + 1)
+    uh *= 2
+    np.testing.assert_allclose(uh(bcs), 2*v0 + 2)
+    np.testing.assert_allclose(uh.grad_value(bcs), 2*g0)
+
+    # 不经过 Function 方法的写入也会使缓存失效
+    uh.flat[:] = 0
+    np.testing.assert_array_equal(uh(bcs), 0)
+    np.testing.assert_array_equal(uh.grad_value(bcs), 0)
+    np.add.at(uh, np.arange(uh.size), 1)
+    np.testing.assert_allclose(uh(bcs), 1)
+    np.copyto(uh, 0.5)
+    np.testing.assert_allclose(uh(bcs), 0.5)
+    np.multiply(uh, 4, out=uh)
+    np.testing.assert_allclose(uh(bcs), 2)
+    uh[:] = 2*space.interpolate(u) + 2
+
+    # 网格节点移动后梯度重新计算
+    mesh.node *= 2
+    np.testing.assert_allclose(uh.grad_value(bcs), g0)
+
+
+def test_vector_function():
+    mesh = TriangleMesh.from_box(nx=2, ny=2)
+    space = LagrangeFESpace(mesh, p=1, doforder='vdims')
+    uh = space.function(dim=2)
+    uh[:] = np.random.rand(*uh.shape)
+    bcs = np.array([[1/3, 1/3, 1/3]])
+
+    v0 = uh(bcs)
+    # 写入视图也会使整个函数的缓存失效
+    uh.index(0)[:] += 1
+    v1 = uh(bcs)
+    np.testing.assert_allclose(v1[..., 0], v0[..., 0] + 1)
+    np.testing.assert_allclose(v1[..., 1], v0[..., 1])
+
+    # 普通数组不缓存结果
+    n = len(space.cache)
+    space.value(np.asarray(uh), bcs)
+    assert len(space.cache) == n
+
+
+def test_lru():
+    cache = FunctionValueCache(maxmemory=3*80)
+    for i in range(4):
+        cache.put(i, np.zeros(10))
+    assert len(cache) == 3
+    assert cache.get(0) is None
+    cache.get(1)
+    cache.put(4, np.zeros(10))
+    assert 1 in cache
+    assert 2 not in cache
+    assert cache.memsize <= cache.maxmemory
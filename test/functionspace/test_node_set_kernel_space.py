@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from fealpy.mesh import NodeSet
+from fealpy.functionspace import NodeSetKernelSpace
+
+
+def lattice(dx=0.02):
+    node = np.mgrid[0:1:dx, 0:1:dx].reshape(2, -1).T.copy()
+    mesh = NodeSet(node)
+    mesh.add_node_data(['rho', 'mass'], ['float64', 'float64'])
+    mesh.set_node_data('rho', 1000.0)
+    mesh.set_node_data('mass', 1000.0*dx*dx)
+    H = 0.92*np.sqrt(2)*dx
+    return mesh, NodeSetKernelSpace(mesh, H=H)
+
+
+def test_kernel():
+    mesh, space = lattice()
+    H = space.H
+    h = H/50
+    r = np.mgrid[-2*H:2*H:h, -2*H:2*H:h].reshape(2, -1).T
+    assert abs(np.sum(space.kernel(r))*h*h - 1) < 1e-6
+    assert np.all(space.kernel(np.array([[2.01*H, 0.0]])) == 0)
+
+    # 梯度与数值微分一致
+    r = np.random.rand(10, 2)*H
+    e = np.array([1e-6, 0])
+    g = (space.kernel(r + e) - space.kernel(r - e))/2e-6
+    np.testing.assert_allclose(space.grad_kernel(r)[:, 0], g, rtol=1e-5)
+
+
+def test_pair_operators():
+    mesh, space = lattice()
+    node = mesh.node
+    NN = mesh.number_of_nodes()
+    H = space.H
+    m = mesh.node_data('mass')
+
+    # 和稠密的逐点对计算比较
+    rij = node[:, None] - node
+    gk = space.grad_kernel(rij)
+    v = np.random.rand(NN, 2)
+    p = np.random.rand(NN)
+    rho = 1000 + np.random.rand(NN)
+    mu = np.random.rand(NN)
+
+    val = np.einsum('ijk, ijk, j->i', v[:, None] - v, gk, m)
+    np.testing.assert_allclose(space.continuity(v), val, atol=1e-10)
+
+    c = p/rho**2
+    val = -np.einsum('j, ij, ijk->ik', m, c[:, None] + c, gk)
+    np.testing.assert_allclose(space.pressure_force(p, rho), val, atol=1e-14)
+
+    r2 = np.sum(rij**2, axis=-1)
+    coef = m*(mu[:, None] + mu)*np.sum(rij*gk, axis=-1)
+    coef /= rho[:, None]*rho*(r2 + 0.01*H**2)
+    val = np.einsum('ij, ijk->ik', coef, v[:, None] - v)
+    np.testing.assert_allclose(space.viscosity_force(v, rho, mu), val, atol=1e-14)
+
+    val = np.sum(m*space.kernel(rij), axis=-1)
+    np.testing.assert_allclose(space.density(), val, rtol=1e-12)
+
+
+def test_value():
+    mesh, space = lattice()
+    node = mesh.node
+    u = 2*node[:, 0] + node[:, 1]
+    inner = np.all((node > 0.1) & (node < 0.9), axis=-1)
+
+    assert np.max(np.abs(space.value(u) - u)[inner]) < 0.05
+    assert np.max(np.abs(space.grad_value(u) - [2, 1])[inner]) < 0.1
+
+    points = np.random.rand(20, 2)*0.6 + 0.2
+    val = 2*points[:, 0] + points[:, 1]
+    assert np.max(np.abs(space.value(u, points) - val)) < 0.05
+    assert np.max(np.abs(space.grad_value(u, points) - [2, 1])) < 0.1
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from fealpy.decorator import cartesian
+from fealpy.mesh import TriangleMesh, PolygonMesh, TetrahedronMesh
+from fealpy.functionspace import ScaledMonomialSpace2d, ScaledMonomialSpace3d
+
+
+@pytest.mark.parametrize("p", [1, 2, 3])
+def test_smspace_2d_moment_matrices(p):
+    tmesh = TriangleMesh.from_box([0, 1, 0, 1], nx=4, ny=4)
+    mesh = PolygonMesh.from_triangle_mesh_by_dual(tmesh)
+    space = ScaledMonomialSpace2d(mesh, p)
+
+    H = space.matrix_H()
+    assert np.allclose(H, space.matrix_H_in())
+
+    @cartesian
+    def f(x, index):
+        gphi = space.grad_basis(x, index=index)
+        return np.einsum('...im, ...jm->...ij', gphi, gphi)
+    A = space.integralalg.integral(f, celltype=True)
+    assert np.allclose(space.cell_stiff_matrix(), A)
+
+    # 低次的质量矩阵直接由缓存的几何矩得到
+    moments = space.moments
+    assert np.allclose(space.matrix_H(p=p-1), H[:, :p*(p+1)//2, :p*(p+1)//2])
+    assert space.moments is moments
+
+
+def test_smspace_2d_inherit_cell_moments():
+    tmesh = TriangleMesh.from_box([0, 1, 0, 1], nx=4, ny=4)
+    mesh = PolygonMesh.from_triangle_mesh_by_dual(tmesh)
+    space0 = ScaledMonomialSpace2d(mesh, 2)
+    space0.matrix_H()
+
+    node = mesh.entity('node').copy()
+    node[0] += 0.01
+    mesh1 = PolygonMesh(node, mesh.ds._cell, mesh.ds.cellLocation)
+    space1 = ScaledMonomialSpace2d(mesh1, 2)
+    space1.inherit_cell_moments(space0)
+
+    space2 = ScaledMonomialSpace2d(mesh1, 2)
+    assert np.allclose(space1.moments, space2.cell_moments(4))
+
+
+@pytest.mark.parametrize("p", [1, 2, 3])
+def test_smspace_3d_cell_mass_matrix(p):
+    mesh = TetrahedronMesh.from_box([0, 1, 0, 1, 0, 1], nx=2, ny=2, nz=2)
+    space = ScaledMonomialSpace3d(mesh, p)
+
+    @cartesian
+    def f(x, index=np.s_[:]):
+        phi = space.basis(x, index=index)
+        return np.einsum('...i, ...j->...ij', phi, phi)
+    M = space.integralalg.cell_integral(f, q=7)
+    assert np.allclose(space.cell_mass_matrix(), M)
+
+
+def test_smspace_3d_high_order_moments():
+    mesh = TetrahedronMesh.from_box([0, 1, 0, 1, 0, 1], nx=1, ny=1, nz=1)
+    space = ScaledMonomialSpace3d(mesh, 1)
+    # 9 次的矩用 9 阶的积分公式是精确的，更高次没有精确的公式
+    @cartesian
+    def f(x, index=np.s_[:]):
+        return space.basis(x, p=9, index=index)
+    M = space.integralalg.cell_integral(f, q=7)
+    assert np.allclose(space.cell_moments(9), M)
+    with pytest.raises(ValueError):
+        space.cell_moments(10)
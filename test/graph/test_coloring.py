@@ -0,0 +1,151 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from fealpy.mesh import TriangleMesh, TetrahedronMesh
+from fealpy.graph.coloring import (adjacency_graph, jones_plassmann_coloring,
+        greedy_coloring, incidence_coloring, color_classes, is_valid_coloring,
+        cell_coloring, node_coloring, matrix_coloring, colored_scatter_add)
+
+
+def _random_graph(n=300, m=1500, seed=1):
+    rng = np.random.default_rng(seed)
+    i = rng.integers(0, n, m)
+    j = rng.integers(0, n, m)
+    return sp.coo_matrix((np.ones(m), (i, j)), shape=(n, n)).tocsr()
+
+
+@pytest.mark.parametrize("order", ['largest_first', 'natural', 'permutation'])
+def test_greedy(order):
+    G = _random_graph()
+    if order == 'permutation':
+        order = np.random.default_rng(2).permutation(G.shape[0])
+    colors = greedy_coloring(G, order=order)
+    assert is_valid_coloring(G, colors)
+    # 贪婪着色的颜色数不超过最大度 + 1
+    deg = np.diff(adjacency_graph(G).indptr)
+    assert colors.max() + 1 <= deg.max() + 1
+
+
+def test_jones_plassmann():
+    G = _random_graph()
+    colors = jones_plassmann_coloring(G)
+    assert is_valid_coloring(G, colors)
+    assert np.all(colors >= 0)
+
+
+def test_many_colors():
+    # 完全图需要 n 种颜色，超过一个 64 位掩码
+    n = 100
+    G = sp.csr_matrix(np.ones((n, n)))
+    for colors in [greedy_coloring(G), jones_plassmann_coloring(G)]:
+        assert is_valid_coloring(G, colors)
+        assert colors.max() + 1 == n
+
+
+def test_incidence_coloring():
+    mesh = TetrahedronMesh.from_unit_cube(nx=4, ny=4, nz=4)
+    cell = mesh.entity('cell')
+    NC, NVC = cell.shape
+    B = sp.csr_matrix((np.ones(NC*NVC), cell.reshape(-1), np.arange(0, NC*NVC+1, NVC)))
+    colors = incidence_coloring(B)
+    assert is_valid_coloring(B@B.T, colors)
+
+
+@pytest.mark.parametrize("method", ['greedy', 'jp'])
+@pytest.mark.parametrize("relation", ['node', 'face'])
+def test_cell_coloring(method, relation):
+    mesh = TriangleMesh.from_unit_square(nx=10, ny=10)
+    classes = cell_coloring(mesh, relation=relation, method=method)
+    NC = mesh.number_of_cells()
+    assert np.array_equal(np.sort(np.concatenate(classes)), np.arange(NC))
+    if relation == 'node':
+        # 同一种颜色的单元没有公共的顶点
+        cell = mesh.entity('cell')
+        for I in classes:
+            assert len(np.unique(cell[I])) == cell[I].size
+    else:
+        face2cell = mesh.ds.face_to_cell()
+        colors = np.zeros(NC, dtype=np.int_)
+        for c, I in enumerate(classes):
+            colors[I] = c
+        isIn = face2cell[:, 0] != face2cell[:, 1]
+        assert np.all(colors[face2cell[isIn, 0]] != colors[face2cell[isIn, 1]])
+
+
+def test_node_coloring():
+    mesh = TetrahedronMesh.from_unit_cube(nx=3, ny=3, nz=3)
+    classes = node_coloring(mesh, relation='cell')
+    NN = mesh.number_of_nodes()
+    colors = np.zeros(NN, dtype=np.int_)
+    for c, I in enumerate(classes):
+        colors[I] = c
+    # 同一个单元的顶点颜色互不相同
+    cell = mesh.entity('cell')
+    assert np.all(np.diff(np.sort(colors[cell], axis=1), axis=1) > 0)
+
+
+@pytest.mark.parametrize("workers", [None, 3])
+def test_colored_scatter_add(workers):
+    mesh = TriangleMesh.from_unit_square(nx=12, ny=12)
+    cell = mesh.entity('cell')
+    NN = mesh.number_of_nodes()
+    val = np.random.default_rng(0).random(cell.shape + (2, ))
+    a = np.zeros((NN, 2))
+    np.add.at(a, cell, val)
+    b = colored_scatter_add(np.zeros((NN, 2)), cell, val, cell_coloring(mesh),
+            workers=workers)
+    np.testing.assert_allclose(a, b, atol=1e-14)
+
+
+def _poisson(n=32):
+    # 五点差分的 Laplace 矩阵
+    T = sp.diags([-np.ones(n-1), 2*np.ones(n), -np.ones(n-1)], [-1, 0, 1])
+    I = sp.eye(n)
+    return (sp.kron(T, I) + sp.kron(I, T)).tocsr()
+
+
+def test_multicolor_gauss_seidel():
+    from fealpy.solver.smoother import MulticolorGaussSeidelSmoother
+    A = _poisson()
+    classes = matrix_coloring(A)
+    colors = np.zeros(A.shape[0], dtype=np.int_)
+    for c, I in enumerate(classes):
+        colors[I] = c
+    assert is_valid_coloring(A, colors)
+    s = MulticolorGaussSeidelSmoother(A, classes=classes)
+    b = np.ones(A.shape[0])
+    x = np.zeros(A.shape[0])
+    # Gauss-Seidel 使能量 x^T A x/2 - b^T x 单调下降
+    energy = lambda x: x@(A@x)/2 - b@x
+    e0 = energy(x)
+    s.smooth(b, x, maxit=5)
+    e1 = energy(x)
+    s.smooth(b, x, lower=False, maxit=5)
+    e2 = energy(x)
+    assert e1 < e0 and e2 < e1
+
+
+def test_gamg_multicolor():
+    from fealpy.solver import GAMGSolver
+    A = _poisson()
+    b = np.ones(A.shape[0])
+    s = GAMGSolver(ptype='V', sstep=2, stype='MCGS')
+    s.setup(A)
+    x = np.zeros(A.shape[0])
+    for i in range(30):
+        x += s.vcycle(b - A@x)
+    assert np.linalg.norm(b - A@x) < 1e-6*np.linalg.norm(b)
+
+
+def test_gamg_postsmooth_return():
+    from fealpy.solver import GAMGSolver
+    A = _poisson()
+    b = np.ones(A.shape[0])
+    s = GAMGSolver(ptype='V', sstep=2, stype='MCGS')
+    s.setup(A)
+    r = b - A@np.ones(A.shape[0])
+    e0 = s.vcycle(r)
+    # 后磨光返回新数组而不原地修改 e，V 循环也要用到磨光的结果
+    s.postsmooth = lambda r, e, level: GAMGSolver.postsmooth(s, r, e.copy(), level)
+    np.testing.assert_allclose(s.vcycle(r), e0, rtol=1e-12)
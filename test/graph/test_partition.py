@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from fealpy.mesh import TriangleMesh, TetrahedronMesh
+from fealpy.graph.partition import (cell_adjacency, edge_cut, part_mesh,
+        recursive_bisection, MeshPartition)
+
+
+@pytest.mark.parametrize("method", ['rcb', 'inertial', 'hilbert'])
+@pytest.mark.parametrize("nparts", [2, 5, 8])
+def test_balance(method, nparts):
+    mesh = TriangleMesh.from_unit_square(nx=20, ny=20)
+    NC = mesh.number_of_cells()
+    parts = part_mesh(mesh, nparts, method=method)
+    count = np.bincount(parts, minlength=nparts)
+    assert len(count) == nparts
+    assert count.max() - count.min() <= 2
+
+
+def test_weights():
+    mesh = TriangleMesh.from_unit_square(nx=16, ny=16)
+    NC = mesh.number_of_cells()
+    w = np.ones(NC)
+    w[mesh.entity_barycenter('cell')[:, 0] < 0.5] = 3
+    for method in ['rcb', 'hilbert']:
+        parts = part_mesh(mesh, 4, method=method, weights=w)
+        load = np.bincount(parts, weights=w, minlength=4)
+        assert load.max() < 1.1*w.sum()/4
+
+
+def test_spectral_refine():
+    mesh = TriangleMesh.from_unit_square(nx=24, ny=24)
+    # 斜着拉伸的区域，坐标二分的切口不是最短的
+    node = mesh.entity('node')
+    node[:, 1] += 0.7*node[:, 0]
+    G = cell_adjacency(mesh)
+    p0 = part_mesh(mesh, 4, method='rcb')
+    p1 = part_mesh(mesh, 4, method='rcb', refine='spectral')
+    assert edge_cut(G, p1) <= edge_cut(G, p0)
+    count = np.bincount(p1, minlength=4)
+    assert count.max() - count.min() <= 2
+
+
+def test_mesh_partition():
+    mesh = TetrahedronMesh.from_box(nx=4, ny=4, nz=4)
+    cell = mesh.entity('cell')
+    parts = part_mesh(mesh, 4, method='inertial')
+    mp = MeshPartition(mesh, parts)
+    for r in range(4):
+        data = mp.subdomain(r)
+        NCO = data['NCO']
+        cells = data['cell_global']
+        assert np.all(parts[cells[:NCO]] == r)
+        assert np.all(parts[cells[NCO:]] != r)
+        # 局部单元与整体单元一致
+        np.testing.assert_array_equal(data['node_global'][data['cell']], cell[cells])
+        # 所有与所有的单元有公共顶点的单元都在局部网格中
+        isNode = np.zeros(mesh.number_of_nodes(), dtype=np.bool_)
+        isNode[cell[cells[:NCO]]] = True
+        assert np.sum(np.any(isNode[cell], axis=1)) == len(cells)
+        # ghost 节点都不属于 r
+        owner = mp.node_owner[data['node_global']]
+        np.testing.assert_array_equal(np.nonzero(owner != r)[0], data['ghost_node'])
+
+        for s, nodes in mp.interface(r).items():
+            np.testing.assert_array_equal(nodes, mp.interface(s)[r])
+            assert np.all(np.isin(nodes, cell[parts == r]))
+            assert np.all(np.isin(nodes, cell[parts == s]))
+
+
+def test_metis_zero_copy():
+    code = """
+import numpy as np
+from fealpy.graph import metis
+xadj = np.array([0, 1, 2], dtype=metis.idx_dtype)
+adjncy = np.array([1, 0], dtype=metis.idx_dtype)
+g = metis.array_to_metis(adjncy, xadj)
+# 类型一致时直接传入数组的缓冲区，不复制
+import ctypes
+assert ctypes.cast(g.adjncy, ctypes.c_void_p).value == adjncy.ctypes.data
+assert ctypes.cast(g.xadj, ctypes.c_void_p).value == xadj.ctypes.data
+print(int(np.ctypeslib.as_array(g.adjncy, shape=(2, ))[0]))
+"""
+    env = dict(os.environ, METIS_DLL='SKIP')
+    out = subprocess.run([sys.executable, '-c', code], env=env,
+            capture_output=True, text=True)
+    if out.returncode != 0:
+        pytest.skip(out.stderr.strip().splitlines()[-1])
+    assert out.stdout.strip() == '1'
@@ -0,0 +1,72 @@
+import pytest
+import numpy as np
+
+from fealpy.mesh import UniformMesh2d, UniformMesh3d
+from fealpy.mesh import TriangleMesh, TetrahedronMesh
+from fealpy.functionspace import LagrangeFESpace
+from fealpy.levelset import LSFEMSolver
+from fealpy.levelset import UniformMeshEikonalSolver, SimplexMeshEikonalSolver
+
+
+def test_uniform_mesh_2d_fast_sweeping():
+    nx, ny = 80, 40
+    mesh = UniformMesh2d([0, nx, 0, ny], h=(1/nx, 0.5/ny), origin=(0, 0))
+    node = mesh.entity('node')
+    exact = np.sqrt((node[:, 0] - 0.5)**2 + (node[:, 1] - 0.25)**2) - 0.15
+    phi0 = exact*(1 + node[:, 0]**2)
+
+    phi = mesh.fast_sweeping_method(phi0)
+    assert phi.shape == phi0.shape
+    assert np.all(np.sign(phi) == np.sign(phi0))
+    assert np.max(np.abs(phi - exact)) < 2*mesh.h[0]
+
+    # 网格函数形式的输入
+    phi = mesh.fast_sweeping_method(phi0.reshape(nx+1, ny+1))
+    assert phi.shape == (nx+1, ny+1)
+
+
+def test_uniform_mesh_3d_fast_sweeping():
+    n = 20
+    mesh = UniformMesh3d([0, n, 0, n, 0, n], h=(1/n, 1/n, 1/n))
+    node = mesh.entity('node')
+    exact = np.sqrt(np.sum((node - 0.5)**2, axis=-1)) - 0.3
+
+    solver = UniformMeshEikonalSolver(mesh)
+    phi = solver.solve(2*exact, band=0.2)
+    assert np.max(np.abs(phi - np.clip(exact, -0.2, 0.2))) < 2/n
+
+
+@pytest.mark.parametrize("band", [None, 0.1])
+def test_triangle_mesh_fast_marching(band):
+    mesh = TriangleMesh.from_box([0, 1, 0, 1], nx=40, ny=40)
+    node = mesh.entity('node')
+    exact = np.sqrt(np.sum((node - 0.5)**2, axis=-1)) - 0.2
+
+    solver = SimplexMeshEikonalSolver(mesh)
+    phi = solver.solve(exact*(1 + node[:, 0]), band=band)
+    if band is not None:
+        exact = np.clip(exact, -band, band)
+    assert np.max(np.abs(phi - exact)) < 1/40
+
+
+def test_tetrahedron_mesh_fast_marching():
+    mesh = TetrahedronMesh.from_box([0, 1, 0, 1, 0, 1], nx=8, ny=8, nz=8)
+    node = mesh.entity('node')
+    exact = np.sqrt(np.sum((node - 0.5)**2, axis=-1)) - 0.3
+
+    solver = SimplexMeshEikonalSolver(mesh)
+    phi = solver.solve(3*exact)
+    assert np.max(np.abs(phi - exact)) < 2/8
+
+
+def test_ls_fem_solver_redistance():
+    mesh = TriangleMesh.from_box([0, 1, 0, 1], nx=40, ny=40)
+    space = LagrangeFESpace(mesh, p=1)
+    node = mesh.entity('node')
+    phi0 = space.function()
+    phi0[:] = (node[:, 0] - 0.5)**2 + (node[:, 1] - 0.5)**2 - 0.04
+
+    solver = LSFEMSolver(space)
+    phi1 = solver.redistance(phi0)
+    exact = np.sqrt(np.sum((node - 0.5)**2, axis=-1)) - 0.2
+    assert np.max(np.abs(phi1 - exact)) < 1/40
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from fealpy.geometry.domain_2d import CircleDomain, RectangleDomain
+from fealpy.mesh.distmesher_2d import DistMesher2d
+
+
+def test_move_force_accumulation():
+    np.random.seed(0)
+    mesher = DistMesher2d(RectangleDomain(), 0.2, output=False)
+    node = mesher.init_nodes()
+    edge = mesher.construct_edge(node)
+
+    v = node[edge[:, 0]] - node[edge[:, 1]]
+    L = np.sqrt(np.sum(v**2, axis=1))
+    he = mesher.sizing_function((node[edge[:, 0]] + node[edge[:, 1]])/2)
+    L0 = np.sqrt(np.sum(L**2)/np.sum(he**2))*mesher.fscale*he
+    FV = (np.maximum(L0 - L, 0)/L)[:, None]*v
+    dnode = np.zeros_like(node)
+    np.add.at(dnode, edge[:, 0], FV)
+    np.subtract.at(dnode, edge[:, 1], FV)
+    dnode[:4] = 0.0
+
+    p = node.copy()
+    mesher.move(p, edge)
+    np.testing.assert_allclose(p, node + mesher.dt*dnode, atol=1e-14)
+
+
+def test_grad_signed_dist_function():
+    domain = RectangleDomain()
+    mesher = DistMesher2d(domain, 0.1, output=False)
+    p = np.array([[0.5, -0.2], [1.3, 0.5], [0.5, 1.1]])
+    g = mesher.grad_signed_dist_function(p)
+    np.testing.assert_allclose(g, [[0, -1], [1, 0], [0, 1]], atol=1e-6)
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_meshing(workers):
+    np.random.seed(0)
+    info = []
+    mesher = DistMesher2d(CircleDomain(), 0.1, output=False,
+            workers=workers, chunksize=200, callback=info.append)
+    mesh = mesher.meshing()
+
+    assert len(info) == mesher.NT
+    assert info[-1]['NT'] == mesher.NT
+    # 只有第一次是全局的三角化，之后都在局部修复
+    assert info[-1]['NG'] < info[-1]['NL']
+    assert info[-1]['NG'] + info[-1]['NL'] == mesher.NT
+    area = mesh.entity_measure('cell')
+    assert np.all(area > 0)
+    assert abs(np.sum(area) - np.pi) < 0.05
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from scipy.spatial import Delaunay
+
+from fealpy.mesh.incremental_delaunay import IncrementalDelaunay
+
+
+def _cells(cell):
+    return set(map(tuple, np.sort(cell, axis=1)))
+
+
+def _check_neighbor(cell, neighbor):
+    NC, NV = cell.shape
+    i, j = np.nonzero(neighbor >= 0)
+    n = neighbor[i, j]
+    # 相邻关系是对称的，对面的对顶点不在公共面上
+    k = np.argmax(neighbor[n] == i[:, None], axis=1)
+    assert np.all(neighbor[n, k] == i)
+    assert np.all(np.sum(cell[i][:, :, None] == cell[n][:, None, :], axis=(1, 2)) == NV - 1)
+    assert not np.any(cell[n, k][:, None] == cell[i])
+
+
+@pytest.mark.parametrize("GD, N", [(2, 3000), (3, 2000)])
+def test_update(GD, N):
+    rng = np.random.default_rng(0)
+    node = rng.random((N, GD))
+    tri = IncrementalDelaunay(node)
+    for i in range(3):
+        # 只移动内部的点，凸包不变
+        isIn = np.all((node > 0.05) & (node < 0.95), axis=1)
+        isMoved = isIn & (rng.random(N) < 0.05)
+        node[isMoved] += 0.01*rng.standard_normal((np.sum(isMoved), GD))
+        assert tri.update(node, isMoved)
+        assert _cells(tri.cell) == _cells(Delaunay(node).simplices)
+        _check_neighbor(tri.cell, tri.neighbor)
+    assert tri.NG == 1
+    assert tri.NL == 3
+
+
+@pytest.mark.parametrize("GD", [2, 3])
+def test_box(GD):
+    rng = np.random.default_rng(1)
+    node = rng.random((1000, GD))
+    tri = IncrementalDelaunay(node, box=True)
+    isMoved = rng.random(1000) < 0.1
+    node[isMoved] += 0.005*rng.standard_normal((np.sum(isMoved), GD))
+    tri.update(node, isMoved)
+    cell = tri.simplex()
+    assert np.all(cell < 1000)
+    # 不含辅助点的单纯形是 Delaunay 三角化的一部分，并且都是正定向的
+    assert _cells(cell) <= _cells(Delaunay(node).simplices)
+    x = node[cell]
+    assert np.all(np.linalg.det(x[:, 1:] - x[:, :1]) > 0)
+    _check_neighbor(tri.cell, tri.neighbor)
+
+
+def test_no_change():
+    rng = np.random.default_rng(2)
+    node = rng.random((500, 2))
+    tri = IncrementalDelaunay(node)
+    cell = tri.cell.copy()
+    isMoved = np.zeros(500, dtype=np.bool_)
+    isMoved[:5] = True
+    node[:5] += 1e-9
+    assert not tri.update(node, isMoved)
+    assert np.array_equal(cell, tri.cell)
@@ -0,0 +1,119 @@
+import functools
+
+import numpy as np
+import pytest
+
+from fealpy.mesh import TriangleMesh, TetrahedronMesh, MeshCache
+from fealpy.geometry.domain_2d import CircleDomain
+
+
+def test_key():
+    k0 = MeshCache.key(TriangleMesh.from_box, [0, 1, 0, 1], nx=2, ny=2)
+    k1 = MeshCache.key(TriangleMesh.from_box, [0, 1, 0, 1], nx=2, ny=2)
+    k2 = MeshCache.key(TriangleMesh.from_box, [0, 1, 0, 1], nx=2, ny=3)
+    k3 = MeshCache.key(TriangleMesh.from_box, [0, 1, 0, 1], nx=2, ny=2, refine=1)
+    assert k0 == k1
+    assert len({k0, k2, k3}) == 3
+
+    # 区域按内容计算哈希
+    assert MeshCache.key('distmesh', CircleDomain(radius=1.0)) == \
+            MeshCache.key('distmesh', CircleDomain(radius=1.0))
+    assert MeshCache.key('distmesh', CircleDomain(radius=1.0)) != \
+            MeshCache.key('distmesh', CircleDomain(radius=2.0))
+
+
+def test_function_key():
+    # 闭包变量、默认参数、用到的全局变量和函数都参与计算
+    make = lambda h: (lambda p: h)
+    assert MeshCache.key('dm', make(0.1)) == MeshCache.key('dm', make(0.1))
+    assert MeshCache.key('dm', make(0.1)) != MeshCache.key('dm', make(0.5))
+    assert MeshCache.key('dm', lambda p, h=0.1: h) != MeshCache.key('dm', lambda p, h=0.5: h)
+    assert MeshCache.key('dm', lambda p: np.sin(p)) != MeshCache.key('dm', lambda p: np.cos(p))
+    assert MeshCache.key('dm', functools.partial(make, 0.1)) != \
+            MeshCache.key('dm', functools.partial(make, 0.5))
+
+    g0 = {'np': np, 'H': 0.1}
+    g1 = {'np': np, 'H': 0.5}
+    src = "def fh(p):\n    return H*np.ones(len(p))\n"
+    exec(src, g0)
+    exec(src, g1)
+    assert MeshCache.key('dm', g0['fh']) != MeshCache.key('dm', g1['fh'])
+
+    # 无法按内容计算键的对象
+    with pytest.raises(TypeError):
+        MeshCache.key('dm', object())
+
+
+def test_distmesher_key():
+    from fealpy.mesh import DistMesher2d
+    np.random.seed(0)
+    mesher = DistMesher2d(CircleDomain(), 0.2, output=False, callback=lambda info: None)
+    k0 = MeshCache.key(mesher.meshing)
+    mesher.meshing()
+    # 运行状态不影响键，输入参数影响键
+    assert MeshCache.key(mesher.meshing) == k0
+    assert MeshCache.key(DistMesher2d(CircleDomain(), 0.2, workers=2).meshing) == k0
+    assert MeshCache.key(DistMesher2d(CircleDomain(), 0.1).meshing) != k0
+
+
+def test_get_or_create(tmp_path):
+    calls = []
+    def generator(nx):
+        calls.append(nx)
+        return TetrahedronMesh.from_unit_cube(nx=nx, ny=nx, nz=nx)
+
+    # generator 的闭包变量 calls 会改变，所以显式地给出键
+    cache = MeshCache(path=str(tmp_path), memory=False)
+    mesh = cache.get_or_create(generator, 2, refine=1, key='cube')
+    assert calls == [2]
+
+    mesh0 = TetrahedronMesh.from_unit_cube(nx=2, ny=2, nz=2)
+    mesh0.uniform_refine()
+    assert mesh.number_of_cells() == mesh0.number_of_cells()
+
+    # 热启动时从磁盘内存映射读入，不调用生成函数
+    cache = MeshCache(path=str(tmp_path), memory=False)
+    mesh1 = cache.get_or_create(generator, 2, refine=1, key='cube')
+    assert calls == [2]
+    np.testing.assert_array_equal(mesh1.entity('node'), mesh.entity('node'))
+    np.testing.assert_array_equal(mesh1.entity('cell'), mesh.entity('cell'))
+    np.testing.assert_array_equal(mesh1.ds.face2cell, mesh.ds.face2cell)
+    base = mesh1.entity('node')
+    while not isinstance(base, np.memmap):
+        base = base.base
+        assert base is not None
+
+    # 从已缓存的最细一层继续加密
+    mesh2 = cache.get_or_create(generator, 2, refine=2, key='cube')
+    assert calls == [2]
+    assert mesh2.number_of_cells() == 8*mesh.number_of_cells()
+
+    # 修改读出的网格不影响缓存
+    mesh1.node[:] = 0.0
+    mesh3 = cache.get(cache.key('cube', 2, refine=1))
+    np.testing.assert_array_equal(mesh3.entity('node'), mesh.entity('node'))
+
+
+def test_memory_cache():
+    cache = MeshCache(path=False)
+    key = cache.key('box', 4)
+    cache.put(key, TriangleMesh.from_box(nx=4, ny=4))
+    assert key in cache
+
+    mesh = cache.get(key)
+    mesh.node[:] = 0.0
+    assert np.max(cache.get(key).entity('node')) == 1.0
+
+
+def test_evict(tmp_path):
+    cache = MeshCache(path=str(tmp_path), memory=False)
+    for n in range(1, 4):
+        cache.get_or_create(TriangleMesh.from_box, nx=n, ny=n)
+    assert cache.size() > 0
+
+    cache.evict(maxsize=cache.size() - 1)
+    assert cache.key(TriangleMesh.from_box, nx=1, ny=1) not in cache
+    assert cache.key(TriangleMesh.from_box, nx=3, ny=3) in cache
+
+    cache.clear()
+    assert cache.size() == 0
@@ -0,0 +1,147 @@
+import numpy as np
+import pytest
+
+from fealpy.mesh import TriangleMesh, TetrahedronMesh
+from fealpy.mesh.quality import mean_ratio_energy, radius_ratio_energy
+from fealpy.mesh.mesh_optimizer import MeshOptimizer
+
+
+def perturbed(mesh, s, seed=0):
+    """
+    @brief 随机扰动内部节点
+    """
+    rng = np.random.default_rng(seed)
+    node = mesh.entity('node')
+    isBdNode = mesh.ds.boundary_node_flag()
+    node[~isBdNode] += s*rng.uniform(-1, 1, node[~isBdNode].shape)
+    return mesh
+
+
+@pytest.mark.parametrize("energy", [mean_ratio_energy, radius_ratio_energy])
+@pytest.mark.parametrize("mesh", [TriangleMesh.from_unit_square(nx=3, ny=3),
+    TetrahedronMesh.from_box(nx=2, ny=2, nz=2)])
+def test_energy_grad(energy, mesh):
+    node = perturbed(mesh, 0.05).entity('node')
+    cell = mesh.entity('cell')
+    NC, NVC = cell.shape
+    # 每个单元用自己的一份顶点，移动一个顶点只影响一个单元
+    node = node[cell].reshape(NC*NVC, -1)
+    cell = np.arange(NC*NVC).reshape(NC, NVC)
+    e, g = energy(node, cell, return_grad=True)
+    assert np.all(e >= 1)
+
+    h = 1e-6
+    fd = np.zeros_like(g)
+    for i in range(NVC):
+        for k in range(g.shape[-1]):
+            node0 = node.copy()
+            node1 = node.copy()
+            node0[cell[:, i], k] -= h
+            node1[cell[:, i], k] += h
+            fd[:, i, k] = (energy(node1, cell) - energy(node0, cell))/(2*h)
+    np.testing.assert_allclose(fd, g, rtol=1e-5, atol=1e-6)
+
+
+def test_regular_simplex():
+    node = np.array([[0, 0], [1, 0], [0.5, np.sqrt(3)/2]])
+    cell = np.array([[0, 1, 2]])
+    assert np.allclose(mean_ratio_energy(node, cell), 1)
+    assert np.allclose(radius_ratio_energy(node, cell), 1)
+    # 反向的单元能量为 inf
+    assert np.isinf(mean_ratio_energy(node, cell[:, [1, 0, 2]]))
+
+
+@pytest.mark.parametrize("method", ['mean_ratio', 'radius_ratio', 'odt', 'cpt'])
+@pytest.mark.parametrize("update", ['jacobi', 'gauss-seidel'])
+def test_optimizer_2d(method, update):
+    mesh = perturbed(TriangleMesh.from_unit_square(nx=20, ny=20), 0.0125)
+    node = mesh.entity('node')
+    isBdNode = mesh.ds.boundary_node_flag()
+    bnode = node[isBdNode].copy()
+    opt = MeshOptimizer(mesh, method=method, update=update)
+    q0 = opt.cell_quality()
+    history = opt.run(maxit=5)
+    q = opt.cell_quality()
+    assert q.min() >= q0.min()
+    assert q.mean() > q0.mean()
+    assert np.all(node[isBdNode] == bnode)
+    assert len(history) <= 5
+    assert history[-1]['mean_quality'] == pytest.approx(q.mean())
+
+
+def test_groups():
+    mesh = TetrahedronMesh.from_box(nx=3, ny=3, nz=3)
+    opt = MeshOptimizer(mesh, update='gauss-seidel')
+    cell = mesh.entity('cell')
+    nodes = np.concatenate([g[0] for g in opt.groups])
+    np.testing.assert_array_equal(np.sort(nodes), np.nonzero(opt.isMoving)[0])
+    for g in opt.groups:
+        # 同一组的节点不在同一个单元中
+        flag = np.zeros(mesh.number_of_nodes(), dtype=np.int_)
+        flag[g[0]] = 1
+        assert np.all(np.sum(flag[cell], axis=1) <= 1)
+
+
+def test_optimizer_3d_odt():
+    mesh = perturbed(TetrahedronMesh.from_box(nx=6, ny=6, nz=6), 0.04)
+    opt = MeshOptimizer(mesh, method='odt')
+    q0 = opt.cell_quality()
+    history = mesh.odt_iterate(maxit=3)
+    q = opt.cell_quality()
+    assert q.min() >= q0.min()
+    assert q.mean() > q0.mean()
+
+
+def test_boundary_projection():
+    mesh = TriangleMesh.from_unit_square(nx=16, ny=16)
+    node = mesh.entity('node')
+    isBdNode = mesh.ds.boundary_node_flag()
+    rng = np.random.default_rng(1)
+    # 把边界节点沿边界随机移动
+    isX = isBdNode & ((node[:, 1] == 0) | (node[:, 1] == 1)) & (node[:, 0] > 0) & (node[:, 0] < 1)
+    node[isX, 0] += 0.02*rng.uniform(-1, 1, isX.sum())
+
+    def fd(p):
+        x = p[:, 0]
+        y = p[:, 1]
+        return -np.min(np.stack([x, 1 - x, y, 1 - y], axis=1), axis=1)
+
+    corner = np.nonzero(np.all(np.abs(node - np.round(node)) < 1e-12, axis=1))[0]
+    opt = MeshOptimizer(mesh, method='mean_ratio', fd=fd, fixed=corner)
+    q0 = opt.cell_quality()
+    opt.run(maxit=5)
+    assert opt.cell_quality().mean() > q0.mean()
+    np.testing.assert_allclose(fd(node[isBdNode]), 0, atol=1e-8)
+    assert np.max(np.abs(node[isX, 1] - np.round(node[isX, 1]))) < 1e-8
+
+
+def test_triangle_odt_iterate():
+    mesh = perturbed(TriangleMesh.from_unit_square(nx=10, ny=10), 0.03)
+    q0 = mesh.cell_quality()
+    history = mesh.odt_iterate(maxit=2)
+    assert mesh.cell_quality().mean() > q0.mean()
+    history = mesh.cpt_iterate()
+    assert len(history) == 1
+
+
+def test_odt_boundary_cell():
+    mesh = perturbed(TriangleMesh.from_unit_square(nx=8, ny=8), 0.03)
+    opt = MeshOptimizer(mesh, method='odt', update='jacobi')
+    # 只有带边界边的单元用重心，只含边界节点的单元仍然用外心
+    np.testing.assert_array_equal(opt.isBdCell, mesh.ds.boundary_cell_flag())
+
+    # 与原来的 odt_iterate 给出的新节点相同
+    node = mesh.entity('node')
+    cell = mesh.entity('cell')
+    cm = mesh.entity_measure('cell')
+    cc = mesh.circumcenter()
+    isBdCell = mesh.ds.boundary_cell_flag()
+    cc[isBdCell] = mesh.entity_barycenter('cell')[isBdCell]
+    NN = mesh.number_of_nodes()
+    p = np.zeros((NN, 2))
+    a = np.zeros(NN)
+    np.add.at(p, cell, np.broadcast_to((cm[:, None]*cc)[:, None], cell.shape + (2, )))
+    np.add.at(a, cell, np.broadcast_to(cm[:, None], cell.shape))
+    nodes = opt.groups[0][0]
+    d = opt._direction(node, *opt.groups[0])
+    np.testing.assert_allclose(node[nodes] + d, p[nodes]/a[nodes, None], atol=1e-12)
@@ -20,7 +20,38 @@ def test_init():
     print(mesh.node_data("pressure"))
 
 def test_neighbors():
-    pass
+    from scipy.spatial import cKDTree
+    from fealpy.mesh.node_set import cell_list_pairs
+
+    for GD, h in [(2, 0.05), (3, 0.12)]:
+        node = np.random.rand(2000, GD)
+        tree = cKDTree(node)
+        indptr, indices = cell_list_pairs(node, h)
+        nb = tree.query_ball_point(node, h)
+        for i in range(len(node)):
+            assert set(indices[indptr[i]:indptr[i+1]]) == set(nb[i]) - {i}
+
+        points = np.random.rand(100, GD)*1.2 - 0.1
+        indptr, indices = cell_list_pairs(node, h, points=points)
+        nb = tree.query_ball_point(points, h)
+        for i in range(len(points)):
+            assert set(indices[indptr[i]:indptr[i+1]]) == set(nb[i])
+
+def test_verlet_list():
+    from scipy.spatial import cKDTree
+
+    mesh = NodeSet(np.random.rand(2000, 2))
+    h = 0.05
+    velocity = np.random.rand(2000, 2) - 0.5
+    for k in range(10):
+        mesh.node += 0.002*velocity
+        indptr, indices = mesh.neighbor_list(h, skin=0.02)
+        i = np.repeat(np.arange(2000), np.diff(indptr))
+        d = np.sqrt(np.sum((mesh.node[i] - mesh.node[indices])**2, axis=-1))
+        assert np.all(d <= h)
+        assert len(indices) == 2*len(cKDTree(mesh.node).query_pairs(h))
+    # 每步的最大位移约 0.0014，缓冲层 0.02 可以用 7 步
+    assert mesh.verlet.nbuild == 2
 
 def test_node_data():
 
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from fealpy.mesh import TriangleMesh, TetrahedronMesh
+from fealpy.mesh.reordering import hilbert_index, hilbert_order, rcm_order
+from fealpy.functionspace import LagrangeFESpace
+from fealpy.fem import BilinearForm, ScalarDiffusionIntegrator
+
+
+def f(p):
+    x = p[..., 0]
+    y = p[..., 1]
+    return np.sin(3*x)*np.cos(2*y) + x*y
+
+
+def shuffled(mesh):
+    """
+    @brief 随机打乱节点和单元的编号
+    """
+    NN = mesh.number_of_nodes()
+    NC = mesh.number_of_cells()
+    mesh.reorder(np.random.permutation(NN), np.random.permutation(NC))
+    return mesh
+
+
+def bandwidth(A):
+    A = A.tocoo()
+    return np.max(np.abs(A.row - A.col))
+
+
+def test_hilbert():
+    # 2x2 网格上的一阶 Hilbert 曲线
+    points = np.array([[0, 0], [0, 1], [1, 1], [1, 0]], dtype=np.float64)
+    np.testing.assert_array_equal(hilbert_index(points, order=1), [0, 1, 2, 3])
+
+    # 网格点沿曲线相邻的两点也在网格上相邻
+    for GD in [2, 3]:
+        n = 8
+        x = np.stack(np.meshgrid(*(GD*[np.arange(n)]), indexing='ij'), axis=-1).reshape(-1, GD)
+        x = x[hilbert_order(x.astype(np.float64), order=3)]
+        np.testing.assert_array_equal(np.sum(np.abs(np.diff(x, axis=0)), axis=-1), 1)
+
+
+def test_reorder_mesh():
+    mesh = shuffled(TriangleMesh.from_unit_square(nx=10, ny=10))
+    mesh.celldata['bc'] = mesh.entity_barycenter('cell')
+    mesh.nodedata['x'] = mesh.entity('node').copy()
+    mesh.edgedata['bc'] = mesh.entity_barycenter('edge')
+    space = LagrangeFESpace(mesh, p=3)
+    uh = space.interpolate(f)
+    vh = space.interpolate(lambda p: np.stack([f(p), 2*f(p)], axis=-1), dim=2)
+
+    mesh.reorder_by_curve(functions=[uh, vh])
+    np.testing.assert_allclose(mesh.celldata['bc'], mesh.entity_barycenter('cell'))
+    np.testing.assert_allclose(mesh.nodedata['x'], mesh.entity('node'))
+    np.testing.assert_allclose(mesh.edgedata['bc'], mesh.entity_barycenter('edge'))
+    assert np.all(mesh.entity_measure('cell') > 0)
+    np.testing.assert_allclose(uh, space.interpolate(f), atol=1e-14)
+    np.testing.assert_allclose(vh[:, 1], 2*space.interpolate(f), atol=1e-14)
+
+    # 单元沿曲线排列后，相邻单元的编号接近
+    edge2cell = mesh.ds.edge_to_cell()
+    isIn = edge2cell[:, 0] != edge2cell[:, 1]
+    d = np.abs(edge2cell[isIn, 0] - edge2cell[isIn, 1])
+    assert np.median(d) < 10
+
+
+def test_reorder_dofs():
+    mesh = shuffled(TriangleMesh.from_unit_square(nx=10, ny=10))
+    space = LagrangeFESpace(mesh, p=2)
+    bform = BilinearForm(space)
+    bform.add_domain_integrator(ScalarDiffusionIntegrator(q=3))
+    A0 = bform.assembly()
+    uh = space.interpolate(f)
+    isBdDof = space.is_boundary_dof()
+
+    perm = space.reorder('rcm', functions=[uh])
+    np.testing.assert_allclose(uh, space.interpolate(f), atol=1e-14)
+    np.testing.assert_array_equal(space.is_boundary_dof(), isBdDof[perm])
+    np.testing.assert_allclose(space.interpolation_points()[:, 0] >= 0, True)
+    A = BilinearForm(space)
+    A.add_domain_integrator(ScalarDiffusionIntegrator(q=3))
+    A = A.assembly()
+    assert bandwidth(A) < bandwidth(A0)/5
+    np.testing.assert_allclose(A.toarray(), A0[perm][:, perm].toarray(), atol=1e-12)
+
+
+def test_reorder_tet():
+    mesh = TetrahedronMesh.from_box(nx=3, ny=3, nz=3)
+    mesh.facedata['bc'] = mesh.entity_barycenter('face')
+    mesh.edgedata['bc'] = mesh.entity_barycenter('edge')
+    space = LagrangeFESpace(mesh, p=2)
+    uh = space.interpolate(f)
+    shuffled(mesh)
+    mesh.reorder_by_curve()
+    np.testing.assert_allclose(mesh.facedata['bc'], mesh.entity_barycenter('face'))
+    np.testing.assert_allclose(mesh.edgedata['bc'], mesh.entity_barycenter('edge'))
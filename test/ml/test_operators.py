@@ -0,0 +1,116 @@
+import numpy as np
+import torch
+from torch import sin
+
+from fealpy.mesh import UniformMesh2d
+from fealpy.ml.modules import RandomFeatureSpace, PoUSpace, Cos, Sin, Tanh, PoUSin
+from fealpy.ml.sampler import Collocator
+from fealpy.ml.operators import (
+    ScalerDiffusion, ScalerConvection, ScalerMass, Integrator, Continuous0,
+    Continuous1, Form
+)
+
+PI = torch.pi
+
+
+def solution(p):
+    return sin(PI*p[:, 0:1]) * sin(PI*p[:, 1:2])
+
+def source(p):
+    # -\Delta u + (0.5, 0)\cdot\nabla u
+    ux = PI * torch.cos(PI*p[:, 0:1]) * sin(PI*p[:, 1:2])
+    return 2 * PI**2 * solution(p) + 0.5 * ux
+
+
+def pou_form(nx=4, nf=40, N=60):
+    torch.manual_seed(0)
+    mesh = UniformMesh2d((0, nx, 0, nx), (1/nx, 1/nx), origin=(0, 0))
+    space = PoUSpace.from_uniform_mesh(
+        lambda i: RandomFeatureSpace(2, nf, Cos(), bound=(1.0, PI)),
+        mesh, 'node', pou=PoUSin()
+    )
+    col_in = Collocator([0, 1, 0, 1], [N, N]).run()
+    col_bd = torch.cat([Collocator([0, 1, 0, 0], [N, 1]).run(),
+                        Collocator([0, 1, 1, 1], [N, 1]).run(),
+                        Collocator([0, 0, 0, 1], [1, N]).run(),
+                        Collocator([1, 1, 0, 1], [1, N]).run()], dim=0)
+    form = Form(space)
+    form.add(col_in, (ScalerDiffusion(), ScalerConvection([0.5, 0.0])), source)
+    form.add(col_bd, ScalerMass(coef=lambda p: 1 + p[:, 0:1]), solution)
+    return space, form
+
+
+def test_fused_basis():
+    torch.manual_seed(0)
+    p = torch.rand(50, 2, dtype=torch.float64)
+    orders = ('value', 'grad', 'hessian', 'laplace')
+
+    def check(space, p):
+        ref = {'value': space.basis(p), 'grad': space.grad_basis(p),
+               'hessian': space.hessian_basis(p), 'laplace': space.laplace_basis(p)}
+        for sub in (orders, ('laplace', ), ('grad', 'laplace')):
+            data = space.fused_basis(p, sub)
+            for order in sub:
+                torch.testing.assert_close(data[order], ref[order])
+
+    for act in (Sin(), Cos(), Tanh()):
+        check(RandomFeatureSpace(2, 20, act), p)
+
+    # 各向同性与各向异性的分片
+    for radius in ([0.5, 0.5], [0.3, 0.6]):
+        ctrs = torch.tensor([[0.25, 0.5], [0.75, 0.5]], dtype=torch.float64)
+        space = PoUSpace(lambda i: RandomFeatureSpace(2, 10, Cos()), ctrs,
+                         torch.tensor(radius, dtype=torch.float64), pou=PoUSin())
+        check(space.partitions[1], p)
+        data = space.fused_basis(p, ('value', 'laplace'))
+        torch.testing.assert_close(data['value'], space.basis(p))
+        torch.testing.assert_close(data['laplace'], space.laplace_basis(p))
+
+    # 缓存只在上下文中有效，并按样本点张量区分
+    space = RandomFeatureSpace(2, 20, Sin())
+    with space.basis_cache():
+        d1 = space.fused_basis(p, ('value', 'grad'))
+        d2 = space.fused_basis(p, ('grad', ))
+        assert d2['grad'] is d1['grad']
+        assert space.fused_basis(p.clone(), ('grad', ))['grad'] is not d1['grad']
+    assert space.fused_basis(p, ('grad', ))['grad'] is not d1['grad']
+
+
+def test_apply_sparse():
+    space, _ = pou_form(nf=10, N=20)
+    p = Collocator([0, 1, 0, 1], [20, 20]).run()
+    coef = torch.rand(p.shape[0], 2, dtype=torch.float64)
+    ops = [ScalerDiffusion(2.0), ScalerConvection(coef), ScalerMass(), Integrator()]
+    for op in ops:
+        dense = op.apply(p, space)
+        sparse = op.apply_sparse(p, space).to_dense()
+        torch.testing.assert_close(sparse, dense)
+
+    # 两个分片之间的连续性条件
+    ctrs = torch.tensor([[0.25, 0.5], [0.75, 0.5]], dtype=torch.float64)
+    space = PoUSpace(lambda i: RandomFeatureSpace(2, 8, Cos()), ctrs, 0.25)
+    p = torch.stack((torch.full((10, ), 0.5, dtype=torch.float64),
+                     torch.linspace(0.3, 0.7, 10, dtype=torch.float64)), dim=-1)[:, None, :]
+    sub2part = torch.tensor([[0, 1]])
+    normal = torch.tensor([[1.0, 0.0]], dtype=torch.float64)
+    for op in [Continuous0(sub2part), Continuous1(sub2part, normal)]:
+        torch.testing.assert_close(op.apply_sparse(p, space).to_dense(), op.apply(p, space))
+
+
+def test_block_sparse_assembly():
+    _, form = pou_form()
+    A, b = form.assembly(return_sparse=False)
+    As, bs = form.assembly(block_sparse=True, batch_size=500)
+    np.testing.assert_allclose(As.toarray(), A.numpy(), atol=1e-10*np.abs(A.numpy()).max())
+    np.testing.assert_allclose(bs.toarray(), b.numpy(), atol=1e-10)
+    # 只有相邻分片之间有非零块
+    assert As.nnz < 0.3 * np.prod(As.shape)
+
+
+def test_solve():
+    _, form = pou_form()
+    p = Collocator([0, 1, 0, 1], [30, 30]).run()
+    u = form.spsolve(rescale=100, ridge=1e-8, block_sparse=True, batch_size=500)
+    assert torch.max(torch.abs(u(p) - solution(p))) < 1e-5
+    u = form.lsqr(rescale=100, batch_size=500, iter_lim=20000)
+    assert torch.max(torch.abs(u(p) - solution(p))) < 1e-3
@@ -72,3 +72,64 @@ class TestSimple():
         assert out.shape == (1000, 2)
         _valified_range(out[:, 0], 0, 1)
         _valified_range(out[:, 1], 1, 2)
+
+
+class TestStream():
+    def test_seed(self):
+        s1 = ISampler([[0, 1], [1, 3]], seed=42)
+        s2 = ISampler([[0, 1], [1, 3]], seed=42)
+        for a, b in zip(s1.load(20, epoch=3), s2.load(20, epoch=3)):
+            assert torch.equal(a, b)
+
+        s1 = BoxBoundarySampler([0, 0], [1, 1], seed=7)
+        s2 = BoxBoundarySampler([0, 0], [1, 1], seed=7)
+        assert torch.equal(s1.run(10), s2.run(10))
+
+
+    def test_prefetch(self):
+        from fealpy.mesh import TriangleMesh
+
+        mesh = TriangleMesh.from_box([0, 2, 0, 3], nx=10, ny=10)
+        s1 = MeshSampler(mesh, 'cell', seed=3)
+        s2 = MeshSampler(mesh, 'cell', seed=3)
+        out1 = list(s1.load(5, epoch=4))
+        node = torch.from_numpy(mesh.entity('node'))
+        cell = torch.from_numpy(mesh.entity('cell'))
+        out2 = []
+        for b in s2.load(5, epoch=4, prefetch=2):
+            # NOTE: bcs belongs to this batch, not the one prefetched after it.
+            val = torch.einsum('...j, ijk->...ik', s2.bcs, node[cell]).reshape(-1, 2)
+            torch.testing.assert_close(b, val)
+            out2.append(b)
+        assert len(out2) == 4
+        for a, b in zip(out1, out2):
+            assert torch.equal(a, b)
+
+
+    def test_prefetch_error(self):
+        from fealpy.ml.sampler import Prefetcher
+        import pytest
+
+        def func(n):
+            raise RuntimeError("failed")
+
+        with pytest.raises(RuntimeError):
+            list(Prefetcher(None, 10, epoch=2, func=func))
+
+
+    def test_collocator(self):
+        from fealpy.ml.sampler import Collocator
+
+        s = Collocator([0, 1, 0, 2], [3, 5])
+        out = s.run()
+        assert out.shape == (15, 2)
+        out2 = s.run()
+        assert out2 is not out
+        assert torch.equal(out2, out)
+        out2 += 1
+        assert torch.equal(s.run(), out)
+
+        s = Collocator([0, 1, 0, 2], [3, 5], requires_grad=True)
+        out = s.run()
+        assert out.requires_grad
+        assert out is not s.run()
@@ -0,0 +1,105 @@
+import os
+import sys
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from fealpy.mesh import TriangleMesh
+from fealpy.functionspace import LagrangeFESpace
+from fealpy.fem import BilinearForm, LinearForm
+from fealpy.fem import ScalarDiffusionIntegrator, ScalarSourceIntegrator
+from fealpy.parallel import ParallelMesh, ParallelFESpace, ParallelCGSolver
+from fealpy.parallel.parallel_mesh import coordinate_bisection
+from fealpy.solver.preconditioner import pyamg
+
+try:
+    from mpi4py import MPI
+except ImportError:
+    MPI = None
+
+
+def source(p):
+    x = p[..., 0]
+    y = p[..., 1]
+    return 2*np.pi**2*np.sin(np.pi*x)*np.sin(np.pi*y)
+
+def dirichlet(p):
+    return np.zeros(p.shape[:-1])
+
+
+def solve(comm, ns=16, p=2, M='jacobi'):
+    mesh = TriangleMesh.from_unit_square(nx=ns, ny=ns) if comm.Get_rank() == 0 else None
+    pmesh = ParallelMesh(comm, mesh)
+    pspace = ParallelFESpace(pmesh, LagrangeFESpace, p=p)
+
+    bform = BilinearForm(pspace.space)
+    bform.add_domain_integrator(ScalarDiffusionIntegrator(q=p+2))
+    lform = LinearForm(pspace.space)
+    lform.add_domain_integrator(ScalarSourceIntegrator(source, q=p+2))
+    A = pspace.assemble(bform)
+    F = pspace.assemble(lform)
+    A, F = pspace.apply_dirichlet(A, F, dirichlet)
+
+    x, info = ParallelCGSolver(A, M=M, rtol=1e-10).solve(F)
+    assert info.success
+    return pspace.gather(x), mesh, info
+
+
+def serial(mesh, p=2):
+    from scipy.sparse.linalg import spsolve
+    space = LagrangeFESpace(mesh, p=p)
+    bform = BilinearForm(space)
+    bform.add_domain_integrator(ScalarDiffusionIntegrator(q=p+2))
+    lform = LinearForm(space)
+    lform.add_domain_integrator(ScalarSourceIntegrator(source, q=p+2))
+    A = bform.assembly()
+    F = lform.assembly()
+    # 齐次 Dirichlet 边界条件，只在内部自由度上求解
+    isFree = ~space.is_boundary_dof()
+    uh = np.zeros(len(F))
+    uh[isFree] = spsolve(A[isFree][:, isFree].tocsc(), F[isFree])
+    return uh
+
+
+def test_coordinate_bisection():
+    points = np.random.rand(1000, 2)
+    parts = coordinate_bisection(points, 3)
+    np.testing.assert_array_equal(np.bincount(parts), [333, 333, 334])
+
+
+@pytest.mark.skipif(MPI is None, reason="needs mpi4py")
+def test_single_process():
+    uh, mesh, _ = solve(MPI.COMM_WORLD, ns=8)
+    np.testing.assert_allclose(uh, serial(mesh), atol=1e-8)
+
+
+@pytest.mark.skipif((MPI is None) or (shutil.which('mpirun') is None),
+        reason="needs mpi4py and mpirun")
+def test_mpirun():
+    cmd = ['mpirun', '-n', '3', '--oversubscribe', sys.executable, __file__]
+    if os.geteuid() == 0:
+        cmd.insert(1, '--allow-run-as-root')
+    # 当前进程的 MPI 初始化会在 C 层设置 OMPI_* 环境变量，使子进程中的 mpirun
+    # 失败，所以显式传入启动时的环境变量。子进程从 test/parallel 启动，要把
+    # 仓库根目录加到 PYTHONPATH 里才能导入 fealpy
+    env = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env['PYTHONPATH'] = os.pathsep.join(
+            [root] + [p for p in [env.get('PYTHONPATH')] if p])
+    ret = subprocess.run(cmd, capture_output=True, text=True, timeout=300,
+            env=env)
+    assert ret.returncode == 0, ret.stderr
+    assert 'OK' in ret.stdout
+
+
+if __name__ == '__main__':
+    # mpirun -n 3 python test_parallel_solver.py
+    comm = MPI.COMM_WORLD
+    # pyamg 是可选依赖，没有安装时只测 Jacobi 预条件
+    for M in ['jacobi'] + (['amg'] if pyamg is not None else []):
+        uh, mesh, info = solve(comm, M=M)
+        if comm.Get_rank() == 0:
+            np.testing.assert_allclose(uh, serial(mesh), atol=1e-8)
+            print('OK', M, info.niter)
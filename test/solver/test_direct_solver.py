@@ -0,0 +1,63 @@
+import numpy as np
+import scipy.sparse as sp
+import pytest
+
+from fealpy.solver import DirectSolver, FactorizationCache
+from fealpy.solver.direct_solver import matrix_hash, pypardiso
+
+
+def laplace_matrix(n):
+    T = sp.diags([-1, 2, -1], [-1, 0, 1], shape=(n, n), dtype=np.float64)
+    I = sp.identity(n)
+    return (sp.kron(I, T) + sp.kron(T, I)).tocsr()
+
+
+methods = ['superlu'] + (['pardiso'] if pypardiso is not None else [])
+
+@pytest.mark.parametrize("method", methods)
+def test_solve(method):
+    A = laplace_matrix(20) + sp.diags(np.linspace(0, 1, 400))
+    x = np.random.rand(400, 3)
+    b = A@x
+
+    solver = DirectSolver(A, method=method)
+    np.testing.assert_allclose(solver.solve(b[:, 0]), x[:, 0], rtol=1e-10)
+    np.testing.assert_allclose(solver.solve(b), x, rtol=1e-10)
+    assert solver.nfactor == 1
+
+    # 值不变时不重新分解
+    solver.factorize(A.copy())
+    assert solver.nfactor == 1
+
+    # 只改变值时重用符号分析
+    A1 = A.copy()
+    A1.data *= 2
+    solver.factorize(A1)
+    assert solver.nfactor == 2
+    assert solver.nsymbolic == 1
+    np.testing.assert_allclose(solver.solve(2*b), x, rtol=1e-10)
+
+
+def test_factorization_cache():
+    A = laplace_matrix(10)
+    B = A + sp.identity(100, format='csr')
+    b = np.ones(100)
+
+    cache = FactorizationCache(maxsize=2)
+    s0 = cache.get(A)
+    assert cache.get(A.copy()) is s0
+    np.testing.assert_allclose(A@cache.solve(A, b), b)
+
+    cache.get(B)
+    assert len(cache) == 2
+    cache.get(2*B)
+    assert len(cache) == 2
+    assert matrix_hash(A) not in cache.solvers
+
+    # 按名字取出时，值改变会重新做数值分解
+    s1 = cache.get(A, key='A')
+    s2 = cache.get(3*A, key='A')
+    assert s1 is s2
+    assert s1.nfactor == 2
+    assert s1.nsymbolic == 1
+    np.testing.assert_allclose(3*A@s1.solve(b), b)
@@ -0,0 +1,110 @@
+import numpy as np
+import scipy.sparse as sp
+import pytest
+
+from fealpy.solver import (CGSolver, MINRESSolver, GMRESSolver, BiCGStabSolver,
+        FCGSolver, DeflationSpace, DirectSolver, krylov_solve)
+from fealpy.solver.preconditioner import pyamg
+
+
+def laplace_matrix(n):
+    T = sp.diags([-1, 2, -1], [-1, 0, 1], shape=(n, n), dtype=np.float64)
+    I = sp.identity(n)
+    return (sp.kron(I, T) + sp.kron(T, I)).tocsr()
+
+
+@pytest.mark.parametrize("method", ['cg', 'minres', 'gmres', 'fgmres', 'bicgstab', 'fcg'])
+def test_solve(method):
+    A = laplace_matrix(16)
+    x = np.random.rand(256, 3)
+    b = A@x
+
+    # 一维右端
+    x0, info = krylov_solve(A, b[:, 0], method=method, rtol=1e-10, maxiter=2000)
+    assert info.success
+    assert info.history.shape == (info.niter+1, )
+    np.testing.assert_allclose(x0, x[:, 0], atol=1e-6)
+
+    # 多列右端，每一列各自收敛
+    X, info = krylov_solve(A, b, method=method, rtol=1e-10, maxiter=2000)
+    assert info.success
+    assert info.history.shape == (info.niter+1, 3)
+    assert np.all(info.iterations <= info.niter)
+    np.testing.assert_allclose(X, x, atol=1e-6)
+
+
+def test_nonsymmetric():
+    A = laplace_matrix(16) + 0.3*sp.diags([-1, 1], [-1, 1], shape=(256, 256))
+    b = np.ones(256)
+    for Solver in [GMRESSolver, BiCGStabSolver]:
+        x, info = Solver(A, M='ilu', rtol=1e-10).solve(b)
+        assert info.success
+        assert np.linalg.norm(A@x - b) <= 1e-9*np.linalg.norm(b)
+
+
+@pytest.mark.parametrize("flexible", [False, True])
+def test_complex_gmres(flexible):
+    # 复的非对称矩阵，Givens 旋转要用复数形式
+    A = (laplace_matrix(16) + 0.3j*sp.diags([-1, 1], [-1, 1], shape=(256, 256))
+            + 0.5j*sp.identity(256)).tocsr()
+    x = np.random.rand(256, 2) + 1j*np.random.rand(256, 2)
+    b = A@x
+    X, info = GMRESSolver(A, restart=20, flexible=flexible, rtol=1e-10,
+            maxiter=2000).solve(b)
+    assert info.success
+    np.testing.assert_allclose(X, x, atol=1e-7)
+
+
+def test_indefinite():
+    # 对称不定矩阵用 MINRES
+    A = (laplace_matrix(16) - 0.5*sp.identity(256)).tocsr()
+    b = np.ones(256)
+    x, info = MINRESSolver(A, rtol=1e-10, maxiter=2000).solve(b)
+    assert info.success
+    assert np.linalg.norm(A@x - b) <= 1e-8*np.linalg.norm(b)
+
+
+preconditioners = ['jacobi', 'ilu'] + (['amg'] if pyamg is not None else [])
+
+@pytest.mark.parametrize("M", preconditioners)
+def test_preconditioner(M):
+    A = laplace_matrix(32)
+    b = np.ones((1024, 2))
+    _, info0 = CGSolver(A, rtol=1e-8).solve(b)
+    _, info = CGSolver(A, M=M, rtol=1e-8).solve(b)
+    assert info.success
+    if M != 'jacobi': # Laplace 矩阵的对角线是常数
+        assert info.niter < info0.niter
+
+
+def test_callable_preconditioner():
+    A = laplace_matrix(16)
+    b = np.ones(256)
+    # 直接解法器作为预条件子，一步收敛
+    _, info = CGSolver(A, M=DirectSolver(A), rtol=1e-10).solve(b)
+    assert info.niter <= 2
+    # 带变化的预条件子用 FCG
+    _, info = FCGSolver(A, M=lambda r: r/4, rtol=1e-10).solve(b)
+    assert info.success
+
+    history = []
+    CGSolver(A, callback=lambda info: history.append(info.niter)).solve(b)
+    assert history == list(range(len(history)))
+
+
+def test_deflation():
+    # 时间步进：矩阵不变，右端变化，回收的子空间减少迭代步数
+    A = laplace_matrix(32)
+    solver = CGSolver(A, deflation=DeflationSpace(k=8), rtol=1e-8)
+    b = np.random.rand(1024)
+    x, info0 = solver.solve(b)
+    assert info0.success
+    assert solver.deflation.W.shape == (1024, 8)
+    for i in range(3):
+        x0 = x
+        b = b + 0.1*np.random.rand(1024)
+        x, info = solver.solve(b, x0=x0)
+        assert info.success
+        np.testing.assert_allclose(A@x, b, atol=1e-6)
+    _, info1 = CGSolver(A, rtol=1e-8).solve(b, x0=x0)
+    assert info.niter < info1.niter
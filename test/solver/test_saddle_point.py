@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from fealpy.mesh import TriangleMesh
+from fealpy.functionspace import LagrangeFESpace
+from fealpy.fem import BilinearForm, MixedBilinearForm
+from fealpy.fem import VectorDiffusionIntegrator, PressWorkIntegrator, ScalarMassIntegrator
+from fealpy.solver import DirectSolver, SaddlePointSystem
+from fealpy.solver.preconditioner import pyamg
+
+
+def stokes(ns):
+    """
+    @brief 单位正方形上 P2-P1 Taylor-Hood 元的 Stokes 问题，速度在边界上为 0
+    """
+    mesh = TriangleMesh.from_unit_square(nx=ns, ny=ns)
+    uspace = LagrangeFESpace(mesh, p=2, doforder='sdofs')
+    pspace = LagrangeFESpace(mesh, p=1, doforder='sdofs')
+
+    A = BilinearForm(2*(uspace, ))
+    A.add_domain_integrator(VectorDiffusionIntegrator())
+    A = A.assembly()
+    # (p, div v) 的形状为 (nu, np)，SaddlePointSystem 会自动转置
+    D = MixedBilinearForm((pspace, ), 2*(uspace, ))
+    D.add_domain_integrator(PressWorkIntegrator())
+    D = D.assembly()
+    M = BilinearForm(pspace)
+    M.add_domain_integrator(ScalarMassIntegrator())
+    M = M.assembly()
+
+    isBdDof = uspace.is_boundary_dof()
+    free = np.r_[~isBdDof, ~isBdDof]
+    return A[free][:, free], -D[free], M
+
+
+def test_system():
+    A, B, Mp = stokes(4)
+    S = SaddlePointSystem(A, B, C=1e-2*Mp)
+    assert S.B.shape == (Mp.shape[0], A.shape[0])
+    x = np.random.rand(S.shape[0], 2)
+    np.testing.assert_allclose(S@x, S.tocsr()@x)
+    np.testing.assert_allclose(S@x[:, 0], S.tocsr()@x[:, 0])
+
+
+@pytest.mark.parametrize("kind", ['diagonal', 'triangular'])
+def test_mesh_independent(kind):
+    niter = []
+    for ns in [8, 16]:
+        A, B, Mp = stokes(ns)
+        S = SaddlePointSystem(A, B)
+        f = np.ones(A.shape[0])
+        P = S.preconditioner(kind, velocity=DirectSolver(A), schur='mass-direct', Mp=Mp)
+        u, p, info = S.solve(f, M=P, rtol=1e-8)
+        assert info.success
+        assert info.method == ('minres' if kind == 'diagonal' else 'gmres')
+        r = S@np.r_[u, p]
+        r[:len(u)] -= f
+        assert np.linalg.norm(r) < 1e-6*np.linalg.norm(f)
+        niter.append(info.niter)
+    # 精确的块预条件子下迭代步数与网格尺寸无关
+    assert niter[1] <= niter[0] + 5
+
+
+@pytest.mark.skipif(pyamg is None, reason="needs pyamg")
+@pytest.mark.parametrize("kind, schur", [('diagonal', 'mass'), ('triangular', 'mass'), ('triangular', 'lsc')])
+def test_amg(kind, schur):
+    A, B, Mp = stokes(8)
+    S = SaddlePointSystem(A, B)
+    f = np.ones(A.shape[0])
+    g = np.zeros(Mp.shape[0])
+    P = S.preconditioner(kind, schur=schur, Mp=Mp)
+    u, p, info = S.solve(f, g, M=P, rtol=1e-8, maxiter=500)
+    assert info.success
+    assert info.niter < 100
@@ -0,0 +1,81 @@
+import numpy as np
+import scipy.sparse as sp
+import pytest
+
+from fealpy.mesh import TriangleMesh
+from fealpy.functionspace import LagrangeFESpace
+from fealpy.solver import CGSolver, GMRESSolver
+from fealpy.solver.schwarz import SchwarzPreconditioner, space_partition, overlap_subdomains
+from fealpy.parallel.parallel_mesh import coordinate_bisection
+
+
+def laplace_matrix(n):
+    T = sp.diags([-1, 2, -1], [-1, 0, 1], shape=(n, n), dtype=np.float64)
+    I = sp.identity(n)
+    return (sp.kron(I, T) + sp.kron(T, I)).tocsr()
+
+def grid_parts(n, nparts):
+    x, y = np.meshgrid(np.arange(n), np.arange(n), indexing='ij')
+    return coordinate_bisection(np.c_[y.reshape(-1), x.reshape(-1)], nparts)
+
+
+def test_space_partition():
+    mesh = TriangleMesh.from_unit_square(nx=8, ny=8)
+    space = LagrangeFESpace(mesh, p=2)
+    parts = space_partition(space, nparts=4)
+    assert parts.shape == (space.number_of_global_dofs(), )
+    assert set(parts) == {0, 1, 2, 3}
+
+
+def test_overlap():
+    A = laplace_matrix(8)
+    parts = grid_parts(8, 2)
+    sub = overlap_subdomains(A, parts, overlap=2)
+    # 5 点格式每层向外扩展一行
+    assert [len(s) for s in sub] == [48, 48]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_schwarz(processes):
+    n = 32
+    A = laplace_matrix(n)
+    parts = grid_parts(n, 4)
+    b = np.ones((n*n, 2))
+    with SchwarzPreconditioner(A, parts, overlap=2, restricted=False, processes=processes) as M:
+        x, info = CGSolver(A, M=M, rtol=1e-10).solve(b)
+        assert info.success
+        np.testing.assert_allclose(A@x, b, atol=1e-7)
+        # 多进程与单进程的结果相同
+        z = M(b[:, 0])
+    M = SchwarzPreconditioner(A, parts, overlap=2, restricted=False, processes=1)
+    np.testing.assert_allclose(z, M(b[:, 0]), rtol=1e-12)
+
+
+def test_coarse():
+    # 子区域很多时粗空间才明显减少迭代步数
+    n = 128
+    A = laplace_matrix(n)
+    parts = grid_parts(n, 256)
+    b = np.ones(n*n)
+    niter = []
+    for coarse in [None, 'nicolaides']:
+        M = SchwarzPreconditioner(A, parts, overlap=2, restricted=False, coarse=coarse, processes=1)
+        _, info = CGSolver(A, M=M, rtol=1e-8).solve(b)
+        assert info.success
+        niter.append(info.niter)
+    assert niter[1] < 0.8*niter[0]
+
+
+def test_ras():
+    # 对流占优的非对称问题用 RAS + GMRES
+    n = 32
+    C = sp.diags([-1, 1], [-1, 0], shape=(n, n))
+    I = sp.identity(n)
+    A = (laplace_matrix(n) + 20*sp.kron(I, C)).tocsr()
+    parts = grid_parts(n, 4)
+    b = np.ones(n*n)
+    M = SchwarzPreconditioner(A, parts, overlap=1, restricted=True, coarse='nicolaides', processes=1)
+    x, info = GMRESSolver(A, M=M, rtol=1e-10).solve(b)
+    assert info.success
+    _, info0 = GMRESSolver(A, rtol=1e-10).solve(b)
+    assert info.niter < info0.niter/4
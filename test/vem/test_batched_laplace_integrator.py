@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from fealpy.functionspace import ConformingScalarVESpace2d
+
+from fealpy.vem import ScaledMonomialSpaceMassIntegrator2d
+from fealpy.vem import ConformingVEMDoFIntegrator2d
+from fealpy.vem import ConformingScalarVEMH1Projector2d
+from fealpy.vem import ConformingScalarVEMLaplaceIntegrator2d
+from fealpy.vem import BatchedConformingScalarVEMLaplaceIntegrator2d
+from fealpy.vem import BilinearForm
+
+from fealpy.mesh import TriangleMesh
+from fealpy.mesh import PolygonMesh
+
+
+@pytest.mark.parametrize("p", [1, 2, 3])
+def test_batched_assembly(p):
+    tmesh = TriangleMesh.from_box([0, 1, 0, 1], nx=4, ny=4)
+    mesh = PolygonMesh.from_triangle_mesh_by_dual(tmesh)
+    space = ConformingScalarVESpace2d(mesh, p=p)
+
+    M = ScaledMonomialSpaceMassIntegrator2d().assembly_cell_matrix(space.smspace)
+    D = ConformingVEMDoFIntegrator2d().assembly_cell_matrix(space, M)
+    projector = ConformingScalarVEMH1Projector2d(D)
+    PI1 = projector.assembly_cell_matrix(space)
+
+    a = BilinearForm(space)
+    a.add_domain_integrator(ConformingScalarVEMLaplaceIntegrator2d(PI1, projector.G, D))
+    A0 = a.assembly()
+
+    integrator = BatchedConformingScalarVEMLaplaceIntegrator2d(M=M)
+    b = BilinearForm(space)
+    b.add_domain_integrator(integrator)
+    A1 = b.assembly()
+
+    assert np.abs(A0 - A1).max() < 1e-10
+
+    for nv, (index, pi1) in integrator.PI1.items():
+        for i, c in enumerate(index):
+            assert np.allclose(pi1[i], PI1[c])